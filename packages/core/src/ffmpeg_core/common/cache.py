@@ -1,13 +1,62 @@
 """Cache utilities for FFmpeg operations."""
 
+import hashlib
+import io
+import logging
+import pickle
 import sys
+from dataclasses import fields, is_dataclass
+from enum import Enum
+from itertools import pairwise
 from pathlib import Path
-from typing import TypeVar
+from typing import Any, TypeVar
 
-from .serialize import dumps, loads
+from ..utils.frozendict import FrozenDict
+from .serialize import CLASS_REGISTRY, dumps, load_class, loads
+
+logger = logging.getLogger(__name__)
 
 T = TypeVar("T")
 
+SNAPSHOT_VERSION = 1
+"""
+Version of the binary snapshot format; snapshots of other versions are ignored.
+"""
+
+_SNAPSHOT_GLOBALS = frozenset(
+    {
+        ("ffmpeg_core.common.cache", "_restore"),
+        ("ffmpeg_core.common.cache", "_restore_enum"),
+        ("ffmpeg_core.utils.frozendict", "FrozenDict"),
+        ("copyreg", "_reconstructor"),
+        ("builtins", "object"),
+        ("builtins", "dict"),
+        ("builtins", "list"),
+        ("builtins", "tuple"),
+        ("builtins", "set"),
+        ("builtins", "frozenset"),
+    }
+)
+"""
+The globals a snapshot record may reference, as (module, name) pairs; registered
+classes are pickled by name, through `_restore` and `_restore_enum`.
+"""
+
+_loaded: dict[tuple[str, str], Any] = {}
+"""
+Objects decoded by `load`, keyed by class name and id.
+"""
+
+_indexes: dict[tuple[str, str], FrozenDict[str, Any]] = {}
+"""
+Name-keyed indexes built by `load_index`, keyed by class name and id.
+"""
+
+_snapshot_headers: dict[Path, dict[str, Any]] = {}
+"""
+Headers of the binary snapshots read so far, keyed by snapshot path.
+"""
+
 
 def get_cache_path() -> Path:
     """
@@ -63,6 +112,10 @@ def load(cls: type[T], id: str) -> T:
     installed ffmpeg-data-vN package. Raises FileNotFoundError with installation
     instructions if the data is not available.
 
+    The decoded object is memoized for the lifetime of the process (see
+    `invalidate`); lists are returned as shallow copies so callers can modify
+    them without affecting later loads.
+
     Args:
         cls: The class of the object
         id: The id of the object
@@ -73,6 +126,32 @@ def load(cls: type[T], id: str) -> T:
     Raises:
         FileNotFoundError: If the cache file is not found and no data package is installed.
 
+    """
+    key = (cls.__name__, id)
+    if key not in _loaded:
+        _loaded[key] = _load(cls, id)
+
+    obj = _loaded[key]
+    if isinstance(obj, list):
+        return list(obj)  # type: ignore[return-value]
+    return obj
+
+
+def _resolve_path(cls: type[Any], id: str) -> Path:
+    """
+    Find the JSON file of a cached object.
+
+    Args:
+        cls: The class of the object
+        id: The id of the object
+
+    Returns:
+        The path in the local cache, or in the installed data package if only
+        that one exists
+
+    Raises:
+        FileNotFoundError: If the cache file is not found and no data package is installed.
+
     """
     path = cache_path / f"{cls.__name__}/{id}.json"
 
@@ -83,19 +162,325 @@ def load(cls: type[T], id: str) -> T:
             if data_path.exists():
                 path = data_path
 
-    try:
-        with path.open() as ifile:
-            obj = loads(ifile.read())
-            return obj
-    except FileNotFoundError:
+    if not path.exists():
         raise FileNotFoundError(
             f"Cache file not found: {cls.__name__}/{id}.json. "
             "Install the parse extra for CLI parsing and Python compilation support: "
             "pip install typed-ffmpeg[parse]"
-        ) from None
+        )
+    return path
 
 
-def save(obj: T, id: str) -> None:
+def _load(cls: type[T], id: str) -> T:
+    """
+    Read and decode an object from the cache, bypassing the memoized objects.
+
+    The binary snapshot next to the JSON file is preferred if there is a usable one.
+
+    Args:
+        cls: The class of the object
+        id: The id of the object
+
+    Returns:
+        The loaded object
+
+    Raises:
+        FileNotFoundError: If the cache file is not found and no data package is installed.
+
+    """
+    path = _resolve_path(cls, id)
+
+    header = _read_snapshot_header(path)
+    if header is not None:
+        with path.with_suffix(".pickle").open("rb") as ifile:
+            ifile.seek(header["start"])
+            records = memoryview(ifile.read())
+        try:
+            return [  # type: ignore[return-value]
+                _SnapshotUnpickler(io.BytesIO(records[start:end])).load()
+                for start, end in pairwise(header["offsets"])
+            ]
+        except (pickle.UnpicklingError, EOFError, AssertionError) as e:
+            logger.warning(f"Ignoring unreadable cache snapshot of {path}: {e}")
+
+    with path.open() as ifile:
+        return loads(ifile.read())
+
+
+def _restore(name: str, state: dict[str, Any]) -> Any:
+    """
+    Rebuild a serializable object from a snapshot record.
+
+    Args:
+        name: The registered class name of the object
+        state: The object's field values
+
+    Returns:
+        The object
+
+    """
+    obj = object.__new__(load_class(name))
+    obj.__dict__.update(state)
+    return obj
+
+
+def _restore_enum(name: str, value: Any) -> Enum:
+    """
+    Rebuild an enum member from a snapshot record.
+
+    Args:
+        name: The registered class name of the enum
+        value: The member's value
+
+    Returns:
+        The enum member
+
+    """
+    return load_class(name)(value)  # type: ignore[return-value]
+
+
+class _SnapshotPickler(pickle.Pickler):
+    """
+    Pickle registered classes by name, the same way as the JSON cache files.
+
+    Code generation registers its own variants of some schema classes, so pickling
+    them by module would make snapshots unusable where those are not installed.
+    """
+
+    def reducer_override(self, obj: Any) -> Any:
+        """
+        Reduce registered dataclasses and enums to their class name and values.
+
+        Args:
+            obj: The object to pickle
+
+        Returns:
+            The reduction, or NotImplemented to pickle the object normally
+
+        """
+        cls = type(obj)
+        if CLASS_REGISTRY.get(cls.__name__) is not cls:
+            return NotImplemented
+        if isinstance(obj, Enum):
+            return _restore_enum, (cls.__name__, obj.value)
+        if is_dataclass(obj):
+            return _restore, (
+                cls.__name__,
+                {f.name: getattr(obj, f.name) for f in fields(obj)},
+            )
+        return NotImplemented
+
+
+class _SnapshotUnpickler(pickle.Unpickler):
+    """Unpickle snapshot records, refusing any global not in `_SNAPSHOT_GLOBALS`."""
+
+    def find_class(self, module: str, name: str) -> Any:
+        """
+        Resolve a global referenced by a record.
+
+        Args:
+            module: The module of the global
+            name: The name of the global
+
+        Returns:
+            The global
+
+        Raises:
+            UnpicklingError: If the global is not one that snapshots use
+
+        """
+        if (module, name) not in _SNAPSHOT_GLOBALS:
+            raise pickle.UnpicklingError(
+                f"Unexpected global in snapshot: {module}.{name}"
+            )
+        return super().find_class(module, name)
+
+
+def _read_snapshot_header(path: Path) -> dict[str, Any] | None:
+    """
+    Read the header of the binary snapshot of a JSON cache file.
+
+    Args:
+        path: The JSON file of the cached list
+
+    Returns:
+        The header, with the position of the first record added as ``start``, or
+        None if there is no snapshot, or it was written by another format version or
+        from other JSON content
+
+    """
+    snapshot_path = path.with_suffix(".pickle")
+    if snapshot_path in _snapshot_headers:
+        return _snapshot_headers[snapshot_path]
+
+    try:
+        with snapshot_path.open("rb") as ifile:
+            header = _SnapshotUnpickler(ifile).load()
+            start = ifile.tell()
+    except FileNotFoundError:
+        return None
+    except (pickle.UnpicklingError, EOFError) as e:
+        logger.warning(f"Ignoring unreadable cache snapshot {snapshot_path}: {e}")
+        return None
+
+    if not isinstance(header, dict) or header.get("version") != SNAPSHOT_VERSION:
+        logger.warning(
+            f"Ignoring cache snapshot {snapshot_path} of another format version"
+        )
+        return None
+
+    if header["digest"] != hashlib.sha256(path.read_bytes()).hexdigest():
+        logger.warning(f"Ignoring outdated cache snapshot {snapshot_path}")
+        return None
+
+    _snapshot_headers[snapshot_path] = header | {"start": start}
+    return _snapshot_headers[snapshot_path]
+
+
+def snapshot(path: Path) -> Path:
+    """
+    Write the binary snapshot of a cached list next to its JSON file.
+
+    A snapshot stores each element as a separate pickle record, preceded by a
+    header with the format version, the digest of the JSON file, the element names
+    and the record offsets, so a single element can be decoded without decoding
+    the rest (see `load_item`). Snapshots whose digest no longer matches the JSON
+    file are ignored.
+
+    Args:
+        path: The JSON file of the cached list
+
+    Returns:
+        The path of the snapshot
+
+    Raises:
+        ValueError: If the file does not contain a list
+
+    """
+    content = path.read_bytes()
+    objs = loads(content.decode())
+
+    if not isinstance(objs, list):
+        raise ValueError(f"Only cached lists can be snapshotted: {path}")
+
+    records = []
+    for obj in objs:
+        buffer = io.BytesIO()
+        _SnapshotPickler(buffer, protocol=pickle.HIGHEST_PROTOCOL).dump(obj)
+        records.append(buffer.getvalue())
+    offsets = [0]
+    for record in records:
+        offsets.append(offsets[-1] + len(record))
+
+    header = {
+        "version": SNAPSHOT_VERSION,
+        "digest": hashlib.sha256(content).hexdigest(),
+        "names": tuple(getattr(obj, "name", None) for obj in objs),
+        "offsets": tuple(offsets),
+    }
+
+    snapshot_path = path.with_suffix(".pickle")
+    with snapshot_path.open("wb") as ofile:
+        pickle.dump(header, ofile, protocol=pickle.HIGHEST_PROTOCOL)
+        for record in records:
+            ofile.write(record)
+
+    _snapshot_headers.pop(snapshot_path, None)
+    return snapshot_path
+
+
+def load_index(cls: type[list[T]], id: str) -> FrozenDict[str, T]:
+    """
+    Load a list of named objects from the cache, indexed by name.
+
+    The index is built once per process (see `invalidate`), so lookups by name
+    are O(1) after the first call.
+
+    Args:
+        cls: The list class of the objects, e.g. ``list[FFMpegFilter]``
+        id: The id of the list
+
+    Returns:
+        A mapping from each object's ``name`` to the object. When several
+        objects share a name, the first one is kept.
+
+    Raises:
+        FileNotFoundError: If the cache file is not found and no data package is installed.
+
+    """
+    key = (cls.__name__, id)
+    if key not in _indexes:
+        index: dict[str, T] = {}
+        for obj in load(cls, id):
+            index.setdefault(obj.name, obj)  # type: ignore[attr-defined]
+        _indexes[key] = FrozenDict(index)
+
+    return _indexes[key]
+
+
+def load_item(cls: type[list[T]], id: str, name: str) -> T:
+    """
+    Load one named object of a cached list.
+
+    If the list has a binary snapshot (see `snapshot`), only that object's record
+    is decoded; otherwise the whole list is loaded and indexed.
+
+    Args:
+        cls: The list class of the objects, e.g. ``list[FFMpegFilter]``
+        id: The id of the list
+        name: The name of the object
+
+    Returns:
+        The first object of the list with that name
+
+    Raises:
+        FileNotFoundError: If the cache file is not found and no data package is installed.
+        KeyError: If the list has no object with that name
+
+    """
+    key = (cls.__name__, id)
+    if key not in _loaded:
+        path = _resolve_path(cls, id)
+        header = _read_snapshot_header(path)
+        if header is not None:
+            index = header["names"].index(name) if name in header["names"] else None
+            if index is None:
+                raise KeyError(name)
+
+            start, end = header["offsets"][index : index + 2]
+            with path.with_suffix(".pickle").open("rb") as ifile:
+                ifile.seek(header["start"] + start)
+                record = ifile.read(end - start)
+            try:
+                return _SnapshotUnpickler(io.BytesIO(record)).load()
+            except (pickle.UnpicklingError, EOFError, AssertionError) as e:
+                logger.warning(f"Ignoring unreadable cache snapshot of {path}: {e}")
+
+    return load_index(cls, id)[name]
+
+
+def invalidate(cls: type[Any] | None = None, id: str | None = None) -> None:
+    """
+    Drop memoized objects and indexes so the next load reads the cache again.
+
+    Args:
+        cls: Only drop objects of this class (all classes if None)
+        id: Only drop objects with this id (all ids if None)
+
+    """
+    for memo in (_loaded, _indexes):
+        for key in list(memo):
+            if (cls is None or key[0] == cls.__name__) and (id is None or key[1] == id):
+                del memo[key]
+
+    for path in list(_snapshot_headers):
+        if (cls is None or path.parent.name == cls.__name__) and (
+            id is None or path.stem == id
+        ):
+            del _snapshot_headers[path]
+
+
+def save(obj: T, id: str) -> Path:
     """
     Save an object to the cache.
 
@@ -103,6 +488,9 @@ def save(obj: T, id: str) -> None:
         obj: The object to save
         id: The id of the object
 
+    Returns:
+        The path of the JSON file written
+
     """
     schema_path = cache_path / f"{obj.__class__.__name__}"
     schema_path.mkdir(exist_ok=True)
@@ -111,6 +499,11 @@ def save(obj: T, id: str) -> None:
         ofile.write(dumps(obj))
         ofile.write("\n")
 
+    # NOTE: a snapshot of the previous content would shadow the new JSON file
+    (schema_path / f"{id}.pickle").unlink(missing_ok=True)
+    invalidate(obj.__class__, id)
+    return schema_path / f"{id}.json"
+
 
 def list_all(cls: type[T]) -> list[T]:
     """
@@ -133,3 +526,7 @@ def clean(cls: type[T]) -> None:
     path = cache_path / f"{cls.__name__}"
     for i in path.glob("*.json"):
         i.unlink()
+    for i in path.glob("*.pickle"):
+        i.unlink()
+
+    invalidate(cls)
@@ -4,12 +4,14 @@ Serialization utilities for FFmpeg filter graphs and components.
 This module provides functions for serializing and deserializing FFmpeg filter
 graph components to and from JSON. It handles dataclasses, enums, and other
 custom types used in the typed-ffmpeg library, enabling filter graphs to be
-saved to disk and loaded back.
+saved to disk and loaded back, either with each object inlined wherever it is
+referenced, or in a shared format where each object is written once.
 """
 
 from __future__ import annotations
 
 import json
+from collections.abc import Iterator
 from dataclasses import fields, is_dataclass
 from enum import Enum
 from pathlib import Path
@@ -22,6 +24,22 @@ CLASS_REGISTRY: dict[str, type[Serializable | Enum]] = {}
 A registry of classes that have been loaded, and can be deserialized.
 """
 
+SHARED_FORMAT_KEY = "__graph__"
+"""
+The key holding the version of the shared format, which marks a JSON document
+written by `to_shared_dict`
+"""
+
+SHARED_FORMAT_VERSION = 1
+"""
+The version of the shared format written by `to_shared_dict`
+"""
+
+REF_KEY = "__ref__"
+"""
+The key of a reference to an object of the table of the shared format
+"""
+
 
 def serializable(
     cls: type[Serializable] | type[Enum],
@@ -156,13 +174,45 @@ def object_hook(obj: Any) -> Any:
     return obj
 
 
+def _revive(value: Any, objects: list[Any]) -> Any:
+    """
+    Reconstruct a value of the shared format, whose references are all resolved.
+
+    Args:
+        value: A value decoded by the JSON parser, without class information
+            applied
+        objects: The objects of the table defined so far
+
+    Returns:
+        The value with its references replaced by objects of the table, and
+        its class information applied
+
+    Raises:
+        ValueError: If a reference is not to an earlier object of the table
+
+    """
+    if isinstance(value, list):
+        return [_revive(v, objects) for v in value]
+
+    if isinstance(value, dict):
+        if REF_KEY in value:
+            ref = value[REF_KEY]
+            if not isinstance(ref, int) or not 0 <= ref < len(objects):
+                raise ValueError(f"Invalid reference {ref!r} in serialized graph")
+            return objects[ref]
+        return object_hook({k: _revive(v, objects) for k, v in value.items()})
+
+    return value
+
+
 def loads(raw: str) -> Any:
     """
     Deserialize a JSON string into Python objects with proper class types.
 
     This function parses a JSON string and reconstructs the original Python
     objects, including dataclasses and enums, based on class information
-    embedded in the JSON.
+    embedded in the JSON. Both the inline format and the shared format written
+    by `dumps` with ``shared=True`` are accepted.
 
     Args:
         raw: The JSON string to deserialize
@@ -170,6 +220,10 @@ def loads(raw: str) -> Any:
     Returns:
         The deserialized Python object with proper types
 
+    Raises:
+        ValueError: If the shared format has an unknown version or an invalid
+            reference
+
     Example:
         ```python
         # Deserialize a filter graph from JSON
@@ -179,7 +233,20 @@ def loads(raw: str) -> Any:
         ```
 
     """
-    return json.loads(raw, object_hook=object_hook)
+    obj = json.loads(raw)
+    if not (isinstance(obj, dict) and SHARED_FORMAT_KEY in obj):
+        return _revive(obj, [])
+
+    if obj[SHARED_FORMAT_KEY] != SHARED_FORMAT_VERSION:
+        raise ValueError(
+            f"Unsupported serialized graph version {obj[SHARED_FORMAT_KEY]!r}"
+        )
+
+    # NOTE: objects are listed after the objects they reference
+    objects: list[Any] = []
+    for entry in obj["objects"]:
+        objects.append(_revive(entry, objects))
+    return _revive(obj["root"], objects)
 
 
 def to_dict_with_class_info(instance: Any) -> Any:
@@ -230,8 +297,102 @@ def to_dict_with_class_info(instance: Any) -> Any:
     return instance
 
 
+def to_shared_dict(instance: Any) -> dict[str, Any]:
+    """
+    Convert Python objects to the shared format, where each object is written once.
+
+    Unlike `to_dict_with_class_info`, which inlines a dataclass wherever it is
+    referenced, each dataclass instance is written once in a table of objects,
+    and referenced by its position, as ``{"__ref__": 3}``. A filter graph whose
+    nodes feed several others is thus written in size proportional to its
+    number of nodes, instead of its number of paths. The table is in
+    post-order, so that each object only references earlier ones.
+
+    Args:
+        instance: The Python object to convert
+
+    Returns:
+        A JSON-serializable dict, with the format version, the table of
+        objects, and the root value
+
+    Example:
+        ```python
+        stream = ffmpeg.input("input.mp4")
+        shared = to_shared_dict(stream.overlay(stream))
+        # {"__graph__": 1, "objects": [...], "root": {"__ref__": 5}}
+        ```
+
+    """
+    objects: list[dict[str, Any]] = []
+    refs: dict[int, dict[str, int]] = {}
+
+    def is_instance(value: Any) -> bool:
+        return is_dataclass(value) and not isinstance(value, type)
+
+    def iter_instances(value: Any) -> Iterator[Any]:
+        if isinstance(value, dict | FrozenDict):
+            for v in value.values():
+                yield from iter_instances(v)
+        elif isinstance(value, list | tuple):
+            for v in value:
+                yield from iter_instances(v)
+        elif is_instance(value):
+            yield value
+
+    def convert(value: Any) -> Any:
+        # NOTE: every dataclass reached here is already in the table
+        if isinstance(value, dict | FrozenDict):
+            return {k: convert(v) for k, v in value.items()}
+        elif isinstance(value, list | tuple):
+            return [convert(v) for v in value]
+        elif isinstance(value, Path):
+            return str(value)
+        elif is_instance(value):
+            return refs[id(value)]
+        elif isinstance(value, Enum):
+            return {
+                "__class__": value.__class__.__name__,
+                "value": value.value,
+            }
+        return value
+
+    # NOTE: post-order walk, so every instance is written after the instances
+    # its fields reference; children are pushed in reverse to keep field order
+    stack: list[tuple[Any, bool]] = [
+        (value, False) for value in reversed(list(iter_instances(instance)))
+    ]
+    expanded: set[int] = set()
+
+    while stack:
+        obj, ready = stack.pop()
+        if id(obj) in refs:
+            continue
+        if ready:
+            # NOTE: keyed by identity, the instance is kept alive by the graph
+            refs[id(obj)] = {REF_KEY: len(objects)}
+            objects.append(
+                {
+                    "__class__": obj.__class__.__name__,
+                    **{k.name: convert(getattr(obj, k.name)) for k in fields(obj)},
+                }
+            )
+            continue
+        if id(obj) in expanded:
+            continue
+        expanded.add(id(obj))
+
+        stack.append((obj, True))
+        children = [
+            child for k in fields(obj) for child in iter_instances(getattr(obj, k.name))
+        ]
+        stack.extend((child, False) for child in reversed(children))
+
+    root = convert(instance)
+    return {SHARED_FORMAT_KEY: SHARED_FORMAT_VERSION, "objects": objects, "root": root}
+
+
 # Serialization
-def dumps(instance: Any) -> str:
+def dumps(instance: Any, *, shared: bool = False, compact: bool = False) -> str:
     """
     Serialize a Python object to a JSON string with class information.
 
@@ -241,6 +402,12 @@ def dumps(instance: Any) -> str:
 
     Args:
         instance: The Python object to serialize
+        shared: Whether to write the shared format of `to_shared_dict`, where
+            each object is written once, instead of inlining each object
+            wherever it is referenced
+        compact: Whether to write the JSON without indentation, whitespace and
+            key sorting, e.g. to send it over the wire, instead of indented
+            with sorted keys
 
     Returns:
         A JSON string representation of the object with class information
@@ -255,5 +422,7 @@ def dumps(instance: Any) -> str:
         ```
 
     """
-    obj = to_dict_with_class_info(instance)
+    obj = to_shared_dict(instance) if shared else to_dict_with_class_info(instance)
+    if compact:
+        return json.dumps(obj, separators=(",", ":"))
     return json.dumps(obj, indent=2, sort_keys=True)
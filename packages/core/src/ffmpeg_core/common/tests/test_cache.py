@@ -1,7 +1,23 @@
+import io
+import pickle
+from collections.abc import Iterator
+
+import pytest
 from syrupy.assertion import SnapshotAssertion
 
-from ..cache import clean, list_all, load, save
-from ..schema import FFMpegFilter
+from .. import cache
+from ..cache import (
+    cache_path,
+    clean,
+    invalidate,
+    list_all,
+    load,
+    load_index,
+    load_item,
+    save,
+    snapshot,
+)
+from ..schema import FFMpegFilter, FFMpegOption, StreamType
 
 
 def test_save_and_load(snapshot: SnapshotAssertion) -> None:
@@ -12,3 +28,166 @@ def test_save_and_load(snapshot: SnapshotAssertion) -> None:
     assert load(FFMpegFilter, ffmpeg_filter.name) == ffmpeg_filter
 
     assert snapshot == list_all(FFMpegFilter)
+
+
+def test_load_is_memoized() -> None:
+    save(
+        [
+            FFMpegFilter(name="foo", description=""),
+            FFMpegFilter(name="bar", description=""),
+        ],
+        "memo",
+    )
+
+    try:
+        first = load(list[FFMpegFilter], "memo")
+        first.append(FFMpegFilter(name="baz", description=""))
+        second = load(list[FFMpegFilter], "memo")
+
+        assert [f.name for f in second] == ["foo", "bar"]
+        assert second[0] is first[0]
+
+        index = load_index(list[FFMpegFilter], "memo")
+        assert index["bar"] is second[1]
+        assert load_index(list[FFMpegFilter], "memo") is index
+
+        # saving replaces the memoized objects
+        save([FFMpegFilter(name="foo", description="new")], "memo")
+        assert load_index(list[FFMpegFilter], "memo")["foo"].description == "new"
+        assert [f.name for f in load(list[FFMpegFilter], "memo")] == ["foo"]
+    finally:
+        (cache_path / "list" / "memo.json").unlink()
+        invalidate(list, "memo")
+
+
+def test_invalidate() -> None:
+    load(list[FFMpegFilter], "filters")
+    index = load_index(list[FFMpegFilter], "filters")
+
+    invalidate(FFMpegOption)
+    assert load_index(list[FFMpegFilter], "filters") is index
+
+    invalidate(list[FFMpegFilter], "filters")
+    reloaded = load_index(list[FFMpegFilter], "filters")
+    assert reloaded is not index
+    assert reloaded == index
+
+
+@pytest.fixture
+def snapshotted() -> Iterator[list[FFMpegFilter]]:
+    filters = [
+        FFMpegFilter(
+            name="foo",
+            description="",
+            stream_typings_input=(StreamType.video,),
+        ),
+        FFMpegFilter(name="bar", description=""),
+    ]
+    path = save(filters, "snapshotted")
+    snapshot(path)
+
+    yield filters
+
+    path.unlink()
+    path.with_suffix(".pickle").unlink(missing_ok=True)
+    invalidate(list, "snapshotted")
+
+
+def test_load_prefers_snapshot(snapshotted: list[FFMpegFilter]) -> None:
+    invalidate(list, "snapshotted")
+
+    loaded = load(list[FFMpegFilter], "snapshotted")
+    assert loaded == snapshotted
+    assert loaded[0].stream_typings_input == (StreamType.video,)
+    assert type(loaded[0]) is FFMpegFilter
+
+
+def test_load_item(snapshotted: list[FFMpegFilter]) -> None:
+    invalidate(list, "snapshotted")
+
+    assert load_item(list[FFMpegFilter], "snapshotted", "bar") == snapshotted[1]
+    # only the header was decoded
+    assert (list.__name__, "snapshotted") not in cache._loaded
+
+    with pytest.raises(KeyError):
+        load_item(list[FFMpegFilter], "snapshotted", "baz")
+
+
+def test_load_item_without_snapshot() -> None:
+    path = save([FFMpegFilter(name="foo", description="")], "unsnapshotted")
+    try:
+        assert load_item(list[FFMpegFilter], "unsnapshotted", "foo").name == "foo"
+        with pytest.raises(KeyError):
+            load_item(list[FFMpegFilter], "unsnapshotted", "bar")
+    finally:
+        path.unlink()
+        invalidate(list, "unsnapshotted")
+
+
+def test_outdated_snapshot_is_ignored(snapshotted: list[FFMpegFilter]) -> None:
+    path = cache_path / "list" / "snapshotted.json"
+    snapshot_path = path.with_suffix(".pickle")
+    content = snapshot_path.read_bytes()
+
+    # saving removes the snapshot of the previous content
+    save([FFMpegFilter(name="baz", description="")], "snapshotted")
+    assert not snapshot_path.exists()
+
+    # a snapshot that does not match the JSON file is not used
+    snapshot_path.write_bytes(content)
+    invalidate(list, "snapshotted")
+    assert [f.name for f in load(list[FFMpegFilter], "snapshotted")] == ["baz"]
+    assert load_item(list[FFMpegFilter], "snapshotted", "baz").name == "baz"
+
+
+def test_snapshot_of_another_version_is_ignored(
+    snapshotted: list[FFMpegFilter],
+) -> None:
+    snapshot_path = cache_path / "list" / "snapshotted.pickle"
+    with snapshot_path.open("wb") as ofile:
+        pickle.dump({"version": cache.SNAPSHOT_VERSION + 1}, ofile)
+
+    invalidate(list, "snapshotted")
+    assert load(list[FFMpegFilter], "snapshotted") == snapshotted
+
+
+def test_snapshot_refuses_foreign_globals(snapshotted: list[FFMpegFilter]) -> None:
+    snapshot_path = cache_path / "list" / "snapshotted.pickle"
+    header = cache._read_snapshot_header(snapshot_path.with_suffix(".json"))
+    assert header is not None
+
+    # a record referencing a global outside of the package
+    record = pickle.dumps(pickle.PickleError())
+    with snapshot_path.open("wb") as ofile:
+        pickle.dump(header | {"offsets": (0, len(record))}, ofile)
+        ofile.write(record)
+
+    invalidate(list, "snapshotted")
+    assert load(list[FFMpegFilter], "snapshotted") == snapshotted
+
+
+def test_truncated_snapshot_is_ignored(snapshotted: list[FFMpegFilter]) -> None:
+    snapshot_path = cache_path / "list" / "snapshotted.pickle"
+    snapshot_path.write_bytes(snapshot_path.read_bytes()[:-10])
+
+    invalidate(list, "snapshotted")
+    assert load_item(list[FFMpegFilter], "snapshotted", "bar") == snapshotted[1]
+    assert load(list[FFMpegFilter], "snapshotted") == snapshotted
+
+
+class _Eval:
+    def __reduce__(self) -> tuple[object, tuple[str]]:
+        return eval, ("__import__('os').getpid()",)
+
+
+def test_snapshot_refuses_builtins(snapshotted: list[FFMpegFilter]) -> None:
+    with pytest.raises(pickle.UnpicklingError, match="builtins.eval"):
+        cache._SnapshotUnpickler(io.BytesIO(pickle.dumps(_Eval()))).load()
+
+    # neither in a record, nor in the header
+    snapshot_path = cache_path / "list" / "snapshotted.pickle"
+    with snapshot_path.open("wb") as ofile:
+        pickle.dump(_Eval(), ofile)
+
+    invalidate(list, "snapshotted")
+    assert load(list[FFMpegFilter], "snapshotted") == snapshotted
@@ -1,4 +1,8 @@
 import shutil
+import sys
+import textwrap
+from collections.abc import Callable
+from pathlib import Path
 
 import pytest
 
@@ -10,3 +14,28 @@ requires_ffprobe = pytest.mark.skipif(
     shutil.which("ffprobe") is None,
     reason="ffprobe binary not found",
 )
+
+
+@pytest.fixture
+def make_fake_executable(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> Callable[..., str]:
+    """
+    Write Python scripts standing in for ffmpeg or ffprobe.
+
+    Each script is written to `tmp_path` under its name, run by the current
+    interpreter through its shebang, and can log its calls to the file named
+    by the ``<NAME>_LOG`` environment variable, e.g. ``FAKE_FFMPEG_LOG``, which
+    is ``<name>.log`` in `tmp_path`.
+    """
+
+    def make(script: str, name: str = "fake_ffmpeg") -> str:
+        if sys.platform == "win32":
+            pytest.skip("the fake executable is run through its shebang")
+        path = tmp_path / name
+        path.write_text(f"#!{sys.executable}\n{textwrap.dedent(script)}")
+        path.chmod(0o755)
+        monkeypatch.setenv(f"{name.upper()}_LOG", str(tmp_path / f"{name}.log"))
+        return str(path)
+
+    return make
@@ -0,0 +1,224 @@
+"""
+Probing many media files concurrently.
+
+Probing a large library one file at a time is dominated by starting ffprobe
+processes, one after the other. This module provides `probe_many` and
+`aprobe_many`, which keep a bounded number of ffprobe processes running at
+once and report each result as soon as it is available.
+"""
+
+import asyncio
+import concurrent.futures
+import os
+from collections.abc import AsyncIterator, Iterable, Iterator
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from .cache import ProbeCache
+from .probe import probe
+
+
+@dataclass(frozen=True)
+class ProbeResult:
+    """The outcome of probing one file."""
+
+    filename: str | Path
+    """
+    The probed file, as given
+    """
+
+    info: dict[str, Any] | None = None
+    """
+    The result of `probe`, or None if it failed
+    """
+
+    error: Exception | None = None
+    """
+    The error probing raised, e.g. a `FFMpegExecuteError` or
+    `subprocess.TimeoutExpired`, or None if it succeeded
+    """
+
+
+def _default_concurrency() -> int:
+    """
+    Choose how many ffprobe processes run at once.
+
+    Returns:
+        The number of CPUs plus a few, as ffprobe mostly waits on I/O
+
+    """
+    return min(32, (os.cpu_count() or 1) + 4)
+
+
+def _probe_one(
+    filename: str | Path,
+    timeout: int | None,
+    cache: ProbeCache | None,
+    kwargs: dict[str, Any],
+) -> ProbeResult:
+    """
+    Probe one file, catching its error.
+
+    Args:
+        filename: The file
+        timeout: The maximum number of seconds ffprobe may run
+        cache: The cache of earlier results to use, if any
+        kwargs: The other arguments of `probe`
+
+    Returns:
+        The outcome
+
+    """
+    try:
+        return ProbeResult(
+            filename, info=probe(filename, timeout=timeout, cache=cache, **kwargs)
+        )
+    except Exception as e:
+        return ProbeResult(filename, error=e)
+
+
+def probe_many(
+    filenames: Iterable[str | Path],
+    *,
+    concurrency: int | None = None,
+    timeout: int | None = None,
+    cache: ProbeCache | None = None,
+    **kwargs: Any,
+) -> Iterator[ProbeResult]:
+    """
+    Probe many files concurrently, yielding each result as it completes.
+
+    At most `concurrency` ffprobe processes run at once, each waited on by a
+    thread, and `filenames` is consumed only as processes free up, so it can be
+    a lazy iterable over a very large library. A failure is reported in the
+    result of its file, and does not stop the others.
+
+    Args:
+        filenames: The files to probe
+        concurrency: The maximum number of ffprobe processes run at once, by
+            default a few more than the number of CPUs
+        timeout: The maximum number of seconds each ffprobe process may run,
+            after which it is killed
+        cache: The cache of earlier results to use, if any
+        **kwargs: The other arguments of `probe`, e.g. show_packets or cmd
+
+    Yields:
+        The outcome of each file, in the order probes complete
+
+    Raises:
+        ValueError: If concurrency is not positive
+
+    Example:
+        ```python
+        for result in probe_many(Path("library").rglob("*.mp4"), timeout=30):
+            if result.error is not None:
+                print(f"{result.filename}: {result.error}")
+            else:
+                print(result.filename, result.info["format"]["duration"])
+        ```
+
+    """
+    if concurrency is None:
+        concurrency = _default_concurrency()
+    if concurrency <= 0:
+        raise ValueError(f"concurrency must be positive, got {concurrency}")
+
+    pending: set[concurrent.futures.Future[ProbeResult]] = set()
+    remaining = iter(filenames)
+    with concurrent.futures.ThreadPoolExecutor(concurrency) as executor:
+        try:
+            while True:
+                # NOTE: submitting lazily keeps memory bounded for huge libraries
+                for filename in remaining:
+                    pending.add(
+                        executor.submit(_probe_one, filename, timeout, cache, kwargs)
+                    )
+                    if len(pending) >= concurrency:
+                        break
+                if not pending:
+                    return
+
+                done, pending = concurrent.futures.wait(
+                    pending, return_when=concurrent.futures.FIRST_COMPLETED
+                )
+                for future in done:
+                    yield future.result()
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+async def aprobe_many(
+    filenames: Iterable[str | Path],
+    *,
+    concurrency: int | None = None,
+    timeout: int | None = None,
+    cache: ProbeCache | None = None,
+    **kwargs: Any,
+) -> AsyncIterator[ProbeResult]:
+    """
+    Probe many files concurrently from asyncio, yielding each result as it completes.
+
+    This is the asyncio counterpart of `probe_many`: each ffprobe process is
+    waited on by a thread of a dedicated pool, so that the timeout and cleanup
+    of `probe` apply unchanged, and the event loop is never blocked.
+
+    Args:
+        filenames: The files to probe
+        concurrency: The maximum number of ffprobe processes run at once, by
+            default a few more than the number of CPUs
+        timeout: The maximum number of seconds each ffprobe process may run,
+            after which it is killed
+        cache: The cache of earlier results to use, if any
+        **kwargs: The other arguments of `probe`, e.g. show_packets or cmd
+
+    Yields:
+        The outcome of each file, in the order probes complete
+
+    Raises:
+        ValueError: If concurrency is not positive
+
+    Example:
+        ```python
+        async def main():
+            async for result in aprobe_many(paths, concurrency=16):
+                print(result.filename, result.error or "ok")
+
+
+        asyncio.run(main())
+        ```
+
+    """
+    if concurrency is None:
+        concurrency = _default_concurrency()
+    if concurrency <= 0:
+        raise ValueError(f"concurrency must be positive, got {concurrency}")
+
+    loop = asyncio.get_running_loop()
+    executor = concurrent.futures.ThreadPoolExecutor(concurrency)
+    pending: set[asyncio.Future[ProbeResult]] = set()
+    remaining = iter(filenames)
+    try:
+        while True:
+            for filename in remaining:
+                pending.add(
+                    loop.run_in_executor(
+                        executor, _probe_one, filename, timeout, cache, kwargs
+                    )
+                )
+                if len(pending) >= concurrency:
+                    break
+            if not pending:
+                return
+
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for future in done:
+                yield future.result()
+    finally:
+        # NOTE: a probe already running in a thread still completes, within its timeout
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,322 @@
+"""
+Caching ffprobe results.
+
+Probing starts an ffprobe process, which takes tens of milliseconds, while a
+pipeline often probes the same files many times. This module provides
+`ProbeCache`, which `probe` and `probe_obj` can use to reuse the result of an
+earlier probe of a file, as long as the file has not changed.
+"""
+
+import copy
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from collections.abc import Callable
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+@dataclass
+class CacheStats:
+    """The counters of a `ProbeCache`."""
+
+    hits: int = 0
+    """
+    The lookups answered from memory
+    """
+
+    disk_hits: int = 0
+    """
+    The lookups answered from disk
+    """
+
+    misses: int = 0
+    """
+    The lookups that ran ffprobe
+    """
+
+    evictions: int = 0
+    """
+    The entries dropped from memory to make room for newer ones
+    """
+
+    uncacheable: int = 0
+    """
+    The probes of inputs that are not local files, e.g. URLs, which are never cached
+    """
+
+
+class ProbeCache:
+    """
+    A cache of ffprobe results, keyed by file and probe options.
+
+    A result is keyed by the file's resolved path, size and modification time
+    (in nanoseconds), and by the options it was probed with, so a modified
+    file is probed again. Results are kept in memory, up to `max_entries` of
+    them, dropping the least recently used first; if a `path` is given, they
+    are also stored in a SQLite database there, so that they outlive the
+    process, up to `max_disk_entries` of them. Setting `bypass` makes every
+    lookup run ffprobe again, and refresh the cached result.
+
+    Example:
+        ```python
+        cache = ProbeCache(max_entries=256, path="~/.cache/probe.sqlite")
+        info = probe("video.mp4", cache=cache)  # runs ffprobe
+        info = probe("video.mp4", cache=cache)  # answered from memory
+        print(cache.stats)
+        ```
+
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        path: str | Path | None = None,
+        max_disk_entries: int = 65536,
+    ) -> None:
+        """
+        Create an empty cache, or open a cache stored on disk.
+
+        Args:
+            max_entries: The maximum number of results kept in memory
+            path: The SQLite database results are also stored in, if any
+            max_disk_entries: The maximum number of results stored on disk
+
+        Raises:
+            ValueError: If max_entries or max_disk_entries is not positive
+
+        """
+        if max_entries <= 0 or max_disk_entries <= 0:
+            raise ValueError(
+                "max_entries and max_disk_entries must be positive, "
+                f"got {max_entries}, {max_disk_entries}"
+            )
+
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        # NOTE: when set, every lookup runs ffprobe again and replaces the result
+        self.bypass = False
+        self.stats = CacheStats()
+        self._entries: OrderedDict[str, Any] = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: sqlite3.Connection | None = None
+        self._used = 0
+        self._disk_entries = 0
+        if path is not None:
+            path = Path(path).expanduser()
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS probe "
+                "(key TEXT PRIMARY KEY, output TEXT NOT NULL, used INTEGER NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS probe_used ON probe (used)")
+            self._db.commit()
+            # NOTE: `used` orders the entries by last use, across processes
+            self._used, self._disk_entries = self._db.execute(
+                "SELECT COALESCE(MAX(used), 0), COUNT(*) FROM probe"
+            ).fetchone()
+
+    @staticmethod
+    def key(filename: str | Path, options: dict[str, Any]) -> str | None:
+        """
+        Compute the key of a probe.
+
+        Args:
+            filename: The probed file
+            options: The options of the probe, e.g. its show_* flags
+
+        Returns:
+            The key, or None if the input is not a local file
+
+        """
+        try:
+            st = os.stat(filename)
+        except (OSError, ValueError):
+            return None
+
+        identity = [os.path.realpath(filename), st.st_size, st.st_mtime_ns, options]
+        text = json.dumps(identity, sort_keys=True, default=str)
+        return hashlib.sha256(text.encode()).hexdigest()
+
+    def get_or_probe(
+        self,
+        filename: str | Path,
+        options: dict[str, Any],
+        run: Callable[[], str],
+        parse: Callable[[str], T],
+    ) -> T:
+        """
+        Get the result of a probe, running it only if it is not cached.
+
+        Args:
+            filename: The probed file
+            options: The options of the probe, part of its key
+            run: Runs ffprobe and returns its output
+            parse: Parses the output into the result
+
+        Returns:
+            The result; mutable results (dicts) are copied, so that changing
+            them does not change the cache
+
+        """
+        key = self.key(filename, options)
+        if key is None:
+            with self._lock:
+                self.stats.uncacheable += 1
+            return parse(run())
+
+        if not self.bypass:
+            with self._lock:
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+                    self.stats.hits += 1
+                    return self._copy(self._entries[key])
+
+            output = self._load(key)
+            if output is not None:
+                result = parse(output)
+                with self._lock:
+                    self.stats.disk_hits += 1
+                    self._remember(key, result)
+                return self._copy(result)
+
+        output = run()
+        result = parse(output)
+        with self._lock:
+            self.stats.misses += 1
+            self._remember(key, result)
+        self._store(key, output)
+        return self._copy(result)
+
+    @staticmethod
+    def _copy(result: T) -> T:
+        """
+        Copy a result if it is mutable.
+
+        Args:
+            result: The cached result
+
+        Returns:
+            A deep copy of a dict, or the result itself, e.g. a frozen `ffprobeType`
+
+        """
+        return copy.deepcopy(result) if isinstance(result, dict) else result
+
+    def _remember(self, key: str, result: Any) -> None:
+        """
+        Keep a result in memory, evicting the least recently used ones if full.
+
+        Must be called with the lock held.
+
+        Args:
+            key: The key of the probe
+            result: The result
+
+        """
+        self._entries[key] = result
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats.evictions += 1
+
+    def _load(self, key: str) -> str | None:
+        """
+        Load the output of a probe from disk.
+
+        Args:
+            key: The key of the probe
+
+        Returns:
+            The output of ffprobe, or None if it is not stored
+
+        """
+        if self._db is None:
+            return None
+
+        with self._lock:
+            self._used += 1
+            try:
+                row = self._db.execute(
+                    "SELECT output FROM probe WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    self._db.execute(
+                        "UPDATE probe SET used = ? WHERE key = ?", (self._used, key)
+                    )
+                    self._db.commit()
+            except sqlite3.Error:
+                logger.exception("Failed to read the probe cache; ignoring")
+                return None
+        return row[0] if row is not None else None
+
+    def _store(self, key: str, output: str) -> None:
+        """
+        Store the output of a probe on disk, evicting the least recently used ones if full.
+
+        Args:
+            key: The key of the probe
+            output: The output of ffprobe
+
+        """
+        if self._db is None:
+            return
+
+        with self._lock:
+            self._used += 1
+            try:
+                updated = self._db.execute(
+                    "UPDATE probe SET output = ?, used = ? WHERE key = ?",
+                    (output, self._used, key),
+                ).rowcount
+                if not updated:
+                    self._db.execute(
+                        "INSERT INTO probe VALUES (?, ?, ?)", (key, output, self._used)
+                    )
+                    self._disk_entries += 1
+                excess = self._disk_entries - self.max_disk_entries
+                if excess > 0:
+                    self._db.execute(
+                        "DELETE FROM probe WHERE key IN "
+                        "(SELECT key FROM probe ORDER BY used LIMIT ?)",
+                        (excess,),
+                    )
+                    self._disk_entries -= excess
+                self._db.commit()
+            except sqlite3.Error:
+                logger.exception("Failed to write the probe cache; ignoring")
+
+    def clear(self) -> None:
+        """Drop every cached result, in memory and on disk."""
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM probe")
+                self._db.commit()
+                self._disk_entries = 0
+
+    def close(self) -> None:
+        """Close the database results are stored in, if any."""
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def __len__(self) -> int:
+        """
+        Count the results kept in memory.
+
+        Returns:
+            The number of results kept in memory
+
+        """
+        return len(self._entries)
@@ -0,0 +1,423 @@
+"""
+Indexing the keyframes of a media file.
+
+Frame-accurate seeking and segment planning need the keyframes of a video
+stream, which `probe` can only give as a list of every packet held in memory.
+This module provides `keyframe_index`, which streams the packets of one stream
+from ffprobe into a compact, array-backed `KeyframeIndex`, optionally stored in
+a sidecar file next to the media file, and answers keyframe lookups by
+bisection.
+"""
+
+import bisect
+import logging
+import os
+import struct
+import sys
+from array import array
+from collections.abc import Iterable
+from dataclasses import dataclass
+from pathlib import Path
+
+from .schema import packetType
+from .streaming import iter_packets
+
+logger = logging.getLogger(__name__)
+
+SIDECAR_SUFFIX = ".keyframes"
+"""
+The suffix of the default sidecar file, appended to the media file's name
+"""
+
+_MAGIC = b"FFKI"
+_VERSION = 1
+# magic, version, size and mtime_ns of the media file, length of the stream
+# specifier, number of packets
+_HEADER = struct.Struct("<4sHqqHq")
+
+
+@dataclass(frozen=True)
+class Keyframe:
+    """A keyframe of a `KeyframeIndex`."""
+
+    pts_time: float
+    """
+    The presentation time of the keyframe in seconds
+    """
+
+    pos: int | None = None
+    """
+    The byte offset of the keyframe's packet in the file, if ffprobe knows it
+    """
+
+
+class KeyframeIndex:
+    """
+    The packets of a video stream, in presentation order, with their keyframe flag.
+
+    The packets are held in three arrays (presentation time, byte offset and
+    keyframe flag, about 17 bytes per packet), and the presentation times of
+    the keyframes in a fourth one, so that each lookup is a bisection, in
+    O(log n).
+
+    Example:
+        ```python
+        index = keyframe_index("video.mp4", sidecar=True)
+        ss, skip = index.seek(12.3)
+        ffmpeg.input("video.mp4", ss=ss).output("clip.mp4", ss=skip, t=5).run()
+        ```
+
+    """
+
+    def __init__(self, pts_time: array, pos: array, keyframe: array) -> None:
+        """
+        Create an index from its arrays.
+
+        Args:
+            pts_time: The presentation time of each packet in seconds, sorted
+                (typecode ``d``)
+            pos: The byte offset of each packet, or -1 if unknown (typecode ``q``)
+            keyframe: 1 for each keyframe packet, 0 for the others (typecode ``B``)
+
+        Raises:
+            ValueError: If the arrays differ in length
+
+        """
+        if not len(pts_time) == len(pos) == len(keyframe):
+            raise ValueError(
+                "the arrays of an index must have the same length, "
+                f"got {len(pts_time)}, {len(pos)}, {len(keyframe)}"
+            )
+
+        self.pts_time = pts_time
+        self.pos = pos
+        self.keyframe = keyframe
+        self._rows = array("q", (i for i, flag in enumerate(keyframe) if flag))
+        self._times = array("d", (pts_time[i] for i in self._rows))
+
+    @classmethod
+    def from_packets(cls, packets: Iterable[packetType]) -> "KeyframeIndex":
+        """
+        Build an index from the packets of one stream, e.g. from `iter_packets`.
+
+        Packets without a presentation time are left out.
+
+        Args:
+            packets: The packets, in any order
+
+        Returns:
+            The index
+
+        """
+        pts_time, pos, keyframe = array("d"), array("q"), array("B")
+        for packet in packets:
+            if packet.pts_time is None:
+                continue
+            pts_time.append(packet.pts_time)
+            pos.append(-1 if packet.pos is None else packet.pos)
+            keyframe.append(1 if packet.flags and "K" in packet.flags else 0)
+
+        # NOTE: packets come in decoding order, which differs with B-frames
+        if any(a > b for a, b in zip(pts_time, pts_time[1:])):
+            order = sorted(range(len(pts_time)), key=pts_time.__getitem__)
+            pts_time = array("d", (pts_time[i] for i in order))
+            pos = array("q", (pos[i] for i in order))
+            keyframe = array("B", (keyframe[i] for i in order))
+        return cls(pts_time, pos, keyframe)
+
+    def __len__(self) -> int:
+        """
+        Count the packets of the index.
+
+        Returns:
+            The number of packets
+
+        """
+        return len(self.pts_time)
+
+    @property
+    def keyframes(self) -> array:
+        """
+        The presentation times of the keyframes in seconds, sorted.
+
+        Returns:
+            The times, which must not be modified
+
+        """
+        return self._times
+
+    def _keyframe(self, i: int) -> Keyframe:
+        """
+        Describe the i-th keyframe.
+
+        Args:
+            i: The index of the keyframe among keyframes
+
+        Returns:
+            The keyframe
+
+        """
+        row = self._rows[i]
+        pos = self.pos[row]
+        return Keyframe(self.pts_time[row], None if pos < 0 else pos)
+
+    def keyframe_before(self, time: float) -> Keyframe | None:
+        """
+        Find the last keyframe at or before a time.
+
+        This is where seeking with ``-ss`` lands, and where decoding has to
+        start to reach the frame at the time.
+
+        Args:
+            time: The time in seconds
+
+        Returns:
+            The keyframe, or None if there is none at or before the time
+
+        """
+        i = bisect.bisect_right(self._times, time)
+        return self._keyframe(i - 1) if i else None
+
+    def keyframe_after(self, time: float) -> Keyframe | None:
+        """
+        Find the first keyframe at or after a time.
+
+        Args:
+            time: The time in seconds
+
+        Returns:
+            The keyframe, or None if there is none at or after the time
+
+        """
+        i = bisect.bisect_left(self._times, time)
+        return self._keyframe(i) if i < len(self._times) else None
+
+    def nearest_keyframe(self, time: float) -> Keyframe | None:
+        """
+        Find the keyframe closest to a time, the earlier one on a tie.
+
+        Args:
+            time: The time in seconds
+
+        Returns:
+            The keyframe, or None if the index has no keyframe
+
+        """
+        before, after = self.keyframe_before(time), self.keyframe_after(time)
+        if before is None or after is None:
+            return before or after
+        return before if time - before.pts_time <= after.pts_time - time else after
+
+    def gop(self, time: float) -> tuple[float, float | None]:
+        """
+        Find the group of pictures a time falls in.
+
+        Args:
+            time: The time in seconds
+
+        Returns:
+            The times of the keyframe starting the group, and of the next
+            keyframe, or None for the last group
+
+        Raises:
+            ValueError: If there is no keyframe at or before the time
+
+        """
+        i = bisect.bisect_right(self._times, time)
+        if not i:
+            raise ValueError(f"no keyframe at or before {time}")
+        return self._times[i - 1], self._times[i] if i < len(self._times) else None
+
+    def seek(self, time: float) -> tuple[float, float]:
+        """
+        Plan a frame-accurate seek to a time.
+
+        Args:
+            time: The time in seconds
+
+        Returns:
+            The time of the keyframe at or before `time`, to pass as the
+            ``ss`` of the input, and the time left from there to `time`, to
+            pass as the ``ss`` of the output, which decodes and drops the
+            frames in between; 0 if `time` is on a keyframe
+
+        Raises:
+            ValueError: If there is no keyframe at or before the time
+
+        """
+        start, _ = self.gop(time)
+        return start, round(time - start, 6)
+
+
+def _stamp(filename: str | Path) -> tuple[int, int]:
+    """
+    Identify the version of a file.
+
+    Args:
+        filename: The file
+
+    Returns:
+        Its size and modification time in nanoseconds
+
+    """
+    stat = os.stat(filename)
+    return stat.st_size, stat.st_mtime_ns
+
+
+def _native(values: array) -> array:
+    """
+    Convert an array between native and little-endian byte order, in place.
+
+    Args:
+        values: The array
+
+    Returns:
+        The array
+
+    """
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values
+
+
+def _write_sidecar(
+    path: Path, stamp: tuple[int, int], stream: str, index: KeyframeIndex
+) -> None:
+    """
+    Store an index in a sidecar file, replacing it atomically.
+
+    Args:
+        path: The sidecar file
+        stamp: The size and modification time of the media file
+        stream: The stream specifier the index was built for
+        index: The index
+
+    """
+    name = stream.encode()
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    try:
+        with open(tmp, "wb") as f:
+            f.write(_HEADER.pack(_MAGIC, _VERSION, *stamp, len(name), len(index)))
+            f.write(name)
+            for values in (index.pts_time, index.pos, index.keyframe):
+                _native(array(values.typecode, values)).tofile(f)
+        os.replace(tmp, path)
+    finally:
+        if tmp.exists():
+            tmp.unlink()
+
+
+def _read_sidecar(
+    path: Path, stamp: tuple[int, int], stream: str
+) -> KeyframeIndex | None:
+    """
+    Load an index from a sidecar file, if it is up to date.
+
+    Args:
+        path: The sidecar file
+        stamp: The size and modification time of the media file
+        stream: The stream specifier the index is needed for
+
+    Returns:
+        The index, or None if the file is missing, invalid, or was built for
+        another version of the media file or another stream
+
+    """
+    try:
+        with open(path, "rb") as f:
+            magic, version, size, mtime_ns, name_length, count = _HEADER.unpack(
+                f.read(_HEADER.size)
+            )
+            if (magic, version, (size, mtime_ns)) != (_MAGIC, _VERSION, stamp):
+                return None
+            if f.read(name_length) != stream.encode():
+                return None
+            arrays = []
+            for typecode in "dqB":
+                values = array(typecode)
+                values.fromfile(f, count)
+                arrays.append(_native(values))
+    except (OSError, EOFError, struct.error):
+        return None
+    return KeyframeIndex(*arrays)
+
+
+def _build_index(filename: str | Path, stream: str, cmd: str) -> KeyframeIndex:
+    """
+    Run ffprobe and index the keyframes of a stream.
+
+    Args:
+        filename: The media file
+        stream: The stream specifier of the stream to index
+        cmd: Path or name of the ffprobe executable
+
+    Returns:
+        The index
+
+    """
+    return KeyframeIndex.from_packets(
+        iter_packets(
+            filename,
+            cmd=cmd,
+            select_streams=stream,
+            show_entries="packet=pts_time,pos,flags",
+        )
+    )
+
+
+def keyframe_index(
+    filename: str | Path,
+    *,
+    stream: str = "v:0",
+    sidecar: bool | str | Path = False,
+    cmd: str = "ffprobe",
+) -> KeyframeIndex:
+    """
+    Index the keyframes of a stream of a media file.
+
+    ffprobe is run with ``-select_streams`` and ``-show_entries
+    packet=pts_time,pos,flags``, and its output is streamed into the index, so
+    that memory use stays proportional to the compact index. With a sidecar,
+    the index is stored in a file, and read back instead of running ffprobe
+    again, as long as the media file keeps its size and modification time.
+
+    Args:
+        filename: Path to the media file to index
+        stream: The stream specifier of the stream to index
+        sidecar: Where the index is stored; True for the media file's name with
+            `SIDECAR_SUFFIX` appended, False to not store it
+        cmd: Path or name of the ffprobe executable
+
+    Returns:
+        The index
+
+    Raises:
+        FFMpegExecuteError: If ffprobe returns a non-zero exit code
+
+    Example:
+        ```python
+        index = keyframe_index("video.mp4", sidecar=True)
+        keyframe = index.keyframe_before(60)
+        print(keyframe.pts_time, keyframe.pos)
+        ```
+
+    """
+    path: Path | None = None
+    if sidecar is True:
+        path = Path(f"{filename}{SIDECAR_SUFFIX}")
+    elif not isinstance(sidecar, bool):
+        path = Path(sidecar)
+
+    if path is None:
+        return _build_index(filename, stream, cmd)
+
+    stamp = _stamp(filename)
+    index = _read_sidecar(path, stamp, stream)
+    if index is None:
+        index = _build_index(filename, stream, cmd)
+        try:
+            _write_sidecar(path, stamp, stream, index)
+        except OSError:
+            # NOTE: e.g. a read-only directory, the index is still usable
+            logger.warning("Could not write keyframe index to %s", path)
+    return index
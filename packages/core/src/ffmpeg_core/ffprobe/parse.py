@@ -2,9 +2,12 @@
 
 # !/usr/bin/env python3
 
+import functools
 import json
 import types
-from dataclasses import is_dataclass
+import xml.etree.ElementTree as ET
+from collections.abc import Callable
+from dataclasses import dataclass, fields, is_dataclass
 from typing import (
     Any,
     TypeGuard,
@@ -17,7 +20,6 @@ from typing import (
 )
 
 from .schema import ffprobeType, registered_types
-from .xml2json import xml_string_to_json
 
 T = TypeVar("T")
 
@@ -121,9 +123,219 @@ def _parse_obj_from_dict(data: Any, cls: type[T]) -> T | None:
     return cls(**kwargs)
 
 
+@dataclass(frozen=True)
+class _FieldPlan:
+    """How the fields of a schema dataclass are decoded."""
+
+    scalars: dict[str, Callable[[Any], Any]]
+    """
+    The converter of each scalar field, e.g. `int`
+    """
+
+    objects: dict[str, type[Any]]
+    """
+    The dataclass of each nested object field
+    """
+
+    tuples: dict[str, type[Any]]
+    """
+    The item dataclass of each tuple field
+    """
+
+    key_value: bool
+    """
+    Whether the dataclass is a key/value item, like `tagType`
+    """
+
+    defaults: dict[str, Any]
+    """
+    The value of each field missing from the input: None, or an empty tuple
+    """
+
+
+@functools.cache
+def _field_plan(cls: type[Any]) -> _FieldPlan:
+    """
+    Compile how the fields of a schema dataclass are decoded.
+
+    The type hints of a dataclass are resolved once, instead of for every
+    decoded object, which dominates parsing frames and packets.
+
+    Args:
+        cls: The dataclass
+
+    Returns:
+        The plan
+
+    """
+    scalars: dict[str, Callable[[Any], Any]] = {}
+    objects: dict[str, type[Any]] = {}
+    tuples: dict[str, type[Any]] = {}
+    for field_name, field_type in get_type_hints(cls).items():
+        actual_type = _get_actual_type(field_type)
+        if get_origin(actual_type) is tuple:
+            tuple_args = get_args(actual_type)
+            if tuple_args:
+                tuples[field_name] = _get_actual_type(tuple_args[0])
+        elif is_dataclass(actual_type):
+            objects[field_name] = actual_type
+        else:
+            scalars[field_name] = actual_type
+    return _FieldPlan(
+        scalars=scalars,
+        objects=objects,
+        tuples=tuples,
+        key_value=not objects and not tuples and set(scalars) == {"key", "value"},
+        defaults={
+            field.name: () if field.name in tuples else None for field in fields(cls)
+        },
+    )
+
+
+def _instantiate(cls: type[T], plan: _FieldPlan, values: dict[str, Any]) -> T:
+    """
+    Create a schema dataclass instance without calling its ``__init__``.
+
+    The ``__init__`` of a frozen dataclass assigns each of its fields through
+    ``object.__setattr__``, which takes most of the time of decoding frames and
+    packets. The schema dataclasses have no ``__post_init__`` and a default for
+    every field, so filling ``__dict__`` gives an equal instance.
+
+    Args:
+        cls: The dataclass
+        plan: The plan of the dataclass
+        values: The decoded fields
+
+    Returns:
+        The instance
+
+    """
+    obj = object.__new__(cls)
+    obj.__dict__.update(plan.defaults)
+    obj.__dict__.update(values)
+    return obj
+
+
+def _decode_element(element: ET.Element, cls: type[T]) -> T:
+    """
+    Decode an ffprobe XML element into a dataclass instance.
+
+    This gives the same result as ``_parse_obj_from_dict(xml_to_dict(element), cls)``,
+    without building the intermediate dictionaries.
+
+    Args:
+        element: The XML element, e.g. a ``<frame>``
+        cls: The dataclass to decode into
+
+    Returns:
+        The decoded dataclass instance
+
+    """
+    plan = _field_plan(cls)
+    scalars = plan.scalars
+    kwargs: dict[str, Any] = {
+        name: scalars[name](value)
+        for name, value in element.attrib.items()
+        if name in scalars
+    }
+    if not len(element):
+        # NOTE: the common case of frames and packets, with attributes only
+        return _instantiate(cls, plan, kwargs)
+
+    children: dict[str, list[ET.Element]] = {}
+    for child in element:
+        children.setdefault(child.tag, []).append(child)
+    for field_name, field_type in plan.objects.items():
+        matches = children.get(field_name)
+        if matches is None:
+            continue
+        if len(matches) > 1:
+            # NOTE: matches what the dict based parser makes of repeated elements
+            kwargs[field_name] = field_type()
+        else:
+            kwargs[field_name] = _decode_element(matches[0], field_type)
+    for field_name, field_type in plan.tuples.items():
+        if field_name in children:
+            kwargs[field_name] = tuple(
+                _decode_element(child, field_type) for child in children[field_name]
+            )
+    return _instantiate(cls, plan, kwargs)
+
+
+def _decode_json(data: dict[str, Any], cls: type[T]) -> T:
+    """
+    Decode a section of ffprobe's JSON output into a dataclass instance.
+
+    ffprobe's JSON output flattens some sections of its XML output, after
+    which the schema is modeled: a list of sections stands for their container
+    (``"streams": [...]`` for ``<streams><stream/>...</streams>``), and the
+    key/value items of tags and side data are plain members of their object.
+    Both are mapped back to the schema.
+
+    Args:
+        data: The JSON object
+        cls: The dataclass to decode into
+
+    Returns:
+        The decoded dataclass instance
+
+    """
+    plan = _field_plan(cls)
+    scalars = plan.scalars
+    kwargs: dict[str, Any] = {
+        name: scalars[name](value)
+        for name, value in data.items()
+        if name in scalars and value is not None
+    }
+    for field_name, field_type in plan.objects.items():
+        value = data.get(field_name)
+        if isinstance(value, list):
+            kwargs[field_name] = _decode_json_container(value, field_type)
+        elif value is not None:
+            kwargs[field_name] = _decode_json(value, field_type)
+    for field_name, field_type in plan.tuples.items():
+        value = data.get(field_name)
+        if value is not None:
+            kwargs[field_name] = tuple(_decode_json(item, field_type) for item in value)
+        elif _field_plan(field_type).key_value:
+            kwargs[field_name] = tuple(
+                field_type(key=key, value=str(item))
+                for key, item in data.items()
+                if not isinstance(item, dict | list)
+            )
+    return _instantiate(cls, plan, kwargs)
+
+
+def _decode_json_container(items: list[dict[str, Any]], cls: type[T]) -> T:
+    """
+    Decode a JSON list of sections into their container dataclass.
+
+    A container with several kinds of sections, such as ``packets_and_frames``,
+    is filled according to the ``type`` ffprobe gives each item, defaulting to
+    the first kind.
+
+    Args:
+        items: The JSON objects of the sections
+        cls: The container dataclass, e.g. `streamsType`
+
+    Returns:
+        The decoded container
+
+    """
+    item_types = _field_plan(cls).tuples
+    default = next(iter(item_types))
+    sections: dict[str, list[Any]] = {field_name: [] for field_name in item_types}
+    for item in items:
+        field_name = item.get("type")
+        if field_name not in sections:
+            field_name = default
+        sections[field_name].append(_decode_json(item, item_types[field_name]))
+    return cls(**{field_name: tuple(value) for field_name, value in sections.items()})
+
+
 def parse_ffprobe(xml_string: str) -> ffprobeType:
     """
-    Parse ffprobe XML output into ffprobeType dataclass using JSON dict.
+    Parse ffprobe XML output into ffprobeType dataclass.
 
     Args:
         xml_string: The XML string to parse
@@ -132,8 +344,19 @@ def parse_ffprobe(xml_string: str) -> ffprobeType:
         The parsed ffprobeType instance
 
     """
-    json_str = xml_string_to_json(xml_string)
-    json_dict = json.loads(json_str)
-    # The root key is 'ffprobe'
-    root_data = json_dict.get("ffprobe", json_dict)
-    return _parse_obj_from_dict(root_data, ffprobeType) or ffprobeType()
+    return _decode_element(ET.fromstring(xml_string), ffprobeType)
+
+
+def parse_ffprobe_json(json_string: str) -> ffprobeType:
+    """
+    Parse ffprobe JSON output (``-of json``) into ffprobeType dataclass.
+
+    Args:
+        json_string: The JSON string to parse, e.g. the output of `probe` dumped
+            again
+
+    Returns:
+        The parsed ffprobeType instance
+
+    """
+    return _decode_json(json.loads(json_string), ffprobeType)
@@ -15,6 +15,7 @@ from typing import Any
 from ..exceptions import FFMpegExecuteError
 from ..utils.escaping import convert_kwargs_to_cmd_line_args
 from ..utils.run import command_line
+from .cache import ProbeCache
 from .parse import parse_ffprobe
 from .schema import ffprobeType
 
@@ -149,6 +150,7 @@ def probe(
     show_error: bool = False,
     cmd: str = "ffprobe",
     timeout: int | None = None,
+    cache: ProbeCache | None = None,
     **kwargs: Any,
 ) -> dict[str, Any]:
     """
@@ -175,6 +177,8 @@ def probe(
         show_chapters: Show the chapters
         show_format: Show the format
         show_error: Show the error
+        cache: The cache of earlier results to use, if any. A file is probed
+            again only if it, or the options of the probe, changed.
         **kwargs: Additional arguments to pass to ffprobe as command line parameters
             (e.g., loglevel="quiet", skip_frame="nokey")
 
@@ -193,24 +197,28 @@ def probe(
         ```
 
     """
-    return json.loads(
-        _probe(
-            filename,
-            show_program_version=show_program_version,
-            show_library_versions=show_library_versions,
-            show_pixel_formats=show_pixel_formats,
-            show_packets=show_packets,
-            show_frames=show_frames,
-            show_programs=show_programs,
-            show_streams=show_streams,
-            show_chapters=show_chapters,
-            show_format=show_format,
-            show_error=show_error,
-            cmd=cmd,
-            timeout=timeout,
-            **kwargs,
-        )
-    )
+    options: dict[str, Any] = {
+        "show_program_version": show_program_version,
+        "show_library_versions": show_library_versions,
+        "show_pixel_formats": show_pixel_formats,
+        "show_packets": show_packets,
+        "show_frames": show_frames,
+        "show_programs": show_programs,
+        "show_streams": show_streams,
+        "show_chapters": show_chapters,
+        "show_format": show_format,
+        "show_error": show_error,
+        "cmd": cmd,
+        "format": "json",
+        **kwargs,
+    }
+
+    def run() -> str:
+        return _probe(filename, timeout=timeout, **options)
+
+    if cache is None:
+        return json.loads(run())
+    return cache.get_or_probe(filename, options, run, json.loads)
 
 
 def probe_obj(
@@ -228,6 +236,7 @@ def probe_obj(
     show_error: bool = False,
     cmd: str = "ffprobe",
     timeout: int | None = None,
+    cache: ProbeCache | None = None,
     **kwargs: Any,
 ) -> ffprobeType | None:
     """
@@ -254,6 +263,8 @@ def probe_obj(
         show_chapters: Show the chapters
         show_format: Show the format
         show_error: Show the error
+        cache: The cache of earlier results to use, if any. A file is probed
+            again only if it, or the options of the probe, changed.
         **kwargs: Additional arguments to pass to ffprobe as command line parameters
             (e.g., loglevel="quiet", skip_frame="nokey")
 
@@ -272,21 +283,25 @@ def probe_obj(
         ```
 
     """
-    xml = _probe(
-        filename,
-        show_program_version=show_program_version,
-        show_library_versions=show_library_versions,
-        show_pixel_formats=show_pixel_formats,
-        show_packets=show_packets,
-        show_frames=show_frames,
-        show_programs=show_programs,
-        show_streams=show_streams,
-        show_chapters=show_chapters,
-        show_format=show_format,
-        show_error=show_error,
-        cmd=cmd,
-        timeout=timeout,
-        format="xml",
+    options: dict[str, Any] = {
+        "show_program_version": show_program_version,
+        "show_library_versions": show_library_versions,
+        "show_pixel_formats": show_pixel_formats,
+        "show_packets": show_packets,
+        "show_frames": show_frames,
+        "show_programs": show_programs,
+        "show_streams": show_streams,
+        "show_chapters": show_chapters,
+        "show_format": show_format,
+        "show_error": show_error,
+        "cmd": cmd,
+        "format": "xml",
         **kwargs,
-    )
-    return parse_ffprobe(xml)
+    }
+
+    def run() -> str:
+        return _probe(filename, timeout=timeout, **options)
+
+    if cache is None:
+        return parse_ffprobe(run())
+    return cache.get_or_probe(filename, options, run, parse_ffprobe)
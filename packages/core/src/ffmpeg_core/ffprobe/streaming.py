@@ -0,0 +1,236 @@
+"""
+Streaming the packets and frames of a media file from ffprobe.
+
+With ``show_packets`` or ``show_frames``, `probe` and `probe_obj` hold all of
+ffprobe's output, and several converted copies of it, in memory at once. This
+module provides `iter_packets` and `iter_frames`, which parse ffprobe's XML
+output incrementally and yield one `packetType` or `frameType` at a time, as
+soon as ffprobe writes it, in constant memory.
+"""
+
+import logging
+import subprocess
+import threading
+import xml.etree.ElementTree as ET
+from collections.abc import Iterator
+from pathlib import Path
+from typing import IO, Any
+
+from ..exceptions import FFMpegExecuteError
+from ..utils.escaping import convert_kwargs_to_cmd_line_args
+from ..utils.run import command_line
+from ..utils.stderr import StderrCapture
+from .parse import _decode_element
+from .schema import frameType, packetType, subtitleType
+
+logger = logging.getLogger(__name__)
+
+SECTION_TYPES: dict[str, type[Any]] = {
+    "packet": packetType,
+    "frame": frameType,
+    "subtitle": subtitleType,
+}
+"""
+The dataclass each streamed XML element is parsed into, by tag
+"""
+
+SECTION_DEPTH = 2
+"""
+The depth of streamed elements, e.g. ``<ffprobe><packets><packet>``
+"""
+
+
+def _drain(pipe: IO[bytes], capture: StderrCapture) -> threading.Thread:
+    """
+    Start a thread reading a pipe into a capture until its end.
+
+    Args:
+        pipe: The pipe
+        capture: The capture
+
+    Returns:
+        The started thread
+
+    """
+
+    def read() -> None:
+        try:
+            while chunk := pipe.read(4096):
+                capture.append(chunk)
+        except (OSError, ValueError):
+            logger.debug("I/O error while reading ffprobe stderr")
+
+    thread = threading.Thread(target=read, daemon=True)
+    thread.start()
+    return thread
+
+
+def _iter_sections(
+    filename: str | Path,
+    *,
+    show_packets: bool,
+    show_frames: bool,
+    cmd: str,
+    read_size: int,
+    kwargs: dict[str, Any],
+) -> Iterator[Any]:
+    """
+    Run ffprobe and yield its packets and frames one at a time.
+
+    Args:
+        filename: The media file
+        show_packets: Whether ffprobe lists the packets
+        show_frames: Whether ffprobe lists the frames
+        cmd: Path or name of the ffprobe executable
+        read_size: The maximum number of bytes read from ffprobe at once
+        kwargs: Additional arguments to pass to ffprobe
+
+    Yields:
+        The parsed packets, frames and subtitles, in ffprobe's order
+
+    Raises:
+        FFMpegExecuteError: If ffprobe returns a non-zero exit code
+
+    """
+    args = [
+        cmd,
+        *(["-show_packets"] if show_packets else []),
+        *(["-show_frames"] if show_frames else []),
+        "-of",
+        "xml",
+    ]
+    args += convert_kwargs_to_cmd_line_args(kwargs)
+    args += [str(filename)]
+
+    logger.info("Running ffprobe command: %s", command_line(args))
+    p = subprocess.Popen(args, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    assert p.stdout is not None and p.stderr is not None
+    # NOTE: only the end of stderr is kept, where ffprobe reports its error
+    stderr = StderrCapture(head=4096, tail=65536)
+    stderr_thread = _drain(p.stderr, stderr)
+
+    parser = ET.XMLPullParser(events=("start", "end"))
+    parents: list[ET.Element] = []
+    try:
+        while chunk := p.stdout.read1(read_size):
+            parser.feed(chunk)
+            for event, element in parser.read_events():
+                assert isinstance(element, ET.Element)
+                if event == "start":
+                    parents.append(element)
+                    continue
+
+                parents.pop()
+                if len(parents) == SECTION_DEPTH and element.tag in SECTION_TYPES:
+                    # NOTE: detached once parsed, so the tree never grows
+                    parents[-1].remove(element)
+                    yield _decode_element(element, SECTION_TYPES[element.tag])
+        retcode = p.wait()
+    finally:
+        if p.poll() is None:
+            # the caller stopped early
+            p.terminate()
+            p.wait()
+        p.stdout.close()
+        stderr_thread.join()
+        p.stderr.close()
+
+    if retcode != 0:
+        raise FFMpegExecuteError(
+            retcode=retcode,
+            cmd=command_line(args),
+            stdout=b"",
+            stderr=stderr.getvalue(),
+        )
+
+
+def iter_packets(
+    filename: str | Path,
+    *,
+    cmd: str = "ffprobe",
+    read_size: int = 65536,
+    **kwargs: Any,
+) -> Iterator[packetType]:
+    """
+    Yield the packets of a media file one at a time, as ffprobe reads them.
+
+    Unlike ``probe_obj(show_packets=True)``, ffprobe's output is never held in
+    memory as a whole, so memory use does not grow with the length of the file,
+    and the first packet is available as soon as ffprobe writes it. Stopping
+    the iteration early terminates ffprobe.
+
+    Args:
+        filename: Path to the media file to analyze
+        cmd: Path or name of the ffprobe executable
+        read_size: The maximum number of bytes read from ffprobe at once
+        **kwargs: Additional arguments to pass to ffprobe as command line parameters
+            (e.g., select_streams="v:0", read_intervals="%+60")
+
+    Yields:
+        The packets, in ffprobe's order
+
+    Raises:
+        FFMpegExecuteError: If ffprobe returns a non-zero exit code
+
+    Example:
+        ```python
+        for packet in iter_packets("video.mp4", select_streams="v:0"):
+            if packet.flags and "K" in packet.flags:
+                print(f"keyframe at {packet.pts_time}s")
+        ```
+
+    """
+    yield from _iter_sections(
+        filename,
+        show_packets=True,
+        show_frames=False,
+        cmd=cmd,
+        read_size=read_size,
+        kwargs=kwargs,
+    )
+
+
+def iter_frames(
+    filename: str | Path,
+    *,
+    cmd: str = "ffprobe",
+    read_size: int = 65536,
+    **kwargs: Any,
+) -> Iterator[frameType | subtitleType]:
+    """
+    Yield the frames of a media file one at a time, as ffprobe decodes them.
+
+    Unlike ``probe_obj(show_frames=True)``, ffprobe's output is never held in
+    memory as a whole, so memory use does not grow with the length of the file,
+    and the first frame is available as soon as ffprobe writes it. Stopping
+    the iteration early terminates ffprobe.
+
+    Args:
+        filename: Path to the media file to analyze
+        cmd: Path or name of the ffprobe executable
+        read_size: The maximum number of bytes read from ffprobe at once
+        **kwargs: Additional arguments to pass to ffprobe as command line parameters
+            (e.g., select_streams="v:0", read_intervals="%+60")
+
+    Yields:
+        The frames (and subtitles, which ffprobe lists among frames), in
+        ffprobe's order
+
+    Raises:
+        FFMpegExecuteError: If ffprobe returns a non-zero exit code
+
+    Example:
+        ```python
+        for frame in iter_frames("video.mp4", select_streams="v:0"):
+            print(frame.pict_type, frame.pts_time)
+        ```
+
+    """
+    yield from _iter_sections(
+        filename,
+        show_packets=False,
+        show_frames=True,
+        cmd=cmd,
+        read_size=read_size,
+        kwargs=kwargs,
+    )
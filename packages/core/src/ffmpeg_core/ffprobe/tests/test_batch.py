@@ -0,0 +1,151 @@
+import asyncio
+import json
+import subprocess
+import threading
+import time
+from pathlib import Path
+from typing import Any
+from unittest.mock import patch
+
+import pytest
+
+from ...exceptions import FFMpegExecuteError
+from .. import probe as probe_module
+from ..batch import ProbeResult, aprobe_many, probe_many
+from ..cache import ProbeCache
+
+
+class FakeProbe:
+    def __init__(self) -> None:
+        self.running = 0
+        self.peak = 0
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, filename: str, timeout: int | None = None, **_: Any) -> str:
+        with self.lock:
+            self.calls += 1
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+        try:
+            name = Path(filename).name
+            time.sleep(0.05 if name.startswith("slow") else 0.01)
+            if name.startswith("broken"):
+                raise FFMpegExecuteError(
+                    retcode=1, cmd="ffprobe", stdout=b"", stderr=b"invalid data"
+                )
+            if name.startswith("hang"):
+                raise subprocess.TimeoutExpired("ffprobe", timeout or 0)
+            return json.dumps({"format": {"filename": name}})
+        finally:
+            with self.lock:
+                self.running -= 1
+
+
+@pytest.fixture
+def fake_probe() -> Any:
+    fake = FakeProbe()
+    with patch.object(probe_module, "_probe", side_effect=fake):
+        yield fake
+
+
+def names(results: list[ProbeResult]) -> list[str]:
+    return [Path(result.filename).name for result in results]
+
+
+def test_probe_many(fake_probe: FakeProbe) -> None:
+    files = [f"{i}.mp4" for i in range(20)]
+
+    results = list(probe_many(files, concurrency=4))
+
+    assert sorted(names(results)) == sorted(files)
+    assert all(
+        result.info == {"format": {"filename": Path(result.filename).name}}
+        for result in results
+    )
+    assert fake_probe.peak == 4
+
+
+def test_errors(fake_probe: FakeProbe) -> None:
+    results = {
+        result.filename: result
+        for result in probe_many(["ok.mp4", "broken.mp4", "hang.mp4"], timeout=1)
+    }
+
+    assert results["ok.mp4"].error is None
+    assert isinstance(results["broken.mp4"].error, FFMpegExecuteError)
+    assert results["broken.mp4"].info is None
+    assert isinstance(results["hang.mp4"].error, subprocess.TimeoutExpired)
+
+
+def test_streams_results(fake_probe: FakeProbe) -> None:
+    results = probe_many(["slow.mp4", "fast.mp4"], concurrency=2)
+
+    # a result is yielded as soon as it completes
+    assert names([next(results)]) == ["fast.mp4"]
+    assert names([next(results)]) == ["slow.mp4"]
+
+
+def test_lazy_input(fake_probe: FakeProbe) -> None:
+    consumed = []
+
+    def files() -> Any:
+        for i in range(1000):
+            consumed.append(i)
+            yield f"{i}.mp4"
+
+    results = probe_many(files(), concurrency=2)
+    next(results)
+    results.close()
+
+    # only the files being probed are taken from the iterable
+    assert len(consumed) <= 3
+    assert fake_probe.calls <= 3
+
+
+def test_cache(fake_probe: FakeProbe, tmp_path: Path) -> None:
+    files = []
+    for i in range(5):
+        files.append(tmp_path / f"{i}.mp4")
+        files[-1].write_bytes(b"video")
+    cache = ProbeCache()
+
+    list(probe_many(files, cache=cache))
+    list(probe_many(files, cache=cache))
+
+    assert fake_probe.calls == 5
+    assert cache.stats.hits == 5
+
+
+def test_aprobe_many(fake_probe: FakeProbe) -> None:
+    files = [f"{i}.mp4" for i in range(20)] + ["broken.mp4"]
+
+    async def main() -> list[ProbeResult]:
+        return [result async for result in aprobe_many(files, concurrency=4)]
+
+    results = asyncio.run(main())
+
+    assert sorted(names(results)) == sorted(files)
+    assert [result.filename for result in results if result.error] == ["broken.mp4"]
+    assert fake_probe.peak == 4
+
+
+def test_invalid_concurrency() -> None:
+    with pytest.raises(ValueError):
+        next(probe_many(["a.mp4"], concurrency=0))
+
+
+def test_benchmark(fake_probe: FakeProbe) -> None:
+    files = [f"{i}.mp4" for i in range(40)]
+
+    start = time.perf_counter()
+    for filename in files:
+        probe_module.probe(filename)
+    serial = time.perf_counter() - start
+
+    start = time.perf_counter()
+    list(probe_many(files, concurrency=8))
+    concurrent = time.perf_counter() - start
+
+    # the wait on each process overlaps with the others
+    assert concurrent < serial / 2
@@ -0,0 +1,189 @@
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any
+from unittest.mock import patch
+
+import pytest
+
+from .. import probe as probe_module
+from ..cache import ProbeCache
+from ..probe import probe, probe_obj
+
+XML = """<?xml version="1.0" encoding="UTF-8"?>
+<ffprobe>
+    <format filename="video.mp4" nb_streams="1" format_name="mov" duration="5.000000"/>
+</ffprobe>
+"""
+
+
+@pytest.fixture
+def calls() -> Any:
+    calls: list[dict[str, Any]] = []
+
+    def fake_probe(filename: str, **options: Any) -> str:
+        calls.append(options)
+        if options["format"] == "xml":
+            return XML
+        return json.dumps({"format": {"filename": str(filename), "calls": len(calls)}})
+
+    with patch.object(probe_module, "_probe", side_effect=fake_probe):
+        yield calls
+
+
+@pytest.fixture
+def video(tmp_path: Path) -> Path:
+    path = tmp_path / "video.mp4"
+    path.write_bytes(b"video")
+    return path
+
+
+def test_hit(calls: list[dict[str, Any]], video: Path) -> None:
+    cache = ProbeCache()
+
+    first = probe(video, cache=cache)
+    second = probe(video, cache=cache)
+
+    assert first == second
+    assert len(calls) == 1
+    assert (cache.stats.hits, cache.stats.misses) == (1, 1)
+
+    # a cached dict cannot be changed through a result
+    second["format"].clear()
+    assert probe(video, cache=cache) == first
+
+
+def test_key(calls: list[dict[str, Any]], video: Path) -> None:
+    cache = ProbeCache()
+
+    probe(video, cache=cache)
+    probe(video, cache=cache, show_packets=True)
+    probe(video, cache=cache, select_streams="v:0")
+    assert len(calls) == 3
+
+    # a modified file is probed again
+    video.write_bytes(b"longer video")
+    probe(video, cache=cache)
+    assert len(calls) == 4
+    os.utime(video, ns=(0, 0))
+    probe(video, cache=cache)
+    assert len(calls) == 5
+
+    # without a cache, every call runs ffprobe
+    probe(video)
+    assert len(calls) == 6
+
+
+def test_probe_obj(calls: list[dict[str, Any]], video: Path) -> None:
+    cache = ProbeCache()
+
+    first = probe_obj(video, cache=cache)
+    assert first is not None and first.format is not None
+    assert probe_obj(video, cache=cache) is first
+    # the dict and dataclass results are cached apart
+    assert isinstance(probe(video, cache=cache), dict)
+    assert [options["format"] for options in calls] == ["xml", "json"]
+
+
+def test_eviction(calls: list[dict[str, Any]], tmp_path: Path) -> None:
+    cache = ProbeCache(max_entries=2)
+    paths = []
+    for name in "abc":
+        paths.append(tmp_path / name)
+        paths[-1].write_bytes(name.encode())
+        probe(paths[-1], cache=cache)
+
+    assert len(cache) == 2
+    assert cache.stats.evictions == 1
+    probe(paths[2], cache=cache)
+    probe(paths[0], cache=cache)
+    assert len(calls) == 4
+
+    with pytest.raises(ValueError):
+        ProbeCache(max_entries=0)
+
+
+def test_bypass_and_uncacheable(calls: list[dict[str, Any]], video: Path) -> None:
+    cache = ProbeCache()
+    probe(video, cache=cache)
+
+    cache.bypass = True
+    assert probe(video, cache=cache)["format"]["calls"] == 2
+    cache.bypass = False
+    assert probe(video, cache=cache)["format"]["calls"] == 2
+
+    probe("https://example.com/video.mp4", cache=cache)
+    probe("https://example.com/video.mp4", cache=cache)
+    assert cache.stats.uncacheable == 2
+    assert len(calls) == 4
+
+
+def test_disk(calls: list[dict[str, Any]], video: Path, tmp_path: Path) -> None:
+    path = tmp_path / "cache" / "probe.sqlite"
+    cache = ProbeCache(path=path)
+    probe(video, cache=cache)
+    probe_obj(video, cache=cache)
+    cache.close()
+
+    # a new process reads the results from disk
+    cache = ProbeCache(path=path)
+    probe(video, cache=cache)
+    assert probe_obj(video, cache=cache) is not None
+    probe(video, cache=cache)
+    assert len(calls) == 2
+    assert (cache.stats.disk_hits, cache.stats.hits) == (2, 1)
+
+    cache.clear()
+    probe(video, cache=cache)
+    assert len(calls) == 3
+    cache.close()
+
+
+def test_disk_eviction(calls: list[dict[str, Any]], tmp_path: Path) -> None:
+    path = tmp_path / "probe.sqlite"
+    paths = []
+    for name in "abc":
+        paths.append(tmp_path / name)
+        paths[-1].write_bytes(name.encode())
+        cache = ProbeCache(max_entries=1, path=path, max_disk_entries=2)
+        probe(paths[-1], cache=cache)
+        cache.close()
+
+    cache = ProbeCache(max_entries=1, path=path, max_disk_entries=2)
+    for p in reversed(paths):
+        probe(p, cache=cache)
+    # the oldest entry was evicted, across processes
+    assert (cache.stats.disk_hits, cache.stats.misses) == (2, 1)
+    cache.close()
+
+
+def test_threads(calls: list[dict[str, Any]], video: Path, tmp_path: Path) -> None:
+    cache = ProbeCache(path=tmp_path / "probe.sqlite")
+    probe(video, cache=cache)
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(probe(video, cache=cache)))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(results) == 8
+    assert len(calls) == 1
+    cache.close()
+
+
+def test_benchmark_hit(calls: list[dict[str, Any]], video: Path) -> None:
+    cache = ProbeCache()
+    probe(video, cache=cache)
+
+    start = time.perf_counter()
+    for _ in range(1000):
+        probe(video, cache=cache)
+    # a hit costs a stat and a copy, far from the tens of milliseconds of ffprobe
+    assert (time.perf_counter() - start) / 1000 < 0.001
@@ -0,0 +1,168 @@
+import os
+import time
+from array import array
+from collections.abc import Callable
+from pathlib import Path
+
+import pytest
+
+from ...conftest import requires_ffprobe
+from ..keyframes import SIDECAR_SUFFIX, Keyframe, KeyframeIndex, keyframe_index
+from ..probe import probe_obj
+from ..schema import packetType
+
+test_data = Path(__file__).parent / "test_probe"
+
+FAKE_FFPROBE = """
+    import os
+    import sys
+
+    with open(os.environ["FAKE_FFPROBE_LOG"], "a") as log:
+        log.write(" ".join(sys.argv[1:]) + "\\n")
+    out = sys.stdout
+    out.write('<?xml version="1.0" encoding="UTF-8"?>\\n<ffprobe>\\n<packets>\\n')
+    # a keyframe every 2s, in decoding order, with a B-frame after each I-frame
+    for i in (0, 2, 1, 3, 5, 4, 6, 7):
+        flags = "K__" if i % 4 == 0 else "___"
+        out.write(
+            f'<packet pts_time="{i * 0.5:.6f}" pos="{1000 * i}" flags="{flags}"/>\\n'
+        )
+    out.write('<packet pos="9000" flags="___"/>\\n')
+    out.write("</packets>\\n</ffprobe>\\n")
+    """
+
+
+@pytest.fixture
+def fake_ffprobe(make_fake_executable: Callable[..., str]) -> str:
+    return make_fake_executable(FAKE_FFPROBE, "fake_ffprobe")
+
+
+@pytest.fixture
+def video(tmp_path: Path) -> Path:
+    path = tmp_path / "video.mp4"
+    path.write_bytes(b"video")
+    return path
+
+
+def calls(tmp_path: Path) -> list[str]:
+    log = tmp_path / "fake_ffprobe.log"
+    return log.read_text().splitlines() if log.exists() else []
+
+
+def test_keyframe_index(fake_ffprobe: str, video: Path, tmp_path: Path) -> None:
+    index = keyframe_index(video, cmd=fake_ffprobe)
+
+    (args,) = calls(tmp_path)
+    assert "-select_streams v:0" in args
+    assert "-show_entries packet=pts_time,pos,flags" in args
+    # the packet without pts_time is left out, the others sorted by it
+    assert len(index) == 8
+    assert list(index.pts_time) == [i * 0.5 for i in range(8)]
+    assert list(index.keyframes) == [0.0, 2.0]
+    assert not (tmp_path / f"video.mp4{SIDECAR_SUFFIX}").exists()
+
+
+def test_lookups() -> None:
+    index = KeyframeIndex(
+        array("d", [0.0, 0.5, 1.0, 1.5, 2.0, 2.5]),
+        array("q", [0, 10, 20, 30, 40, -1]),
+        array("B", [1, 0, 1, 0, 0, 1]),
+    )
+
+    assert index.keyframe_before(1.7) == Keyframe(1.0, 20)
+    assert index.keyframe_before(1.0) == Keyframe(1.0, 20)
+    assert index.keyframe_before(-1) is None
+    assert index.keyframe_after(1.7) == Keyframe(2.5)
+    assert index.keyframe_after(3) is None
+    assert index.nearest_keyframe(1.7) == Keyframe(1.0, 20)
+    assert index.nearest_keyframe(2.0) == Keyframe(2.5)
+    assert index.gop(1.7) == (1.0, 2.5)
+    assert index.gop(2.6) == (2.5, None)
+    assert index.seek(1.7) == (1.0, 0.7)
+    assert index.seek(2.5) == (2.5, 0)
+    with pytest.raises(ValueError):
+        index.seek(-1)
+
+    with pytest.raises(ValueError):
+        KeyframeIndex(array("d", [0.0]), array("q"), array("B"))
+
+
+def test_sidecar(fake_ffprobe: str, video: Path, tmp_path: Path) -> None:
+    first = keyframe_index(video, sidecar=True, cmd=fake_ffprobe)
+    second = keyframe_index(video, sidecar=True, cmd=fake_ffprobe)
+
+    assert len(calls(tmp_path)) == 1
+    assert (tmp_path / f"video.mp4{SIDECAR_SUFFIX}").exists()
+    for name in ("pts_time", "pos", "keyframe", "keyframes"):
+        assert getattr(first, name) == getattr(second, name)
+
+    # another stream, or a modified file, is indexed again
+    keyframe_index(video, stream="v:1", sidecar=True, cmd=fake_ffprobe)
+    assert len(calls(tmp_path)) == 2
+    keyframe_index(video, stream="v:1", sidecar=True, cmd=fake_ffprobe)
+    assert len(calls(tmp_path)) == 2
+    os.utime(video, ns=(0, 0))
+    keyframe_index(video, stream="v:1", sidecar=True, cmd=fake_ffprobe)
+    assert len(calls(tmp_path)) == 3
+
+
+def test_sidecar_invalid(fake_ffprobe: str, video: Path, tmp_path: Path) -> None:
+    path = tmp_path / "index" / "video.idx"
+    path.parent.mkdir()
+    keyframe_index(video, sidecar=path, cmd=fake_ffprobe)
+    path.write_bytes(path.read_bytes()[:-4])
+
+    index = keyframe_index(video, sidecar=path, cmd=fake_ffprobe)
+
+    assert len(index) == 8
+    assert len(calls(tmp_path)) == 2
+    assert sorted(os.listdir(path.parent)) == ["video.idx"]
+
+
+def test_from_packets() -> None:
+    index = KeyframeIndex.from_packets(
+        [
+            packetType(pts_time=0.04, flags="__"),
+            packetType(pts_time=0.0, pos=48, flags="K_"),
+        ]
+    )
+
+    assert list(index.pos) == [48, -1]
+    assert index.keyframe_before(1) == Keyframe(0.0, 48)
+
+
+def test_benchmark() -> None:
+    count = 1_000_000
+    index = KeyframeIndex(
+        array("d", (i * 0.04 for i in range(count))),
+        array("q", range(count)),
+        array("B", (i % 250 == 0 for i in range(count))),
+    )
+    times = [i * 0.397 for i in range(100_000)]
+
+    start = time.perf_counter()
+    for t in times:
+        index.keyframe_before(t)
+    # a bisection of 4000 keyframes, not a scan of a million packets
+    assert time.perf_counter() - start < 2
+
+
+@requires_ffprobe
+def test_matches_probe_obj() -> None:
+    path = test_data / "test-5sec.mp4"
+
+    index = keyframe_index(path)
+
+    info = probe_obj(
+        path,
+        show_packets=True,
+        show_streams=False,
+        show_format=False,
+        select_streams="v:0",
+    )
+    assert info is not None and info.packets is not None
+    assert list(index.keyframes) == sorted(
+        packet.pts_time
+        for packet in info.packets.packet
+        if packet.flags and "K" in packet.flags and packet.pts_time is not None
+    )
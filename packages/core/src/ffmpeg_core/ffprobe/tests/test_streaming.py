@@ -0,0 +1,121 @@
+import time
+import tracemalloc
+from collections.abc import Callable
+from pathlib import Path
+
+import pytest
+
+from ...conftest import requires_ffprobe
+from ...exceptions import FFMpegExecuteError
+from ..probe import probe_obj
+from ..schema import frameType, packetType, subtitleType
+from ..streaming import iter_frames, iter_packets
+
+test_data = Path(__file__).parent / "test_probe"
+
+FAKE_FFPROBE = """
+    import os
+    import sys
+    import time
+
+    args = sys.argv[1:]
+    name = os.path.basename(args[-1])
+    out = sys.stdout
+    out.write('<?xml version="1.0" encoding="UTF-8"?>\\n<ffprobe>\\n')
+    if "-show_packets" in args:
+        out.write("    <packets>\\n")
+        for i in range(int(os.environ.get("FAKE_FFPROBE_COUNT", "3"))):
+            out.write(
+                f'        <packet codec_type="video" stream_index="0" pts="{i * 512}"'
+                f' pts_time="{i * 0.04:.6f}" size="{1000 + i}"'
+                f' flags="{"K__" if i % 25 == 0 else "___"}">\\n'
+                f'            <side_data_list><side_data type="A"/></side_data_list>\\n'
+                f"        </packet>\\n"
+            )
+            out.flush()
+            if name.startswith("slow"):
+                time.sleep(10)
+        out.write("    </packets>\\n")
+    if "-show_frames" in args:
+        out.write(
+            "    <frames>\\n"
+            '        <frame media_type="video" key_frame="1" pict_type="I"'
+            ' width="320" height="240"/>\\n'
+            '        <subtitle media_type="subtitle" pts="100"/>\\n'
+            "    </frames>\\n"
+        )
+    if name.startswith("broken"):
+        sys.stderr.write("Invalid data found when processing input\\n")
+        sys.exit(1)
+    out.write("</ffprobe>\\n")
+    """
+
+
+@pytest.fixture
+def fake_ffprobe(make_fake_executable: Callable[..., str]) -> str:
+    return make_fake_executable(FAKE_FFPROBE, "fake_ffprobe")
+
+
+def test_iter_packets(fake_ffprobe: str) -> None:
+    packets = list(iter_packets("video.mp4", cmd=fake_ffprobe))
+
+    assert len(packets) == 3
+    assert all(isinstance(packet, packetType) for packet in packets)
+    assert packets[1].pts == 512
+    assert packets[1].pts_time == 0.04
+    assert packets[0].flags == "K__"
+    assert packets[0].side_data_list is not None
+    assert packets[0].side_data_list.side_data[0].type == "A"  # type: ignore[index]
+
+
+def test_iter_frames(fake_ffprobe: str) -> None:
+    frame, subtitle = iter_frames("video.mp4", cmd=fake_ffprobe)
+
+    assert isinstance(frame, frameType)
+    assert (frame.width, frame.height, frame.pict_type) == (320, 240, "I")
+    assert isinstance(subtitle, subtitleType)
+    assert subtitle.pts == 100
+
+
+def test_first_result_is_streamed(fake_ffprobe: str) -> None:
+    start = time.perf_counter()
+    packets = iter_packets("slow.mp4", cmd=fake_ffprobe, read_size=1)
+
+    next(packets)
+    # ffprobe is still running, and is terminated when the iteration stops
+    assert time.perf_counter() - start < 5
+    packets.close()
+    assert time.perf_counter() - start < 10
+
+
+def test_error(fake_ffprobe: str) -> None:
+    with pytest.raises(FFMpegExecuteError) as excinfo:
+        list(iter_packets("broken.mp4", cmd=fake_ffprobe))
+
+    assert excinfo.value.retcode == 1
+    assert b"Invalid data" in excinfo.value.stderr
+
+
+def test_constant_memory(fake_ffprobe: str, monkeypatch: pytest.MonkeyPatch) -> None:
+    def peak(count: int) -> int:
+        monkeypatch.setenv("FAKE_FFPROBE_COUNT", str(count))
+        tracemalloc.start()
+        try:
+            for _ in iter_packets("video.mp4", cmd=fake_ffprobe, read_size=4096):
+                pass
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    # the parsed document would take about 5 MB
+    assert peak(3_000) < 1_000_000
+
+
+@requires_ffprobe
+def test_matches_probe_obj() -> None:
+    path = test_data / "test-5sec.mp4"
+
+    info = probe_obj(path, show_packets=True, show_streams=False, show_format=False)
+
+    assert info is not None and info.packets is not None
+    assert tuple(iter_packets(path)) == info.packets.packet
@@ -5,18 +5,174 @@ This module provides functionality to query the available FFmpeg codecs,
 decoders, and encoders on the system. It parses the output of FFmpeg's
 command-line tools to extract information about supported formats and
 capabilities.
+
+The results are memoized per FFmpeg binary, and queried again only when the
+binary changes, e.g. when it is upgraded.
 """
 
 import logging
+import os
+import re
+import shutil
 import subprocess
+import threading
+from collections.abc import Callable
 from dataclasses import dataclass
 from enum import Flag, auto
+from typing import Any, TypeVar
 
 from .exceptions import FFMpegExecuteError
+from .utils.frozendict import FrozenDict
 from .utils.run import command_line
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
+HARDWARE_SUFFIXES = (
+    "_amf",
+    "_cuvid",
+    "_d3d11va",
+    "_d3d12va",
+    "_dxva2",
+    "_mediacodec",
+    "_mf",
+    "_mmal",
+    "_nvenc",
+    "_omx",
+    "_qsv",
+    "_rkmpp",
+    "_v4l2m2m",
+    "_vaapi",
+    "_videotoolbox",
+    "_vulkan",
+)
+"""
+The name suffixes of the encoders and decoders backed by hardware
+"""
+
+# results by (resolved binary path, query), with the size and modification
+# time of the binary they were computed for
+_cache: dict[tuple[str, str], tuple[tuple[int, int], Any]] = {}
+_cache_lock = threading.Lock()
+
+
+def _binary_stamp(cmd: str) -> tuple[str, tuple[int, int]] | None:
+    """
+    Identify the version of an FFmpeg binary on disk.
+
+    Args:
+        cmd: Path or name of the ffmpeg executable
+
+    Returns:
+        The resolved path of the binary, and its size and modification time
+        in nanoseconds, or None if it is not found
+
+    """
+    path = shutil.which(cmd)
+    if path is None:
+        return None
+    # NOTE: resolving symlinks catches a package manager switching versions
+    path = os.path.realpath(path)
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return path, (stat.st_size, stat.st_mtime_ns)
+
+
+def _memoize(cmd: str, query: str, compute: Callable[[], T], refresh: bool) -> T:
+    """
+    Compute a result for an FFmpeg binary, or reuse the one computed before.
+
+    A result is reused as long as the binary keeps its resolved path, size
+    and modification time, which an upgrade changes along with its version.
+    Errors are not memoized.
+
+    Args:
+        cmd: Path or name of the ffmpeg executable
+        query: The name of the result
+        compute: Computes the result
+        refresh: Whether to compute the result again
+
+    Returns:
+        The result
+
+    """
+    binary = _binary_stamp(cmd)
+    if binary is None:
+        # NOTE: running it reports the missing binary
+        return compute()
+
+    path, stamp = binary
+    with _cache_lock:
+        entry = _cache.get((path, query))
+    if entry is not None and entry[0] == stamp and not refresh:
+        return entry[1]
+
+    value = compute()
+    with _cache_lock:
+        _cache[(path, query)] = (stamp, value)
+    return value
+
+
+def clear_cache() -> None:
+    """
+    Forget every memoized result, e.g. after changing FFmpeg's configuration.
+    """
+    with _cache_lock:
+        _cache.clear()
+
+
+def _run(cmd: str, option: str, hide_banner: bool = True) -> tuple[str, str]:
+    """
+    Run an FFmpeg listing command, e.g. ``ffmpeg -codecs``.
+
+    Args:
+        cmd: Path or name of the ffmpeg executable
+        option: The listing option
+        hide_banner: Whether FFmpeg omits its version banner from stderr
+
+    Returns:
+        The standard output and error of FFmpeg
+
+    Raises:
+        FFMpegExecuteError: If the ffmpeg command fails
+
+    """
+    args = [cmd, *(["-hide_banner"] if hide_banner else []), option]
+    logger.info("Running ffmpeg command: %s", command_line(args))
+    p = subprocess.Popen(args, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    out, err = p.communicate()
+
+    retcode = p.poll()
+    if p.returncode != 0:
+        raise FFMpegExecuteError(
+            retcode=retcode, cmd=command_line(args), stdout=out, stderr=err
+        )
+    return out.decode("utf-8"), err.decode("utf-8", errors="replace")
+
+
+def _codecs_output(cmd: str, refresh: bool) -> tuple[str, str]:
+    """
+    Run ``ffmpeg -codecs`` once per binary.
+
+    Its output lists the codecs with their encoders and decoders, and its
+    banner gives the version, which is all `get_codecs` and
+    `get_capabilities` need.
+
+    Args:
+        cmd: Path or name of the ffmpeg executable
+        refresh: Whether to run FFmpeg again
+
+    Returns:
+        The standard output and error of FFmpeg
+
+    """
+    return _memoize(
+        cmd, "-codecs", lambda: _run(cmd, "-codecs", hide_banner=False), refresh
+    )
+
 
 class CodecFlags(Flag):
     """
@@ -97,49 +253,74 @@ def parse_codec_flags(flags: str) -> CodecFlags:
     return flags_enum
 
 
-def get_codecs() -> tuple[Codec, ...]:
+def _listing_lines(listing: str) -> list[str]:
     """
-    Query the system for all available FFmpeg codecs.
+    Split the output of an FFmpeg listing command into its entries.
 
-    This function calls `ffmpeg -codecs` and parses the output to create
-    a tuple of Codec objects representing all codecs available on the system.
+    Args:
+        listing: String output from e.g. the FFmpeg codecs command
 
     Returns:
-        A tuple of Codec objects with information about each codec
+        The lines after the header
+
+    """
+    lines = listing.strip().split("\n")
+    # Skip header lines until we find the separator
+    for i, line in enumerate(lines):
+        if line.startswith(" ------"):
+            return lines[i + 1 :]
+    return lines
 
-    Raises:
-        FFMpegExecuteError: If the ffmpeg command fails
 
+def parse_codecs(codecs: str) -> tuple[Codec, ...]:
     """
-    args = ["ffmpeg", "-hide_banner", "-codecs"]
-    logger.info("Running ffmpeg command: %s", command_line(args))
-    p = subprocess.Popen(args, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-    out, err = p.communicate()
+    Parse the output of ``ffmpeg -codecs`` into Codec objects.
 
-    retcode = p.poll()
-    if p.returncode != 0:
-        raise FFMpegExecuteError(
-            retcode=retcode, cmd=command_line(args), stdout=out, stderr=err
-        )
+    Args:
+        codecs: String output from the FFmpeg codecs command
 
-    codecs = out.decode("utf-8")
-    codecs_lines = codecs.strip().split("\n")
-    # Skip header lines until we find the separator
-    for i, line in enumerate(codecs_lines):
-        if line.startswith(" ------"):
-            codecs_lines = codecs_lines[i + 1 :]
-            break
+    Returns:
+        A tuple of Codec objects representing the listed codecs
+
+    """
     return tuple(
         Codec(
             name=parts[1],
             flags=parse_codec_flags(parts[0]),
             description=parts[2],
         )
-        for line in codecs_lines
+        for line in _listing_lines(codecs)
         for parts in [line.split(None, 3)]
     )
 
 
+def get_codecs(cmd: str = "ffmpeg", *, refresh: bool = False) -> tuple[Codec, ...]:
+    """
+    Query the system for all available FFmpeg codecs.
+
+    This function calls `ffmpeg -codecs` and parses the output to create
+    a tuple of Codec objects representing all codecs available on the system.
+    The result is memoized per binary, see `get_capabilities`.
+
+    Args:
+        cmd: Path or name of the ffmpeg executable
+        refresh: Whether to run FFmpeg again instead of reusing an earlier result
+
+    Returns:
+        A tuple of Codec objects with information about each codec
+
+    Raises:
+        FFMpegExecuteError: If the ffmpeg command fails
+
+    """
+    return _memoize(
+        cmd,
+        "codecs",
+        lambda: parse_codecs(_codecs_output(cmd, refresh)[0]),
+        refresh,
+    )
+
+
 class CoderFlags(Flag):
     """
     Flag enumeration representing the capabilities of a coder (encoder/decoder).
@@ -229,29 +410,28 @@ def get_coders(codes: str) -> tuple[Coder, ...]:
         A tuple of Coder objects representing the available encoders/decoders
 
     """
-    codecs_lines = codes.strip().split("\n")
-    # Skip header lines until we find the separator
-    for i, line in enumerate(codecs_lines):
-        if line.startswith(" ------"):
-            codecs_lines = codecs_lines[i + 1 :]
-            break
     return tuple(
         Coder(
             name=parts[1],
             flags=parse_coder_flags(parts[0]),
             description=parts[2],
         )
-        for line in codecs_lines
+        for line in _listing_lines(codes)
         for parts in [line.split(None, 3)]
     )
 
 
-def get_decoders() -> tuple[Coder, ...]:
+def get_decoders(cmd: str = "ffmpeg", *, refresh: bool = False) -> tuple[Coder, ...]:
     """
     Query the system for all available FFmpeg decoders.
 
     This function calls `ffmpeg -decoders` and parses the output to create
     a tuple of Coder objects representing all decoders available on the system.
+    The result is memoized per binary, and shared between calls.
+
+    Args:
+        cmd: Path or name of the ffmpeg executable
+        refresh: Whether to run FFmpeg again instead of reusing an earlier result
 
     Returns:
         A tuple of Coder objects with information about each decoder
@@ -260,27 +440,22 @@ def get_decoders() -> tuple[Coder, ...]:
         FFMpegExecuteError: If the ffmpeg command fails
 
     """
-    args = ["ffmpeg", "-hide_banner", "-decoders"]
-    logger.info("Running ffmpeg command: %s", command_line(args))
-    p = subprocess.Popen(args, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-    out, err = p.communicate()
-
-    retcode = p.poll()
-    if p.returncode != 0:
-        raise FFMpegExecuteError(
-            retcode=retcode, cmd=command_line(args), stdout=out, stderr=err
-        )
-
-    decoders = out.decode("utf-8")
-    return get_coders(decoders)
+    return _memoize(
+        cmd, "-decoders", lambda: get_coders(_run(cmd, "-decoders")[0]), refresh
+    )
 
 
-def get_encoders() -> tuple[Coder, ...]:
+def get_encoders(cmd: str = "ffmpeg", *, refresh: bool = False) -> tuple[Coder, ...]:
     """
     Query the system for all available FFmpeg encoders.
 
     This function calls `ffmpeg -encoders` and parses the output to create
     a tuple of Coder objects representing all encoders available on the system.
+    The result is memoized per binary, and shared between calls.
+
+    Args:
+        cmd: Path or name of the ffmpeg executable
+        refresh: Whether to run FFmpeg again instead of reusing an earlier result
 
     Returns:
         A tuple of Coder objects with information about each encoder
@@ -289,16 +464,264 @@ def get_encoders() -> tuple[Coder, ...]:
         FFMpegExecuteError: If the ffmpeg command fails
 
     """
-    args = ["ffmpeg", "-hide_banner", "-encoders"]
-    logger.info("Running ffmpeg command: %s", command_line(args))
-    p = subprocess.Popen(args, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-    out, err = p.communicate()
+    return _memoize(
+        cmd, "-encoders", lambda: get_coders(_run(cmd, "-encoders")[0]), refresh
+    )
 
-    retcode = p.poll()
-    if p.returncode != 0:
-        raise FFMpegExecuteError(
-            retcode=retcode, cmd=command_line(args), stdout=out, stderr=err
-        )
 
-    encoders = out.decode("utf-8")
-    return get_coders(encoders)
+@dataclass(frozen=True)
+class Capabilities:
+    """
+    An index of the codecs, encoders and decoders of an FFmpeg binary.
+
+    Every lookup is a dictionary lookup. See `get_capabilities`.
+    """
+
+    version: str | None
+    """
+    The version of FFmpeg, e.g. ``6.1.1``, if its banner gives it
+    """
+
+    codecs: FrozenDict[str, Codec]
+    """
+    The codecs, by name
+    """
+
+    encoders: FrozenDict[str, str]
+    """
+    The codec of each encoder, by encoder name, e.g. ``libx264`` to ``h264``
+    """
+
+    decoders: FrozenDict[str, str]
+    """
+    The codec of each decoder, by decoder name
+    """
+
+    hardware_encoders: FrozenDict[str, tuple[str, ...]]
+    """
+    The encoders backed by hardware of each codec, e.g. ``h264`` to
+    ``("h264_nvenc", "h264_qsv")``, for codecs that have some
+    """
+
+    hardware_decoders: FrozenDict[str, tuple[str, ...]]
+    """
+    The decoders backed by hardware of each codec, for codecs that have some
+    """
+
+    def has_encoder(self, name: str) -> bool:
+        """
+        Check if an encoder is available.
+
+        Args:
+            name: The name of the encoder, e.g. ``libx264``
+
+        Returns:
+            True if the encoder is available
+
+        """
+        return name in self.encoders
+
+    def has_decoder(self, name: str) -> bool:
+        """
+        Check if a decoder is available.
+
+        Args:
+            name: The name of the decoder
+
+        Returns:
+            True if the decoder is available
+
+        """
+        return name in self.decoders
+
+
+_FILTER = re.compile(r"^\s*\S+\s+(\S+)\s+\S*->\S*(\s|$)")
+_FORMAT_LEGEND = re.compile(r"^ (D\.+) = ")
+_CODER_LIST = re.compile(r"\((de|en)coders: ([^)]*)\)")
+_VERSION = re.compile(r"version (\S+)")
+
+
+def parse_capabilities(codecs: str, banner: str = "") -> Capabilities:
+    """
+    Build a capability index from the output of ``ffmpeg -codecs``.
+
+    A codec lists its encoders and decoders when their names differ from its
+    own, e.g. ``(encoders: libx264 h264_nvenc )``; otherwise its flags tell
+    whether its own name is an encoder and a decoder.
+
+    Args:
+        codecs: The standard output of the FFmpeg codecs command
+        banner: The standard error of the command, with FFmpeg's version banner
+
+    Returns:
+        The index
+
+    """
+    encoders: dict[str, str] = {}
+    decoders: dict[str, str] = {}
+    codec_list = parse_codecs(codecs)
+    for codec, line in zip(codec_list, _listing_lines(codecs)):
+        listed = {kind: names.split() for kind, names in _CODER_LIST.findall(line)}
+        if CodecFlags.encoding in codec.flags:
+            for name in listed.get("en", [codec.name]):
+                encoders.setdefault(name, codec.name)
+        if CodecFlags.decoding in codec.flags:
+            for name in listed.get("de", [codec.name]):
+                decoders.setdefault(name, codec.name)
+
+    def hardware(coders: dict[str, str]) -> FrozenDict[str, tuple[str, ...]]:
+        variants: dict[str, tuple[str, ...]] = {}
+        for name, codec in coders.items():
+            if name.endswith(HARDWARE_SUFFIXES):
+                variants[codec] = (*variants.get(codec, ()), name)
+        return FrozenDict(variants)
+
+    version = _VERSION.search(banner)
+    return Capabilities(
+        version=version.group(1) if version else None,
+        codecs=FrozenDict({codec.name: codec for codec in codec_list}),
+        encoders=FrozenDict(encoders),
+        decoders=FrozenDict(decoders),
+        hardware_encoders=hardware(encoders),
+        hardware_decoders=hardware(decoders),
+    )
+
+
+def get_capabilities(cmd: str = "ffmpeg", *, refresh: bool = False) -> Capabilities:
+    """
+    Query the codecs, encoders and decoders of an FFmpeg binary, as an index.
+
+    The index is built from a single ``ffmpeg -codecs`` run, whose output
+    lists the encoders and decoders of each codec, and which `get_codecs`
+    shares. It is memoized per binary, and rebuilt when the binary's resolved
+    path, size or modification time changes, as an upgrade does.
+
+    Args:
+        cmd: Path or name of the ffmpeg executable
+        refresh: Whether to run FFmpeg again instead of reusing an earlier result
+
+    Returns:
+        The index
+
+    Raises:
+        FFMpegExecuteError: If the ffmpeg command fails
+
+    Example:
+        ```python
+        capabilities = get_capabilities()
+        if capabilities.hardware_encoders.get("h264"):
+            print("hardware H.264 encoding:", capabilities.hardware_encoders["h264"])
+        ```
+
+    """
+    return _memoize(
+        cmd,
+        "capabilities",
+        lambda: parse_capabilities(*_codecs_output(cmd, refresh)),
+        refresh,
+    )
+
+
+def parse_filter_names(filters: str) -> frozenset[str]:
+    """
+    Parse the output of ``ffmpeg -filters`` into filter names.
+
+    Args:
+        filters: String output from the FFmpeg filters command
+
+    Returns:
+        The names of the filters
+
+    """
+    return frozenset(
+        match.group(1)
+        for line in filters.splitlines()
+        if (match := _FILTER.match(line)) is not None
+    )
+
+
+def get_filter_names(cmd: str = "ffmpeg", *, refresh: bool = False) -> frozenset[str]:
+    """
+    Query the names of the filters of an FFmpeg binary.
+
+    The result is memoized per binary, see `get_capabilities`.
+
+    Args:
+        cmd: Path or name of the ffmpeg executable
+        refresh: Whether to run FFmpeg again instead of reusing an earlier result
+
+    Returns:
+        The names of the filters
+
+    Raises:
+        FFMpegExecuteError: If the ffmpeg command fails
+
+    """
+    return _memoize(
+        cmd,
+        "-filters",
+        lambda: parse_filter_names(_run(cmd, "-filters")[0]),
+        refresh,
+    )
+
+
+def parse_formats(formats: str) -> tuple[frozenset[str], frozenset[str]]:
+    """
+    Parse the output of ``ffmpeg -formats`` into muxer and demuxer names.
+
+    A format may have several comma separated names, e.g.
+    ``mov,mp4,m4a,3gp,3g2,mj2``, each of which can be given to ``-f``.
+
+    Args:
+        formats: String output from the FFmpeg formats command
+
+    Returns:
+        The names of the muxers, and of the demuxers
+
+    """
+    muxers: set[str] = set()
+    demuxers: set[str] = set()
+    # NOTE: the flags are fixed width columns, some blank, as many as in the
+    # legend, e.g. " D.. = Demuxing supported" (newer versions add devices)
+    width, listing = 2, False
+    for line in formats.splitlines():
+        legend = _FORMAT_LEGEND.match(line)
+        if legend is not None:
+            width = len(legend.group(1))
+        elif set(line.strip()) == {"-"}:
+            listing = True
+        if not listing or not line.startswith(" "):
+            continue
+        flags, names = line[1 : 1 + width], line[1 + width :].split()[:1]
+        if not names:
+            continue
+        if "E" in flags:
+            muxers.update(names[0].split(","))
+        if "D" in flags:
+            demuxers.update(names[0].split(","))
+    return frozenset(muxers), frozenset(demuxers)
+
+
+def get_formats(
+    cmd: str = "ffmpeg", *, refresh: bool = False
+) -> tuple[frozenset[str], frozenset[str]]:
+    """
+    Query the names of the muxers and demuxers of an FFmpeg binary.
+
+    Both come from a single ``ffmpeg -formats`` run, which also lists
+    devices. The result is memoized per binary, see `get_capabilities`.
+
+    Args:
+        cmd: Path or name of the ffmpeg executable
+        refresh: Whether to run FFmpeg again instead of reusing an earlier result
+
+    Returns:
+        The names of the muxers, and of the demuxers
+
+    Raises:
+        FFMpegExecuteError: If the ffmpeg command fails
+
+    """
+    return _memoize(
+        cmd, "-formats", lambda: parse_formats(_run(cmd, "-formats")[0]), refresh
+    )
@@ -1,17 +1,60 @@
+import os
+import time
+from collections.abc import Callable, Iterator
+from pathlib import Path
+
+import pytest
+
 from ..conftest import requires_ffmpeg
+from ..exceptions import FFMpegExecuteError
 from ..info import (
     Codec,
     CodecFlags,
     Coder,
     CoderFlags,
+    clear_cache,
+    get_capabilities,
     get_codecs,
     get_coders,
     get_decoders,
     get_encoders,
+    get_filter_names,
+    get_formats,
+    parse_capabilities,
     parse_codec_flags,
     parse_coder_flags,
+    parse_filter_names,
+    parse_formats,
 )
 
+CODECS = """\
+Codecs:
+ D..... = Decoding supported
+ -------
+ DEV.LS h264                 H.264 / AVC / MPEG-4 AVC / MPEG-4 part 10 (decoders: h264 h264_qsv h264_cuvid ) (encoders: libx264 libx264rgb h264_nvenc h264_qsv )
+ DEA.L. aac                  AAC (Advanced Audio Coding) (decoders: aac aac_fixed )
+ D.V.L. vp6                  On2 VP6
+ .EV.LS rawvideo             raw video
+"""
+
+FAKE_FFMPEG = f"""
+    import os
+    import sys
+
+    with open(os.environ["FAKE_FFMPEG_LOG"], "a") as log:
+        log.write(" ".join(sys.argv[1:]) + "\\n")
+    if os.environ.get("FAKE_FFMPEG_FAIL"):
+        sys.exit(1)
+    if "-hide_banner" not in sys.argv:
+        sys.stderr.write("ffmpeg version 6.1.1 Copyright (c) 2000-2023\\n")
+    if "-codecs" in sys.argv:
+        sys.stdout.write({CODECS!r})
+    else:
+        sys.stdout.write(
+            "Coders:\\n ------\\n V....D libx264 libx264 H.264 (codec h264)\\n"
+        )
+    """
+
 
 def test_parse_codec_flags_full() -> None:
     flags = parse_codec_flags("DEV.S.....")
@@ -113,3 +156,164 @@ def test_get_encoders() -> None:
     encoders = get_encoders()
     assert len(encoders) > 0
     assert isinstance(encoders[0], Coder)
+
+
+@pytest.fixture
+def fake_ffmpeg(make_fake_executable: Callable[..., str]) -> Iterator[str]:
+    clear_cache()
+    yield make_fake_executable(FAKE_FFMPEG)
+    clear_cache()
+
+
+def calls(tmp_path: Path) -> list[str]:
+    log = tmp_path / "fake_ffmpeg.log"
+    return log.read_text().splitlines() if log.exists() else []
+
+
+def test_parse_capabilities() -> None:
+    capabilities = parse_capabilities(CODECS, "ffmpeg version 6.1.1 Copyright")
+
+    assert capabilities.version == "6.1.1"
+    assert CodecFlags.video in capabilities.codecs["h264"].flags
+    assert capabilities.encoders["libx264"] == "h264"
+    assert capabilities.encoders["rawvideo"] == "rawvideo"
+    assert capabilities.decoders["aac_fixed"] == "aac"
+    assert capabilities.decoders["vp6"] == "vp6"
+    assert capabilities.has_encoder("h264_nvenc")
+    assert capabilities.has_encoder("aac")
+    assert not capabilities.has_encoder("vp6")
+    assert not capabilities.has_decoder("rawvideo")
+    assert capabilities.hardware_encoders["h264"] == ("h264_nvenc", "h264_qsv")
+    assert capabilities.hardware_decoders["h264"] == ("h264_qsv", "h264_cuvid")
+    assert "aac" not in capabilities.hardware_decoders
+    assert parse_capabilities(CODECS).version is None
+
+
+def test_memoized(fake_ffmpeg: str, tmp_path: Path) -> None:
+    codecs = get_codecs(fake_ffmpeg)
+    capabilities = get_capabilities(fake_ffmpeg)
+    encoders = get_encoders(fake_ffmpeg)
+    decoders = get_decoders(fake_ffmpeg)
+
+    assert [codec.name for codec in codecs] == ["h264", "aac", "vp6", "rawvideo"]
+    assert capabilities.version == "6.1.1"
+    assert [encoder.name for encoder in encoders] == ["libx264"]
+    # the codecs and the capabilities share one run
+    assert calls(tmp_path) == [
+        "-codecs",
+        "-hide_banner -encoders",
+        "-hide_banner -decoders",
+    ]
+
+    for _ in range(3):
+        assert get_codecs(fake_ffmpeg) is codecs
+        assert get_capabilities(fake_ffmpeg) is capabilities
+        assert get_encoders(fake_ffmpeg) is encoders
+        assert get_decoders(fake_ffmpeg) is decoders
+    assert len(calls(tmp_path)) == 3
+
+    get_capabilities(fake_ffmpeg, refresh=True)
+    assert len(calls(tmp_path)) == 4
+
+
+def test_invalidated(fake_ffmpeg: str, tmp_path: Path) -> None:
+    get_capabilities(fake_ffmpeg)
+
+    # an upgrade changes the binary
+    os.utime(fake_ffmpeg, ns=(0, 0))
+    get_capabilities(fake_ffmpeg)
+    assert len(calls(tmp_path)) == 2
+
+    # another binary is queried apart
+    other = tmp_path / "other_ffmpeg"
+    other.write_bytes(Path(fake_ffmpeg).read_bytes())
+    other.chmod(0o755)
+    get_capabilities(str(other))
+    assert len(calls(tmp_path)) == 3
+
+    clear_cache()
+    get_capabilities(fake_ffmpeg)
+    assert len(calls(tmp_path)) == 4
+
+
+def test_errors_not_memoized(
+    fake_ffmpeg: str, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setenv("FAKE_FFMPEG_FAIL", "1")
+    with pytest.raises(FFMpegExecuteError):
+        get_codecs(fake_ffmpeg)
+
+    monkeypatch.delenv("FAKE_FFMPEG_FAIL")
+    assert len(get_codecs(fake_ffmpeg)) == 4
+    assert len(calls(tmp_path)) == 2
+
+
+def test_benchmark(fake_ffmpeg: str) -> None:
+    start = time.perf_counter()
+    get_capabilities(fake_ffmpeg)
+    first = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(100):
+        capabilities = get_capabilities(fake_ffmpeg)
+        assert capabilities.has_encoder("libx264")
+    # a memoized query costs a stat, not a process
+    assert (time.perf_counter() - start) / 100 < first / 10
+
+
+@requires_ffmpeg
+def test_get_capabilities() -> None:
+    capabilities = get_capabilities()
+
+    assert capabilities.version is not None
+    assert {codec.name for codec in get_codecs()} == set(capabilities.codecs)
+    assert {encoder.name for encoder in get_encoders()} <= set(capabilities.encoders)
+
+
+def test_parse_filter_names() -> None:
+    filters = """\
+Filters:
+  T.. = Timeline support
+  | = Source or sink filter
+ ... abench            A->A       Benchmark part of a filtergraph.
+ TSC scale             V->V       Scale the input video size.
+ ... buffer            |->V       Buffer video frames.
+ ... amix              N->A       Audio mixing.
+"""
+    assert parse_filter_names(filters) == {"abench", "scale", "buffer", "amix"}
+
+
+def test_parse_formats() -> None:
+    formats = """\
+File formats:
+ D. = Demuxing supported
+ .E = Muxing supported
+ --
+  E 3g2             3GP2 (3GPP2 file format)
+ DE matroska,webm   Matroska
+ D  mov,mp4,m4a     QuickTime / MOV
+"""
+    assert parse_formats(formats) == (
+        {"3g2", "matroska", "webm"},
+        {"matroska", "webm", "mov", "mp4", "m4a"},
+    )
+
+    # newer versions add a column for devices
+    formats = """\
+Formats:
+ D.. = Demuxing supported
+ .E. = Muxing supported
+ ..d = Is a device
+ ---
+ D d lavfi           Libavfilter virtual input device
+  E  mp4             MP4 (MPEG-4 Part 14)
+"""
+    assert parse_formats(formats) == ({"mp4"}, {"lavfi"})
+
+
+@requires_ffmpeg
+def test_get_filter_names_and_formats() -> None:
+    assert "scale" in get_filter_names()
+    muxers, demuxers = get_formats()
+    assert "mp4" in muxers
+    assert "mov" in demuxers
@@ -0,0 +1,545 @@
+"""
+Raw media frames exchanged with FFmpeg through pipes.
+
+This module describes the memory layout of raw (``-f rawvideo``) frames and
+raw PCM (e.g. ``-f s16le``) audio, and reads them from a pipe into preallocated
+buffers, exposed as NumPy arrays when NumPy is installed, or as `memoryview`s
+otherwise.
+"""
+
+from __future__ import annotations
+
+import logging
+from collections.abc import Iterator
+from dataclasses import dataclass
+from functools import cached_property
+from math import prod
+from types import ModuleType
+from typing import IO, Any
+
+from ..exceptions import FFMpegValueError
+
+logger = logging.getLogger(__name__)
+
+PACKED_PIXEL_FORMATS: dict[str, tuple[str, int]] = {
+    "gray": ("u1", 1),
+    "gray16le": ("<u2", 1),
+    "gray16be": (">u2", 1),
+    "grayf32le": ("<f4", 1),
+    "rgb24": ("u1", 3),
+    "bgr24": ("u1", 3),
+    "rgba": ("u1", 4),
+    "bgra": ("u1", 4),
+    "argb": ("u1", 4),
+    "abgr": ("u1", 4),
+    "rgb0": ("u1", 4),
+    "bgr0": ("u1", 4),
+    "0rgb": ("u1", 4),
+    "0bgr": ("u1", 4),
+    "rgb48le": ("<u2", 3),
+    "bgr48le": ("<u2", 3),
+    "rgba64le": ("<u2", 4),
+    "bgra64le": ("<u2", 4),
+}
+"""
+The NumPy dtype and number of channels of each supported packed pixel format
+"""
+
+PLANAR_PIXEL_FORMATS: frozenset[str] = frozenset(
+    {"yuv420p", "nv12", "nv21", "yuv444p", "gbrp"}
+)
+"""
+The supported 8-bit planar pixel formats
+"""
+
+SAMPLE_FORMATS: dict[str, str] = {
+    "u8": "u1",
+    "s8": "i1",
+    "s16le": "<i2",
+    "s16be": ">i2",
+    "s32le": "<i4",
+    "s32be": ">i4",
+    "f32le": "<f4",
+    "f32be": ">f4",
+    "f64le": "<f8",
+    "f64be": ">f8",
+}
+"""
+The NumPy dtype of the samples of each supported raw PCM format (``-f`` value)
+"""
+
+READ_SIZE = 65536
+"""
+The maximum number of bytes read from a pipe at once when streaming audio
+"""
+
+
+def import_numpy() -> ModuleType | None:
+    """
+    Import NumPy if it is installed.
+
+    Returns:
+        The numpy module, or None if it is not installed
+
+    """
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+@dataclass(frozen=True)
+class VideoFrameFormat:
+    """
+    The layout of raw video frames.
+
+    Packed formats have the shape ``(height, width, channels)``; 4:2:0 formats
+    (``yuv420p``, ``nv12``, ``nv21``) the shape ``(height * 3 // 2, width)``, the
+    same as OpenCV, and an even width and height; and 4:4:4 planar formats the
+    shape ``(3, height, width)``.
+    """
+
+    width: int
+    """
+    The width of a frame, in pixels
+    """
+
+    height: int
+    """
+    The height of a frame, in pixels
+    """
+
+    pix_fmt: str = "rgb24"
+    """
+    The FFmpeg pixel format of the frames
+    """
+
+    def __post_init__(self) -> None:
+        """
+        Validate the frame layout.
+
+        Raises:
+            FFMpegValueError: If the size is not positive, the pixel format is not supported, or a 4:2:0 frame has an odd size
+
+        """
+        if self.width <= 0 or self.height <= 0:
+            raise FFMpegValueError(f"Invalid frame size: {self.width}x{self.height}")
+        if (
+            self.pix_fmt not in PACKED_PIXEL_FORMATS
+            and self.pix_fmt not in PLANAR_PIXEL_FORMATS
+        ):
+            raise FFMpegValueError(
+                f"Unsupported raw pixel format {self.pix_fmt!r}; supported: "
+                f"{sorted(PACKED_PIXEL_FORMATS.keys() | PLANAR_PIXEL_FORMATS)}"
+            )
+        # NOTE: FFmpeg rounds the chroma planes of odd sizes up, which the
+        # (height * 3 // 2, width) shape cannot hold
+        if self.pix_fmt in ("yuv420p", "nv12", "nv21") and (
+            self.width % 2 or self.height % 2
+        ):
+            raise FFMpegValueError(
+                f"{self.pix_fmt} frames must have an even size, "
+                f"got {self.width}x{self.height}"
+            )
+
+    @cached_property
+    def dtype(self) -> str:
+        """
+        Get the NumPy dtype of the frames' samples.
+
+        Returns:
+            The dtype string, e.g. ``"u1"``
+
+        """
+        if self.pix_fmt in PACKED_PIXEL_FORMATS:
+            return PACKED_PIXEL_FORMATS[self.pix_fmt][0]
+        return "u1"
+
+    @cached_property
+    def shape(self) -> tuple[int, ...]:
+        """
+        Get the array shape of a frame.
+
+        Returns:
+            The shape of a frame, as described in the class documentation
+
+        """
+        if self.pix_fmt in PACKED_PIXEL_FORMATS:
+            return (self.height, self.width, PACKED_PIXEL_FORMATS[self.pix_fmt][1])
+        if self.pix_fmt in ("yuv444p", "gbrp"):
+            return (3, self.height, self.width)
+        return (self.height * 3 // 2, self.width)
+
+    @cached_property
+    def frame_size(self) -> int:
+        """
+        Get the size of a frame.
+
+        Returns:
+            The number of bytes of a frame
+
+        """
+        itemsize = int(self.dtype[-1])
+        return prod(self.shape) * itemsize
+
+    @property
+    def size(self) -> str:
+        """
+        Get the frame size as an FFmpeg ``-s`` option value.
+
+        Returns:
+            The size, e.g. ``"640x480"``
+
+        """
+        return f"{self.width}x{self.height}"
+
+    @classmethod
+    def parse_size(cls, size: str, pix_fmt: str = "rgb24") -> VideoFrameFormat:
+        """
+        Build a frame layout from an FFmpeg ``-s`` option value.
+
+        Args:
+            size: The frame size, e.g. ``"640x480"``
+            pix_fmt: The FFmpeg pixel format of the frames
+
+        Returns:
+            The frame layout
+
+        Raises:
+            FFMpegValueError: If the size is not of the form ``WIDTHxHEIGHT``
+
+        """
+        width, sep, height = size.partition("x")
+        if not sep or not width.isdigit() or not height.isdigit():
+            raise FFMpegValueError(
+                f"Expected a frame size like '640x480', got {size!r}"
+            )
+        return cls(int(width), int(height), pix_fmt)
+
+
+@dataclass(frozen=True)
+class AudioSampleFormat:
+    """
+    The layout of raw PCM audio.
+
+    Channels are interleaved, so a chunk of ``n`` samples has the shape
+    ``(n, channels)``.
+    """
+
+    channels: int
+    """
+    The number of channels
+    """
+
+    format: str = "s16le"
+    """
+    The FFmpeg raw PCM format of the samples, e.g. ``s16le`` or ``f32le``
+    """
+
+    def __post_init__(self) -> None:
+        """
+        Validate the sample layout.
+
+        Raises:
+            FFMpegValueError: If the number of channels is not positive, or the format is not supported
+
+        """
+        if self.channels <= 0:
+            raise FFMpegValueError(f"Invalid number of channels: {self.channels}")
+        if self.format not in SAMPLE_FORMATS:
+            raise FFMpegValueError(
+                f"Unsupported raw PCM format {self.format!r}; supported: "
+                f"{sorted(SAMPLE_FORMATS)}"
+            )
+
+    @property
+    def dtype(self) -> str:
+        """
+        Get the NumPy dtype of the samples.
+
+        Returns:
+            The dtype string, e.g. ``"<i2"``
+
+        """
+        return SAMPLE_FORMATS[self.format]
+
+    @property
+    def frame_size(self) -> int:
+        """
+        Get the size of one sample of every channel.
+
+        Returns:
+            The number of bytes per sample, times the number of channels
+
+        """
+        return int(self.dtype[-1]) * self.channels
+
+
+class AudioChunkBuffer:
+    """
+    A ring buffer cutting raw PCM audio into chunks of a fixed number of samples.
+
+    Data is read straight into the buffer (see `writable` and `commit`) and each
+    chunk is a view of it, so samples are neither copied nor concatenated. When a
+    chunk would run past the end of the buffer, the samples not consumed yet are
+    moved back to its start; the buffer holds one chunk plus one read, so this
+    happens at most once per read.
+
+    Example:
+        ```python
+        buffer = AudioChunkBuffer(AudioSampleFormat(1, "s16le"), chunk_size=320)
+        while count := pipe.readinto(buffer.writable()):
+            buffer.commit(count)
+            for chunk in buffer.chunks():
+                process(chunk)  # an int16 array of shape (320, 1)
+        ```
+
+    """
+
+    def __init__(
+        self,
+        sample_format: AudioSampleFormat,
+        chunk_size: int,
+        overlap: int = 0,
+        read_size: int = READ_SIZE,
+    ) -> None:
+        """
+        Initialize an empty buffer.
+
+        Args:
+            sample_format: The layout of the samples
+            chunk_size: The number of samples per chunk
+            overlap: The number of samples shared by consecutive chunks
+            read_size: The maximum number of bytes to read at once
+
+        Raises:
+            FFMpegValueError: If the chunk size is not positive, or the overlap is not smaller
+
+        """
+        if chunk_size <= 0:
+            raise FFMpegValueError(f"Invalid chunk size: {chunk_size}")
+        if not 0 <= overlap < chunk_size:
+            raise FFMpegValueError(
+                f"The overlap must be between 0 and the chunk size, got {overlap}"
+            )
+
+        self.sample_format = sample_format
+        self.chunk_size = chunk_size
+        self.overlap = overlap
+        self.chunk_count = 0
+        self._chunk_bytes = chunk_size * sample_format.frame_size
+        self._hop = (chunk_size - overlap) * sample_format.frame_size
+        self._buffer = bytearray(
+            self._chunk_bytes + max(read_size, sample_format.frame_size)
+        )
+        self._view = memoryview(self._buffer)
+        self._start = 0
+        self._end = 0
+
+        numpy = import_numpy()
+        self._array: Any = (
+            numpy.frombuffer(self._buffer, dtype=sample_format.dtype)
+            if numpy is not None
+            else None
+        )
+
+    def writable(self) -> memoryview:
+        """
+        Get the free space of the buffer, to read data into.
+
+        Returns:
+            A view of the free space, which always has room for the current chunk
+
+        """
+        if self._start and self._start + self._chunk_bytes > len(self._buffer):
+            pending = self._end - self._start
+            self._view[:pending] = self._view[self._start : self._end]
+            self._start, self._end = 0, pending
+        return self._view[self._end :]
+
+    def commit(self, count: int) -> None:
+        """
+        Mark data read into the free space as available.
+
+        Args:
+            count: The number of bytes read into the view returned by `writable`
+
+        """
+        self._end += count
+
+    def chunks(self, copy: bool = False) -> Iterator[Any]:
+        """
+        Consume the complete chunks available.
+
+        Args:
+            copy: Whether to yield a copy of each chunk that stays valid.
+                  Otherwise a chunk is only valid until more data is read.
+
+        Yields:
+            Each chunk, as a NumPy array of shape ``(chunk_size, channels)``, or as
+            a flat memoryview of bytes if NumPy is not installed
+
+        """
+        while self._end - self._start >= self._chunk_bytes:
+            chunk = self._chunk(copy)
+            self._start += self._hop
+            self.chunk_count += 1
+            yield chunk
+
+    def tail(self, pad: bool = False, copy: bool = False) -> Any | None:
+        """
+        Get the last, incomplete chunk once the end of the audio is reached.
+
+        Args:
+            pad: Whether to return the samples left, padded with silence (zeros)
+                 to a full chunk. Otherwise they are discarded.
+            copy: Whether to return a copy of the chunk
+
+        Returns:
+            The padded chunk, or None if there is none
+
+        """
+        frame_size = self.sample_format.frame_size
+        pending = self._end - self._start
+        if pending % frame_size:
+            logger.warning(
+                f"Discarding an incomplete sample of {pending % frame_size} bytes at the end"
+            )
+            pending -= pending % frame_size
+        # NOTE: the first samples left were already part of the previous chunk
+        if pending <= (self.overlap * frame_size if self.chunk_count else 0):
+            return None
+        if not pad:
+            logger.debug(f"Discarding {pending // frame_size} samples at the end")
+            return None
+
+        self.writable()
+        start = self._start + pending
+        self._view[start : self._start + self._chunk_bytes] = bytes(
+            self._start + self._chunk_bytes - start
+        )
+        self._end = self._start + self._chunk_bytes
+        return next(self.chunks(copy))
+
+    def _chunk(self, copy: bool) -> Any:
+        """
+        Get the chunk at the start of the buffer.
+
+        Args:
+            copy: Whether to return a copy of the chunk
+
+        Returns:
+            The chunk, as a NumPy array or a memoryview
+
+        """
+        if self._array is not None:
+            itemsize = self._array.itemsize
+            chunk = self._array[
+                self._start // itemsize : (self._start + self._chunk_bytes) // itemsize
+            ].reshape(self.chunk_size, self.sample_format.channels)
+            return chunk.copy() if copy else chunk
+
+        chunk = self._view[self._start : self._start + self._chunk_bytes]
+        return memoryview(bytearray(chunk)) if copy else chunk
+
+
+def readinto_exactly(pipe: IO[bytes], buffer: memoryview) -> int:
+    """
+    Fill a buffer from a pipe, with as many reads as needed.
+
+    Args:
+        pipe: The pipe to read from
+        buffer: The buffer to fill
+
+    Returns:
+        The number of bytes read, which is less than the buffer's size only at
+        the end of the pipe
+
+    """
+    filled = 0
+    while filled < len(buffer):
+        count = pipe.readinto(buffer[filled:])  # type: ignore[attr-defined]
+        if not count:
+            break
+        filled += count
+    return filled
+
+
+def iter_video_frames(
+    pipe: IO[bytes], frame_format: VideoFrameFormat, copy: bool = False
+) -> Iterator[Any]:
+    """
+    Read raw video frames from a pipe.
+
+    Every frame is read into the same preallocated buffer, so unless ``copy``
+    is set, a frame is only valid until the next one is read.
+
+    Args:
+        pipe: The pipe FFmpeg writes raw frames to
+        frame_format: The layout of the frames
+        copy: Whether to yield a copy of each frame that stays valid
+
+    Yields:
+        Each frame, as a NumPy array of shape `VideoFrameFormat.shape`, or as a
+        flat memoryview of bytes if NumPy is not installed
+
+    """
+    numpy = import_numpy()
+    buffer = bytearray(frame_format.frame_size)
+    view = memoryview(buffer)
+    if numpy is not None:
+        frame: Any = numpy.frombuffer(buffer, dtype=frame_format.dtype).reshape(
+            frame_format.shape
+        )
+    else:
+        frame = view
+
+    while True:
+        count = readinto_exactly(pipe, view)
+        if count < len(view):
+            if count:
+                logger.warning(
+                    f"Discarding an incomplete frame of {count} bytes at the end"
+                )
+            return
+
+        if not copy:
+            yield frame
+        elif numpy is not None:
+            yield frame.copy()
+        else:
+            yield memoryview(bytearray(view))
+
+
+def iter_audio_chunks(
+    pipe: IO[bytes],
+    buffer: AudioChunkBuffer,
+    copy: bool = False,
+    pad: bool = False,
+) -> Iterator[Any]:
+    """
+    Read raw PCM audio from a pipe in chunks of a fixed number of samples.
+
+    Each read returns what the pipe has available (`readinto1` when the pipe is
+    buffered), so chunks are yielded as soon as they are complete.
+
+    Args:
+        pipe: The pipe FFmpeg writes raw audio to
+        buffer: The buffer cutting the audio into chunks
+        copy: Whether to yield a copy of each chunk that stays valid
+        pad: Whether to yield the samples left at the end, padded with silence
+
+    Yields:
+        Each chunk, as a NumPy array of shape ``(chunk_size, channels)``, or as a
+        flat memoryview of bytes if NumPy is not installed
+
+    """
+    read = getattr(pipe, "readinto1", None) or pipe.readinto  # type: ignore[attr-defined]
+    while count := read(buffer.writable()):
+        buffer.commit(count)
+        yield from buffer.chunks(copy)
+
+    tail = buffer.tail(pad, copy)
+    if tail is not None:
+        yield tail
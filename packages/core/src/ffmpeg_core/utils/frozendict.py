@@ -94,6 +94,8 @@ class FrozenDict(Mapping[K, V], Generic[K, V]):
             True if the objects are equal, False otherwise
 
         """
+        if isinstance(other, FrozenDict):
+            return self._data == other._data
         if isinstance(other, Mapping):
             return dict(self._data) == dict(other)
         return NotImplemented
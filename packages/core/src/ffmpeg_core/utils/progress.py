@@ -0,0 +1,287 @@
+"""
+Parsing and delivery of FFmpeg's machine-readable progress reports.
+
+With ``-progress <url>``, FFmpeg periodically writes blocks of ``key=value``
+lines, each block ending with a ``progress=continue`` (or ``progress=end``)
+line. This module parses that output incrementally into `Progress` events, and
+provides a bounded buffer to hand them from a reader thread to a synchronous or
+asynchronous consumer.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+from collections import deque
+from collections.abc import AsyncIterator, Iterator
+from dataclasses import dataclass
+
+from .frozendict import FrozenDict
+
+
+def _int(value: str | None) -> int | None:
+    if value is None:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        return None
+
+
+def _float(value: str | None, suffix: str = "") -> float | None:
+    if value is None:
+        return None
+    try:
+        return float(value.removesuffix(suffix))
+    except ValueError:
+        return None
+
+
+@dataclass(frozen=True, kw_only=True)
+class Progress:
+    """A progress report of a running FFmpeg process."""
+
+    frame: int | None = None
+    """
+    The number of frames output so far
+    """
+
+    fps: float | None = None
+    """
+    The current processing rate, in frames per second
+    """
+
+    bitrate: float | None = None
+    """
+    The current output bitrate, in kbit/s
+    """
+
+    total_size: int | None = None
+    """
+    The output size so far, in bytes
+    """
+
+    out_time: float | None = None
+    """
+    The output timestamp reached so far, in seconds
+    """
+
+    dup_frames: int = 0
+    """
+    The number of frames duplicated so far
+    """
+
+    drop_frames: int = 0
+    """
+    The number of frames dropped so far
+    """
+
+    speed: float | None = None
+    """
+    The processing speed relative to real time
+    """
+
+    done: bool = False
+    """
+    Whether this is the last report (``progress=end``)
+    """
+
+    fields: FrozenDict[str, str] = FrozenDict({})
+    """
+    All the reported values, including the per-stream ones (e.g. ``stream_0_0_q``)
+    """
+
+    @classmethod
+    def from_fields(cls, fields: dict[str, str]) -> Progress:
+        """
+        Build a progress report from the values of one block.
+
+        Unavailable (``N/A``) or malformed values are left as None.
+
+        Args:
+            fields: The ``key=value`` pairs of the block
+
+        Returns:
+            The progress report
+
+        """
+        # NOTE: out_time_ms is in microseconds too, and is the only one in FFmpeg < 4.4
+        out_time_us = _int(fields.get("out_time_us", fields.get("out_time_ms")))
+        return cls(
+            frame=_int(fields.get("frame")),
+            fps=_float(fields.get("fps")),
+            bitrate=_float(fields.get("bitrate"), "kbits/s"),
+            total_size=_int(fields.get("total_size")),
+            out_time=out_time_us / 1_000_000 if out_time_us is not None else None,
+            dup_frames=_int(fields.get("dup_frames")) or 0,
+            drop_frames=_int(fields.get("drop_frames")) or 0,
+            speed=_float(fields.get("speed"), "x"),
+            done=fields.get("progress") == "end",
+            fields=FrozenDict(fields),
+        )
+
+
+class ProgressParser:
+    """
+    Incremental parser of FFmpeg's ``-progress`` output.
+
+    Example:
+        ```python
+        parser = ProgressParser()
+        for chunk in iter(lambda: pipe.read1(4096), b""):
+            for progress in parser.feed(chunk):
+                print(progress.out_time, progress.speed)
+        ```
+
+    """
+
+    def __init__(self) -> None:
+        """Initialize a parser expecting the start of a block."""
+        self._pending = b""
+        self._fields: dict[str, str] = {}
+
+    def feed(self, data: bytes) -> list[Progress]:
+        """
+        Parse the next chunk of output.
+
+        Chunks do not need to be aligned on lines or blocks; incomplete ones are
+        kept until the rest is fed.
+
+        Args:
+            data: The bytes read from the progress pipe
+
+        Returns:
+            The reports of the blocks completed by this chunk
+
+        """
+        data = self._pending + data
+        end = data.rfind(b"\n") + 1
+        self._pending = data[end:]
+
+        reports = []
+        for line in data[:end].decode("utf-8", "replace").splitlines():
+            key, sep, value = line.partition("=")
+            if not sep:
+                continue
+
+            key = key.strip()
+            self._fields[key] = value.strip()
+            if key == "progress":
+                reports.append(Progress.from_fields(self._fields))
+                self._fields = {}
+        return reports
+
+
+class ProgressBuffer:
+    """
+    A bounded, thread-safe buffer of progress reports.
+
+    A producer thread `put`s reports and `close`s the buffer when the process ends;
+    a consumer iterates it, either synchronously or with ``async for``. When the
+    consumer falls behind, the oldest reports are dropped rather than blocking the
+    producer, since only the latest progress matters and FFmpeg would otherwise
+    stall writing to the progress pipe.
+    """
+
+    def __init__(self, maxsize: int = 64) -> None:
+        """
+        Initialize an empty buffer.
+
+        Args:
+            maxsize: The maximum number of reports kept
+
+        Raises:
+            ValueError: If maxsize is not positive
+
+        """
+        if maxsize < 1:
+            raise ValueError(f"maxsize must be positive, got {maxsize}")
+
+        self.dropped = 0
+        self._reports: deque[Progress] = deque(maxlen=maxsize)
+        self._closed = False
+        self._condition = threading.Condition()
+        self._waiters: list[tuple[asyncio.AbstractEventLoop, asyncio.Future[None]]] = []
+
+    def put(self, progress: Progress) -> None:
+        """
+        Add a report, dropping the oldest one if the buffer is full.
+
+        Args:
+            progress: The report to add
+
+        """
+        with self._condition:
+            if len(self._reports) == self._reports.maxlen:
+                self.dropped += 1
+            self._reports.append(progress)
+            self._wake()
+
+    def close(self) -> None:
+        """Mark the end of the reports; consumers stop once the buffer is empty."""
+        with self._condition:
+            self._closed = True
+            self._wake()
+
+    def _wake(self) -> None:
+        self._condition.notify_all()
+        for loop, waiter in self._waiters:
+            loop.call_soon_threadsafe(_resolve, waiter)
+        self._waiters.clear()
+
+    def get(self) -> Progress | None:
+        """
+        Wait for the next report.
+
+        Returns:
+            The oldest buffered report, or None if the buffer is closed and empty
+
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: self._reports or self._closed)
+            return self._reports.popleft() if self._reports else None
+
+    async def aget(self) -> Progress | None:
+        """
+        Wait for the next report without blocking the event loop.
+
+        Returns:
+            The oldest buffered report, or None if the buffer is closed and empty
+
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._condition:
+                if self._reports:
+                    return self._reports.popleft()
+                if self._closed:
+                    return None
+                waiter = loop.create_future()
+                self._waiters.append((loop, waiter))
+            await waiter
+
+    def __iter__(self) -> Iterator[Progress]:
+        """
+        Iterate over the reports until the buffer is closed.
+
+        Returns:
+            An iterator blocking for each report
+
+        """
+        return iter(self.get, None)
+
+    async def __aiter__(self) -> AsyncIterator[Progress]:
+        """
+        Asynchronously iterate over the reports until the buffer is closed.
+
+        Yields:
+            Each report as it becomes available
+
+        """
+        while (progress := await self.aget()) is not None:
+            yield progress
+
+
+def _resolve(waiter: asyncio.Future[None]) -> None:
+    if not waiter.done():
+        waiter.set_result(None)
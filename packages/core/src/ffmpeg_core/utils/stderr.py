@@ -0,0 +1,168 @@
+"""
+Capturing FFmpeg's stderr.
+
+FFmpeg logs to stderr for as long as it runs: with ``-stats`` or a verbose
+loglevel, a long job writes an unbounded amount of it. This module provides
+`StderrCapture`, which can keep only its beginning (the banner and stream
+mapping) and its end (usually the error), and report it line by line.
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+from collections.abc import Callable
+
+logger = logging.getLogger(__name__)
+
+_LINE_END = re.compile(rb"[\r\n]")
+"""
+FFmpeg ends its log lines with ``\\n``, and rewrites its ``-stats`` line with ``\\r``
+"""
+
+
+class StderrCapture:
+    """
+    A capture of FFmpeg's stderr, optionally bounded.
+
+    When bounded, the first `head` bytes and the last `tail` bytes are kept,
+    and the bytes in between are only counted in `omitted`, so memory use stays
+    fixed however long FFmpeg runs.
+
+    Example:
+        ```python
+        capture = StderrCapture(head=4096, tail=65536, on_line=logger.debug)
+        for chunk in iter(lambda: pipe.read1(4096), b""):
+            capture.append(chunk)
+        capture.close()
+        print(capture.getvalue().decode())
+        ```
+
+    """
+
+    def __init__(
+        self,
+        head: int | None = None,
+        tail: int | None = None,
+        on_line: Callable[[str], None] | None = None,
+        max_line: int = 65536,
+    ) -> None:
+        """
+        Initialize an empty capture.
+
+        Args:
+            head: The number of bytes kept from the beginning. If neither head
+                  nor tail is given, everything is kept.
+            tail: The number of bytes kept from the end
+            on_line: Called with each line, decoded, as it is completed
+            max_line: The length after which an unterminated line is reported anyway
+
+        Raises:
+            ValueError: If head or tail is negative
+
+        """
+        if (head is not None and head < 0) or (tail is not None and tail < 0):
+            raise ValueError(f"head and tail must not be negative, got {head}, {tail}")
+
+        self.bounded = head is not None or tail is not None
+        self.head = head or 0
+        self.tail = tail or 0
+        self._omitted = 0
+        self._head = bytearray()
+        self._tail = bytearray()
+        self._on_line = on_line
+        self._max_line = max_line
+        self._line = b""
+
+    def append(self, chunk: bytes) -> None:
+        """
+        Add the next chunk read from stderr.
+
+        Args:
+            chunk: The bytes read
+
+        """
+        if self._on_line is not None:
+            self._feed_lines(chunk)
+
+        if not self.bounded:
+            self._head += chunk
+            return
+
+        room = self.head - len(self._head)
+        if room > 0:
+            self._head += chunk[:room]
+            chunk = chunk[room:]
+        self._tail += chunk
+        # NOTE: trimming in batches keeps appends amortized O(len(chunk))
+        if len(self._tail) > 2 * self.tail + 4096:
+            self._trim()
+
+    @property
+    def omitted(self) -> int:
+        """The number of bytes dropped between the head and the tail."""
+        return self._omitted + max(0, len(self._tail) - self.tail)
+
+    def _trim(self) -> None:
+        """Drop the bytes before the last `tail` ones."""
+        excess = len(self._tail) - self.tail
+        if excess > 0:
+            self._omitted += excess
+            del self._tail[:excess]
+
+    def _feed_lines(self, chunk: bytes) -> None:
+        """
+        Report the lines completed by a chunk.
+
+        Args:
+            chunk: The bytes read
+
+        """
+        lines = _LINE_END.split(self._line + chunk)
+        self._line = lines.pop()
+        if len(self._line) > self._max_line:
+            lines.append(self._line)
+            self._line = b""
+
+        for line in lines:
+            if line and self._on_line is not None:
+                self._report(line)
+
+    def _report(self, line: bytes) -> None:
+        """
+        Call the line callback, disabling it if it fails.
+
+        Args:
+            line: The line, without its line ending
+
+        """
+        assert self._on_line is not None
+        try:
+            self._on_line(line.decode("utf-8", "replace"))
+        except Exception:
+            logger.exception("Stderr line callback failed; ignoring")
+            self._on_line = None
+
+    def close(self) -> None:
+        """Report the last line, if stderr does not end with a line ending."""
+        if self._on_line is not None and self._line:
+            self._report(self._line)
+        self._line = b""
+
+    def getvalue(self) -> bytes:
+        """
+        Get the captured bytes.
+
+        Returns:
+            Everything captured, or if bounded, the head and the tail separated
+            by a note of how many bytes were omitted
+
+        """
+        self._trim()
+        if not self.omitted:
+            return bytes(self._head + self._tail)
+        return (
+            bytes(self._head)
+            + f"\n[... {self.omitted} bytes omitted ...]\n".encode()
+            + bytes(self._tail)
+        )
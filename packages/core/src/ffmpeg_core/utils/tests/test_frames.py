@@ -0,0 +1,162 @@
+import io
+
+import pytest
+
+from ...exceptions import FFMpegValueError
+from ..frames import (
+    AudioChunkBuffer,
+    AudioSampleFormat,
+    VideoFrameFormat,
+    iter_audio_chunks,
+    iter_video_frames,
+    readinto_exactly,
+)
+
+
+class TrickleReader(io.RawIOBase):
+    """A pipe that returns at most a few bytes per read."""
+
+    def __init__(self, data: bytes, chunk: int = 5) -> None:
+        self._data = io.BytesIO(data)
+        self._chunk = chunk
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer: memoryview) -> int:  # type: ignore[override]
+        data = self._data.read(min(len(buffer), self._chunk))
+        buffer[: len(data)] = data
+        return len(data)
+
+
+@pytest.mark.parametrize(
+    "pix_fmt, shape, frame_size",
+    [
+        ("rgb24", (2, 4, 3), 24),
+        ("gray", (2, 4, 1), 8),
+        ("rgba64le", (2, 4, 4), 64),
+        ("grayf32le", (2, 4, 1), 32),
+        ("yuv420p", (3, 4), 12),
+        ("gbrp", (3, 2, 4), 24),
+    ],
+)
+def test_video_frame_format(
+    pix_fmt: str, shape: tuple[int, ...], frame_size: int
+) -> None:
+    frame_format = VideoFrameFormat(4, 2, pix_fmt)
+    assert frame_format.shape == shape
+    assert frame_format.frame_size == frame_size
+    assert frame_format.size == "4x2"
+
+
+def test_video_frame_format_invalid() -> None:
+    with pytest.raises(FFMpegValueError):
+        VideoFrameFormat(0, 2)
+    with pytest.raises(FFMpegValueError):
+        VideoFrameFormat(4, 2, "yuv422p10le")
+    with pytest.raises(FFMpegValueError):
+        VideoFrameFormat.parse_size("hd720")
+    # FFmpeg writes 463043 bytes per 641x481 yuv420p frame, not 641 * 481 * 3 // 2
+    for pix_fmt in ("yuv420p", "nv12", "nv21"):
+        with pytest.raises(FFMpegValueError, match="even size"):
+            VideoFrameFormat(641, 481, pix_fmt)
+        with pytest.raises(FFMpegValueError, match="even size"):
+            VideoFrameFormat(640, 481, pix_fmt)
+    assert VideoFrameFormat(641, 481, "yuv444p").frame_size == 641 * 481 * 3
+
+    assert VideoFrameFormat.parse_size("640x480", "gray") == VideoFrameFormat(
+        640, 480, "gray"
+    )
+
+
+def test_readinto_exactly() -> None:
+    buffer = memoryview(bytearray(12))
+    pipe = TrickleReader(bytes(range(20)))
+
+    assert readinto_exactly(pipe, buffer) == 12
+    assert bytes(buffer) == bytes(range(12))
+    assert readinto_exactly(pipe, buffer) == 8
+    assert readinto_exactly(pipe, buffer) == 0
+
+
+def test_iter_video_frames(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr("ffmpeg_core.utils.frames.import_numpy", lambda: None)
+    frame_format = VideoFrameFormat(2, 2, "gray")
+    data = b"\x01" * 4 + b"\x02" * 4 + b"\x03" * 2
+
+    frames = list(iter_video_frames(TrickleReader(data, 3), frame_format, copy=True))
+    # the incomplete last frame is discarded
+    assert [bytes(frame) for frame in frames] == [b"\x01" * 4, b"\x02" * 4]
+
+    shared = list(iter_video_frames(TrickleReader(data, 3), frame_format))
+    assert shared[0] is shared[1]
+
+
+def test_iter_video_frames_numpy() -> None:
+    numpy = pytest.importorskip("numpy")
+    frame_format = VideoFrameFormat(2, 1, "rgb48le")
+    data = numpy.arange(6, dtype="<u2").tobytes()
+
+    (frame,) = iter_video_frames(io.BytesIO(data), frame_format)
+    assert frame.shape == (1, 2, 3)
+    assert frame.tolist() == [[[0, 1, 2], [3, 4, 5]]]
+
+
+def samples(count: int, channels: int = 1) -> bytes:
+    return b"".join((i % 256).to_bytes(2, "little") * channels for i in range(count))
+
+
+def test_audio_sample_format() -> None:
+    assert AudioSampleFormat(2).frame_size == 4
+    assert AudioSampleFormat(1, "f64le").dtype == "<f8"
+
+    with pytest.raises(FFMpegValueError):
+        AudioSampleFormat(0)
+    with pytest.raises(FFMpegValueError):
+        AudioSampleFormat(1, "mp3")
+
+
+@pytest.mark.parametrize("read_size", [2, 7, 64, 65536])
+def test_iter_audio_chunks(monkeypatch: pytest.MonkeyPatch, read_size: int) -> None:
+    monkeypatch.setattr("ffmpeg_core.utils.frames.import_numpy", lambda: None)
+    buffer = AudioChunkBuffer(AudioSampleFormat(2), 5, overlap=2, read_size=read_size)
+    pipe = TrickleReader(samples(20, channels=2), chunk=read_size)
+
+    chunks = [bytes(c) for c in iter_audio_chunks(pipe, buffer, copy=True)]
+    # chunks of 5 samples start every 3 samples, whatever the size of the reads
+    assert chunks == [samples(20, 2)[i * 12 : i * 12 + 20] for i in range(6)]
+
+
+def test_iter_audio_chunks_pad(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr("ffmpeg_core.utils.frames.import_numpy", lambda: None)
+    sample_format = AudioSampleFormat(1)
+
+    buffer = AudioChunkBuffer(sample_format, 4, read_size=6)
+    chunks = [
+        bytes(c)
+        for c in iter_audio_chunks(TrickleReader(samples(6)), buffer, True, pad=True)
+    ]
+    assert chunks == [samples(4), samples(6)[8:] + bytes(4)]
+
+    # no chunk made only of samples already yielded, or of silence
+    buffer = AudioChunkBuffer(sample_format, 4, overlap=2)
+    assert len(list(iter_audio_chunks(io.BytesIO(samples(6)), buffer, pad=True))) == 2
+    buffer = AudioChunkBuffer(sample_format, 4)
+    assert list(iter_audio_chunks(io.BytesIO(b""), buffer, pad=True)) == []
+
+
+def test_audio_chunk_buffer_invalid() -> None:
+    with pytest.raises(FFMpegValueError):
+        AudioChunkBuffer(AudioSampleFormat(1), 0)
+    with pytest.raises(FFMpegValueError):
+        AudioChunkBuffer(AudioSampleFormat(1), 4, overlap=4)
+
+
+def test_iter_audio_chunks_numpy() -> None:
+    numpy = pytest.importorskip("numpy")
+    data = numpy.arange(12, dtype="<f4").tobytes()
+    buffer = AudioChunkBuffer(AudioSampleFormat(2, "f32le"), 3)
+
+    chunks = list(iter_audio_chunks(io.BytesIO(data), buffer, copy=True))
+    assert [chunk.shape for chunk in chunks] == [(3, 2), (3, 2)]
+    assert chunks[1].tolist() == [[6, 7], [8, 9], [10, 11]]
@@ -0,0 +1,90 @@
+import asyncio
+import threading
+
+import pytest
+
+from ..progress import Progress, ProgressBuffer, ProgressParser
+
+BLOCK = (
+    b"frame=120\nfps=29.97\nstream_0_0_q=23.0\nbitrate=N/A\ntotal_size=N/A\n"
+    b"out_time_us=4004000\nout_time_ms=4004000\nout_time=00:00:04.004000\n"
+    b"dup_frames=1\ndrop_frames=0\nspeed=1.99x\nprogress=continue\n"
+)
+
+
+def test_parse_block() -> None:
+    (progress,) = ProgressParser().feed(BLOCK)
+
+    assert progress.frame == 120
+    assert progress.fps == 29.97
+    assert progress.bitrate is None
+    assert progress.total_size is None
+    assert progress.out_time == 4.004
+    assert progress.dup_frames == 1
+    assert progress.drop_frames == 0
+    assert progress.speed == 1.99
+    assert not progress.done
+    assert progress.fields["stream_0_0_q"] == "23.0"
+
+
+def test_parse_incrementally() -> None:
+    parser = ProgressParser()
+    data = BLOCK + BLOCK.replace(b"progress=continue", b"progress=end")
+
+    reports = []
+    for i in range(0, len(data), 7):
+        reports += parser.feed(data[i : i + 7])
+
+    assert [p.done for p in reports] == [False, True]
+    assert [p.out_time for p in reports] == [4.004, 4.004]
+
+
+def test_parse_legacy_out_time() -> None:
+    (progress,) = ProgressParser().feed(b"out_time_ms=1500000\nprogress=end\n")
+    assert progress.out_time == 1.5
+    assert progress.done
+
+
+def test_buffer_drops_oldest() -> None:
+    buffer = ProgressBuffer(maxsize=2)
+    for frame in range(5):
+        buffer.put(Progress(frame=frame))
+    buffer.close()
+
+    assert [p.frame for p in buffer] == [3, 4]
+    assert buffer.dropped == 3
+
+
+def test_buffer_from_thread() -> None:
+    buffer = ProgressBuffer()
+
+    def produce() -> None:
+        for frame in range(100):
+            buffer.put(Progress(frame=frame))
+        buffer.close()
+
+    thread = threading.Thread(target=produce)
+    thread.start()
+    frames = [p.frame for p in buffer]
+    thread.join()
+
+    # reports are delivered in order, the latest one always included
+    assert frames == sorted(frames)
+    assert frames[-1] == 99
+    assert len(frames) + buffer.dropped == 100
+
+
+def test_buffer_async() -> None:
+    buffer = ProgressBuffer()
+
+    async def consume() -> list[int | None]:
+        threading.Timer(0.01, buffer.put, (Progress(frame=1),)).start()
+        threading.Timer(0.05, buffer.close).start()
+        return [p.frame async for p in buffer]
+
+    assert asyncio.run(consume()) == [1]
+
+
+def test_buffer_size() -> None:
+    with pytest.raises(ValueError):
+        ProgressBuffer(maxsize=0)
@@ -0,0 +1,86 @@
+import pytest
+
+from ..stderr import StderrCapture
+
+
+def feed(capture: StderrCapture, data: bytes, size: int = 7) -> StderrCapture:
+    for start in range(0, len(data), size):
+        capture.append(data[start : start + size])
+    capture.close()
+    return capture
+
+
+def test_unbounded() -> None:
+    data = b"".join(b"line %d\n" % i for i in range(1000))
+    capture = feed(StderrCapture(), data)
+
+    assert capture.getvalue() == data
+    assert capture.omitted == 0
+
+
+def test_head_and_tail() -> None:
+    data = bytes(range(256)) * 100
+    capture = feed(StderrCapture(head=10, tail=20), data, size=1000)
+
+    assert capture.omitted == len(data) - 30
+    assert capture.getvalue() == (
+        data[:10]
+        + f"\n[... {len(data) - 30} bytes omitted ...]\n".encode()
+        + data[-20:]
+    )
+    # memory stays bounded however much is appended
+    assert len(capture._tail) <= 2 * 20 + 4096 + 1000
+
+
+@pytest.mark.parametrize("head, tail", [(None, 5), (5, None), (0, 0)])
+def test_one_side(head: int | None, tail: int | None) -> None:
+    capture = feed(StderrCapture(head=head, tail=tail), b"0123456789")
+
+    value = capture.getvalue()
+    assert value.startswith(b"01234"[: head or 0])
+    assert value.endswith(b"56789"[5 - (tail or 0) :])
+    assert capture.omitted == 10 - (head or 0) - (tail or 0)
+
+
+def test_short_output_is_kept() -> None:
+    capture = feed(StderrCapture(head=10, tail=10), b"0123456789abc")
+
+    assert capture.getvalue() == b"0123456789abc"
+
+
+def test_lines() -> None:
+    lines: list[str] = []
+    capture = feed(
+        StderrCapture(head=0, tail=0, on_line=lines.append),
+        b"banner\nframe=1\rframe=2\r\nerror: caf\xc3\xa9\nno newline",
+        size=3,
+    )
+
+    assert lines == ["banner", "frame=1", "frame=2", "error: café", "no newline"]
+    assert capture.getvalue().endswith(b"omitted ...]\n")
+
+
+def test_long_line() -> None:
+    lines: list[str] = []
+    feed(StderrCapture(on_line=lines.append, max_line=10), b"x" * 25 + b"\n")
+
+    assert "".join(lines) == "x" * 25
+    assert all(len(line) <= 10 + 7 for line in lines)
+
+
+def test_failing_callback() -> None:
+    calls = []
+
+    def on_line(line: str) -> None:
+        calls.append(line)
+        raise RuntimeError("boom")
+
+    capture = feed(StderrCapture(on_line=on_line), b"a\nb\nc\n")
+
+    assert calls == ["a"]
+    assert capture.getvalue() == b"a\nb\nc\n"
+
+
+def test_negative() -> None:
+    with pytest.raises(ValueError):
+        StderrCapture(tail=-1)
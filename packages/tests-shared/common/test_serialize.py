@@ -1,6 +1,8 @@
+import json
 from dataclasses import dataclass
 from enum import Enum
 
+import pytest
 from syrupy.assertion import SnapshotAssertion
 
 from ffmpeg.base import input
@@ -88,3 +90,38 @@ def test_load_and_dump_mixed_type(snapshot: SnapshotAssertion) -> None:
     deserialized = loads(serialized)
 
     assert [in_file, True] == deserialized
+
+
+def test_load_and_dump_shared() -> None:
+    in_file = input("input.mp4")
+    stream = in_file.video.overlay(in_file.video.hflip()).output(filename="out.mp4")
+
+    serialized = dumps(stream, shared=True)
+    document = json.loads(serialized)
+
+    assert document["__graph__"] == 1
+    # the input node is written once, and referenced by both streams
+    classes = [entry["__class__"] for entry in document["objects"]]
+    assert classes.count("InputNode") == 1
+    deserialized = loads(serialized)
+    assert stream == deserialized
+    assert loads(dumps(stream, shared=True, compact=True)) == stream
+
+
+def test_load_shared_errors() -> None:
+    with pytest.raises(ValueError, match="version"):
+        loads('{"__graph__": 2, "objects": [], "root": null}')
+    with pytest.raises(ValueError, match="reference"):
+        loads('{"__graph__": 1, "objects": [{"__ref__": 0}], "root": null}')
+
+
+def test_load_and_dump_shared_deep_graph() -> None:
+    stream = input("input.mp4").video
+    for _ in range(3000):
+        stream = stream.hflip()
+    graph = stream.output(filename="out.mp4")
+
+    serialized = dumps(graph, shared=True)
+
+    assert len(json.loads(serialized)["objects"]) == 3002 + 3002
+    assert loads(serialized) == graph
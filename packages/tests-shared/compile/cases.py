@@ -1,7 +1,9 @@
+from collections.abc import Callable
+
 import pytest
 
 from ffmpeg.base import input, merge_outputs
-from ffmpeg.dag.schema import Stream
+from ffmpeg.dag.schema import HashableBaseModel, Stream
 from ffmpeg.filters import amix, concat
 
 
@@ -175,3 +177,44 @@ shared_cases = [
     pytest.param(stream_selector_with_subtitle(), id="stream-selector-with-subtitle"),
     pytest.param(stream_select_with_optional(), id="stream-select-with-optional"),
 ]
+
+
+def chain(n: int) -> Stream:
+    stream = input("input.mp4").video
+    for _ in range(n):
+        stream = stream.hflip()
+    return stream.output(filename="tmp.mp4")
+
+
+def fan_out(n: int) -> Stream:
+    stream = input("input.mp4").video.reverse()
+    return (
+        concat(*(stream.trim(start=i) for i in range(n)), n=n)
+        .video(0)
+        .output(filename="tmp.mp4")
+    )
+
+
+def diamond_lattice(width: int, depth: int) -> Stream:
+    layer = [input(f"input{i}.mp4").video for i in range(width)]
+    for _ in range(depth):
+        layer = [layer[i].overlay(layer[(i + 1) % width]) for i in range(width)]
+    return concat(*layer, n=width).video(0).output(filename="tmp.mp4")
+
+
+def hash_lookups(func: Callable[[], object]) -> int:
+    """Count the node and stream hash lookups made by `func`."""
+    count = 0
+    __hash__ = HashableBaseModel.__hash__
+
+    def counted(self: HashableBaseModel) -> int:
+        nonlocal count
+        count += 1
+        return __hash__(self)
+
+    HashableBaseModel.__hash__ = counted  # type: ignore[method-assign]
+    try:
+        func()
+    finally:
+        HashableBaseModel.__hash__ = __hash__  # type: ignore[method-assign]
+    return count
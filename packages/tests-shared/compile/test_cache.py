@@ -0,0 +1,100 @@
+import os
+from collections.abc import Iterator
+
+import pytest
+
+from ffmpeg.base import input
+from ffmpeg.common.serialize import dumps, loads
+from ffmpeg.compile.cache import (
+    CompileCache,
+    CompileCacheInfo,
+    CompiledGraph,
+    disable_compile_cache,
+    enable_compile_cache,
+    get_compile_cache,
+)
+from ffmpeg.compile.compile_cli import compile_as_list, precompile
+from ffmpeg.dag.schema import Stream
+
+from .cases import shared_cases
+
+
+def build(filename: str = "output.mp4") -> Stream:
+    stream = input("input.mp4").video.hflip()
+    return stream.overlay(stream).output(filename=filename)
+
+
+@pytest.fixture
+def cache() -> Iterator[CompileCache]:
+    yield enable_compile_cache(maxsize=2)
+    disable_compile_cache()
+
+
+@pytest.mark.parametrize("graph", shared_cases)
+def test_precompile(graph: Stream) -> None:
+    compiled = precompile(graph)
+
+    assert compiled.fingerprint == graph.fingerprint
+    assert compiled.as_list() == compile_as_list(graph)
+
+
+def test_uncached_compile_skips_fingerprint() -> None:
+    stream = build()
+    compile_as_list(stream)
+
+    # the fingerprint is memoized once computed
+    assert "fingerprint" not in stream.__dict__
+    assert "fingerprint" not in stream.node.__dict__
+
+
+def test_compile_cache(cache: CompileCache) -> None:
+    assert get_compile_cache() is cache
+
+    expected = compile_as_list(build())
+    assert compile_as_list(build()) == expected
+    assert compile_as_list(build(), auto_fix=False) != expected
+    assert cache.info() == CompileCacheInfo(hits=1, misses=2, maxsize=2, currsize=2)
+
+    # the least recently used entry (auto_fix=False) is evicted
+    compile_as_list(build())
+    compile_as_list(build("other.mp4"))
+    assert cache.get(build().fingerprint) is not None
+    assert cache.get(build().fingerprint, auto_fix=False) is None
+
+    cache.clear()
+    assert cache.info() == CompileCacheInfo(hits=0, misses=0, maxsize=2, currsize=0)
+
+
+def test_compile_cache_returns_copies(cache: CompileCache) -> None:
+    compile_as_list(build()).append("-y")
+    assert compile_as_list(build()) == precompile(build()).as_list()
+
+
+def test_compile_cache_filter_complex_script(cache: CompileCache) -> None:
+    first = compile_as_list(build(), use_filter_complex_script=True)
+    second = compile_as_list(build(), use_filter_complex_script=True)
+
+    try:
+        assert cache.info().hits == 1
+        assert (
+            first[first.index("-filter_complex_script") + 1]
+            != (second[second.index("-filter_complex_script") + 1])
+        )
+    finally:
+        for args in (first, second):
+            os.unlink(args[args.index("-filter_complex_script") + 1])
+
+
+def test_precompiled_graph_reuse(cache: CompileCache) -> None:
+    # e.g. written by a build step and loaded by each worker process
+    compiled = loads(dumps(precompile(build())))
+    assert isinstance(compiled, CompiledGraph)
+
+    cache.add(compiled)
+    assert compile_as_list(build()) == compiled.as_list()
+    assert cache.info().hits == 1
+
+
+def test_compile_cache_maxsize() -> None:
+    with pytest.raises(ValueError):
+        CompileCache(maxsize=0)
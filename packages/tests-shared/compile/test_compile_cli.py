@@ -13,7 +13,15 @@ if TYPE_CHECKING:
 import ffmpeg
 from ffmpeg.base import filter_multi_output, input
 from ffmpeg.common.schema import StreamType
-from ffmpeg.compile.compile_cli import compile, compile_as_list, get_args, parse
+from ffmpeg.compile.compile_cli import (
+    compile,
+    compile_as_list,
+    get_args,
+    get_av_options_dict,
+    get_filter_dict,
+    get_options_dict,
+    parse,
+)
 from ffmpeg.dag.schema import Stream
 
 from .cases import shared_cases
@@ -132,3 +140,10 @@ def test_parse_ffmpeg_commands(snapshot: SnapshotAssertion, command: str) -> Non
     assert snapshot(
         name="build-ffmpeg-commands", extension_class=VersionedAmberExtension
     ) == compile(parsed)
+
+
+def test_option_indexes_are_shared() -> None:
+    assert get_filter_dict() is get_filter_dict()
+    assert get_options_dict() is get_options_dict()
+    assert get_av_options_dict() is get_av_options_dict()
+    assert get_filter_dict()["scale"].name == "scale"
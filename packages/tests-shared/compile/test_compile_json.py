@@ -4,6 +4,7 @@ import pytest
 from syrupy.assertion import SnapshotAssertion
 from syrupy.extensions.json import JSONSnapshotExtension
 
+from ffmpeg.base import input
 from ffmpeg.compile.compile_json import compile, parse
 from ffmpeg.compile.validate import validate
 from ffmpeg.dag.schema import Stream
@@ -21,3 +22,37 @@ def test_compile_json(graph: Stream, snapshot: SnapshotAssertion) -> None:
     assert parse(r) == validate(graph, auto_fix=True), (
         "parse result should be equal to the original graph"
     )
+
+
+@pytest.mark.parametrize("graph", shared_cases)
+def test_parse_inline_format(graph: Stream) -> None:
+    # JSON compiled before the shared format, with every node inlined
+    r = compile(graph, shared=False)
+
+    assert "__graph__" not in json.loads(r)
+    assert parse(r) == validate(graph, auto_fix=True)
+
+
+def test_compact() -> None:
+    graph = input("input.mp4").video.hflip().output(filename="output.mp4")
+
+    r = compile(graph, compact=True)
+
+    assert "\n" not in r and ": " not in r
+    assert json.loads(r) == json.loads(compile(graph))
+    assert parse(r) == validate(graph, auto_fix=True)
+
+
+def test_shared_subgraphs() -> None:
+    def graph(depth: int) -> Stream:
+        stream = input("input.mp4").video
+        for _ in range(depth):
+            stream = stream.overlay(stream)
+        return stream.output(filename="output.mp4")
+
+    # each overlay doubles the paths to the input, but adds a few nodes
+    sizes = [len(compile(graph(depth))) for depth in (10, 20, 40)]
+    assert sizes[2] - sizes[1] < 3 * (sizes[1] - sizes[0])
+    assert len(compile(graph(10), shared=False)) > 100 * sizes[0]
+
+    assert parse(compile(graph(40))) == validate(graph(40), auto_fix=True)
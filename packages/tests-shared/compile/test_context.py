@@ -1,5 +1,7 @@
+from collections.abc import Callable
 from typing import Any
 
+import pytest
 from syrupy.assertion import SnapshotAssertion
 
 from ffmpeg.base import input
@@ -8,6 +10,8 @@ from ffmpeg.compile.context import DAGContext
 from ffmpeg.dag.schema import Node, Stream
 from ffmpeg.filters import concat
 
+from .cases import chain, diamond_lattice, fan_out, hash_lookups, shared_cases
+
 
 def render(context: DAGContext, obj: Any) -> Any:
     """Recursively convert graph objects to a human-readable representation."""
@@ -45,3 +49,45 @@ def test_context(snapshot: SnapshotAssertion) -> None:
     assert get_node_label(input1.node, context) == "0"
     assert context.get_outgoing_streams(input1.node) == [input1]
     assert context.get_outgoing_nodes(input1) == [(rev.node, 0)]
+
+
+@pytest.mark.parametrize("graph", shared_cases)
+def test_upstream_counts(graph: Stream) -> None:
+    context = DAGContext.build(graph.node)
+
+    assert context.upstream_counts == {
+        node: len(node.upstream_nodes) for node in context.nodes
+    }
+
+
+def test_deep_graph() -> None:
+    graph = chain(5000)
+    context = DAGContext.build(graph.node)
+
+    assert len(context.nodes) == 5002
+    assert len(context.all_nodes) == 5002
+    assert context.upstream_counts[graph.node] == 5002
+    assert len(graph.node.upstream_nodes) == 5002
+
+
+@pytest.mark.parametrize(
+    "build",
+    [
+        pytest.param(chain, id="chain"),
+        pytest.param(fan_out, id="fan-out"),
+        pytest.param(lambda n: diamond_lattice(8, n // 8), id="diamond-lattice"),
+    ],
+)
+def test_build_is_linear(build: Callable[[int], Stream]) -> None:
+    def lookups(n: int) -> int:
+        graph = build(n)
+
+        def traverse() -> None:
+            context = DAGContext.build(graph.node)
+            context.all_nodes
+            context.all_streams
+
+        return hash_lookups(traverse)
+
+    # every node and stream is looked up a constant number of times
+    assert lookups(2000) < 5 * lookups(500)
@@ -0,0 +1,121 @@
+import shutil
+import time
+from collections.abc import Callable, Iterator
+from pathlib import Path
+
+import pytest
+
+from ffmpeg.base import input
+from ffmpeg.compile.preflight import MissingCapabilities, preflight
+from ffmpeg.exceptions import FFMpegValueError
+from ffmpeg_core.info import clear_cache
+
+FAKE_FFMPEG = """
+    import os
+    import sys
+
+    with open(os.environ["FAKE_FFMPEG_LOG"], "a") as log:
+        log.write(" ".join(sys.argv[1:]) + "\\n")
+    if "-filters" in sys.argv:
+        print("Filters:")
+        print("  | = Source or sink filter")
+        print(" ... hflip             V->V       Horizontally flip the input video.")
+        print(" TSC crop              V->V       Crop the input video.")
+    elif "-codecs" in sys.argv:
+        print("Codecs:")
+        print(" -------")
+        print(" DEV.LS h264 H.264 (decoders: h264 ) (encoders: libx264 )")
+        print(" DEA.L. aac AAC")
+    elif "-formats" in sys.argv:
+        print("Formats:")
+        print(" D.. = Demuxing supported")
+        print(" ---")
+        print(" DE  matroska,webm   Matroska / WebM")
+        print(" D d lavfi           Libavfilter virtual input device")
+    """
+
+
+@pytest.fixture
+def fake_ffmpeg(make_fake_executable: Callable[..., str]) -> Iterator[str]:
+    clear_cache()
+    yield make_fake_executable(FAKE_FFMPEG)
+    clear_cache()
+
+
+def calls(tmp_path: Path) -> list[str]:
+    log = tmp_path / "fake_ffmpeg.log"
+    return log.read_text().splitlines() if log.exists() else []
+
+
+def test_preflight(fake_ffmpeg: str) -> None:
+    stream = (
+        input("input.mkv", f="matroska", c="h264")
+        .video.hflip()
+        .crop(out_w="320", out_h="240")
+        .output(filename="output.mkv", extra_options={"c:v": "libx264", "c:a": "copy"})
+    )
+
+    assert not preflight(stream, cmd=fake_ffmpeg)
+
+
+def test_missing(fake_ffmpeg: str, tmp_path: Path) -> None:
+    stream = (
+        input("input.mp4", f="mov", c="hevc")
+        .video.hflip()
+        .vflip()
+        .deband()
+        .output(filename="output.mp4", vcodec="libx265", f="mp4", acodec="aac")
+    )
+
+    missing = preflight(stream, cmd=fake_ffmpeg, check=False)
+
+    # every missing piece is reported at once
+    assert missing == MissingCapabilities(
+        filters=("deband", "vflip"),
+        decoders=("hevc",),
+        encoders=("libx265",),
+        demuxers=("mov",),
+        muxers=("mp4",),
+    )
+    with pytest.raises(FFMpegValueError, match="filters: deband, vflip; decoders"):
+        preflight(stream, cmd=fake_ffmpeg)
+    assert sorted(calls(tmp_path)) == [
+        "-codecs",
+        "-hide_banner -filters",
+        "-hide_banner -formats",
+    ]
+
+
+def test_only_needed_listings(fake_ffmpeg: str, tmp_path: Path) -> None:
+    preflight(
+        input("input.mp4").video.hflip().output(filename="output.mp4"), cmd=fake_ffmpeg
+    )
+
+    assert calls(tmp_path) == ["-hide_banner -filters"]
+
+
+def test_benchmark(fake_ffmpeg: str) -> None:
+    stream = (
+        input("input.mkv", c="h264")
+        .video.hflip()
+        .crop(out_w="320", out_h="240")
+        .hflip()
+        .output(filename="output.mkv", vcodec="libx264", f="matroska")
+    )
+    preflight(stream, cmd=fake_ffmpeg)
+
+    start = time.perf_counter()
+    for _ in range(100):
+        preflight(stream, cmd=fake_ffmpeg)
+    # after warm-up, a check costs lookups, not processes
+    assert (time.perf_counter() - start) / 100 < 0.001
+
+
+@pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg binary not found")
+def test_installed_ffmpeg() -> None:
+    stream = input("input.mp4").video.hflip().output(filename="output.mp4", c="copy")
+
+    assert not preflight(stream)
+    assert preflight(
+        input("input.mp4").output(filename="output.x", f="not-a-muxer"), check=False
+    ).muxers == ("not-a-muxer",)
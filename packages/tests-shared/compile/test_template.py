@@ -0,0 +1,100 @@
+from typing import Any
+
+import pytest
+
+from ffmpeg.base import input
+from ffmpeg.compile.compile_cli import compile_as_list
+from ffmpeg.compile.template import Placeholder, compile_template
+from ffmpeg.dag.schema import Stream
+from ffmpeg.exceptions import FFMpegValueError
+from ffmpeg.utils.lazy_eval.schema import Symbol
+
+
+def build(src: Any, start: Any, title: Any, dst: Any, duration: Any) -> Stream:
+    stream = input(src, ss=start)
+    video = stream.video.drawtext(text=title).overlay(stream.video.hflip())
+    return video.output(stream.audio, filename=dst, t=duration)
+
+
+@pytest.mark.parametrize(
+    "values",
+    [
+        {"src": "input.mp4", "start": 3, "title": "hello", "dst": "output.mp4"},
+        {
+            "src": "in put's.mp4",
+            "start": "00:01:02.5",
+            "title": "It's [a]: test, ok; \\o/",
+            "dst": "/tmp/out;[0].mp4",
+        },
+    ],
+)
+def test_render(values: dict[str, Any]) -> None:
+    template = compile_template(
+        build(
+            Placeholder("src"),
+            Symbol("start"),
+            Symbol("title"),
+            Placeholder("dst"),
+            Symbol("start") * 2,
+        )
+    )
+    expected = compile_as_list(
+        build(
+            values["src"],
+            values["start"],
+            values["title"],
+            values["dst"],
+            Symbol("start").eval(start=values["start"]) * 2,
+        )
+    )
+
+    assert template.keys == {"src", "start", "title", "dst"}
+    assert template.render(**values) == expected
+
+
+def test_render_placeholder_in_string() -> None:
+    template = compile_template(
+        input("input.mp4")
+        .drawtext(text=f"by {Placeholder('author')}: {Placeholder('title')}")
+        .output(filename=f"{Placeholder('name')}.mp4")
+    )
+
+    assert template.render(author="a=b", title="c'd", name="out") == compile_as_list(
+        input("input.mp4").drawtext(text="by a=b: c'd").output(filename="out.mp4")
+    )
+
+
+def test_render_without_placeholders() -> None:
+    graph = build("input.mp4", 1, "title", "output.mp4", 2)
+    template = compile_template(graph)
+
+    assert template.keys == set()
+    assert template.render() == compile_as_list(graph)
+
+
+def test_render_missing_value() -> None:
+    template = compile_template(
+        input(Placeholder("src")).output(filename=Placeholder("dst"))
+    )
+
+    with pytest.raises(FFMpegValueError, match="dst"):
+        template.render(src="input.mp4")
+
+
+def test_render_boolean_option() -> None:
+    template = compile_template(
+        input("input.mp4", ss=Symbol("start")).output(filename="output.mp4")
+    )
+
+    with pytest.raises(FFMpegValueError, match="start"):
+        template.render(start=True)
+
+
+def test_invalid_placeholder_key() -> None:
+    with pytest.raises(FFMpegValueError):
+        Placeholder("not a key")
+
+    with pytest.raises(FFMpegValueError):
+        compile_template(
+            input("input.mp4").hflip().output(filename="o.mp4", t=Symbol("a:b"))
+        )
@@ -1,12 +1,15 @@
+from collections.abc import Callable
+
 import pytest
 from syrupy.assertion import SnapshotAssertion
 
+from ffmpeg.base import input
 from ffmpeg.compile.context import DAGContext
-from ffmpeg.compile.validate import add_split, remove_split
+from ffmpeg.compile.validate import add_split, fix_graph, remove_split
 from ffmpeg.dag.schema import Stream
 from ffmpeg.utils.snapshot import DAGSnapshotExtension
 
-from .cases import shared_cases
+from .cases import chain, diamond_lattice, fan_out, hash_lookups, shared_cases
 
 
 @pytest.mark.parametrize("graph", shared_cases)
@@ -29,3 +32,39 @@ def test_rebuild_graph(graph: Stream, snapshot: SnapshotAssertion) -> None:
         snapshot(name="add-split", extension_class=DAGSnapshotExtension)
         == added_split[0].node
     )
+
+
+def test_fix_graph_skips_valid_graph() -> None:
+    graph = chain(10)
+    assert fix_graph(graph) is graph
+
+
+def test_fix_graph_deep_graph() -> None:
+    stream = input("input.mp4").video
+    for _ in range(5000):
+        stream = stream.hflip()
+    graph = stream.overlay(stream).output(filename="tmp.mp4")
+
+    fixed = fix_graph(graph)
+    overlay = fixed.node.inputs[0].node
+
+    assert overlay.inputs[0].node.name == "split"
+    assert overlay.inputs[0].node is overlay.inputs[1].node
+    assert [s.index for s in overlay.inputs] == [0, 1]
+    assert len(DAGContext.build(fixed.node).nodes) == 5004
+
+
+@pytest.mark.parametrize(
+    "build",
+    [
+        pytest.param(fan_out, id="fan-out"),
+        pytest.param(lambda n: diamond_lattice(8, n // 8), id="diamond-lattice"),
+    ],
+)
+def test_fix_graph_is_linear(build: Callable[[int], Stream]) -> None:
+    def lookups(n: int) -> int:
+        graph = build(n)
+        return hash_lookups(lambda: fix_graph(graph))
+
+    # every node and stream is looked up a constant number of times
+    assert lookups(2000) < 5 * lookups(500)
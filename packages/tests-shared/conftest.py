@@ -4,3 +4,5 @@ Most snapshots are identical across versions, so a single __snapshots__ dir is u
 Version-sensitive tests (e.g., CLI parsing that depends on options.json data) use
 per-version snapshot directories: __snapshots_v5__/, __snapshots_v6__/, etc.
 """
+
+from ffmpeg_core.conftest import make_fake_executable  # noqa: F401
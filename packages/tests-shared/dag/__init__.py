@@ -0,0 +1 @@
+# Shared DAG tests for typed-ffmpeg v5-v8
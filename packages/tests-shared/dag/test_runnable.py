@@ -0,0 +1,569 @@
+import asyncio
+import struct
+import sys
+import time
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from ffmpeg.base import input
+from ffmpeg.dag.global_runnable.raw import raw_audio_output, raw_video_output
+from ffmpeg.dag.nodes import OutputStream
+from ffmpeg.exceptions import FFMpegExecuteError, FFMpegValueError
+from ffmpeg.utils.progress import Progress
+
+FAKE_FFMPEG = """
+    import os
+    import signal
+    import struct
+    import sys
+    import time
+
+    args = sys.argv[1:]
+    delay = float(os.environ.get("FAKE_FFMPEG_DELAY", "0"))
+
+    if os.path.basename(args[-1]).startswith("hang"):
+        def interrupt(signum, frame):
+            # FFmpeg finalizes its outputs on SIGINT
+            with open(args[-1], "w") as output:
+                output.write("finalized")
+            sys.exit(255)
+
+        ignore = "ignore" in args[-1]
+        signal.signal(signal.SIGINT, signal.SIG_IGN if ignore else interrupt)
+        time.sleep(60)
+
+    sys.stderr.write("x" * int(os.environ.get("FAKE_FFMPEG_STDERR", "0")))
+    sys.stdout.write("y" * int(os.environ.get("FAKE_FFMPEG_STDOUT", "0")))
+    sys.stdout.flush()
+
+    if "-progress" in args:
+        fd = int(args[args.index("-progress") + 1].removeprefix("pipe:"))
+        blocks = int(os.environ.get("FAKE_FFMPEG_BLOCKS", "3"))
+        with os.fdopen(fd, "w") as progress:
+            for i in range(blocks):
+                progress.write(
+                    f"frame={i * 10}\\nfps=25.00\\nstream_0_0_q=28.0\\n"
+                    f"bitrate= 128.5kbits/s\\ntotal_size={i * 1000}\\n"
+                    f"out_time_us={i * 400000}\\nout_time_ms={i * 400000}\\n"
+                    f"out_time=00:00:00.{i * 4}00000\\ndup_frames=0\\n"
+                    f"drop_frames={i}\\nspeed={i}.5x\\n"
+                    f"progress={'end' if i == blocks - 1 else 'continue'}\\n"
+                )
+                progress.flush()
+                time.sleep(delay)
+
+    if "pipe:" in args and args[args.index("pipe:") - 1] == "-i":
+        if "fail.mp4" in args:
+            sys.stderr.write("invalid frame\\n")
+            sys.exit(1)
+        size = 0
+        while chunk := sys.stdin.buffer.read(65536):
+            size += len(chunk)
+        sys.stderr.write(f"read {size} bytes\\n")
+
+    if args[-1] == "pipe:" and args[args.index("-f") + 1] == "rawvideo":
+        width, height = map(int, args[args.index("-s") + 1].split("x"))
+        bpp = {"rgb24": 3, "gray": 1, "rgba": 4}[args[args.index("-pix_fmt") + 1]]
+        for i in range(int(os.environ.get("FAKE_FFMPEG_FRAMES", "3"))):
+            sys.stdout.buffer.write(bytes([i % 256]) * (width * height * bpp))
+            sys.stdout.buffer.flush()
+            time.sleep(delay)
+
+    if args[-1] == "pipe:" and args[args.index("-f") + 1] in ("s16le", "f32le"):
+        channels = int(args[args.index("-ac") + 1])
+        # samples are numbered, and written in odd-sized blocks
+        samples = list(range(int(os.environ.get("FAKE_FFMPEG_SAMPLES", "1000"))))
+        code = "h" if args[args.index("-f") + 1] == "s16le" else "f"
+        for i in range(0, len(samples), 77):
+            block = [s for s in samples[i : i + 77] for _ in range(channels)]
+            sys.stdout.buffer.write(struct.pack(f"<{len(block)}{code}", *block))
+            sys.stdout.buffer.flush()
+            time.sleep(delay)
+
+    sys.stderr.write("fake ffmpeg finished\\n")
+    sys.exit(1 if "fail.mp4" in args else 0)
+    """
+
+
+@pytest.fixture
+def fake_ffmpeg(make_fake_executable: Callable[..., str]) -> str:
+    return make_fake_executable(FAKE_FFMPEG)
+
+
+def build(filename: str = "output.mp4") -> OutputStream:
+    return input("input.mp4").output(filename=filename)
+
+
+def test_run_progress_callback(fake_ffmpeg: str) -> None:
+    reports: list[Progress] = []
+    stdout, stderr = build().run(
+        fake_ffmpeg, capture_stderr=True, progress=reports.append
+    )
+
+    assert stderr == b"fake ffmpeg finished\n"
+    assert [p.frame for p in reports] == [0, 10, 20]
+    assert [p.done for p in reports] == [False, False, True]
+    assert reports[-1] == Progress(
+        frame=20,
+        fps=25.0,
+        bitrate=128.5,
+        total_size=2000,
+        out_time=0.8,
+        dup_frames=0,
+        drop_frames=2,
+        speed=2.5,
+        done=True,
+        fields=reports[-1].fields,
+    )
+    assert reports[-1].fields["stream_0_0_q"] == "28.0"
+
+
+def test_run_progress_error(fake_ffmpeg: str) -> None:
+    reports: list[Progress] = []
+    with pytest.raises(FFMpegExecuteError) as excinfo:
+        build("fail.mp4").run(fake_ffmpeg, capture_stderr=True, progress=reports.append)
+
+    assert excinfo.value.retcode == 1
+    assert excinfo.value.stderr == b"fake ffmpeg finished\n"
+    assert len(reports) == 3
+
+
+def test_run_progress_failing_callback(fake_ffmpeg: str) -> None:
+    def callback(progress: Progress) -> None:
+        raise RuntimeError("boom")
+
+    # a failing callback does not stall or fail the run
+    build().run(fake_ffmpeg, quiet=True, progress=callback)
+
+
+def test_iter_progress(fake_ffmpeg: str) -> None:
+    reports = list(build().iter_progress(fake_ffmpeg, quiet=True))
+    assert [p.out_time for p in reports] == [0.0, 0.4, 0.8]
+
+    with pytest.raises(FFMpegExecuteError):
+        list(build("fail.mp4").iter_progress(fake_ffmpeg, quiet=True))
+
+
+def test_iter_progress_stops_early(
+    fake_ffmpeg: str, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setenv("FAKE_FFMPEG_BLOCKS", "1000")
+    monkeypatch.setenv("FAKE_FFMPEG_DELAY", "0.1")
+
+    start = time.perf_counter()
+    for progress in build().iter_progress(fake_ffmpeg, quiet=True):
+        assert progress.frame == 0
+        break
+
+    # FFmpeg is terminated instead of running to completion
+    assert time.perf_counter() - start < 10
+
+
+def test_aiter_progress(fake_ffmpeg: str) -> None:
+    async def collect(filename: str) -> list[Progress]:
+        return [
+            p async for p in build(filename).aiter_progress(fake_ffmpeg, quiet=True)
+        ]
+
+    reports = asyncio.run(collect("output.mp4"))
+    assert [p.frame for p in reports] == [0, 10, 20]
+
+    with pytest.raises(FFMpegExecuteError):
+        asyncio.run(collect("fail.mp4"))
+
+
+def test_iter_frames(fake_ffmpeg: str) -> None:
+    stream = input("input.mp4").output(filename="pipe:", s="4x2")
+
+    frames = list(stream.iter_frames(fake_ffmpeg, quiet=True, copy=True))
+    assert [bytes(frame)[:1] for frame in frames] == [b"\x00", b"\x01", b"\x02"]
+    assert all(len(bytes(frame)) == 4 * 2 * 3 for frame in frames)
+
+
+def test_iter_frames_reuses_buffer(fake_ffmpeg: str) -> None:
+    stream = input("input.mp4").output(filename="pipe:")
+
+    frames = list(stream.iter_frames(fake_ffmpeg, width=2, height=2, pix_fmt="gray"))
+    # without copy, every frame is a view of the same buffer
+    assert [bytes(frame) for frame in frames] == [b"\x02" * 4] * 3
+
+
+def test_iter_frames_args() -> None:
+    stream = input("input.mp4").output(filename="pipe:", pix_fmt="rgba")
+    raw, frame_format = raw_video_output(stream, 640, 480, None, "ffprobe")
+
+    assert frame_format.shape == (480, 640, 4)
+    assert raw.compile() == [
+        "ffmpeg",
+        "-i",
+        "input.mp4",
+        "-pix_fmt",
+        "rgba",
+        "-f",
+        "rawvideo",
+        "-s",
+        "640x480",
+        "pipe:",
+    ]
+
+
+def test_iter_frames_invalid_output() -> None:
+    with pytest.raises(FFMpegValueError, match="exactly one output"):
+        list(input("input.mp4").output(filename="output.mp4").iter_frames())
+
+    with pytest.raises(FFMpegValueError, match="rawvideo"):
+        list(input("input.mp4").output(filename="pipe:", f="mp4").iter_frames())
+
+    with pytest.raises(FFMpegValueError, match="pixel format"):
+        stream = input("input.mp4").output(filename="pipe:", s="4x2")
+        list(stream.iter_frames(pix_fmt="yuv422p10le"))
+
+
+def test_iter_frames_stops_early(
+    fake_ffmpeg: str, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setenv("FAKE_FFMPEG_FRAMES", "100000")
+    stream = input("input.mp4").output(filename="pipe:", s="320x240")
+
+    start = time.perf_counter()
+    for i, _ in enumerate(stream.iter_frames(fake_ffmpeg, quiet=True)):
+        if i == 5:
+            break
+
+    assert time.perf_counter() - start < 10
+
+
+def raw_input(filename: str = "output.mp4", **kwargs: str) -> OutputStream:
+    return input("pipe:", f="rawvideo", s="4x2", **kwargs).output(filename=filename)
+
+
+def test_frame_writer(fake_ffmpeg: str, capfd: pytest.CaptureFixture[str]) -> None:
+    with raw_input(pix_fmt="rgb24").frame_writer(fake_ffmpeg) as writer:
+        assert writer.frame_format.frame_size == 4 * 2 * 3
+        writer.write(bytes(24))
+        writer.write(memoryview(bytearray(24)))
+        writer.write(bytearray(24), copy=True)
+
+    assert writer.frames_written == 3
+    assert writer.process.returncode == 0
+    assert "read 72 bytes" in capfd.readouterr().err
+
+
+def test_frame_writer_default_pix_fmt(fake_ffmpeg: str) -> None:
+    with raw_input().frame_writer(fake_ffmpeg, quiet=True) as writer:
+        # yuv420p: a full luma plane, and quarter-size chroma planes
+        writer.write(bytes(12))
+
+        with pytest.raises(FFMpegValueError, match="Expected frames of 12 bytes"):
+            writer.write(bytes(24))
+
+    with pytest.raises(FFMpegValueError, match="closed"):
+        writer.write(bytes(12))
+
+
+def test_frame_writer_error(fake_ffmpeg: str) -> None:
+    writer = raw_input("fail.mp4").frame_writer(fake_ffmpeg, quiet=True, queue_size=1)
+
+    # the failure is reported while writing, instead of blocking on the full pipe
+    start = time.perf_counter()
+    with pytest.raises(FFMpegExecuteError) as excinfo:
+        with writer:
+            while True:
+                writer.write(bytes(12))
+
+    assert time.perf_counter() - start < 10
+    assert excinfo.value.retcode == 1
+    assert excinfo.value.stderr == b"invalid frame\n"
+
+
+def test_frame_writer_abort(fake_ffmpeg: str) -> None:
+    with pytest.raises(RuntimeError):
+        with raw_input().frame_writer(fake_ffmpeg, quiet=True) as writer:
+            writer.write(bytes(12))
+            raise RuntimeError("boom")
+
+    # FFmpeg is stopped before reading to the end of its input
+    assert writer.process.returncode != 0
+
+
+def test_frame_writer_invalid_input() -> None:
+    with pytest.raises(FFMpegValueError, match="exactly one input"):
+        input("input.mp4").output(filename="output.mp4").frame_writer()
+
+    with pytest.raises(FFMpegValueError, match="rawvideo"):
+        input("pipe:", f="rawvideo").output(filename="output.mp4").frame_writer()
+
+
+def audio_output(filename: str = "pipe:", **kwargs: str | int) -> OutputStream:
+    return input("input.mp4").output(filename=filename, **kwargs)
+
+
+def test_iter_audio_chunks(fake_ffmpeg: str) -> None:
+    chunks = list(
+        audio_output(f="s16le", ac=2).iter_audio_chunks(
+            300, overlap=100, cmd=fake_ffmpeg, quiet=True, copy=True
+        )
+    )
+
+    # chunks of 300 samples start every 200 samples; the last 100 are discarded
+    assert len(chunks) == 4
+    first = struct.unpack("<600h", bytes(chunks[0]))
+    assert first[:4] == (0, 0, 1, 1)
+    assert struct.unpack("<600h", bytes(chunks[3]))[:2] == (600, 600)
+
+
+def test_iter_audio_chunks_pad(fake_ffmpeg: str) -> None:
+    stream = audio_output(f="f32le")
+    chunks = list(
+        stream.iter_audio_chunks(
+            300, cmd=fake_ffmpeg, channels=1, pad=True, quiet=True, copy=True
+        )
+    )
+
+    last = struct.unpack("<300f", bytes(chunks[-1]))
+    assert len(chunks) == 4
+    assert last[:100] == tuple(range(900, 1000))
+    assert set(last[100:]) == {0.0}
+
+
+def test_iter_audio_chunks_args() -> None:
+    stream = audio_output(ac=1)
+    raw, sample_format = raw_audio_output(stream, None, "ffprobe")
+
+    assert sample_format.frame_size == 2
+    assert raw.compile() == [
+        "ffmpeg",
+        "-i",
+        "input.mp4",
+        "-ac",
+        "1",
+        "-f",
+        "s16le",
+        "pipe:",
+    ]
+
+
+def test_iter_audio_chunks_invalid_output() -> None:
+    with pytest.raises(FFMpegValueError, match="raw PCM"):
+        list(audio_output(f="wav").iter_audio_chunks(320))
+
+    with pytest.raises(FFMpegValueError, match="overlap"):
+        list(audio_output(ac=1).iter_audio_chunks(320, overlap=320))
+
+
+def test_iter_audio_chunks_error(fake_ffmpeg: str) -> None:
+    stream = input("input.mp4").output(
+        filename="pipe:", f="s16le", ac=1, metadata="fail.mp4"
+    )
+    with pytest.raises(FFMpegExecuteError):
+        list(stream.iter_audio_chunks(320, cmd=fake_ffmpeg, quiet=True))
+
+
+def test_aiter_audio_chunks(fake_ffmpeg: str) -> None:
+    async def collect(limit: int | None = None) -> list[bytes]:
+        chunks = []
+        stream = audio_output(f="s16le", ac=1)
+        async for chunk in stream.aiter_audio_chunks(250, cmd=fake_ffmpeg, quiet=True):
+            chunks.append(bytes(chunk))
+            if len(chunks) == limit:
+                break
+        return chunks
+
+    chunks = asyncio.run(collect())
+    assert len(chunks) == 4
+    assert struct.unpack("<250h", chunks[2])[0] == 500
+
+    assert len(asyncio.run(collect(limit=1))) == 1
+
+
+def test_aiter_audio_chunks_cancel(
+    fake_ffmpeg: str, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setenv("FAKE_FFMPEG_SAMPLES", "1000000")
+    monkeypatch.setenv("FAKE_FFMPEG_DELAY", "0.05")
+
+    async def consume() -> None:
+        stream = audio_output(f="s16le", ac=1)
+        async for _ in stream.aiter_audio_chunks(320, cmd=fake_ffmpeg, quiet=True):
+            pass
+
+    async def main() -> None:
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(consume(), 0.5)
+
+    start = time.perf_counter()
+    asyncio.run(main())
+    # FFmpeg is terminated instead of running to completion
+    assert time.perf_counter() - start < 10
+
+
+def test_arun(fake_ffmpeg: str) -> None:
+    stdout, stderr = asyncio.run(build().arun(fake_ffmpeg, capture_stderr=True))
+    assert (stdout, stderr) == (b"", b"fake ffmpeg finished\n")
+
+    with pytest.raises(FFMpegExecuteError) as excinfo:
+        asyncio.run(build("fail.mp4").arun(fake_ffmpeg, capture_stderr=True))
+    assert excinfo.value.retcode == 1
+    assert excinfo.value.stderr == b"fake ffmpeg finished\n"
+
+
+def test_arun_input(fake_ffmpeg: str) -> None:
+    stream = raw_input()
+    _, stderr = asyncio.run(
+        stream.arun(fake_ffmpeg, capture_stderr=True, input=bytes(100_000))
+    )
+    assert stderr.startswith(b"read 100000 bytes\n")
+
+
+def test_arun_drains_pipes(fake_ffmpeg: str, monkeypatch: pytest.MonkeyPatch) -> None:
+    # both far larger than a pipe's buffer
+    monkeypatch.setenv("FAKE_FFMPEG_STDERR", "1000000")
+    monkeypatch.setenv("FAKE_FFMPEG_STDOUT", "1000000")
+
+    stdout, stderr = asyncio.run(
+        build().arun(fake_ffmpeg, capture_stdout=True, capture_stderr=True)
+    )
+    assert len(stdout) == 1_000_000
+    assert len(stderr) == 1_000_000 + len(b"fake ffmpeg finished\n")
+
+
+def test_arun_tee_stderr(fake_ffmpeg: str, capfd: pytest.CaptureFixture[str]) -> None:
+    _, stderr = asyncio.run(build().arun(fake_ffmpeg, tee_stderr=True))
+
+    assert stderr == b"fake ffmpeg finished\n"
+    assert "fake ffmpeg finished" in capfd.readouterr().err
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="SIGINT is not supported")
+def test_arun_cancel(fake_ffmpeg: str, tmp_path: Path) -> None:
+    output = tmp_path / "hang.mp4"
+
+    async def main() -> None:
+        stream = build(str(output))
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(stream.arun(fake_ffmpeg, quiet=True), 0.5)
+
+    start = time.perf_counter()
+    asyncio.run(main())
+
+    # FFmpeg is interrupted, and had the chance to finalize its output
+    assert time.perf_counter() - start < 5
+    assert output.read_text() == "finalized"
+
+
+def test_arun_kill(fake_ffmpeg: str, tmp_path: Path) -> None:
+    async def main() -> None:
+        stream = build(str(tmp_path / "hang_ignore.mp4"))
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(
+                stream.arun(fake_ffmpeg, quiet=True, kill_timeout=0.5), 0.5
+            )
+
+    start = time.perf_counter()
+    asyncio.run(main())
+    assert time.perf_counter() - start < 5
+
+
+def test_arun_concurrent(fake_ffmpeg: str) -> None:
+    async def main() -> list[tuple[bytes, bytes]]:
+        return await asyncio.gather(
+            *(
+                build(f"{i}.mp4").arun(fake_ffmpeg, capture_stderr=True)
+                for i in range(50)
+            )
+        )
+
+    results = asyncio.run(main())
+    assert results == [(b"", b"fake ffmpeg finished\n")] * 50
+
+
+BOUNDED_STDERR = b"xxxxx\n[... 1000005 bytes omitted ...]\nfake ffmpeg finished\n"
+
+
+@pytest.mark.parametrize("tee_stderr", [False, True])
+def test_run_bounded_stderr(
+    fake_ffmpeg: str, monkeypatch: pytest.MonkeyPatch, tee_stderr: bool
+) -> None:
+    monkeypatch.setenv("FAKE_FFMPEG_STDERR", "1000010")
+    options: dict[str, Any] = {
+        "capture_stderr": True,
+        "quiet": True,
+        "tee_stderr": tee_stderr,
+        "stderr_head": 5,
+        "stderr_tail": 21,
+    }
+
+    _, stderr = build().run(fake_ffmpeg, **options)
+    assert stderr == BOUNDED_STDERR
+
+    with pytest.raises(FFMpegExecuteError) as excinfo:
+        build("fail.mp4").run(fake_ffmpeg, **options)
+    assert excinfo.value.stderr == BOUNDED_STDERR
+
+    _, stderr = asyncio.run(build().arun(fake_ffmpeg, **options))
+    assert stderr == BOUNDED_STDERR
+
+    _, stderr = build().run(fake_ffmpeg, progress=lambda _: None, **options)
+    assert stderr == BOUNDED_STDERR
+
+
+def test_iterators_bounded_stderr(
+    fake_ffmpeg: str, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setenv("FAKE_FFMPEG_STDERR", "1000010")
+    options: dict[str, Any] = {"quiet": True, "stderr_head": 5, "stderr_tail": 21}
+    frames = input("input.mp4").output(filename="pipe:", s="4x2", metadata="fail.mp4")
+    audio = audio_output(f="s16le", ac=1, metadata="fail.mp4")
+
+    async def aconsume(iterator: Any) -> None:
+        async for _ in iterator:
+            pass
+
+    for consume in (
+        lambda: list(build("fail.mp4").iter_progress(fake_ffmpeg, **options)),
+        lambda: asyncio.run(
+            aconsume(build("fail.mp4").aiter_progress(fake_ffmpeg, **options))
+        ),
+        lambda: list(frames.iter_frames(fake_ffmpeg, **options)),
+        lambda: list(audio.iter_audio_chunks(320, cmd=fake_ffmpeg, **options)),
+        lambda: asyncio.run(
+            aconsume(audio.aiter_audio_chunks(320, cmd=fake_ffmpeg, **options))
+        ),
+    ):
+        with pytest.raises(FFMpegExecuteError) as excinfo:
+            consume()
+        assert excinfo.value.stderr == BOUNDED_STDERR
+
+    options["stderr_tail"] = 14
+    with pytest.raises(FFMpegExecuteError) as excinfo:
+        with raw_input("fail.mp4").frame_writer(fake_ffmpeg, **options) as writer:
+            writer.write(bytes(12))
+    assert (
+        excinfo.value.stderr
+        == b"xxxxx\n[... 1000005 bytes omitted ...]\ninvalid frame\n"
+    )
+
+
+def test_run_stderr_lines(
+    fake_ffmpeg: str,
+    monkeypatch: pytest.MonkeyPatch,
+    capfd: pytest.CaptureFixture[str],
+) -> None:
+    monkeypatch.setenv("FAKE_FFMPEG_STDERR", "3")
+    lines: list[str] = []
+
+    # stderr is still displayed, as it is not captured
+    build().run(fake_ffmpeg, on_stderr_line=lines.append)
+    assert lines == ["xxxfake ffmpeg finished"]
+    assert "xxxfake ffmpeg finished" in capfd.readouterr().err
+
+    lines.clear()
+    asyncio.run(build().arun(fake_ffmpeg, on_stderr_line=lines.append))
+    assert lines == ["xxxfake ffmpeg finished"]
+    assert "xxxfake ffmpeg finished" in capfd.readouterr().err
+
+    with pytest.raises(FFMpegValueError):
+        build().run(fake_ffmpeg, stderr_tail=-1)
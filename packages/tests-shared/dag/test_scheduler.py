@@ -0,0 +1,198 @@
+import concurrent.futures
+import threading
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+import pytest
+
+from ffmpeg.base import input
+from ffmpeg.dag.global_runnable.scheduler import JobScheduler
+from ffmpeg.dag.nodes import OutputStream
+from ffmpeg.exceptions import FFMpegExecuteError, FFMpegValueError
+
+FAKE_FFMPEG = """
+    import os
+    import sys
+    import time
+
+    name = os.path.basename(sys.argv[-1])
+    with open(os.environ["FAKE_FFMPEG_LOG"], "a") as log:
+        log.write(f"start {name} {time.monotonic()}\\n")
+
+    if name.startswith("hang"):
+        time.sleep(60)
+    time.sleep(float(os.environ.get("FAKE_FFMPEG_DELAY", "0")))
+    # a flaky job fails the first time
+    failed = name.startswith("flaky") and not os.path.exists(sys.argv[-1])
+    if failed:
+        open(sys.argv[-1], "w").close()
+
+    with open(os.environ["FAKE_FFMPEG_LOG"], "a") as log:
+        log.write(f"end {name} {time.monotonic()}\\n")
+    sys.stderr.write(f"done {name}\\n")
+    sys.exit(1 if failed or name.startswith("fail") else 0)
+    """
+
+
+@pytest.fixture
+def fake_ffmpeg(make_fake_executable: Callable[..., str]) -> str:
+    return make_fake_executable(FAKE_FFMPEG)
+
+
+def log(tmp_path: Path) -> list[tuple[str, str, float]]:
+    lines = (tmp_path / "fake_ffmpeg.log").read_text().splitlines()
+    return [(event, name, float(t)) for event, name, t in map(str.split, lines)]
+
+
+def job(tmp_path: Path, name: str, **options: str | int) -> OutputStream:
+    return input("input.mp4").output(
+        filename=str(tmp_path / name), extra_options=options
+    )
+
+
+def test_submit(fake_ffmpeg: str, tmp_path: Path) -> None:
+    with JobScheduler() as scheduler:
+        futures = [
+            scheduler.submit(job(tmp_path, f"{i}.mp4"), cmd=fake_ffmpeg)
+            for i in range(5)
+        ]
+
+    assert [f.result() for f in futures] == [
+        (b"", f"done {i}.mp4\n".encode()) for i in range(5)
+    ]
+
+
+def test_priority(
+    fake_ffmpeg: str, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setenv("FAKE_FFMPEG_DELAY", "0.2")
+    with JobScheduler(max_threads=1) as scheduler:
+        for name, priority in [("first", 0), ("low", 0), ("high", 1), ("next", 0)]:
+            scheduler.submit(
+                job(tmp_path, f"{name}.mp4"), priority=priority, cmd=fake_ffmpeg
+            )
+
+    starts = [name for event, name, _ in log(tmp_path) if event == "start"]
+    assert starts == ["first.mp4", "high.mp4", "low.mp4", "next.mp4"]
+
+
+def test_concurrency_limit(
+    fake_ffmpeg: str, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setenv("FAKE_FFMPEG_DELAY", "0.2")
+    with JobScheduler(max_threads=2) as scheduler:
+        for i in range(4):
+            scheduler.submit(job(tmp_path, f"{i}.mp4"), cmd=fake_ffmpeg)
+        # uses all the threads, so runs alone
+        scheduler.submit(job(tmp_path, "big.mp4", threads=2), cmd=fake_ffmpeg)
+
+    running, peak = 0, 0
+    for event, name, _ in sorted(log(tmp_path), key=lambda entry: entry[2]):
+        running += (2 if name == "big.mp4" else 1) * (1 if event == "start" else -1)
+        peak = max(peak, running)
+    assert peak == 2
+
+
+def test_estimate_threads(tmp_path: Path) -> None:
+    scheduler = JobScheduler(max_threads=8, job_threads=2)
+    try:
+        assert scheduler._estimate_threads(job(tmp_path, "a.mp4")) == 2
+        assert scheduler._estimate_threads(job(tmp_path, "a.mp4", threads=3)) == 3
+        assert scheduler._estimate_threads(job(tmp_path, "a.mp4", threads=0)) == 8
+    finally:
+        scheduler.shutdown()
+
+    with pytest.raises(FFMpegValueError):
+        JobScheduler(max_threads=0)
+
+
+def test_failure_and_retries(fake_ffmpeg: str, tmp_path: Path) -> None:
+    with JobScheduler() as scheduler:
+        failed = scheduler.submit(job(tmp_path, "fail.mp4"), retries=2, cmd=fake_ffmpeg)
+        flaky = scheduler.submit(job(tmp_path, "flaky.mp4"), retries=1, cmd=fake_ffmpeg)
+
+    with pytest.raises(FFMpegExecuteError) as excinfo:
+        failed.result()
+    assert excinfo.value.retcode == 1
+    assert excinfo.value.stderr == b"done fail.mp4\n"
+    assert flaky.result() == (b"", b"done flaky.mp4\n")
+
+    starts = [name for event, name, _ in log(tmp_path) if event == "start"]
+    assert starts.count("fail.mp4") == 3
+    assert starts.count("flaky.mp4") == 2
+
+
+def test_timeout(fake_ffmpeg: str, tmp_path: Path) -> None:
+    start = time.perf_counter()
+    with JobScheduler() as scheduler:
+        future = scheduler.submit(
+            job(tmp_path, "hang.mp4"), timeout=0.5, retries=1, cmd=fake_ffmpeg
+        )
+
+    with pytest.raises(TimeoutError):
+        future.result()
+    assert time.perf_counter() - start < 10
+
+
+def test_cancel(fake_ffmpeg: str, tmp_path: Path) -> None:
+    start = time.perf_counter()
+    with JobScheduler(max_threads=1) as scheduler:
+        running = scheduler.submit(job(tmp_path, "hang.mp4"), cmd=fake_ffmpeg)
+        pending = scheduler.submit(job(tmp_path, "never.mp4"), cmd=fake_ffmpeg)
+        assert pending.cancel()
+
+        while not (tmp_path / "fake_ffmpeg.log").exists():
+            time.sleep(0.01)
+        # the process of a running job is terminated
+        assert running.cancel()
+
+    assert time.perf_counter() - start < 10
+    assert [name for _, name, _ in log(tmp_path)] == ["hang.mp4"]
+
+
+def test_shutdown(
+    fake_ffmpeg: str, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setenv("FAKE_FFMPEG_DELAY", "0.2")
+    scheduler = JobScheduler(max_threads=1)
+    futures = [
+        scheduler.submit(job(tmp_path, f"{i}.mp4"), cmd=fake_ffmpeg) for i in range(3)
+    ]
+    scheduler.shutdown(cancel_futures=True)
+
+    assert futures[0].result()
+    assert all(future.cancelled() for future in futures[1:])
+    with pytest.raises(RuntimeError):
+        scheduler.submit(job(tmp_path, "late.mp4"), cmd=fake_ffmpeg)
+
+
+@pytest.mark.benchmark
+def test_benchmark_thread_per_job(fake_ffmpeg: str, tmp_path: Path) -> None:
+    jobs = [job(tmp_path, f"{i}.mp4") for i in range(40)]
+
+    def naive() -> None:
+        threads = [
+            threading.Thread(
+                target=stream.run, args=(fake_ffmpeg,), kwargs={"quiet": True}
+            )
+            for stream in jobs
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def scheduled() -> None:
+        with JobScheduler() as scheduler:
+            futures = [scheduler.submit(stream, cmd=fake_ffmpeg) for stream in jobs]
+        concurrent.futures.wait(futures)
+
+    timings = {}
+    for name, run in [("naive", naive), ("scheduled", scheduled)]:
+        start = time.perf_counter()
+        run()
+        timings[name] = time.perf_counter() - start
+
+    # one thread instead of one per job, with no loss of throughput
+    assert timings["scheduled"] < timings["naive"] * 2
@@ -0,0 +1,154 @@
+import os
+import pickle
+import subprocess
+import sys
+from collections import Counter
+from collections.abc import Callable
+from typing import Any
+
+import pytest
+
+from ffmpeg.base import input
+from ffmpeg.common.serialize import dumps, loads
+from ffmpeg.dag import dag_validation, schema
+from ffmpeg.dag.schema import InternTable, get_dag_validation
+from ffmpeg.filters import concat
+from ffmpeg.streams.video import VideoStream
+
+
+def build_chain(n: int) -> VideoStream:
+    stream = input("input.mp4").video
+    for _ in range(n):
+        stream = stream.hflip()
+    return stream
+
+
+def build_diamonds(n: int) -> VideoStream:
+    stream = input("input.mp4").video
+    for _ in range(n):
+        stream = concat(stream.hflip(), stream.vflip()).video(0)
+    return stream
+
+
+def test_summary_depth() -> None:
+    input1 = input("input1.mp4")
+    rev = input1.video.reverse()
+    graph = concat(rev.hflip().vflip(), rev).video(0)
+
+    assert input1.node.summary.depth == 1
+    assert rev.node.summary.depth == 2
+    assert graph.node.summary.depth == 5
+    assert graph.node.max_depth == 5
+
+
+@pytest.mark.parametrize("mode", ["incremental", "full"])
+def test_dag_validation_modes(mode: str) -> None:
+    with dag_validation(mode):  # type: ignore[arg-type]
+        assert get_dag_validation() == mode
+        stream = build_chain(10)
+
+    assert get_dag_validation() == "incremental"
+    assert stream.node.summary.depth == 11
+
+
+def test_construction_is_incremental(monkeypatch: pytest.MonkeyPatch) -> None:
+    calls: Counter[str] = Counter()
+
+    def counted(name: str, func: Callable[..., Any]) -> Callable[..., Any]:
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            calls[name] += 1
+            return func(*args, **kwargs)
+
+        return wrapper
+
+    monkeypatch.setattr(schema, "DAGSummary", counted("summary", schema.DAGSummary))
+    monkeypatch.setattr(schema, "is_dag", counted("is_dag", schema.is_dag))
+
+    build_chain(2000)
+
+    # one summary per node, and the upstream graph is never re-walked
+    assert calls == {"summary": 2001}
+
+
+def test_structural_hash_and_equality() -> None:
+    input1 = input("input1.mp4")
+
+    assert input1.video.hflip() == input1.video.hflip()
+    assert hash(input1.video.hflip()) == hash(input1.video.hflip())
+    assert input1.video.hflip() != input1.video.vflip()
+    # streams of different types on the same node are not equal
+    assert input1.video != input1.audio
+    assert input1.video != input1.node
+
+
+def test_hash_diamonds() -> None:
+    # 2**60 upstream paths: only tractable if hashes are memoized
+    graph = build_diamonds(60)
+    other = build_diamonds(60)
+
+    assert hash(graph) == hash(other)
+    assert len({graph.node, other.node}) == 1
+
+
+def test_fingerprint() -> None:
+    input1 = input("input1.mp4")
+
+    assert input1.video.hflip().fingerprint == input1.video.hflip().fingerprint
+    assert input1.video.hflip().fingerprint != input1.video.vflip().fingerprint
+    assert input1.video.fingerprint != input1.audio.fingerprint
+    assert (
+        input1.video.trim(start=1).fingerprint
+        != input1.video.trim(start="1").fingerprint
+    )
+    assert (
+        input1.video.trim(start=1).fingerprint
+        != input1.video.trim(start=True).fingerprint
+    )
+    assert build_diamonds(60).fingerprint == build_diamonds(60).fingerprint
+    assert len(build_chain(5000).fingerprint) == 64
+
+
+def test_fingerprint_stable_across_runs() -> None:
+    code = (
+        "from ffmpeg.base import input;"
+        "print(input('input.mp4').video.hflip().output(filename='out.mp4').fingerprint)"
+    )
+    fingerprints = {
+        subprocess.run(
+            [sys.executable, "-c", code],
+            env={**os.environ, "PYTHONHASHSEED": seed},
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout.strip()
+        for seed in ("1", "2")
+    }
+
+    assert fingerprints == {
+        input("input.mp4").video.hflip().output(filename="out.mp4").fingerprint
+    }
+
+
+def test_pickle_drops_memoized_hash() -> None:
+    graph = build_diamonds(3)
+    graph.node.hex
+
+    state = graph.node.__getstate__()
+    assert "_hash" not in state and "hex" not in state
+    assert pickle.loads(pickle.dumps(graph)) == graph
+
+
+def test_intern_table() -> None:
+    graph = build_diamonds(3)
+    copy = loads(dumps(graph))
+
+    table = InternTable()
+    interned = table.intern(copy)
+
+    assert interned == graph
+    assert table.intern(graph) is interned
+    assert table.intern(loads(dumps(graph))) is interned
+
+    # each shared subgraph now exists once
+    shared = interned.node.inputs[0].node.inputs[0]
+    assert shared.node is interned.node.inputs[1].node.inputs[0].node
@@ -0,0 +1,288 @@
+import json
+import os
+import shutil
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+import pytest
+
+from ffmpeg.base import input
+from ffmpeg.dag.global_runnable.segmented import (
+    Segment,
+    fixed_segments,
+    keyframe_segments,
+    run_segmented,
+)
+from ffmpeg.dag.nodes import OutputStream
+from ffmpeg.exceptions import FFMpegExecuteError, FFMpegValueError
+
+FAKE_FFMPEG = """
+    import json
+    import os
+    import sys
+    import time
+
+    args = sys.argv[1:]
+    output = args[-1]
+
+    if "concat" in args:
+        playlist = args[args.index("-i") + 1]
+        with open(playlist) as f:
+            names = [line.split("'")[1] for line in f]
+        with open(output, "w") as f:
+            for name in names:
+                # relative to the playlist, as the concat demuxer does
+                f.write(open(os.path.join(os.path.dirname(playlist), name)).read())
+        sys.exit(0)
+
+    start = float(args[args.index("-ss") + 1])
+    duration = float(args[args.index("-t") + 1]) if "-t" in args else 10 - start
+    with open(os.environ["FAKE_FFMPEG_LOG"], "a") as log:
+        log.write(f"start {start} {time.monotonic()}\\n")
+    time.sleep(float(os.environ.get("FAKE_FFMPEG_DELAY", "0")))
+    if start == float(os.environ.get("FAKE_FFMPEG_FAIL_AT", "-1")):
+        sys.exit(1)
+    if start > 0:
+        # e.g. a frame lost at each join
+        duration -= float(os.environ.get("FAKE_FFMPEG_DRIFT", "0"))
+    with open(output, "w") as f:
+        f.write(json.dumps({"start": start, "duration": duration}) + "\\n")
+    with open(os.environ["FAKE_FFMPEG_LOG"], "a") as log:
+        log.write(f"end {start} {time.monotonic()}\\n")
+    """
+
+FAKE_FFPROBE = """
+    import json
+    import os
+    import sys
+
+    args = sys.argv[1:]
+    if "-show_packets" in args:
+        with open(os.environ["FAKE_FFPROBE_LOG"], "a") as log:
+            log.write("packets\\n")
+        # 25 fps for 10 seconds, with a keyframe every 2 seconds
+        print('<?xml version="1.0" encoding="UTF-8"?>\\n<ffprobe>\\n<packets>')
+        for i in range(250):
+            flags = "K__" if i % 50 == 0 else "___"
+            print(f'<packet pts_time="{i / 25:.6f}" flags="{flags}"/>')
+        print("</packets>\\n</ffprobe>")
+    elif os.path.exists(args[-1]):
+        segment = json.loads(open(args[-1]).read())
+        stream = {"duration": str(segment["duration"]), "avg_frame_rate": "25/1"}
+        print(json.dumps({"streams": [stream], "format": {}}))
+    else:
+        stream = {"duration": "10.000000", "avg_frame_rate": "25/1"}
+        print(json.dumps({"streams": [stream], "format": {}}))
+    """
+
+
+@pytest.fixture
+def fake_ffmpeg(make_fake_executable: Callable[..., str]) -> str:
+    return make_fake_executable(FAKE_FFMPEG)
+
+
+@pytest.fixture
+def fake_ffprobe(make_fake_executable: Callable[..., str]) -> str:
+    return make_fake_executable(FAKE_FFPROBE, "fake_ffprobe")
+
+
+def test_fixed_segments() -> None:
+    assert fixed_segments(10, 3) == [Segment(0, 3), Segment(3, 3), Segment(6)]
+    assert fixed_segments(10, 20) == [Segment(0)]
+    assert fixed_segments(1, 0.1)[3] == Segment(0.3, 0.1)
+
+    with pytest.raises(FFMpegValueError):
+        fixed_segments(10, 0)
+
+
+def test_keyframe_segments(fake_ffprobe: str) -> None:
+    assert keyframe_segments("input.mp4", 3, probe_cmd=fake_ffprobe) == [
+        Segment(0, 4),
+        Segment(4, 4),
+        Segment(8),
+    ]
+    assert keyframe_segments("input.mp4", 20, probe_cmd=fake_ffprobe) == [Segment(0)]
+
+
+def test_keyframe_segments_sidecar(fake_ffprobe: str, tmp_path: Path) -> None:
+    log = tmp_path / "fake_ffprobe.log"
+    video = tmp_path / "input.mp4"
+    video.write_bytes(b"video")
+
+    first = keyframe_segments(video, 3, probe_cmd=fake_ffprobe, sidecar=True)
+    second = keyframe_segments(video, 5, probe_cmd=fake_ffprobe, sidecar=True)
+
+    # the keyframes are read once, and planned again from the sidecar
+    assert log.read_text().splitlines() == ["packets"]
+    assert first == [Segment(0, 4), Segment(4, 4), Segment(8)]
+    assert second == [Segment(0, 6), Segment(6)]
+
+
+def test_run_segmented(fake_ffmpeg: str, fake_ffprobe: str, tmp_path: Path) -> None:
+    output = tmp_path / "output.mp4"
+    stream = input("input.mp4").video.hflip().output(filename=str(output))
+
+    segments = run_segmented(stream, 3, cmd=fake_ffmpeg, probe_cmd=fake_ffprobe)
+
+    assert segments == [Segment(0, 3), Segment(3, 3), Segment(6)]
+    assert [json.loads(line) for line in output.read_text().splitlines()] == [
+        {"start": 0, "duration": 3},
+        {"start": 3, "duration": 3},
+        {"start": 6, "duration": 4},
+    ]
+    # the segments are removed
+    assert sorted(os.listdir(tmp_path)) == [
+        "fake_ffmpeg",
+        "fake_ffmpeg.log",
+        "fake_ffprobe",
+        "output.mp4",
+    ]
+
+
+def test_run_segmented_relative_output(
+    fake_ffmpeg: str,
+    fake_ffprobe: str,
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.chdir(tmp_path)
+    stream = input("input.mp4").output(filename="output.mp4")
+
+    run_segmented(stream, 3, cmd=fake_ffmpeg, probe_cmd=fake_ffprobe)
+
+    output = (tmp_path / "output.mp4").read_text().splitlines()
+    assert [json.loads(line)["start"] for line in output] == [0, 3, 6]
+
+
+def test_run_segmented_keyframes(
+    fake_ffmpeg: str, fake_ffprobe: str, tmp_path: Path
+) -> None:
+    output = tmp_path / "output.mp4"
+    stream = input("input.mp4").output(filename=str(output), c="copy")
+
+    segments = run_segmented(
+        stream, 3, keyframes=True, cmd=fake_ffmpeg, probe_cmd=fake_ffprobe
+    )
+
+    assert [segment.start for segment in segments] == [0, 4, 8]
+    assert len(output.read_text().splitlines()) == 3
+
+
+def test_run_segmented_in_parallel(
+    fake_ffmpeg: str,
+    fake_ffprobe: str,
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setenv("FAKE_FFMPEG_DELAY", "0.5")
+    stream = input("input.mp4").output(filename=str(tmp_path / "output.mp4"))
+
+    run_segmented(stream, 2.5, max_workers=2, cmd=fake_ffmpeg, probe_cmd=fake_ffprobe)
+
+    running, peak = 0, 0
+    events = [
+        line.split() for line in (tmp_path / "fake_ffmpeg.log").read_text().splitlines()
+    ]
+    for event, _, _ in sorted(events, key=lambda event: float(event[2])):
+        running += 1 if event == "start" else -1
+        peak = max(peak, running)
+    assert peak == 2
+
+
+def test_boundary_check(
+    fake_ffmpeg: str,
+    fake_ffprobe: str,
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    stream = input("input.mp4").output(filename=str(tmp_path / "output.mp4"))
+
+    # less than a frame is tolerated
+    monkeypatch.setenv("FAKE_FFMPEG_DRIFT", "0.01")
+    run_segmented(stream, 5, cmd=fake_ffmpeg, probe_cmd=fake_ffprobe)
+
+    monkeypatch.setenv("FAKE_FFMPEG_DRIFT", "0.2")
+    with pytest.raises(FFMpegValueError, match="segment 1 at 3"):
+        run_segmented(
+            stream,
+            3,
+            cmd=fake_ffmpeg,
+            probe_cmd=fake_ffprobe,
+            overwrite_output=True,
+        )
+    run_segmented(
+        stream,
+        3,
+        check=False,
+        cmd=fake_ffmpeg,
+        probe_cmd=fake_ffprobe,
+        overwrite_output=True,
+    )
+
+
+def test_segment_failure(
+    fake_ffmpeg: str,
+    fake_ffprobe: str,
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setenv("FAKE_FFMPEG_FAIL_AT", "3")
+    stream = input("input.mp4").output(filename=str(tmp_path / "output.mp4"))
+
+    with pytest.raises(FFMpegExecuteError):
+        run_segmented(stream, 3, cmd=fake_ffmpeg, probe_cmd=fake_ffprobe)
+    assert not (tmp_path / "output.mp4").exists()
+
+
+def test_unsupported_graphs(tmp_path: Path) -> None:
+    with pytest.raises(FFMpegValueError, match="exactly one input"):
+        run_segmented(
+            input("a.mp4")
+            .video.overlay(input("b.mp4").video)
+            .output(filename="output.mp4"),
+            [Segment(0)],
+        )
+
+    with pytest.raises(FFMpegValueError, match="already sets ss"):
+        run_segmented(
+            input("input.mp4", ss=5).output(filename="output.mp4"), [Segment(0)]
+        )
+
+
+@pytest.mark.skipif(
+    shutil.which("ffmpeg") is None or shutil.which("ffprobe") is None,
+    reason="ffmpeg binary not found",
+)
+def test_benchmark_segmented(tmp_path: Path) -> None:
+    from ffmpeg_core.ffprobe.probe import probe
+
+    source = str(tmp_path / "testsrc.mp4")
+    input("testsrc=size=640x360:rate=25:duration=20", f="lavfi").output(
+        filename=source, extra_options={"g": 25}
+    ).run(quiet=True)
+
+    def transcode(filename: str) -> OutputStream:
+        # a single-threaded filter chain
+        return input(source).output(
+            filename=filename,
+            vf="boxblur=10:3",
+            extra_options={"threads": 1, "filter_threads": 1},
+        )
+
+    timings = {}
+    start = time.perf_counter()
+    transcode(str(tmp_path / "serial.mp4")).run(quiet=True)
+    timings["serial"] = time.perf_counter() - start
+    start = time.perf_counter()
+    run_segmented(transcode(str(tmp_path / "segmented.mp4")), 5)
+    timings["segmented"] = time.perf_counter() - start
+
+    # every frame is transcoded exactly once
+    frames = [
+        probe(tmp_path / name, count_frames=None)["streams"][0]["nb_read_frames"]
+        for name in ("serial.mp4", "segmented.mp4")
+    ]
+    assert frames == ["500", "500"]
+    if (os.cpu_count() or 1) >= 4:
+        assert timings["segmented"] < timings["serial"] * 0.75
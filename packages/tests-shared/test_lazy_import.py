@@ -0,0 +1,66 @@
+"""
+Checks that `import ffmpeg` defers loading the large generated modules.
+
+The import-time benchmark runs each import in a fresh interpreter.
+"""
+
+import subprocess
+import sys
+import textwrap
+
+import ffmpeg
+
+_LARGE_MODULES = [
+    "ffmpeg.filters",
+    "ffmpeg.sources",
+    "ffmpeg.streams.audio",
+    "ffmpeg.streams.video",
+    "ffmpeg.codecs.decoders",
+    "ffmpeg.codecs.encoders",
+    "ffmpeg.formats.demuxers",
+    "ffmpeg.formats.muxers",
+    "ffmpeg_core.ffprobe.probe",
+]
+
+
+def _run(code: str) -> str:
+    result = subprocess.run(
+        [sys.executable, "-c", textwrap.dedent(code)],
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+    return result.stdout.strip()
+
+
+def test_import_is_lazy() -> None:
+    loaded = _run(f"""
+        import sys
+        import ffmpeg
+        print([name for name in {_LARGE_MODULES!r} if name in sys.modules])
+    """)
+
+    assert loaded == "[]"
+
+
+def test_building_does_not_probe() -> None:
+    loaded = _run("""
+        import sys
+        import ffmpeg
+        ffmpeg.input("input.mp4").output(filename="output.mp4").compile()
+        modules = ["ffmpeg_core.ffprobe", "ffmpeg_core.ffprobe.probe", "ffmpeg.utils.frames"]
+        print([name for name in modules if name in sys.modules])
+    """)
+
+    # only the helpers reading raw frames or samples probe their input
+    assert loaded == "[]"
+
+
+def test_public_api() -> None:
+    for name in ffmpeg.__all__:
+        assert getattr(ffmpeg, name) is not None
+        assert name in dir(ffmpeg)
+
+    assert ffmpeg.filters.concat is not None
+    assert ffmpeg.input is ffmpeg.dag.io.input
+    assert ffmpeg.AVStream is ffmpeg.streams.av.AVStream
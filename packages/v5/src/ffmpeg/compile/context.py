@@ -50,28 +50,38 @@ def _remove_duplicates(seq: Iterable[T]) -> list[T]:
 
 def _collect(node: Node) -> tuple[list[Node], list[Stream]]:
     """
-    Recursively collect all nodes and streams in the upstream path of a given node.
+    Collect all nodes and streams in the upstream path of a given node.
 
-    This function traverses the graph starting from the given node and collects
-    all nodes and streams that are upstream (input sources) to the node. The
-    traversal is performed recursively to ensure all dependencies are captured.
+    This function traverses the graph depth-first starting from the given node
+    and collects all nodes and streams that are upstream (input sources) to the
+    node. The traversal is iterative and visits each node once, so shared
+    subgraphs are not revisited and deep graphs do not hit the recursion limit.
 
     Args:
         node: The starting node to collect dependencies from
 
     Returns:
         A tuple containing two lists:
-        - A list of all nodes in the upstream path (including the starting node)
-        - A list of all streams connecting these nodes
+        - A list of all nodes in the upstream path (including the starting node),
+          in depth-first pre-order without duplicates
+        - A list of all streams connecting these nodes, in the same order
+          (a stream appears once per node consuming it)
 
     """
-    nodes: list[Node] = [node]
-    streams: list[Stream] = list(node.inputs)
+    nodes: list[Node] = []
+    streams: list[Stream] = []
+    visited: set[Node] = set()
+    stack = [node]
 
-    for stream in node.inputs:
-        _nodes, _streams = _collect(stream.node)
-        nodes += _nodes
-        streams += _streams
+    while stack:
+        current = stack.pop()
+        if current in visited:
+            continue
+        visited.add(current)
+
+        nodes.append(current)
+        streams.extend(current.inputs)
+        stack.extend(stream.node for stream in reversed(current.inputs))
 
     return nodes, streams
 
@@ -117,7 +127,7 @@ class DAGContext:
         """
         Create a DAG context by traversing the graph from the specified root node.
 
-        This factory method builds a complete DAGContext by recursively collecting
+        This factory method builds a complete DAGContext by collecting
         all nodes and streams that are upstream from the specified node. It removes
         duplicates to ensure each node and stream is represented only once in the context.
 
@@ -132,10 +142,48 @@ class DAGContext:
 
         return cls(
             node=node,
-            nodes=tuple(_remove_duplicates(nodes)),
+            nodes=tuple(nodes),
             streams=tuple(_remove_duplicates(streams)),
         )
 
+    @cached_property
+    def upstream_counts(self) -> dict[Node, int]:
+        """
+        Get the number of upstream nodes of each node in the graph.
+
+        The count includes the node itself, so it equals `len(node.upstream_nodes)`.
+        All counts are computed in one pass over the nodes in topological order,
+        by merging bitsets of the upstream nodes. A node's bitset is released as
+        soon as all of its consumers have been processed.
+
+        Returns:
+            A dictionary mapping nodes to their number of upstream nodes
+
+        """
+        index = {node: i for i, node in enumerate(self.nodes)}
+        consumers: dict[Node, int] = defaultdict(int)
+        for node in self.nodes:
+            for stream in node.inputs:
+                consumers[stream.node] += 1
+
+        upstream: dict[Node, int] = {}
+        counts: dict[Node, int] = {}
+
+        # NOTE: a node is always deeper than its inputs
+        for node in sorted(self.nodes, key=lambda node: node.max_depth):
+            bits = 1 << index[node]
+            for stream in node.inputs:
+                bits |= upstream[stream.node]
+                consumers[stream.node] -= 1
+                if not consumers[stream.node]:
+                    del upstream[stream.node]
+
+            if consumers[node]:
+                upstream[node] = bits
+            counts[node] = bits.bit_count()
+
+        return counts
+
     @cached_property
     def all_nodes(self) -> list[Node]:
         """
@@ -149,7 +197,7 @@ class DAGContext:
             A sorted list of all nodes in the graph
 
         """
-        return sorted(self.nodes, key=lambda node: len(node.upstream_nodes))
+        return sorted(self.nodes, key=lambda node: self.upstream_counts[node])
 
     @cached_property
     def all_streams(self) -> list[Stream]:
@@ -167,7 +215,7 @@ class DAGContext:
         """
         return sorted(
             self.streams,
-            key=lambda stream: (len(stream.node.upstream_nodes), stream.index),
+            key=lambda stream: (self.upstream_counts[stream.node], stream.index),
         )
 
     @cached_property
@@ -16,6 +16,7 @@ from .nodes import (
     OutputStream,
     Stream,
 )
+from .schema import dag_validation
 
 # from .schema import EdgeInfo  # EdgeInfo not defined
 
@@ -28,5 +29,6 @@ __all__ = [
     "OutputStream",
     "OutputNode",
     "Stream",
+    "dag_validation",
     "filter_node_factory",
 ]
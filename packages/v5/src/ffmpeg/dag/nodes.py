@@ -5,6 +5,7 @@ from __future__ import annotations
 import logging
 import os.path
 from dataclasses import dataclass, replace
+from functools import cached_property
 from typing import TYPE_CHECKING, Any
 
 from ..exceptions import FFMpegTypeError, FFMpegValueError
@@ -24,7 +25,7 @@ if TYPE_CHECKING:
 logger = logging.getLogger(__name__)
 
 
-@dataclass(frozen=True, kw_only=True)
+@dataclass(frozen=True, kw_only=True, eq=False)
 class FilterNode(Node):
     """
     A node that represents an FFmpeg filter operation in the filter graph.
@@ -54,6 +55,22 @@ class FilterNode(Node):
     The types (audio/video) of each output stream this filter produces
     """
 
+    @cached_property
+    def _output_indices(self) -> dict[StreamType, tuple[int, ...]]:
+        """
+        Get the output positions of this filter grouped by stream type.
+
+        Returns:
+            A mapping from stream type to the indices of the outputs of that type
+
+        """
+        return {
+            stream_type: tuple(
+                i for i, k in enumerate(self.output_typings) if k == stream_type
+            )
+            for stream_type in (StreamType.video, StreamType.audio)
+        }
+
     @override
     def repr(self) -> str:
         """
@@ -87,9 +104,7 @@ class FilterNode(Node):
         """
         from ..streams.video import VideoStream
 
-        video_outputs = [
-            i for i, k in enumerate(self.output_typings) if k == StreamType.video
-        ]
+        video_outputs = self._output_indices[StreamType.video]
         if not len(video_outputs) > index:
             raise FFMpegValueError(
                 f"Specified index {index} is out of range for video outputs {len(video_outputs)}"
@@ -118,9 +133,7 @@ class FilterNode(Node):
         """
         from ..streams.audio import AudioStream
 
-        audio_outputs = [
-            i for i, k in enumerate(self.output_typings) if k == StreamType.audio
-        ]
+        audio_outputs = self._output_indices[StreamType.audio]
         if not len(audio_outputs) > index:
             raise FFMpegValueError(
                 f"Specified index {index} is out of range for audio outputs {len(audio_outputs)}"
@@ -170,7 +183,7 @@ class FilterNode(Node):
                     )
 
 
-@dataclass(frozen=True, kw_only=True)
+@dataclass(frozen=True, kw_only=True, eq=False)
 class InputNode(Node):
     """
     A node that represents an input file in the FFmpeg filter graph.
@@ -277,7 +290,7 @@ class InputNode(Node):
         return AVStream(node=self)
 
 
-@dataclass(frozen=True, kw_only=True)
+@dataclass(frozen=True, kw_only=True, eq=False)
 class OutputNode(Node):
     """
     A node that represents an output file in the FFmpeg filter graph.
@@ -331,7 +344,7 @@ class OutputNode(Node):
         return OutputStream(node=self)
 
 
-@dataclass(frozen=True, kw_only=True)
+@dataclass(frozen=True, kw_only=True, eq=False)
 class OutputStream(Stream, GlobalRunable):
     """
     A stream representing an output file with additional capabilities.
@@ -371,7 +384,7 @@ class OutputStream(Stream, GlobalRunable):
         return GlobalNode(inputs=(self, *streams), kwargs=FrozenDict(kwargs))
 
 
-@dataclass(frozen=True, kw_only=True)
+@dataclass(frozen=True, kw_only=True, eq=False)
 class GlobalNode(Node):
     """
     A node that represents global FFmpeg options.
@@ -408,7 +421,7 @@ class GlobalNode(Node):
         return GlobalStream(node=self)
 
 
-@dataclass(frozen=True, kw_only=True)
+@dataclass(frozen=True, kw_only=True, eq=False)
 class GlobalStream(Stream, GlobalRunable):
     """
     A stream representing a set of global FFmpeg options.
@@ -6,20 +6,100 @@ This package provides comprehensive type hints and IDE autocomplete for FFmpeg 6
 
 __version__ = "6.1.0"
 
-# Export main API functions and classes
-from ffmpeg_core.ffprobe.probe import probe, probe_obj
-
-# Make commonly used modules easily accessible
-from . import codecs, compile, dag, expressions, filters, formats, options, sources, streams
-from .base import afilter, filter_multi_output, merge_outputs, vfilter
-from .dag import Stream
-from .dag.io import input, output
-from .exceptions import FFMpegExecuteError, FFMpegTypeError, FFMpegValueError
-from .info import get_codecs, get_decoders, get_encoders
-from .streams.audio import AudioStream
-from .streams.av import AVStream
-from .streams.subtitle import SubtitleStream
-from .streams.video import VideoStream
+from importlib import import_module
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    # Export main API functions and classes
+    from ffmpeg_core.ffprobe.batch import aprobe_many, probe_many
+    from ffmpeg_core.ffprobe.cache import ProbeCache
+    from ffmpeg_core.ffprobe.keyframes import KeyframeIndex, keyframe_index
+    from ffmpeg_core.ffprobe.probe import probe, probe_obj
+
+    # Make commonly used modules easily accessible
+    from . import (
+        codecs,
+        compile,
+        dag,
+        expressions,
+        filters,
+        formats,
+        options,
+        sources,
+        streams,
+    )
+    from .base import afilter, filter_multi_output, merge_outputs, vfilter
+    from .dag import Stream
+    from .dag.global_runnable.scheduler import JobScheduler
+    from .dag.global_runnable.segmented import run_segmented
+    from .dag.io import input, output
+    from .exceptions import FFMpegExecuteError, FFMpegTypeError, FFMpegValueError
+    from .info import get_capabilities, get_codecs, get_decoders, get_encoders
+    from .streams.audio import AudioStream
+    from .streams.av import AVStream
+    from .streams.subtitle import SubtitleStream
+    from .streams.video import VideoStream
+
+# NOTE: the generated filter, codec and format modules are large, so the public API
+# is imported on first use; maps each name to the module that defines it
+_LAZY_ATTRIBUTES = {
+    "probe": "ffmpeg_core.ffprobe.probe",
+    "probe_obj": "ffmpeg_core.ffprobe.probe",
+    "ProbeCache": "ffmpeg_core.ffprobe.cache",
+    "probe_many": "ffmpeg_core.ffprobe.batch",
+    "aprobe_many": "ffmpeg_core.ffprobe.batch",
+    "KeyframeIndex": "ffmpeg_core.ffprobe.keyframes",
+    "keyframe_index": "ffmpeg_core.ffprobe.keyframes",
+    "afilter": f"{__name__}.base",
+    "filter_multi_output": f"{__name__}.base",
+    "merge_outputs": f"{__name__}.base",
+    "vfilter": f"{__name__}.base",
+    "Stream": f"{__name__}.dag",
+    "JobScheduler": f"{__name__}.dag.global_runnable.scheduler",
+    "run_segmented": f"{__name__}.dag.global_runnable.segmented",
+    "input": f"{__name__}.dag.io",
+    "output": f"{__name__}.dag.io",
+    "FFMpegExecuteError": f"{__name__}.exceptions",
+    "FFMpegTypeError": f"{__name__}.exceptions",
+    "FFMpegValueError": f"{__name__}.exceptions",
+    "get_codecs": f"{__name__}.info",
+    "get_decoders": f"{__name__}.info",
+    "get_encoders": f"{__name__}.info",
+    "get_capabilities": f"{__name__}.info",
+    "AudioStream": f"{__name__}.streams.audio",
+    "AVStream": f"{__name__}.streams.av",
+    "SubtitleStream": f"{__name__}.streams.subtitle",
+    "VideoStream": f"{__name__}.streams.video",
+}
+
+_LAZY_MODULES = {
+    "codecs",
+    "compile",
+    "dag",
+    "expressions",
+    "filters",
+    "formats",
+    "options",
+    "sources",
+    "streams",
+}
+
+
+def __getattr__(name: str) -> object:
+    if name in _LAZY_ATTRIBUTES:
+        value = getattr(import_module(_LAZY_ATTRIBUTES[name]), name)
+    elif name in _LAZY_MODULES:
+        value = import_module(f"{__name__}.{name}")
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(__all__))
+
 
 __all__ = [
     "__version__",
@@ -32,12 +112,19 @@ __all__ = [
     "afilter",
     "filter_multi_output",
     "probe_obj",
+    "ProbeCache",
+    "probe_many",
+    "aprobe_many",
+    "KeyframeIndex",
+    "keyframe_index",
     # Stream classes
     "AudioStream",
     "VideoStream",
     "AVStream",
     "SubtitleStream",
     "Stream",
+    "JobScheduler",
+    "run_segmented",
     # Exceptions
     "FFMpegExecuteError",
     "FFMpegTypeError",
@@ -46,6 +133,7 @@ __all__ = [
     "get_codecs",
     "get_decoders",
     "get_encoders",
+    "get_capabilities",
     # Modules
     "filters",
     "sources",
@@ -0,0 +1,277 @@
+"""
+Caching of compiled FFmpeg command lines.
+
+Compiling a graph validates it, rebuilds it with split filters where needed,
+builds its `DAGContext` and escapes every option, which adds up when the same
+graph shapes are compiled over and over. This module provides an opt-in LRU
+cache that `compile_as_list` consults before doing that work, keyed by the
+graph's structural fingerprint (see `HashableBaseModel.fingerprint`).
+
+Because the fingerprint is stable across interpreter runs, compiled results can
+also be produced once with `precompile`, serialized, and added to the cache of
+another process.
+
+Example:
+    ```python
+    from ffmpeg.compile.cache import enable_compile_cache
+
+    cache = enable_compile_cache(maxsize=512)
+    for job in jobs:
+        build_graph(job).run()
+    print(cache.info())
+    ```
+
+"""
+
+from __future__ import annotations
+
+import tempfile
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from ..common.serialize import Serializable
+
+CompileCacheKey = tuple[str, bool]
+"""
+The key of a compiled graph: the fingerprint of the compiled stream and `auto_fix`.
+"""
+
+
+@dataclass(frozen=True, kw_only=True)
+class CompiledGraph(Serializable):
+    """
+    The result of compiling a graph, before it is rendered into arguments.
+
+    The filter graph is kept separately from the other arguments so that it can be
+    rendered either inline or through a fresh `-filter_complex_script` file.
+    """
+
+    fingerprint: str
+    """
+    The fingerprint of the stream this graph was compiled from
+    """
+
+    auto_fix: bool = True
+    """
+    Whether the stream was fixed (e.g. split filters added) before compiling
+    """
+
+    head: tuple[str, ...] = ()
+    """
+    The global and input arguments
+    """
+
+    filter_complex: str | None = None
+    """
+    The filter graph description, if the graph has any filters
+    """
+
+    tail: tuple[str, ...] = ()
+    """
+    The output arguments
+    """
+
+    @property
+    def key(self) -> CompileCacheKey:
+        """
+        Get the cache key of this compiled graph.
+
+        Returns:
+            The fingerprint and `auto_fix` flag the graph was compiled with
+
+        """
+        return (self.fingerprint, self.auto_fix)
+
+    def as_list(self, use_filter_complex_script: bool = False) -> list[str]:
+        """
+        Render the compiled graph into FFmpeg command-line arguments.
+
+        Args:
+            use_filter_complex_script: If True, write the filter graph to a new
+                                      temporary file and pass it with
+                                      -filter_complex_script instead of -filter_complex
+
+        Returns:
+            A list of strings representing FFmpeg command-line arguments
+
+        """
+        commands = list(self.head)
+
+        if self.filter_complex is not None:
+            if use_filter_complex_script:
+                # Create a temporary file with the filter complex content
+                with tempfile.NamedTemporaryFile(
+                    mode="w", suffix=".txt", delete=False
+                ) as f:
+                    f.write(self.filter_complex)
+                    temp_filename = f.name
+
+                commands += ["-filter_complex_script", temp_filename]
+            else:
+                commands += ["-filter_complex", self.filter_complex]
+
+        return commands + list(self.tail)
+
+
+@dataclass(frozen=True)
+class CompileCacheInfo:
+    """Statistics of a `CompileCache`."""
+
+    hits: int
+    """
+    The number of lookups that found a compiled graph
+    """
+
+    misses: int
+    """
+    The number of lookups that did not find a compiled graph
+    """
+
+    maxsize: int
+    """
+    The maximum number of compiled graphs kept
+    """
+
+    currsize: int
+    """
+    The number of compiled graphs currently kept
+    """
+
+
+class CompileCache:
+    """
+    A thread-safe LRU cache of compiled graphs.
+
+    Note:
+        `use_filter_complex_script` is not part of the key: it only changes how a
+        compiled graph is rendered, and each render writes its own script file.
+
+    """
+
+    def __init__(self, maxsize: int = 256) -> None:
+        """
+        Initialize an empty cache.
+
+        Args:
+            maxsize: The maximum number of compiled graphs to keep
+
+        Raises:
+            ValueError: If maxsize is not positive
+
+        """
+        if maxsize < 1:
+            raise ValueError(f"maxsize must be positive, got {maxsize}")
+
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[CompileCacheKey, CompiledGraph] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """
+        Get the number of compiled graphs in the cache.
+
+        Returns:
+            The number of cached entries
+
+        """
+        return len(self._entries)
+
+    def get(self, fingerprint: str, auto_fix: bool = True) -> CompiledGraph | None:
+        """
+        Look up a compiled graph and mark it as recently used.
+
+        Args:
+            fingerprint: The fingerprint of the stream to compile
+            auto_fix: Whether the stream is compiled with auto_fix
+
+        Returns:
+            The compiled graph, or None if it is not cached
+
+        """
+        with self._lock:
+            compiled = self._entries.get((fingerprint, auto_fix))
+            if compiled is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end((fingerprint, auto_fix))
+            self.hits += 1
+            return compiled
+
+    def add(self, compiled: CompiledGraph) -> None:
+        """
+        Add a compiled graph, evicting the least recently used one if full.
+
+        This is also how graphs precompiled by another process are reused.
+
+        Args:
+            compiled: The compiled graph, e.g. from `precompile`
+
+        """
+        with self._lock:
+            self._entries[compiled.key] = compiled
+            self._entries.move_to_end(compiled.key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def info(self) -> CompileCacheInfo:
+        """
+        Get the statistics of the cache.
+
+        Returns:
+            The hit/miss counts and the size of the cache
+
+        """
+        with self._lock:
+            return CompileCacheInfo(
+                hits=self.hits,
+                misses=self.misses,
+                maxsize=self.maxsize,
+                currsize=len(self._entries),
+            )
+
+    def clear(self) -> None:
+        """Remove all compiled graphs and reset the statistics."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+_compile_cache: CompileCache | None = None
+
+
+def get_compile_cache() -> CompileCache | None:
+    """
+    Get the process-wide compile cache.
+
+    Returns:
+        The cache consulted by `compile_as_list`, or None if caching is disabled
+
+    """
+    return _compile_cache
+
+
+def enable_compile_cache(maxsize: int = 256) -> CompileCache:
+    """
+    Enable the process-wide compile cache, replacing any existing one.
+
+    Args:
+        maxsize: The maximum number of compiled graphs to keep
+
+    Returns:
+        The new cache
+
+    """
+    global _compile_cache
+    _compile_cache = CompileCache(maxsize=maxsize)
+    return _compile_cache
+
+
+def disable_compile_cache() -> None:
+    """Disable the process-wide compile cache."""
+    global _compile_cache
+    _compile_cache = None
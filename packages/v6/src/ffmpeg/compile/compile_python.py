@@ -5,7 +5,7 @@ from __future__ import annotations
 from collections.abc import Mapping
 from typing import Any
 
-from ffmpeg_core.common.cache import load
+from ffmpeg_core.common.cache import load_index
 from ffmpeg_core.common.schema import FFMpegFilter
 
 from ..dag.nodes import (
@@ -59,7 +59,7 @@ def filter_stream_typed_index(
 
 
 def get_input_var_name(
-    stream: Stream, context: DAGContext, filter_data_dict: dict[str, FFMpegFilter]
+    stream: Stream, context: DAGContext, filter_data_dict: Mapping[str, FFMpegFilter]
 ) -> str:
     """
     Get the input variable name for the stream.
@@ -242,8 +242,7 @@ def compile(stream: Stream, auto_fix: bool = True, fluent: bool = True) -> str:
             f"{get_output_var_name(node, context)} = ffmpeg.input('{node.filename}', {compile_kwargs(node.kwargs)})"
         )
 
-    filter_data = load(list[FFMpegFilter], "filters")
-    filter_data_dict = {f.name: f for f in filter_data}
+    filter_data_dict = load_index(list[FFMpegFilter], "filters")
     filter_nodes = sorted(
         (node for node in context.nodes if isinstance(node, FilterNode)),
         key=lambda k: context.node_ids[k],
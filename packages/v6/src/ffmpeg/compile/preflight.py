@@ -0,0 +1,197 @@
+"""
+Checking a graph against the capabilities of the installed FFmpeg.
+
+A graph may use a filter, an encoder or a format that the FFmpeg build it runs
+on lacks, which FFmpeg only reports once started, one problem at a time. This
+module provides `preflight`, which compares every filter, codec option and
+format option of a graph with the capabilities of an FFmpeg binary, memoized
+by `ffmpeg_core.info`, and reports everything that is missing at once.
+"""
+
+from __future__ import annotations
+
+import functools
+from collections.abc import Callable, Container
+from dataclasses import dataclass, fields
+
+from ffmpeg_core.info import get_capabilities, get_filter_names, get_formats
+
+from ..dag.nodes import FilterNode, InputNode, OutputNode
+from ..dag.schema import Stream
+from ..exceptions import FFMpegValueError
+from .context import DAGContext
+
+CODEC_OPTIONS = ("c", "codec", "vcodec", "acodec", "scodec", "dcodec")
+"""
+The options selecting a decoder on an input, or an encoder on an output,
+with or without a stream specifier, e.g. ``c:v:0``
+"""
+
+FORMAT_OPTIONS = ("f", "format")
+"""
+The options selecting a demuxer on an input, or a muxer on an output
+"""
+
+
+@dataclass(frozen=True)
+class MissingCapabilities:
+    """The names a graph uses that an FFmpeg binary lacks, each sorted."""
+
+    filters: tuple[str, ...] = ()
+    """
+    The missing filters
+    """
+
+    decoders: tuple[str, ...] = ()
+    """
+    The missing decoders, selected by codec options of inputs
+    """
+
+    encoders: tuple[str, ...] = ()
+    """
+    The missing encoders, selected by codec options of outputs
+    """
+
+    demuxers: tuple[str, ...] = ()
+    """
+    The missing demuxers, selected by format options of inputs
+    """
+
+    muxers: tuple[str, ...] = ()
+    """
+    The missing muxers, selected by format options of outputs
+    """
+
+    def __bool__(self) -> bool:
+        """
+        Check if anything is missing.
+
+        Returns:
+            True if the graph uses something the binary lacks
+
+        """
+        return any(getattr(self, field.name) for field in fields(self))
+
+    def __str__(self) -> str:
+        """
+        Describe what is missing.
+
+        Returns:
+            E.g. ``filters: foo, bar; encoders: libfoo``
+
+        """
+        return "; ".join(
+            f"{field.name}: {', '.join(getattr(self, field.name))}"
+            for field in fields(self)
+            if getattr(self, field.name)
+        )
+
+
+def _option_name(key: str) -> str:
+    """
+    Strip the stream specifier of an option.
+
+    Args:
+        key: The option, e.g. ``c:v:0``
+
+    Returns:
+        The option without its stream specifier, e.g. ``c``
+
+    """
+    return key.split(":", 1)[0]
+
+
+def _missing(
+    used: set[str], available: Callable[[], Container[str]]
+) -> tuple[str, ...]:
+    """
+    Find the used names that are not available.
+
+    Args:
+        used: The names a graph uses
+        available: Returns the available names; only called if any are used
+
+    Returns:
+        The missing names, sorted
+
+    """
+    if not used:
+        return ()
+    names = available()
+    return tuple(sorted(name for name in used if name not in names))
+
+
+def preflight(
+    stream: Stream,
+    *,
+    cmd: str = "ffmpeg",
+    check: bool = True,
+    refresh: bool = False,
+) -> MissingCapabilities:
+    """
+    Check that an FFmpeg binary has every filter, codec and format a graph uses.
+
+    The graph's filters are compared with ``ffmpeg -filters``, the codec
+    options of its inputs and outputs (``c``, ``vcodec``, ``c:a:0``...) with
+    its decoders and encoders, and their format options (``f``) with
+    ``ffmpeg -formats``. The capabilities are queried once per binary, and
+    memoized, so that checking a graph after the first one costs only
+    dictionary lookups. Stream copy (``copy``) is always available.
+
+    Args:
+        stream: The stream representing the graph, e.g. an output stream
+        cmd: Path or name of the ffmpeg executable the graph will run with
+        check: Whether to raise an error if anything is missing
+        refresh: Whether to query the capabilities again
+
+    Returns:
+        What the binary lacks, which is falsy if nothing
+
+    Raises:
+        FFMpegValueError: If check is True and anything is missing
+        FFMpegExecuteError: If querying the capabilities of the binary fails
+
+    Example:
+        ```python
+        stream = ffmpeg.input("input.mp4").hflip().output("output.mkv", c="libx265")
+        preflight(stream)  # raises before a batch is started on a wrong build
+        ```
+
+    """
+    used: dict[str, set[str]] = {
+        field.name: set() for field in fields(MissingCapabilities)
+    }
+    for node in DAGContext.build(stream.node).nodes:
+        if isinstance(node, FilterNode):
+            used["filters"].add(node.name)
+            continue
+        if not isinstance(node, InputNode | OutputNode):
+            continue
+        coders, demuxers_or_muxers = (
+            ("decoders", "demuxers")
+            if isinstance(node, InputNode)
+            else ("encoders", "muxers")
+        )
+        for key, value in node.kwargs.items():
+            if value is None or value is True or value is False:
+                continue
+            if _option_name(key) in CODEC_OPTIONS and str(value) != "copy":
+                used[coders].add(str(value))
+            elif key in FORMAT_OPTIONS:
+                used[demuxers_or_muxers].add(str(value))
+
+    # NOTE: each listing is only queried if the graph uses names it lists
+    capabilities = functools.cache(lambda: get_capabilities(cmd, refresh=refresh))
+    formats = functools.cache(lambda: get_formats(cmd, refresh=refresh))
+    missing = MissingCapabilities(
+        filters=_missing(
+            used["filters"], lambda: get_filter_names(cmd, refresh=refresh)
+        ),
+        decoders=_missing(used["decoders"], lambda: capabilities().decoders),
+        encoders=_missing(used["encoders"], lambda: capabilities().encoders),
+        demuxers=_missing(used["demuxers"], lambda: formats()[1]),
+        muxers=_missing(used["muxers"], lambda: formats()[0]),
+    )
+    if missing and check:
+        raise FFMpegValueError(f"{cmd} lacks {missing}")
+    return missing
@@ -0,0 +1,290 @@
+"""
+Parameterized graph templates.
+
+A template is a graph compiled once with placeholder values, which can then be
+rendered into concrete FFmpeg command-line arguments for many sets of values
+without rebuilding or recompiling the graph.
+
+Placeholders are lazy values (see `ffmpeg.utils.lazy_eval`): any `Symbol` or
+expression of symbols passed as an option or filter parameter. Where a string
+is expected instead, such as filenames or text assembled with f-strings, use a
+`Placeholder`, a string marker that is recognized in the compiled arguments.
+
+Example:
+    ```python
+    from ffmpeg.compile.template import Placeholder, compile_template
+    from ffmpeg.utils.lazy_eval.schema import Symbol
+
+    template = compile_template(
+        ffmpeg.input(Placeholder("src"), ss=Symbol("start"))
+        .drawtext(text=Symbol("title"))
+        .output(filename=Placeholder("dst"))
+    )
+    args = template.render(src="in.mp4", start=3, title="Hi: there", dst="out.mp4")
+    ```
+
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, replace
+from functools import cached_property
+from typing import Any
+
+from ..dag.schema import Node, Stream
+from ..exceptions import FFMpegValueError
+from ..utils.escaping import escape
+from ..utils.frozendict import FrozenDict
+from ..utils.lazy_eval.schema import LazyValue, Symbol
+from .compile_cli import precompile
+from .context import DAGContext
+
+_MARKER = "\x00"
+"""
+Delimits placeholders in compiled arguments; it cannot occur in real arguments.
+"""
+
+
+class Placeholder(str):
+    """
+    A placeholder that can be used where a string is expected.
+
+    A placeholder is a string marker that `compile_template` finds in the compiled
+    arguments, so unlike a `Symbol` it can be used as a filename or inside larger
+    strings, and it type checks wherever a string is accepted.
+
+    Example:
+        ```python
+        ffmpeg.input(Placeholder("src")).output(filename=Placeholder("dst"))
+        ```
+
+    """
+
+    def __new__(cls, key: str) -> Placeholder:
+        """
+        Create the marker of a placeholder.
+
+        Args:
+            key: The name of the value substituted for the placeholder
+
+        Returns:
+            The placeholder
+
+        Raises:
+            FFMpegValueError: If the key is not a valid identifier
+
+        """
+        if not key.isidentifier():
+            raise FFMpegValueError(f"Invalid placeholder key: {key!r}")
+        return super().__new__(cls, f"{_MARKER}{key}{_MARKER}")
+
+    @property
+    def key(self) -> str:
+        """
+        Get the name of the value substituted for the placeholder.
+
+        Returns:
+            The placeholder's key
+
+        """
+        return self.strip(_MARKER)
+
+
+@dataclass(frozen=True, kw_only=True)
+class GraphTemplate:
+    """
+    An argument skeleton compiled from a graph with placeholder values.
+
+    Note:
+        The filter graph is always rendered inline with -filter_complex.
+
+    """
+
+    args: tuple[str, ...]
+    """
+    The compiled arguments, with markers where placeholders are substituted
+    """
+
+    slots: tuple[tuple[int, tuple[str, ...], bool], ...]
+    """
+    For each argument with placeholders: its position, its parts alternating
+    between literal text and slot names, and whether it is part of the filter graph
+    """
+
+    expressions: FrozenDict[str, LazyValue]
+    """
+    The lazy value of each slot
+    """
+
+    @cached_property
+    def keys(self) -> frozenset[str]:
+        """
+        Get the names of the values required to render the template.
+
+        Returns:
+            The keys of all symbols used by the placeholders
+
+        """
+        return frozenset().union(*(value.keys() for value in self.expressions.values()))
+
+    @cached_property
+    def _filter_slots(self) -> frozenset[str]:
+        """
+        Get the names of the slots that are substituted into the filter graph.
+
+        Returns:
+            The slot names that need filter graph escaping
+
+        """
+        return frozenset(
+            name
+            for _, parts, in_filter in self.slots
+            if in_filter
+            for name in parts[1::2]
+        )
+
+    @cached_property
+    def _option_slots(self) -> frozenset[str]:
+        """
+        Get the names of the slots that are substituted into option arguments.
+
+        Returns:
+            The slot names that are rendered as plain text
+
+        """
+        return frozenset(
+            name
+            for _, parts, in_filter in self.slots
+            if not in_filter
+            for name in parts[1::2]
+        )
+
+    def render(self, **values: Any) -> list[str]:
+        """
+        Render the template into FFmpeg command-line arguments.
+
+        Values are converted with `str()`, and escaped the same way as when
+        compiling a graph if they are substituted into the filter graph.
+
+        Args:
+            **values: The value of each placeholder key
+
+        Returns:
+            A list of strings representing FFmpeg command-line arguments
+
+        Raises:
+            FFMpegValueError: If a required value is missing, or an option
+                value is a boolean
+
+        """
+        missing = self.keys.difference(values)
+        if missing:
+            raise FFMpegValueError(f"Missing template values: {sorted(missing)}")
+
+        texts: dict[str, str] = {}
+        filter_texts: dict[str, str] = {}
+        for name, expression in self.expressions.items():
+            value = expression.eval(**values)
+            if isinstance(value, bool) and name in self._option_slots:
+                # NOTE: compile renders these as -key or -nokey, which changes
+                # the argument skeleton
+                raise FFMpegValueError(
+                    f"Template option values cannot be booleans: {name}={value!r}"
+                )
+            texts[name] = str(value)
+            if name in self._filter_slots:
+                # NOTE: the same escaping as get_args_filter_node
+                if isinstance(value, bool):
+                    value = str(int(value))
+                filter_texts[name] = escape(escape(value), "\\'[],;")
+
+        args = list(self.args)
+        for position, parts, in_filter in self.slots:
+            mapping = filter_texts if in_filter else texts
+            args[position] = "".join(
+                mapping[part] if i % 2 else part for i, part in enumerate(parts)
+            )
+        return args
+
+
+def _replace_lazy_values(stream: Stream, expressions: dict[str, LazyValue]) -> Stream:
+    """
+    Rebuild a graph with every lazy option value replaced by a placeholder marker.
+
+    Args:
+        stream: The root stream of the graph
+        expressions: Collects the lazy value of each marker's slot
+
+    Returns:
+        The root stream of the rebuilt graph
+
+    """
+    context = DAGContext.build(stream.node)
+    new_nodes: dict[Node, Node] = {}
+    new_streams: dict[Stream, Stream] = {}
+
+    def _marker(value: LazyValue) -> str:
+        if isinstance(value, Symbol):
+            name = value.key
+            if not name.isidentifier():
+                raise FFMpegValueError(f"Invalid placeholder key: {name!r}")
+        else:
+            # NOTE: not an identifier, so it cannot clash with a symbol's key
+            name = f"#{len(expressions)}"
+        expressions[name] = value
+        return f"{_MARKER}{name}{_MARKER}"
+
+    # NOTE: a node is always deeper than its inputs
+    for node in sorted(context.nodes, key=lambda node: node.max_depth):
+        new_nodes[node] = replace(
+            node,
+            inputs=tuple(new_streams[stream] for stream in node.inputs),
+            kwargs=FrozenDict(
+                {
+                    key: _marker(value) if isinstance(value, LazyValue) else value
+                    for key, value in node.kwargs.items()
+                }
+            ),
+        )
+        for output in context.get_outgoing_streams(node):
+            new_streams[output] = replace(output, node=new_nodes[node])
+
+    return replace(stream, node=new_nodes[stream.node])
+
+
+def compile_template(stream: Stream, auto_fix: bool = True) -> GraphTemplate:
+    """
+    Compile a graph with placeholder values into a reusable template.
+
+    Args:
+        stream: The Stream object to compile, with `Symbol`/`Placeholder` values
+        auto_fix: Whether to automatically fix issues in the stream
+
+    Returns:
+        A template that renders the compiled arguments for concrete values
+
+    Raises:
+        FFMpegValueError: If the stream contains invalid configurations that cannot be fixed
+
+    """
+    expressions: dict[str, LazyValue] = {}
+    compiled = precompile(_replace_lazy_values(stream, expressions), auto_fix)
+    args = compiled.as_list()
+
+    slots = []
+    for position, arg in enumerate(args):
+        if _MARKER not in arg:
+            continue
+
+        parts = tuple(arg.split(_MARKER))
+        for name in parts[1::2]:
+            # NOTE: markers that are not from a lazy value come from a Placeholder
+            expressions.setdefault(name, Symbol(name))
+        in_filter = position > 0 and args[position - 1] == "-filter_complex"
+        slots.append((position, parts, in_filter))
+
+    return GraphTemplate(
+        args=tuple(args),
+        slots=tuple(slots),
+        expressions=FrozenDict(expressions),
+    )
@@ -19,12 +19,11 @@ from __future__ import annotations
 import logging
 import re
 import shlex
-import tempfile
 from collections import defaultdict
 from collections.abc import Mapping
 from dataclasses import replace
 
-from ffmpeg_core.common.cache import load
+from ffmpeg_core.common.cache import load_index
 from ffmpeg_core.common.schema import (
     FFMpegAVOption,
     FFMpegFilter,
@@ -53,51 +52,48 @@ from ..streams.video import VideoStream
 from ..utils.escaping import escape
 from ..utils.lazy_eval.schema import LazyValue
 from ..utils.run import command_line
+from .cache import CompiledGraph, get_compile_cache
 from .context import DAGContext
 from .validate import validate
 
 logger = logging.getLogger(__name__)
 
 
-def get_options_dict() -> dict[str, FFMpegOption]:
+def get_options_dict() -> Mapping[str, FFMpegOption]:
     """
     Load and index FFmpeg options from the cache.
 
     Returns:
-        Dictionary mapping option names to their FFMpegOption definitions
+        Mapping of option names to their FFMpegOption definitions, shared
+        across calls
 
     """
-    options = load(list[FFMpegOption], "options")
-    return {option.name: option for option in options}
+    return load_index(list[FFMpegOption], "options")
 
 
-def get_av_options_dict() -> dict[str, FFMpegAVOption]:
+def get_av_options_dict() -> Mapping[str, FFMpegAVOption]:
     """
     Load and index FFmpeg AV options (codec/format-level) from the cache.
 
     Returns:
-        Dictionary mapping option names to their FFMpegAVOption definitions.
-        When duplicate names exist across sections, the first occurrence is kept.
+        Mapping of option names to their FFMpegAVOption definitions, shared
+        across calls. When duplicate names exist across sections, the first
+        occurrence is kept.
 
     """
-    av_options = load(list[FFMpegAVOption], "av_option_sets")
-    result: dict[str, FFMpegAVOption] = {}
-    for opt in av_options:
-        if opt.name not in result:
-            result[opt.name] = opt
-    return result
+    return load_index(list[FFMpegAVOption], "av_option_sets")
 
 
-def get_filter_dict() -> dict[str, FFMpegFilter]:
+def get_filter_dict() -> Mapping[str, FFMpegFilter]:
     """
     Load and index FFmpeg filters from the cache.
 
     Returns:
-        Dictionary mapping filter names to their FFMpegFilter definitions
+        Mapping of filter names to their FFMpegFilter definitions, shared
+        across calls
 
     """
-    filters = load(list[FFMpegFilter], "filters")
-    return {filter.name: filter for filter in filters}
+    return load_index(list[FFMpegFilter], "filters")
 
 
 def parse_options(tokens: list[str]) -> dict[str, list[str | None | bool]]:
@@ -233,8 +229,8 @@ def _is_filename(token: str) -> bool:
 def parse_output(
     source: list[str],
     in_streams: Mapping[str, FilterableStream],
-    ffmpeg_options: dict[str, FFMpegOption],
-    av_options: dict[str, FFMpegAVOption] | None = None,
+    ffmpeg_options: Mapping[str, FFMpegOption],
+    av_options: Mapping[str, FFMpegAVOption] | None = None,
 ) -> list[OutputStream]:
     """
     Parse output file specifications and their options.
@@ -311,8 +307,8 @@ def parse_output(
 
 def parse_input(
     tokens: list[str],
-    ffmpeg_options: dict[str, FFMpegOption],
-    av_options: dict[str, FFMpegAVOption] | None = None,
+    ffmpeg_options: Mapping[str, FFMpegOption],
+    av_options: Mapping[str, FFMpegAVOption] | None = None,
 ) -> dict[str, FilterableStream]:
     """
     Parse input file specifications and their options.
@@ -423,7 +419,7 @@ def _parse_filter_params(
 def parse_filter_complex(
     filter_complex: str,
     stream_mapping: dict[str, FilterableStream],
-    ffmpeg_filters: dict[str, FFMpegFilter],
+    ffmpeg_filters: Mapping[str, FFMpegFilter],
 ) -> dict[str, FilterableStream]:
     """
     Parse an FFmpeg filter_complex string into a stream mapping.
@@ -575,7 +571,7 @@ def parse_filter_complex(
 
 
 def parse_global(
-    tokens: list[str], ffmpeg_options: dict[str, FFMpegOption]
+    tokens: list[str], ffmpeg_options: Mapping[str, FFMpegOption]
 ) -> tuple[dict[str, str | bool], list[str]]:
     """
     Parse global FFmpeg options from command-line tokens.
@@ -774,6 +770,9 @@ def compile_as_list(
        - Codec and format settings
        - Stream mapping and selection
 
+    If the compile cache is enabled (see `ffmpeg.compile.cache`), a graph with the
+    same fingerprint that was compiled before is rendered from the cache instead.
+
     If auto_fix is enabled, the function will attempt to fix common issues:
     - Reconnecting disconnected nodes
     - Adding missing split filters
@@ -806,50 +805,98 @@ def compile_as_list(
         )  # ['ffmpeg', '-i', 'input.mp4', '-filter_complex', '...', 'output.mp4']
         ```
 
+    """
+    cache = get_compile_cache()
+    if cache is None:
+        # NOTE: the fingerprint, a walk of the whole graph, is only needed as a key
+        return _precompile(stream, auto_fix, fingerprint="").as_list(
+            use_filter_complex_script
+        )
+
+    fingerprint = stream.fingerprint
+    compiled = cache.get(fingerprint, auto_fix)
+    if compiled is None:
+        compiled = _precompile(stream, auto_fix, fingerprint)
+        cache.add(compiled)
+
+    return compiled.as_list(use_filter_complex_script)
+
+
+def precompile(stream: Stream, auto_fix: bool = True) -> CompiledGraph:
+    """
+    Compile a stream into a reusable `CompiledGraph`.
+
+    This does all the work of `compile_as_list` (validation, context building,
+    escaping) without rendering the filter graph argument, so the result can be
+    cached, serialized, and shared with other processes, which can add it to their
+    compile cache with `CompileCache.add`.
+
+    Args:
+        stream: The Stream object to compile
+        auto_fix: Whether to automatically fix issues in the stream
+
+    Returns:
+        The compiled graph, keyed by the stream's fingerprint
+
+    Raises:
+        FFMpegValueError: If the stream contains invalid configurations that cannot be fixed
+
+    """
+    return _precompile(stream, auto_fix, stream.fingerprint)
+
+
+def _precompile(stream: Stream, auto_fix: bool, fingerprint: str) -> CompiledGraph:
+    """
+    Compile a stream into a `CompiledGraph` with a given key.
+
+    Args:
+        stream: The Stream object to compile
+        auto_fix: Whether to automatically fix issues in the stream
+        fingerprint: The fingerprint of the stream, or an empty string if the
+                     result is only rendered, and never cached
+
+    Returns:
+        The compiled graph
+
+    Raises:
+        FFMpegValueError: If the stream contains invalid configurations that cannot be fixed
+
     """
     stream = validate(stream, auto_fix=auto_fix)
     node = stream.node
     context = DAGContext.build(node)
 
     # compile the global nodes
-    commands = []
+    head = []
     global_nodes = [node for node in context.all_nodes if isinstance(node, GlobalNode)]
     for node in global_nodes:
-        commands += get_args(node, context)
+        head += get_args(node, context)
 
     # compile the input nodes
     input_nodes = [node for node in context.all_nodes if isinstance(node, InputNode)]
     for node in input_nodes:
-        commands += get_args(node, context)
+        head += get_args(node, context)
 
     # compile the filter nodes
     vf_commands = []
     filter_nodes = [node for node in context.all_nodes if isinstance(node, FilterNode)]
 
-    for node in sorted(filter_nodes, key=lambda node: len(node.upstream_nodes)):
+    for node in sorted(filter_nodes, key=lambda node: context.upstream_counts[node]):
         vf_commands += ["".join(get_args(node, context))]
 
-    if vf_commands:
-        filter_complex_content = ";".join(vf_commands)
-
-        if use_filter_complex_script:
-            # Create a temporary file with the filter complex content
-            with tempfile.NamedTemporaryFile(
-                mode="w", suffix=".txt", delete=False
-            ) as f:
-                f.write(filter_complex_content)
-                temp_filename = f.name
-
-            commands += ["-filter_complex_script", temp_filename]
-        else:
-            commands += ["-filter_complex", filter_complex_content]
-
     # compile the output nodes
+    tail = []
     output_nodes = [node for node in context.all_nodes if isinstance(node, OutputNode)]
     for node in output_nodes:
-        commands += get_args(node, context)
-
-    return commands
+        tail += get_args(node, context)
+
+    return CompiledGraph(
+        fingerprint=fingerprint,
+        auto_fix=auto_fix,
+        head=tuple(head),
+        filter_complex=";".join(vf_commands) if vf_commands else None,
+        tail=tuple(tail),
+    )
 
 
 def get_stream_label(stream: Stream, context: DAGContext | None = None) -> str:
@@ -20,24 +20,41 @@ from ..streams.video import VideoStream
 from .context import DAGContext
 
 
+def _is_split(node: Node) -> bool:
+    """
+    Check whether a node is a split/asplit filter.
+
+    Args:
+        node: The node to check
+
+    Returns:
+        True if the node is a split or asplit filter node
+
+    """
+    return isinstance(node, FilterNode) and node.name in ("split", "asplit")
+
+
 def remove_split(
-    current_stream: Stream, mapping: dict[Stream, Stream] | None = None
+    current_stream: Stream,
+    mapping: dict[Stream, Stream] | None = None,
+    context: DAGContext | None = None,
 ) -> tuple[Stream, dict[Stream, Stream]]:
     """
     Remove all split nodes from the graph to prepare for reconstruction.
 
-    This function performs the first step of graph repair by recursively traversing
-    the graph and removing all existing split/asplit nodes. This creates a clean
-    graph without any stream splitting, which will then be reconstructed with proper
+    This function performs the first step of graph repair by removing all
+    existing split/asplit nodes from the graph. This creates a clean graph
+    without any stream splitting, which will then be reconstructed with proper
     split nodes where needed.
 
-    The function works recursively, processing each node's inputs and creating a
-    new graph structure with the split nodes removed.
+    The graph is rebuilt in a single pass over the nodes in topological order,
+    so each node and stream is processed once (O(V+E)).
 
     Args:
         current_stream: The starting stream to process
         mapping: Dictionary mapping original streams to their new versions without splits
-                (used for recursion, pass None for initial call)
+                (pass None for initial call)
+        context: The DAG context of `current_stream`'s node, built if not provided
 
     Returns:
         A tuple containing:
@@ -45,48 +62,41 @@ def remove_split(
         - A mapping dictionary relating original streams to their new versions
 
     """
-    # remove all split nodes
-    # add split nodes to the graph
     if mapping is None:
         mapping = {}
 
     if current_stream in mapping:
         return mapping[current_stream], mapping
 
-    if not current_stream.node.inputs:
-        mapping[current_stream] = current_stream
-        return current_stream, mapping
+    if context is None:
+        context = DAGContext.build(current_stream.node)
 
-    if isinstance(current_stream.node, FilterNode):
-        # if the current node is a split node, we need to remove it
-        if current_stream.node.name in ("split", "asplit"):
-            new_stream, _mapping = remove_split(
-                current_stream=current_stream.node.inputs[0], mapping=mapping
-            )
-            mapping[current_stream] = mapping[current_stream.node.inputs[0]]
-            return mapping[current_stream.node.inputs[0]], mapping
+    new_nodes: dict[Node, Node] = {}
 
-    inputs = {}
-    for idx, input_stream in sorted(
-        enumerate(current_stream.node.inputs),
-        key=lambda idx_stream: -len(idx_stream[1].node.upstream_nodes),
-    ):
-        new_stream, _mapping = remove_split(
-            current_stream=input_stream, mapping=mapping
-        )
-        inputs[idx] = new_stream
-        mapping |= _mapping
+    def _map(stream: Stream) -> None:
+        if stream in mapping:
+            return
 
-    new_node = replace(
-        current_stream.node,
-        inputs=tuple(
-            stream for idx, stream in sorted(inputs.items(), key=lambda x: x[0])
-        ),
-    )
-    new_stream = replace(current_stream, node=new_node)
+        if not stream.node.inputs:
+            mapping[stream] = stream
+        elif _is_split(stream.node):
+            # NOTE: the split node's input was mapped when the split node was processed
+            mapping[stream] = mapping[stream.node.inputs[0]]
+        else:
+            mapping[stream] = replace(stream, node=new_nodes[stream.node])
 
-    mapping[current_stream] = new_stream
-    return new_stream, mapping
+    # NOTE: a node is always deeper than its inputs
+    for node in sorted(context.nodes, key=lambda node: node.max_depth):
+        for stream in node.inputs:
+            _map(stream)
+
+        if node.inputs and not _is_split(node):
+            new_nodes[node] = replace(
+                node, inputs=tuple(mapping[stream] for stream in node.inputs)
+            )
+
+    _map(current_stream)
+    return mapping[current_stream], mapping
 
 
 def add_split(
@@ -99,22 +109,22 @@ def add_split(
     """
     Add split nodes to the graph where streams are reused.
 
-    This function performs the second step of graph repair by traversing the
-    graph and adding split/asplit nodes where a stream is used as input to
-    multiple downstream nodes. In FFmpeg, each stream can only be used once
-    unless explicitly split.
+    This function performs the second step of graph repair by adding split/asplit
+    nodes where a stream is used as input to multiple downstream nodes. In FFmpeg,
+    each stream can only be used once unless explicitly split.
 
     The function detects cases where a stream has multiple outgoing connections
     and inserts the appropriate split filter (split for video, asplit for audio),
     connecting each output of the split to the corresponding downstream node.
+    The graph is rebuilt in a single pass over the nodes in topological order,
+    so each node and stream is processed once (O(V+E)).
 
     Args:
         current_stream: The stream to process for potential splitting
-        down_node: The downstream node that uses current_stream as input (for recursion)
-        down_index: The input index in down_node where current_stream connects (for recursion)
-        context: The DAG context containing graph relationship information
-        mapping: Dictionary tracking the transformations (used for recursion,
-                 pass None for initial call)
+        down_node: The downstream node that uses current_stream as input
+        down_index: The input index in down_node where current_stream connects
+        context: The DAG context of `current_stream`'s node, built if not provided
+        mapping: Dictionary tracking the transformations (pass None for initial call)
 
     Returns:
         Stream: The new stream (possibly from a split node output) for the specified downstream connection
@@ -124,7 +134,7 @@ def add_split(
         FFMpegValueError: If an unsupported stream type is encountered
 
     """
-    if not context:
+    if context is None:
         context = DAGContext.build(current_stream.node)
 
     if mapping is None:
@@ -133,53 +143,44 @@ def add_split(
     if (current_stream, down_node, down_index) in mapping:
         return mapping[(current_stream, down_node, down_index)], mapping
 
-    inputs = {}
+    def _map(stream: Stream, new_node: Node) -> None:
+        new_stream = replace(stream, node=new_node)
+        outgoing_nodes = context.get_outgoing_nodes(stream)
+
+        if len(outgoing_nodes) < 2 or isinstance(stream.node, InputNode):
+            # NOTE: if the current node is InputNode, we don't need to split it
+            for node, index in outgoing_nodes:
+                mapping[(stream, node, index)] = new_stream
+        elif isinstance(new_stream, VideoStream):
+            split_node = new_stream.split(outputs=len(outgoing_nodes))
+            for idx, (node, index) in enumerate(outgoing_nodes):
+                mapping[(stream, node, index)] = split_node.video(idx)
+        elif isinstance(new_stream, AudioStream):
+            split_node = new_stream.asplit(outputs=len(outgoing_nodes))
+            for idx, (node, index) in enumerate(outgoing_nodes):
+                mapping[(stream, node, index)] = split_node.audio(idx)
+        else:
+            raise FFMpegValueError(f"unsupported stream type: {stream}")
+
+    new_nodes: dict[Node, Node] = {}
+
+    # NOTE: a node is always deeper than its inputs
+    for node in sorted(context.nodes, key=lambda node: node.max_depth):
+        new_nodes[node] = replace(
+            node,
+            inputs=tuple(
+                mapping[(stream, node, idx)] for idx, stream in enumerate(node.inputs)
+            ),
+        )
+        for stream in context.get_outgoing_streams(node):
+            _map(stream, new_nodes[node])
 
-    for idx, input_stream in sorted(
-        enumerate(current_stream.node.inputs),
-        key=lambda idx_stream: -len(idx_stream[1].node.upstream_nodes),
-    ):
-        new_stream, _mapping = add_split(
-            current_stream=input_stream,
-            down_node=current_stream.node,
-            down_index=idx,
-            mapping=mapping,
-            context=context,
+    if (current_stream, down_node, down_index) not in mapping:
+        mapping[(current_stream, down_node, down_index)] = replace(
+            current_stream, node=new_nodes[current_stream.node]
         )
-        inputs[idx] = new_stream
-        mapping |= _mapping
-
-    new_node = replace(
-        current_stream.node,
-        inputs=tuple(
-            stream for idx, stream in sorted(inputs.items(), key=lambda x: x[0])
-        ),
-    )
-    new_stream = replace(current_stream, node=new_node)
-
-    num = len(context.get_outgoing_nodes(current_stream))
-    if num < 2:
-        mapping[(current_stream, down_node, down_index)] = new_stream
-        return new_stream, mapping
-
-    if isinstance(current_stream.node, InputNode):
-        for idx, (node, index) in enumerate(context.get_outgoing_nodes(current_stream)):
-            # if the current node is InputNode, we don't need to split it
-            mapping[(current_stream, node, index)] = new_stream
-        return new_stream, mapping
-
-    if isinstance(new_stream, VideoStream):
-        split_node = new_stream.split(outputs=num)
-        for idx, (node, index) in enumerate(context.get_outgoing_nodes(current_stream)):
-            mapping[(current_stream, node, index)] = split_node.video(idx)
-        return mapping[(current_stream, down_node, down_index)], mapping
-    elif isinstance(new_stream, AudioStream):
-        split_node = new_stream.asplit(outputs=num)
-        for idx, (node, index) in enumerate(context.get_outgoing_nodes(current_stream)):
-            mapping[(current_stream, node, index)] = split_node.audio(idx)
-        return mapping[(current_stream, down_node, down_index)], mapping
-    else:
-        raise FFMpegValueError(f"unsupported stream type: {current_stream}")
+
+    return mapping[(current_stream, down_node, down_index)], mapping
 
 
 def fix_graph(stream: Stream) -> Stream:
@@ -192,6 +193,8 @@ def fix_graph(stream: Stream) -> Stream:
 
     This ensures that the graph follows FFmpeg's requirement that each stream
     output can only be used as input to one filter unless explicitly split.
+    If the graph has no split nodes and no stream is used more than once, it
+    is already valid and is returned unchanged.
 
     Args:
         stream: The root stream of the graph to fix (typically an output stream)
@@ -204,7 +207,14 @@ def fix_graph(stream: Stream) -> Stream:
         existing one, preserving the original graph.
 
     """
-    stream, _ = remove_split(stream)
+    context = DAGContext.build(stream.node)
+
+    if not any(_is_split(node) for node in context.nodes) and all(
+        len(context.get_outgoing_nodes(k)) < 2 for k in context.streams
+    ):
+        return stream
+
+    stream, _ = remove_split(stream, context=context)
     stream, _ = add_split(stream)
     return stream
 
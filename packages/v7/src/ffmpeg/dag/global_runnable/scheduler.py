@@ -0,0 +1,470 @@
+"""
+Running many FFmpeg commands concurrently.
+
+This module provides `JobScheduler`, which runs FFmpeg commands as
+subprocesses driven by a single background event loop, so that thousands of
+short jobs do not each hold a Python thread blocked on `communicate()`.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
+import heapq
+import itertools
+import logging
+import os
+import threading
+from collections.abc import Callable
+from dataclasses import dataclass
+from types import TracebackType
+from typing import TYPE_CHECKING, Any
+
+from ...exceptions import FFMpegExecuteError, FFMpegValueError
+
+if TYPE_CHECKING:
+    from .runnable import GlobalRunable
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(eq=False)
+class _Job:
+    """A command submitted to a `JobScheduler`, and how to run it."""
+
+    stream: GlobalRunable
+    """
+    The command to run
+    """
+
+    future: concurrent.futures.Future[tuple[bytes, bytes]]
+    """
+    The future resolved with the job's outcome
+    """
+
+    threads: int
+    """
+    The number of CPU threads the job is expected to use
+    """
+
+    timeout: float | None
+    """
+    The number of seconds an attempt may run before it is stopped
+    """
+
+    retries: int
+    """
+    The number of times the job is run again after a failure
+    """
+
+    cmd: str | list[str]
+    """
+    The FFmpeg executable name or path, or a list containing the executable and
+    initial arguments
+    """
+
+    capture_stdout: bool
+    """
+    Whether to capture the process's stdout
+    """
+
+    capture_stderr: bool
+    """
+    Whether to capture the process's stderr
+    """
+
+    input: bytes | None
+    """
+    The bytes written to the process's stdin
+    """
+
+    overwrite_output: bool | None
+    """
+    Whether to add the -y (True) or -n (False) option
+    """
+
+    auto_fix: bool
+    """
+    Whether to automatically fix issues in the filter graph
+    """
+
+    use_filter_complex_script: bool
+    """
+    Whether to pass the filter graph with -filter_complex_script
+    """
+
+    task: asyncio.Task[None] | None = None
+    """
+    The task running the job, once started
+    """
+
+
+class JobScheduler:
+    """
+    Run many FFmpeg commands concurrently, within a CPU budget.
+
+    Jobs are started from a single background thread running an asyncio event
+    loop, highest priority first, as long as the CPU threads they are expected
+    to use fit in `max_threads`. Each `submit` returns a
+    `concurrent.futures.Future`, resolved with ``(stdout, stderr)`` like `run`,
+    or with the `FFMpegExecuteError` of the last failed attempt. Cancelling the
+    future of a running job interrupts its FFmpeg process (see `arun`).
+
+    Example:
+        ```python
+        with JobScheduler() as scheduler:
+            futures = [
+                scheduler.submit(
+                    ffmpeg.input(path).output(filename=f"{path}.jpg", vframes=1),
+                    timeout=30,
+                    retries=1,
+                )
+                for path in paths
+            ]
+            for future in concurrent.futures.as_completed(futures):
+                future.result()
+        ```
+
+    """
+
+    def __init__(
+        self,
+        max_threads: int | None = None,
+        job_threads: int = 1,
+        kill_timeout: float = 5,
+    ) -> None:
+        """
+        Start the scheduler's thread.
+
+        Args:
+            max_threads: The number of CPU threads running jobs may use together
+                         (default: the number of CPUs). A job larger than this
+                         still runs, alone.
+            job_threads: The number of CPU threads a job is expected to use, unless
+                         it sets the `threads` option of its inputs or outputs
+            kill_timeout: The number of seconds an interrupted FFmpeg process has to
+                          exit, before it is killed
+
+        Raises:
+            FFMpegValueError: If max_threads or job_threads is not positive
+
+        """
+        if max_threads is not None and max_threads < 1:
+            raise FFMpegValueError(f"max_threads must be positive, got {max_threads}")
+        if job_threads < 1:
+            raise FFMpegValueError(f"job_threads must be positive, got {job_threads}")
+
+        self.max_threads = max_threads or os.cpu_count() or 1
+        self.job_threads = job_threads
+        self.kill_timeout = kill_timeout
+
+        # NOTE: the state below is only accessed from the scheduler's thread
+        self._pending: list[tuple[int, int, _Job]] = []
+        self._order = itertools.count()
+        self._running: set[_Job] = set()
+        self._running_threads = 0
+
+        self._shutdown = False
+        self._lock = threading.Lock()
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._loop.run_forever, name="ffmpeg-scheduler", daemon=True
+        )
+        self._thread.start()
+
+    def submit(
+        self,
+        stream: GlobalRunable,
+        priority: int = 0,
+        timeout: float | None = None,
+        retries: int = 0,
+        threads: int | None = None,
+        cmd: str | list[str] = "ffmpeg",
+        capture_stdout: bool = False,
+        capture_stderr: bool = True,
+        input: bytes | None = None,
+        overwrite_output: bool | None = None,
+        auto_fix: bool = True,
+        use_filter_complex_script: bool = False,
+    ) -> concurrent.futures.Future[tuple[bytes, bytes]]:
+        """
+        Schedule an FFmpeg command.
+
+        Args:
+            stream: The command to run, e.g. an output stream
+            priority: Jobs with a higher priority start first; jobs of the same
+                      priority start in submission order
+            timeout: The number of seconds an attempt may run before FFmpeg is
+                     stopped and the attempt fails with a TimeoutError
+            retries: The number of times to run the job again after it fails or
+                     times out
+            threads: The number of CPU threads the job is expected to use, if not
+                     estimated from its `threads` options or `job_threads`
+            cmd: The FFmpeg executable name or path, or a list containing
+                 the executable and initial arguments
+            capture_stdout: Whether to capture and return the process's stdout
+            capture_stderr: Whether to capture and return the process's stderr.
+                            Enabled by default, as the output of concurrent jobs
+                            would otherwise be interleaved on the console.
+            input: Optional bytes to write to the process's stdin
+            overwrite_output: If True, add the -y option to overwrite output files
+                             If False, add the -n option to never overwrite
+                             If None (default), use the current settings
+            auto_fix: Whether to automatically fix issues in the filter graph
+            use_filter_complex_script: If True, use -filter_complex_script with a
+                                      temporary file instead of -filter_complex
+
+        Returns:
+            A future resolved with ``(stdout, stderr)``, which are empty bytes
+            objects if the respective capture_* parameter is False
+
+        Raises:
+            RuntimeError: If the scheduler is shut down
+
+        """
+        future: concurrent.futures.Future[tuple[bytes, bytes]] = (
+            concurrent.futures.Future()
+        )
+        job = _Job(
+            stream=stream,
+            future=future,
+            threads=threads or self._estimate_threads(stream),
+            timeout=timeout,
+            retries=retries,
+            cmd=cmd,
+            capture_stdout=capture_stdout,
+            capture_stderr=capture_stderr,
+            input=input,
+            overwrite_output=overwrite_output,
+            auto_fix=auto_fix,
+            use_filter_complex_script=use_filter_complex_script,
+        )
+
+        with self._lock:
+            if self._shutdown:
+                raise RuntimeError("Cannot submit jobs after shutdown")
+            future.add_done_callback(lambda _: self._on_done(job))
+            self._loop.call_soon_threadsafe(self._enqueue, priority, job)
+        return future
+
+    def _estimate_threads(self, stream: GlobalRunable) -> int:
+        """
+        Estimate the number of CPU threads a command uses.
+
+        Args:
+            stream: The command
+
+        Returns:
+            The largest `threads` option of its inputs and outputs (0 meaning
+            all the CPUs), or `job_threads` if none is set
+
+        """
+        from ..nodes import InputNode, OutputNode
+
+        estimates = []
+        for node in stream._global_node().upstream_nodes:
+            if isinstance(node, (InputNode, OutputNode)) and "threads" in node.kwargs:
+                try:
+                    estimates.append(int(node.kwargs["threads"]) or self.max_threads)
+                except ValueError:
+                    estimates.append(self.max_threads)
+        return max(estimates, default=self.job_threads)
+
+    def _enqueue(self, priority: int, job: _Job) -> None:
+        """
+        Queue a job, and start it if there is room.
+
+        Args:
+            priority: The priority of the job
+            job: The job
+
+        """
+        if job.future.cancelled():
+            return
+        heapq.heappush(self._pending, (-priority, next(self._order), job))
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        """Start the next pending jobs, as long as their threads fit in the budget."""
+        while self._pending:
+            job = self._pending[0][2]
+            if job.future.cancelled():
+                heapq.heappop(self._pending)
+                continue
+            # NOTE: the next job waits rather than being overtaken by smaller ones
+            if self._running and self._running_threads + job.threads > self.max_threads:
+                return
+
+            heapq.heappop(self._pending)
+            self._running.add(job)
+            self._running_threads += job.threads
+            job.task = self._loop.create_task(self._run(job))
+            job.task.add_done_callback(lambda _, job=job: self._finish(job))
+
+    def _finish(self, job: _Job) -> None:
+        """
+        Release the threads of a finished job, and start the next ones.
+
+        Args:
+            job: The finished job
+
+        """
+        self._running.discard(job)
+        self._running_threads -= job.threads
+        self._dispatch()
+
+    def _on_done(self, job: _Job) -> None:
+        """
+        Stop the job of a cancelled future, from whichever thread cancelled it.
+
+        Args:
+            job: The job
+
+        """
+        if job.future.cancelled():
+            self._loop.call_soon_threadsafe(self._cancel, job)
+
+    def _cancel(self, job: _Job) -> None:
+        """
+        Stop a job whose future was cancelled.
+
+        Args:
+            job: The job
+
+        """
+        if job.task is not None:
+            job.task.cancel()
+
+    async def _run(self, job: _Job) -> None:
+        """
+        Run a job until it succeeds or runs out of retries, and resolve its future.
+
+        Args:
+            job: The job
+
+        """
+        for attempt in range(job.retries + 1):
+            try:
+                result = await self._attempt(job)
+            except (FFMpegExecuteError, TimeoutError) as e:
+                if attempt < job.retries:
+                    logger.warning(f"Retrying failed FFmpeg job: {e}")
+                    continue
+                _resolve(job.future.set_exception, e)
+            except Exception as e:
+                _resolve(job.future.set_exception, e)
+            else:
+                _resolve(job.future.set_result, result)
+            return
+
+    async def _attempt(self, job: _Job) -> tuple[bytes, bytes]:
+        """
+        Run a job once.
+
+        Args:
+            job: The job
+
+        Returns:
+            The captured stdout and stderr
+
+        Raises:
+            FFMpegExecuteError: If the FFmpeg process returns a non-zero exit code
+            TimeoutError: If the process does not finish within the job's timeout
+
+        """
+        try:
+            return await asyncio.wait_for(
+                job.stream.arun(
+                    job.cmd,
+                    capture_stdout=job.capture_stdout,
+                    capture_stderr=job.capture_stderr,
+                    input=job.input,
+                    overwrite_output=job.overwrite_output,
+                    auto_fix=job.auto_fix,
+                    use_filter_complex_script=job.use_filter_complex_script,
+                    kill_timeout=self.kill_timeout,
+                ),
+                job.timeout,
+            )
+        except asyncio.TimeoutError:
+            raise TimeoutError(
+                f"FFmpeg did not finish within {job.timeout} seconds"
+            ) from None
+
+    async def _wait_idle(self) -> None:
+        """Wait until no job is pending or running."""
+        while self._running:
+            await asyncio.wait([job.task for job in self._running if job.task])
+
+    def _cancel_pending(self) -> None:
+        """Cancel the futures of the jobs not started yet."""
+        for _, _, job in self._pending:
+            job.future.cancel()
+        self._pending.clear()
+
+    def shutdown(self, wait: bool = True, cancel_futures: bool = False) -> None:
+        """
+        Stop accepting jobs, and stop the scheduler's thread once they are done.
+
+        Args:
+            wait: Whether to wait for the submitted jobs to finish
+            cancel_futures: Whether to cancel the jobs not started yet
+
+        """
+        with self._lock:
+            if self._shutdown:
+                return
+            self._shutdown = True
+
+        if cancel_futures:
+            self._loop.call_soon_threadsafe(self._cancel_pending)
+        done = asyncio.run_coroutine_threadsafe(self._wait_idle(), self._loop)
+        done.add_done_callback(
+            lambda _: self._loop.call_soon_threadsafe(self._loop.stop)
+        )
+        if wait:
+            done.result()
+            self._thread.join()
+            self._loop.close()
+
+    def __enter__(self) -> JobScheduler:
+        """
+        Enter the context.
+
+        Returns:
+            The scheduler itself
+
+        """
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        """
+        Wait for the submitted jobs, then shut the scheduler down.
+
+        Args:
+            exc_type: The type of the exception raised in the block, if any
+            exc_value: The exception raised in the block, if any
+            traceback: The traceback of the exception, if any
+
+        """
+        self.shutdown(wait=True)
+
+
+def _resolve(set_outcome: Callable[[Any], None], outcome: Any) -> None:
+    """
+    Resolve a future, unless it was cancelled meanwhile.
+
+    Args:
+        set_outcome: The future's set_result or set_exception method
+        outcome: The result or exception
+
+    """
+    try:
+        set_outcome(outcome)
+    except concurrent.futures.InvalidStateError:
+        pass
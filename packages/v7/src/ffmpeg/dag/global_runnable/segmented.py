@@ -0,0 +1,399 @@
+"""
+Transcoding one input in parallel segments.
+
+A single FFmpeg process often cannot keep many cores busy, e.g. with a
+filter chain that runs on one thread. This module provides `run_segmented`,
+which runs the same command on consecutive time ranges of its input at once,
+each seeking with ``-ss``/``-t`` on the input, then joins the results with the
+concat demuxer.
+"""
+
+from __future__ import annotations
+
+import bisect
+import concurrent.futures
+import logging
+import os
+import tempfile
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from ffmpeg_core.ffprobe.keyframes import keyframe_index
+from ffmpeg_core.ffprobe.probe import probe
+
+from ...exceptions import FFMpegValueError
+from ...utils.frozendict import FrozenDict
+
+if TYPE_CHECKING:
+    from ..nodes import GlobalNode, InputNode, OutputNode
+    from .runnable import GlobalRunable
+
+logger = logging.getLogger(__name__)
+
+SEEK_OPTIONS = ("ss", "sseof", "t", "to")
+"""
+The input options that conflict with the seeking of a segment
+"""
+
+
+@dataclass(frozen=True)
+class Segment:
+    """A time range of the input, transcoded by one FFmpeg process."""
+
+    start: float
+    """
+    The start time in seconds
+    """
+
+    duration: float | None = None
+    """
+    The duration in seconds, or None for the rest of the input
+    """
+
+
+def fixed_segments(duration: float, segment_duration: float) -> list[Segment]:
+    """
+    Plan segments of a fixed duration.
+
+    Args:
+        duration: The duration of the input in seconds
+        segment_duration: The duration of each segment in seconds
+
+    Returns:
+        The segments, the last one running to the end of the input
+
+    Raises:
+        FFMpegValueError: If segment_duration is not positive
+
+    """
+    if segment_duration <= 0:
+        raise FFMpegValueError(
+            f"segment_duration must be positive, got {segment_duration}"
+        )
+
+    count = max(1, round(duration / segment_duration))
+    return [
+        # NOTE: rounded, so that no float error ends up on the command line
+        Segment(
+            round(i * segment_duration, 6),
+            segment_duration if i < count - 1 else None,
+        )
+        for i in range(count)
+    ]
+
+
+def keyframe_segments(
+    filename: str | Path,
+    segment_duration: float,
+    probe_cmd: str = "ffprobe",
+    sidecar: bool | str | Path = False,
+) -> list[Segment]:
+    """
+    Plan segments starting on keyframes of the input's first video stream.
+
+    Each segment starts on the first keyframe at least `segment_duration`
+    seconds after the start of the previous one. Seeking to a keyframe needs
+    no decoding of earlier frames, and lets a segment be stream copied.
+
+    Args:
+        filename: The input file
+        segment_duration: The minimum duration of each segment in seconds
+        probe_cmd: The ffprobe executable used to read the keyframes
+        sidecar: Where the keyframe index is stored, to plan the segments of
+                 the same input again without running ffprobe; see
+                 `keyframe_index`
+
+    Returns:
+        The segments, the last one running to the end of the input
+
+    Raises:
+        FFMpegValueError: If segment_duration is not positive
+
+    """
+    if segment_duration <= 0:
+        raise FFMpegValueError(
+            f"segment_duration must be positive, got {segment_duration}"
+        )
+
+    keyframes = keyframe_index(
+        filename, stream="v:0", sidecar=sidecar, cmd=probe_cmd
+    ).keyframes
+
+    starts = [0.0]
+    while True:
+        # NOTE: keyframes are sorted, so the next cut is found by bisection
+        index = bisect.bisect_left(keyframes, starts[-1] + segment_duration)
+        if index == len(keyframes):
+            break
+        starts.append(keyframes[index])
+
+    return [Segment(start, end - start) for start, end in zip(starts, starts[1:])] + [
+        Segment(starts[-1])
+    ]
+
+
+def _single_io(graph: GlobalNode) -> tuple[InputNode, OutputNode]:
+    """
+    Find the only input and the only output of a command.
+
+    Args:
+        graph: The command
+
+    Returns:
+        The input node and the output node
+
+    Raises:
+        FFMpegValueError: If the command does not have exactly one input and one output
+
+    """
+    from ..nodes import InputNode, OutputNode
+
+    inputs = [node for node in graph.upstream_nodes if isinstance(node, InputNode)]
+    outputs = [node for node in graph.upstream_nodes if isinstance(node, OutputNode)]
+    if len(inputs) != 1 or len(outputs) != 1:
+        raise FFMpegValueError(
+            "Segmented transcoding needs exactly one input and one output, "
+            f"found {len(inputs)} and {len(outputs)}"
+        )
+
+    (input_node,) = inputs
+    conflicts = sorted(set(SEEK_OPTIONS) & set(input_node.kwargs))
+    if conflicts:
+        raise FFMpegValueError(
+            f"The input already sets {', '.join(conflicts)}; "
+            "trim it with the segments instead"
+        )
+    return input_node, outputs[0]
+
+
+def _segment_graph(
+    graph: GlobalNode,
+    input_node: InputNode,
+    output_node: OutputNode,
+    segment: Segment,
+    filename: str,
+) -> GlobalNode:
+    """
+    Build the command transcoding one segment.
+
+    Args:
+        graph: The command transcoding the whole input
+        input_node: Its input
+        output_node: Its output
+        segment: The segment
+        filename: The file the segment is written to
+
+    Returns:
+        The command, seeking its input and writing to `filename`
+
+    """
+    kwargs: dict[str, Any] = {**input_node.kwargs, "ss": segment.start}
+    if segment.duration is not None:
+        kwargs["t"] = segment.duration
+
+    # NOTE: the output is replaced first, as replacing the input rebuilds it
+    graph = graph.replace(output_node, replace(output_node, filename=filename))
+    return graph.replace(input_node, replace(input_node, kwargs=FrozenDict(kwargs)))
+
+
+def _duration(info: dict[str, Any]) -> tuple[float | None, float | None]:
+    """
+    Read the duration of a probed file and the duration of one of its frames.
+
+    Args:
+        info: The probe of the file, with its first video stream and its format
+
+    Returns:
+        The duration in seconds, and the frame duration in seconds, each None
+        if unknown
+
+    """
+    streams = info.get("streams") or [{}]
+    duration = streams[0].get("duration") or info.get("format", {}).get("duration")
+
+    frame_duration = None
+    rate = streams[0].get("avg_frame_rate", "0/0")
+    numerator, _, denominator = rate.partition("/")
+    if float(numerator or 0) and float(denominator or 1):
+        frame_duration = float(denominator or 1) / float(numerator)
+
+    return (float(duration) if duration else None), frame_duration
+
+
+def _check_boundaries(
+    segments: list[Segment],
+    filenames: list[str],
+    total: float | None,
+    probe_cmd: str,
+) -> None:
+    """
+    Check that each segment lasts as planned, to within one frame.
+
+    Args:
+        segments: The segments
+        filenames: The files they were written to
+        total: The duration of the input, used for the last segment, if known
+        probe_cmd: The ffprobe executable used to read the durations
+
+    Raises:
+        FFMpegValueError: If segments do not last as planned, listing all of them
+
+    """
+    errors = []
+    for index, (segment, filename) in enumerate(zip(segments, filenames)):
+        expected = segment.duration
+        if expected is None:
+            if total is None:
+                continue
+            expected = total - segment.start
+
+        info = probe(filename, cmd=probe_cmd, select_streams="v:0")
+        actual, frame_duration = _duration(info)
+        if actual is None:
+            continue
+        # NOTE: containers round durations, so half a frame of slack is added
+        tolerance = 1.5 * frame_duration if frame_duration else 0.05
+        if abs(actual - expected) > tolerance:
+            errors.append(
+                f"segment {index} at {segment.start}s lasts {actual}s "
+                f"instead of {expected}s"
+            )
+
+    if errors:
+        raise FFMpegValueError(
+            "Segments do not join frame-accurately: " + "; ".join(errors)
+        )
+
+
+def run_segmented(
+    stream: GlobalRunable,
+    segments: list[Segment] | float,
+    *,
+    keyframes: bool = False,
+    max_workers: int | None = None,
+    check: bool = True,
+    cmd: str | list[str] = "ffmpeg",
+    probe_cmd: str = "ffprobe",
+    overwrite_output: bool | None = None,
+    quiet: bool = True,
+) -> list[Segment]:
+    """
+    Transcode a single-input command in parallel segments, then join them.
+
+    Every segment is transcoded by its own FFmpeg process, with ``-ss`` and
+    ``-t`` set on the input. Seeking an input FFmpeg decodes is frame-accurate,
+    so re-encoded segments join without gaps or repeated frames; stream copied
+    outputs can only be cut on keyframes, so use ``keyframes=True`` for them.
+    The segments are written next to the output, then joined into it with the
+    concat demuxer, without re-encoding.
+
+    Filters must not depend on the position in the input (e.g. `fade` or
+    `trim` would apply to every segment), and each segment starts a new GOP and,
+    for audio, may add encoder priming samples at the joins.
+
+    Args:
+        stream: The command, with exactly one input and one output
+        segments: The segments, or the duration of each segment in seconds
+        keyframes: When a duration is given, whether to cut on keyframes
+        max_workers: The maximum number of FFmpeg processes run at once, by
+                     default the number of CPUs
+        check: Whether to check that each segment lasts as planned, to within
+               one frame, before joining them
+        cmd: The FFmpeg executable name or path, or a list containing the
+             executable and initial arguments
+        probe_cmd: The ffprobe executable used to plan and check the segments
+        overwrite_output: If True, add the -y option to overwrite the output
+                          If False, add the -n option to never overwrite
+                          If None (default), use the current settings
+        quiet: Whether to hide the output of the joining FFmpeg process; the
+               output of the segment processes is always captured
+
+    Returns:
+        The segments transcoded
+
+    Raises:
+        FFMpegValueError: If the command does not fit, or segments do not join
+                          frame-accurately
+        FFMpegExecuteError: If a FFmpeg process fails
+
+    Example:
+        ```python
+        stream = (
+            ffmpeg.input("input.mp4").video.hflip().output(filename="output.mp4")
+        )
+        run_segmented(stream, 30)  # one FFmpeg process per 30 seconds, at once
+        ```
+
+    """
+    from ..io._input import input
+
+    graph = stream._global_node()
+    input_node, output_node = _single_io(graph)
+
+    total = None
+    if not isinstance(segments, list):
+        if keyframes:
+            segments = keyframe_segments(input_node.filename, segments, probe_cmd)
+        else:
+            info = probe(input_node.filename, cmd=probe_cmd, select_streams="v:0")
+            total = _duration(info)[0]
+            if total is None:
+                raise FFMpegValueError(
+                    f"Cannot determine the duration of {input_node.filename!r}"
+                )
+            segments = fixed_segments(total, segments)
+    if not segments:
+        raise FFMpegValueError("No segments to transcode")
+
+    output = Path(output_node.filename)
+    with tempfile.TemporaryDirectory(
+        prefix=f".{output.stem}.", dir=output.parent
+    ) as tmpdir:
+        filenames = [
+            os.path.join(tmpdir, f"segment{i:05d}{output.suffix}")
+            for i in range(len(segments))
+        ]
+        commands = [
+            _segment_graph(graph, input_node, output_node, segment, filename).stream()
+            for segment, filename in zip(segments, filenames)
+        ]
+
+        logger.info("Transcoding %s in %d segments", output, len(segments))
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers or os.cpu_count()
+        ) as executor:
+            # NOTE: each worker thread only waits on its own FFmpeg process
+            futures = [
+                executor.submit(
+                    command.run, cmd, capture_stderr=True, overwrite_output=True
+                )
+                for command in commands
+            ]
+            try:
+                for future in futures:
+                    future.result()
+            except BaseException:
+                for future in futures:
+                    future.cancel()
+                raise
+
+        if check:
+            if total is None and segments[-1].duration is None:
+                info = probe(input_node.filename, cmd=probe_cmd, select_streams="v:0")
+                total = _duration(info)[0]
+            _check_boundaries(segments, filenames, total, probe_cmd)
+
+        playlist = os.path.join(tmpdir, "segments.txt")
+        with open(playlist, "w") as f:
+            for filename in filenames:
+                # NOTE: the concat demuxer resolves relative paths against the
+                # playlist's directory, which holds the segments
+                quoted = os.path.basename(filename).replace("'", "'\\''")
+                f.write(f"file '{quoted}'\n")
+
+        input(playlist, f="concat", extra_options={"safe": 0}).output(
+            filename=str(output), c="copy"
+        ).run(cmd, quiet=quiet, overwrite_output=overwrite_output)
+
+    return segments
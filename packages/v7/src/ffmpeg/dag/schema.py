@@ -2,27 +2,302 @@
 
 from __future__ import annotations
 
-from dataclasses import dataclass, replace
-from functools import cached_property
-from typing import Literal
+import hashlib
+from collections.abc import Iterator, Mapping
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, fields, is_dataclass, replace
+from enum import Enum
+from functools import cache, cached_property
+from typing import Any, Literal, TypeVar
 
 from ..common.serialize import Serializable
 from ..utils.frozendict import FrozenDict
 from ..utils.lazy_eval.schema import LazyValue
 from .utils import is_dag
 
+T = TypeVar("T", bound="HashableBaseModel")
+
+DAGValidationMode = Literal["incremental", "full"]
+"""
+How `Node.__post_init__` verifies that the graph is acyclic.
+
+- ``"incremental"``: rely on the node's inputs already being validated and only
+  derive the node's `DAGSummary` from them, in O(fan-in)
+- ``"full"``: additionally re-walk the whole upstream graph and run `is_dag` on it
+"""
+
+_dag_validation: ContextVar[DAGValidationMode] = ContextVar(
+    "dag_validation", default="incremental"
+)
+
+
+def get_dag_validation() -> DAGValidationMode:
+    """
+    Get the DAG validation mode used when constructing nodes.
+
+    Returns:
+        The current validation mode.
+
+    """
+    return _dag_validation.get()
+
+
+@contextmanager
+def dag_validation(mode: DAGValidationMode) -> Iterator[None]:
+    """
+    Set the DAG validation mode for nodes constructed within the block.
+
+    Args:
+        mode: The validation mode to use.
+
+    Yields:
+        None
+
+    Example:
+        ```python
+        # re-check the whole upstream graph on every node construction
+        with dag_validation("full"):
+            stream = ffmpeg.input("input.mp4").hflip()
+        ```
+
+    """
+    token = _dag_validation.set(mode)
+    try:
+        yield
+    finally:
+        _dag_validation.reset(token)
+
+
+@cache
+def _compare_fields(cls: type[HashableBaseModel]) -> tuple[str, ...]:
+    """
+    Get the names of the fields used for hashing and comparing a class.
+
+    Args:
+        cls: The dataclass.
+
+    Returns:
+        The names of the fields with ``compare=True``.
+
+    """
+    return tuple(f.name for f in fields(cls) if f.compare)
+
+
+def _iter_models(value: Any) -> Iterator[HashableBaseModel]:
+    """
+    Iterate over the hashable models directly contained in a field value.
+
+    Args:
+        value: The field value, possibly a tuple or mapping of models.
+
+    Yields:
+        The models in the value, without descending into the models themselves.
+
+    """
+    if isinstance(value, HashableBaseModel):
+        yield value
+    elif isinstance(value, tuple | list):
+        for item in value:
+            yield from _iter_models(item)
+    elif isinstance(value, Mapping):
+        for item in value.values():
+            yield from _iter_models(item)
+
+
+def _fingerprint_value(value: Any) -> str:
+    """
+    Encode a field value canonically for `HashableBaseModel.fingerprint`.
+
+    Args:
+        value: The field value to encode.
+
+    Returns:
+        A string that only depends on the value's type and content.
+
+    """
+    if isinstance(value, HashableBaseModel):
+        return value.fingerprint
+    if isinstance(value, Enum):
+        return f"{value.__class__.__name__}.{value.name}"
+    if isinstance(value, Mapping):
+        # NOTE: insertion order is kept, as it determines the order of compiled options
+        items = ",".join(
+            f"{_fingerprint_value(k)}:{_fingerprint_value(v)}" for k, v in value.items()
+        )
+        return f"{{{items}}}"
+    if isinstance(value, tuple | list):
+        return f"({','.join(_fingerprint_value(item) for item in value)})"
+    if is_dataclass(value) and not isinstance(value, type):
+        items = ",".join(
+            f"{f.name}={_fingerprint_value(getattr(value, f.name))}"
+            for f in fields(value)
+        )
+        return f"{value.__class__.__name__}({items})"
+    return f"{value.__class__.__name__}:{value!r}"
+
 
 @dataclass(frozen=True, kw_only=True)
 class HashableBaseModel(Serializable):
-    """A base class for hashable dataclasses."""
+    """
+    A base class for hashable dataclasses.
+
+    Note:
+        The structural hash is computed once per object and memoized, and equality
+        checks identity and the memoized hash before comparing fields. Subclasses
+        must be declared with ``eq=False`` so that `dataclass` does not replace
+        `__eq__` and `__hash__` with the recursive generated versions.
+
+    """
+
+    @cached_property
+    def _hash(self) -> int:
+        """Get the memoized structural hash of the object."""
+        return hash(
+            (
+                self.__class__,
+                *(getattr(self, name) for name in _compare_fields(self.__class__)),
+            )
+        )
+
+    def __hash__(self) -> int:
+        """
+        Get the structural hash of the object.
+
+        Returns:
+            The memoized hash of the object's class and fields.
+
+        """
+        return self._hash
+
+    def __eq__(self, other: object) -> bool:
+        """
+        Compare the object with another structurally.
+
+        Upstream objects are compared iteratively and each pair only once, so
+        comparing two equal but separately built graphs is O(V+E).
+
+        Args:
+            other: The object to compare with.
+
+        Returns:
+            True if both objects are of the same class and have equal fields.
+
+        """
+        if self is other:
+            return True
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+
+        pairs: list[tuple[Any, Any]] = [(self, other)]
+        compared: set[tuple[int, int]] = set()
+
+        while pairs:
+            a, b = pairs.pop()
+            if a is b or (id(a), id(b)) in compared:
+                continue
+            if a.__class__ is not b.__class__ or a._hash != b._hash:
+                return False
+            compared.add((id(a), id(b)))
+
+            for name in _compare_fields(a.__class__):
+                x, y = getattr(a, name), getattr(b, name)
+                if isinstance(x, HashableBaseModel):
+                    pairs.append((x, y))
+                elif isinstance(x, tuple) and isinstance(y, tuple):
+                    if len(x) != len(y):
+                        return False
+                    for i, j in zip(x, y):
+                        if isinstance(i, HashableBaseModel):
+                            pairs.append((i, j))
+                        elif i != j:
+                            return False
+                elif x != y:
+                    return False
+
+        return True
+
+    def __getstate__(self) -> dict[str, Any]:
+        """
+        Get the state of the object for pickling.
+
+        Returns:
+            The object's attributes without the memoized hashes, which are not
+            stable across interpreter runs.
+
+        """
+        return {k: v for k, v in self.__dict__.items() if k not in ("_hash", "hex")}
 
     @cached_property
     def hex(self) -> str:
         """Get the hexadecimal hash of the object."""
         return hex(abs(hash(self)))[2:]
 
+    @cached_property
+    def fingerprint(self) -> str:
+        """
+        Get a structural fingerprint of the object.
 
-@dataclass(frozen=True, kw_only=True)
+        Unlike `hash()`, the fingerprint is a SHA-256 digest of the object's class
+        names and field values, so it is stable across interpreter runs and can be
+        used as a persistent key. Upstream objects are fingerprinted iteratively and
+        each only once.
+
+        Returns:
+            The hexadecimal SHA-256 digest.
+
+        """
+        # NOTE: post-order walk, so every model is digested after its upstream models
+        stack: list[tuple[HashableBaseModel, bool]] = [(self, False)]
+        expanded: set[int] = set()
+
+        while stack:
+            obj, ready = stack.pop()
+            if "fingerprint" in obj.__dict__:
+                continue
+            if ready:
+                items = ",".join(
+                    f"{name}={_fingerprint_value(getattr(obj, name))}"
+                    for name in _compare_fields(obj.__class__)
+                )
+                digest = hashlib.sha256(
+                    f"{obj.__class__.__name__}({items})".encode()
+                ).hexdigest()
+                obj.__dict__["fingerprint"] = digest
+                continue
+            if id(obj) in expanded:
+                continue
+            expanded.add(id(obj))
+
+            stack.append((obj, True))
+            for name in _compare_fields(obj.__class__):
+                stack.extend(
+                    (model, False) for model in _iter_models(getattr(obj, name))
+                )
+
+        return self.__dict__["fingerprint"]
+
+
+@dataclass(frozen=True)
+class DAGSummary:
+    """
+    A topological summary of a node's upstream graph.
+
+    Note:
+        Nodes are immutable and can only reference nodes that already exist, so a
+        node's summary is derived from the summaries of its inputs alone. Reaching a
+        summary at all proves the upstream graph is acyclic: a cycle would require
+        a node to be an input of itself before it was constructed.
+
+    """
+
+    depth: int
+    """
+    The number of nodes on the longest path from a source node to this node.
+    """
+
+
+@dataclass(frozen=True, kw_only=True, eq=False)
 class Stream(HashableBaseModel):
     """
     A 'Stream' represents a sequence of data flow in the Directed Acyclic Graph (DAG).
@@ -80,7 +355,7 @@ class Stream(HashableBaseModel):
             return f.read()
 
 
-@dataclass(frozen=True, kw_only=True)
+@dataclass(frozen=True, kw_only=True, eq=False)
 class Node(HashableBaseModel):
     """
     A 'Node' represents a single operation in the Directed Acyclic Graph (DAG).
@@ -106,10 +381,23 @@ class Node(HashableBaseModel):
         """
         Validate that the graph is a DAG (Directed Acyclic Graph).
 
+        In ``"incremental"`` mode (the default) only the summaries of the node's
+        inputs are inspected. In ``"full"`` mode the whole upstream graph is
+        re-walked as well, see `dag_validation`.
+
         Raises:
             ValueError: If the graph is not a DAG
 
         """
+        # NOTE: the inputs' summaries and hashes were built when they were
+        # constructed, so this is O(fan-in) instead of a walk of the whole
+        # upstream graph
+        self.summary
+        hash(self)
+
+        if get_dag_validation() != "full":
+            return
+
         # Validate the DAG
         passed = set()
         nodes = [self]
@@ -129,6 +417,19 @@ class Node(HashableBaseModel):
         if not is_dag(output):
             raise ValueError(f"Graph is not a DAG: {output}")  # pragma: no cover
 
+    @cached_property
+    def summary(self) -> DAGSummary:
+        """
+        Get the topological summary of the node.
+
+        Returns:
+            The summary, built from the summaries of the node's inputs.
+
+        """
+        return DAGSummary(
+            depth=max((i.node.summary.depth for i in self.inputs), default=0) + 1
+        )
+
     def repr(self) -> str:
         """
         Get the representation of the node.
@@ -177,7 +478,7 @@ class Node(HashableBaseModel):
             The maximum depth of the node.
 
         """
-        return max((i.node.max_depth for i in self.inputs), default=0) + 1
+        return self.summary.depth
 
     @property
     def upstream_nodes(self) -> set[Node]:
@@ -188,9 +489,15 @@ class Node(HashableBaseModel):
             The upstream nodes of the node.
 
         """
-        output = {self}
-        for input in self.inputs:
-            output |= input.node.upstream_nodes
+        output: set[Node] = {self}
+        nodes: list[Node] = [self]
+
+        while nodes:
+            node = nodes.pop()
+            for input in node.inputs:
+                if input.node not in output:
+                    output.add(input.node)
+                    nodes.append(input.node)
 
         return output
 
@@ -216,3 +523,82 @@ class Node(HashableBaseModel):
     def _repr_svg_(self) -> str:  # pragma: no cover
         with open(self.view(format="svg")) as f:
             return f.read()
+
+
+class InternTable:
+    """
+    A table of canonical DAG objects, so identical subgraphs share one object.
+
+    Equality between interned objects resolves by identity, which keeps lookups
+    cheap on graphs that reuse the same subgraph many times (e.g. deserialized
+    graphs, where every reference to a shared node is a separate copy).
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty intern table."""
+        self._objects: dict[HashableBaseModel, HashableBaseModel] = {}
+        # NOTE: the original object is kept alive so its id is not reused
+        self._seen: dict[int, tuple[HashableBaseModel, HashableBaseModel]] = {}
+
+    def __len__(self) -> int:
+        """
+        Get the number of canonical objects in the table.
+
+        Returns:
+            The number of canonical objects.
+
+        """
+        return len(self._objects)
+
+    def _canonical(self, obj: HashableBaseModel) -> HashableBaseModel:
+        """Get the canonical object of an already interned object."""
+        return self._seen[id(obj)][1]
+
+    def intern(self, obj: T) -> T:
+        """
+        Get the canonical version of a node or stream.
+
+        The object's upstream graph is interned first, so the returned object
+        only references canonical objects.
+
+        Args:
+            obj: The node or stream to intern.
+
+        Returns:
+            The canonical object structurally equal to `obj`.
+
+        """
+        stack: list[HashableBaseModel] = [obj]
+
+        while stack:
+            current = stack[-1]
+            if id(current) in self._seen:
+                stack.pop()
+                continue
+
+            upstream: tuple[HashableBaseModel, ...] = ()
+            if isinstance(current, Stream):
+                upstream = (current.node,)
+            elif isinstance(current, Node):
+                upstream = current.inputs
+
+            pending = [k for k in upstream if id(k) not in self._seen]
+            if pending:
+                stack.extend(pending)
+                continue
+            stack.pop()
+
+            canonical = current
+            if isinstance(current, Stream):
+                node = self._canonical(current.node)
+                if node is not current.node:
+                    canonical = replace(current, node=node)
+            elif isinstance(current, Node):
+                inputs = tuple(self._canonical(k) for k in current.inputs)
+                if any(a is not b for a, b in zip(inputs, current.inputs)):
+                    canonical = replace(current, inputs=inputs)
+
+            canonical = self._objects.setdefault(canonical, canonical)
+            self._seen[id(current)] = (current, canonical)
+
+        return self._canonical(obj)  # type: ignore[return-value]
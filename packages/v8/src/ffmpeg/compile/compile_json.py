@@ -5,16 +5,30 @@ from ..dag.schema import Stream
 from .validate import validate
 
 
-def compile(stream: Stream, auto_fix: bool = True) -> str:
+def compile(
+    stream: Stream,
+    auto_fix: bool = True,
+    *,
+    shared: bool = True,
+    compact: bool = False,
+) -> str:
     """
     Compile a stream into a JSON string.
 
     This function takes a Stream object representing an FFmpeg filter graph
     and converts it into a JSON string that can be passed to FFmpeg.
 
+    By default, each node is written once in a table of objects and referenced
+    by its position, so that a node feeding several filters, e.g. an input
+    overlaid on many streams, does not make the JSON grow exponentially.
+
     Args:
         stream: The Stream object to compile into a JSON string
         auto_fix: Whether to automatically fix issues in the stream
+        shared: Whether to write each node once, instead of inlining it
+            wherever it is referenced, as in earlier versions
+        compact: Whether to write the JSON without whitespace and key sorting,
+            e.g. to send it over the wire, instead of indented with sorted keys
 
     Returns:
         A JSON string that can be passed to FFmpeg
@@ -22,7 +36,7 @@ def compile(stream: Stream, auto_fix: bool = True) -> str:
     """
     stream = validate(stream, auto_fix=auto_fix)
 
-    return dumps(stream)
+    return dumps(stream, shared=shared, compact=compact)
 
 
 def parse(json: str) -> Stream:
@@ -31,6 +45,7 @@ def parse(json: str) -> Stream:
 
     This function takes a JSON string that can be passed to FFmpeg
     and converts it into a Stream object.
+    Both the shared and the inline format are accepted.
 
     Args:
         json: The JSON string to parse into a Stream object
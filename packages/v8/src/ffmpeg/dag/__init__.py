@@ -16,6 +16,8 @@ from .nodes import (
     OutputStream,
     Stream,
 )
+from .schema import dag_validation
+
 # from .schema import EdgeInfo  # EdgeInfo not defined
 
 __all__ = [
@@ -27,5 +29,6 @@ __all__ = [
     "OutputStream",
     "OutputNode",
     "Stream",
+    "dag_validation",
     "filter_node_factory",
 ]
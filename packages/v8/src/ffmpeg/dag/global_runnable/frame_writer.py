@@ -0,0 +1,230 @@
+"""
+Writing raw video frames to a running FFmpeg process.
+
+This module provides `FrameWriter`, the context manager returned by
+`GlobalRunable.frame_writer`, which feeds frames generated in Python to an
+FFmpeg command reading raw video from stdin.
+"""
+
+from __future__ import annotations
+
+import logging
+import queue
+import subprocess
+import threading
+from collections.abc import Callable
+from types import TracebackType
+from typing import IO, Any
+
+from ...exceptions import FFMpegExecuteError, FFMpegValueError
+from ...utils.frames import VideoFrameFormat
+
+logger = logging.getLogger(__name__)
+
+_CLOSE = None
+"""
+Queued after the last frame to close FFmpeg's stdin
+"""
+
+
+class FrameWriter:
+    """
+    A context manager writing raw video frames to FFmpeg's stdin.
+
+    Frames are handed to a background thread through a bounded queue, so that
+    generating the next frame in Python overlaps with FFmpeg encoding the
+    previous ones, while `write` blocks once FFmpeg falls behind. FFmpeg's stderr
+    is drained by another thread, so a verbose encoder cannot deadlock it.
+
+    Frames are written without copying: a frame must not be modified after it
+    is passed to `write`, unless it is written with ``copy=True``.
+
+    Example:
+        ```python
+        source = ffmpeg.input("pipe:", f="rawvideo", pix_fmt="rgb24", s="640x480")
+        with source.video.output(filename="output.mp4").frame_writer() as writer:
+            for frame in frames:  # e.g. NumPy arrays of shape (480, 640, 3)
+                writer.write(frame)
+        ```
+
+    """
+
+    def __init__(
+        self,
+        process: subprocess.Popen[bytes],
+        frame_format: VideoFrameFormat,
+        stop: Callable[[bool], int],
+        error: Callable[[int], FFMpegExecuteError],
+        queue_size: int = 8,
+    ) -> None:
+        """
+        Start writing to a process.
+
+        Args:
+            process: The FFmpeg process, with a stdin pipe
+            frame_format: The layout of the frames FFmpeg expects
+            stop: Waits for the process and the threads reading its other pipes,
+                  terminating the process if the argument is True, and returns its
+                  exit code
+            error: Builds the error raised for an exit code
+            queue_size: The maximum number of frames queued for writing
+
+        """
+        assert process.stdin is not None
+        self.process = process
+        self.frame_format = frame_format
+        self.frames_written = 0
+        self._stdin: IO[bytes] = process.stdin
+        self._stop = stop
+        self._error = error
+        self._queue: queue.Queue[memoryview | None] = queue.Queue(queue_size)
+        self._write_failed = threading.Event()
+        self._closed = False
+        self._writer = threading.Thread(target=self._write_frames, daemon=True)
+        self._writer.start()
+
+    def _write_frames(self) -> None:
+        """Write queued frames to stdin until the close marker."""
+        try:
+            while (frame := self._queue.get()) is not _CLOSE:
+                # NOTE: flushing makes small frames reach FFmpeg (or fail) right away
+                self._stdin.write(frame)
+                self._stdin.flush()
+                self.frames_written += 1
+            self._stdin.close()
+        except (OSError, ValueError):
+            # FFmpeg exited early; the error is reported from its exit code
+            logger.debug("I/O error while writing to FFmpeg stdin")
+            self._write_failed.set()
+
+    def _check(self) -> None:
+        """
+        Report the end of FFmpeg as soon as it is noticed.
+
+        Raises:
+            FFMpegExecuteError: If FFmpeg failed
+            FFMpegValueError: If FFmpeg exited successfully but stopped reading frames
+
+        """
+        if not self._write_failed.is_set() and self.process.poll() is None:
+            return
+
+        self._closed = True
+        retcode = self._stop(False)
+        self._release_writer()
+        if retcode:
+            raise self._error(retcode)
+        raise FFMpegValueError(
+            f"FFmpeg exited after reading {self.frames_written} frames"
+        )
+
+    def write(self, frame: Any, copy: bool = False) -> None:
+        """
+        Queue a frame for writing, waiting while the queue is full.
+
+        Args:
+            frame: A NumPy array or any buffer of `VideoFrameFormat.frame_size` bytes
+            copy: Whether to copy the frame, so that it can be modified right away
+
+        Raises:
+            FFMpegValueError: If the writer is closed or the frame has the wrong size
+            FFMpegExecuteError: If FFmpeg has failed
+
+        """
+        if self._closed:
+            raise FFMpegValueError("Cannot write to a closed frame writer")
+
+        view = memoryview(frame)
+        if not view.c_contiguous or copy:
+            view = memoryview(view.tobytes())
+        view = view.cast("B")
+        if len(view) != self.frame_format.frame_size:
+            raise FFMpegValueError(
+                f"Expected frames of {self.frame_format.frame_size} bytes "
+                f"({self.frame_format.shape} {self.frame_format.dtype}), "
+                f"got {len(view)}"
+            )
+
+        while True:
+            self._check()
+            try:
+                self._queue.put(view, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def close(self) -> None:
+        """
+        Write the queued frames, close FFmpeg's stdin and wait for it to finish.
+
+        Raises:
+            FFMpegExecuteError: If the FFmpeg process returns a non-zero exit code
+
+        """
+        if self._closed:
+            return
+        self._closed = True
+
+        while self._writer.is_alive():
+            try:
+                self._queue.put(_CLOSE, timeout=0.1)
+                break
+            except queue.Full:
+                if self.process.poll() is not None:
+                    break
+        self._writer.join()
+
+        retcode = self._stop(False)
+        if retcode:
+            raise self._error(retcode)
+
+    def abort(self) -> None:
+        """Stop FFmpeg without writing the queued frames."""
+        if self._closed:
+            return
+        self._closed = True
+
+        # NOTE: once FFmpeg is gone, writing fails instead of blocking
+        self._stop(True)
+        self._release_writer()
+
+    def _release_writer(self) -> None:
+        """Wait for the writer thread once FFmpeg has exited."""
+        # NOTE: with stdin broken, the writer fails on its next frame or closes it
+        while self._writer.is_alive():
+            try:
+                self._queue.put(_CLOSE, timeout=0.1)
+                break
+            except queue.Full:
+                continue
+        self._writer.join()
+
+    def __enter__(self) -> FrameWriter:
+        """
+        Enter the context.
+
+        Returns:
+            The writer itself
+
+        """
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        """
+        Finish writing, or stop FFmpeg if the block raised an exception.
+
+        Args:
+            exc_type: The type of the exception raised in the block, if any
+            exc_value: The exception raised in the block, if any
+            traceback: The traceback of the exception, if any
+
+        """
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
@@ -0,0 +1,426 @@
+"""
+Running FFmpeg with progress reporting.
+
+This module backs `GlobalRunable.run` when a progress callback is given, and
+`GlobalRunable.iter_progress` and `GlobalRunable.aiter_progress`. FFmpeg writes
+its progress to a dedicated pipe (`-progress`), which a background thread parses
+into `Progress` reports.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import subprocess
+import threading
+from collections.abc import AsyncIterator, Callable, Iterator
+from typing import IO, TYPE_CHECKING
+
+from ...exceptions import FFMpegValueError
+from ...utils.progress import Progress, ProgressBuffer, ProgressParser
+from ...utils.stderr import StderrCapture
+
+if TYPE_CHECKING:
+    from .runnable import GlobalRunable
+
+logger = logging.getLogger(__name__)
+
+
+def start_progress_thread(
+    progress_pipe: IO[bytes],
+    callback: Callable[[Progress], None],
+    on_eof: Callable[[], None] | None = None,
+) -> threading.Thread:
+    """
+    Start a thread that parses the progress pipe and reports each block.
+
+    The pipe is always drained, even if the callback fails, so that FFmpeg
+    never blocks writing progress.
+
+    Args:
+        progress_pipe: The read end of the pipe given to `-progress`
+        callback: Called with each progress report, from the thread
+        on_eof: Called once the pipe is closed, i.e. FFmpeg has exited
+
+    Returns:
+        The started thread (daemon thread)
+
+    """
+
+    def read_progress() -> None:
+        """Read from the progress pipe and report each parsed block."""
+        parser = ProgressParser()
+        report: Callable[[Progress], None] | None = callback
+        try:
+            while True:
+                chunk = progress_pipe.read1(65536)  # type: ignore[attr-defined]
+                if not chunk:
+                    break
+
+                for progress in parser.feed(chunk):
+                    if report is None:
+                        continue
+                    try:
+                        report(progress)
+                    except Exception:
+                        logger.exception("Progress callback failed; ignoring")
+                        report = None
+        except (OSError, ValueError):
+            logger.debug("I/O error while reading FFmpeg progress")
+        finally:
+            progress_pipe.close()
+            if on_eof is not None:
+                on_eof()
+
+    thread = threading.Thread(target=read_progress, daemon=True)
+    thread.start()
+    return thread
+
+
+def run_async_with_progress(
+    runnable: GlobalRunable,
+    cmd: str | list[str],
+    pipe_stdin: bool,
+    pipe_stdout: bool,
+    pipe_stderr: bool,
+    overwrite_output: bool | None,
+    auto_fix: bool,
+    use_filter_complex_script: bool,
+) -> tuple[subprocess.Popen[bytes], IO[bytes]]:
+    """
+    Start FFmpeg with its progress written to a dedicated pipe.
+
+    On POSIX systems the progress goes to an extra pipe inherited by FFmpeg; on
+    Windows, where only the standard streams can be inherited, it goes to stdout.
+
+    Args:
+        runnable: The command to run
+        cmd: The FFmpeg executable name or path, or a list containing
+             the executable and initial arguments
+        pipe_stdin: Whether to create a pipe for writing to the process's stdin
+        pipe_stdout: Whether to create a pipe for reading from the process's stdout
+        pipe_stderr: Whether to create a pipe for reading from the process's stderr
+        overwrite_output: If True, add the -y option to overwrite output files
+                         If False, add the -n option to never overwrite
+                         If None (default), use the current settings
+        auto_fix: Whether to automatically fix issues in the filter graph
+        use_filter_complex_script: If True, use -filter_complex_script with a
+                                  temporary file instead of -filter_complex
+
+    Returns:
+        The process and the read end of its progress pipe
+
+    Raises:
+        FFMpegValueError: If stdout is piped on Windows
+
+    """
+    if os.name == "nt":
+        if pipe_stdout:
+            raise FFMpegValueError(
+                "Progress reporting uses stdout on Windows; it cannot be captured"
+            )
+        progress_fd = 1
+    else:
+        read_fd, progress_fd = os.pipe()
+
+    args = runnable.global_args(progress=f"pipe:{progress_fd}").compile(
+        cmd,
+        overwrite_output=overwrite_output,
+        auto_fix=auto_fix,
+        use_filter_complex_script=use_filter_complex_script,
+    )
+
+    logger.info(f"Running command: {' '.join(args)}")
+
+    if progress_fd == 1:
+        process = subprocess.Popen(
+            args,
+            stdin=subprocess.PIPE if pipe_stdin else None,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE if pipe_stderr else None,
+        )
+        assert process.stdout is not None
+        return process, process.stdout
+
+    try:
+        process = subprocess.Popen(
+            args,
+            stdin=subprocess.PIPE if pipe_stdin else None,
+            stdout=subprocess.PIPE if pipe_stdout else None,
+            stderr=subprocess.PIPE if pipe_stderr else None,
+            pass_fds=(progress_fd,),
+        )
+    except BaseException:
+        os.close(read_fd)
+        raise
+    finally:
+        # NOTE: only FFmpeg keeps the write end open, so EOF means it exited
+        os.close(progress_fd)
+
+    return process, os.fdopen(read_fd, "rb")
+
+
+def run_with_progress(
+    runnable: GlobalRunable,
+    cmd: str | list[str],
+    capture_stdout: bool,
+    capture_stderr: bool,
+    input: bytes | None,
+    quiet: bool,
+    tee_stderr: bool,
+    overwrite_output: bool | None,
+    auto_fix: bool,
+    use_filter_complex_script: bool,
+    progress: Callable[[Progress], None],
+    stderr_capture: StderrCapture | None = None,
+) -> tuple[bytes, bytes, int]:
+    """
+    Run FFmpeg and report its progress to a callback.
+
+    Args:
+        runnable: The command to run
+        cmd: The FFmpeg executable name or path, or a list containing
+             the executable and initial arguments
+        capture_stdout: Whether to capture and return the process's stdout
+        capture_stderr: Whether to capture and return the process's stderr
+        input: Optional bytes to write to the process's stdin
+        quiet: Whether to suppress output to the console
+        tee_stderr: Whether to capture stderr and also display it to the console
+        overwrite_output: If True, add the -y option to overwrite output files
+                         If False, add the -n option to never overwrite
+                         If None (default), use the current settings
+        auto_fix: Whether to automatically fix issues in the filter graph
+        use_filter_complex_script: If True, use -filter_complex_script with a
+                                  temporary file instead of -filter_complex
+        progress: Called with each progress report, from a reader thread
+        stderr_capture: The capture stderr is read into; by default, an
+                        unbounded one
+
+    Returns:
+        A tuple of (stdout_bytes, stderr_bytes, retcode)
+
+    """
+    process, progress_pipe = run_async_with_progress(
+        runnable,
+        cmd,
+        pipe_stdin=input is not None,
+        pipe_stdout=capture_stdout or quiet,
+        pipe_stderr=capture_stderr or tee_stderr or quiet or stderr_capture is not None,
+        overwrite_output=overwrite_output,
+        auto_fix=auto_fix,
+        use_filter_complex_script=use_filter_complex_script,
+    )
+    progress_thread = start_progress_thread(progress_pipe, progress)
+
+    if stderr_capture is None:
+        stderr_capture = StderrCapture()
+    stderr_thread = None
+    if process.stderr is not None:
+        stderr_thread = runnable._start_stderr_tee_thread(
+            process.stderr,
+            capture_buffer=stderr_capture,
+            write_to_stderr=not quiet and (tee_stderr or not capture_stderr),
+        )
+
+    # Send stdin (if any) from a thread, so a full stdout pipe cannot deadlock
+    stdin_thread = None
+    if input is not None and process.stdin is not None:
+        stdin_thread = threading.Thread(
+            target=runnable._write_stdin, args=(process.stdin, input), daemon=True
+        )
+        stdin_thread.start()
+
+    stdout_chunks: list[bytes] = []
+    try:
+        # NOTE: on Windows stdout carries the progress and is read by its thread
+        if process.stdout is not None and process.stdout is not progress_pipe:
+            try:
+                while chunk := process.stdout.read(4096):
+                    stdout_chunks.append(chunk)
+            except OSError:
+                pass
+            finally:
+                process.stdout.close()
+
+        retcode = process.wait()
+    finally:
+        for thread in (stdin_thread, stderr_thread, progress_thread):
+            if thread is not None:
+                thread.join()
+
+    return b"".join(stdout_chunks), stderr_capture.getvalue(), retcode
+
+
+def start_progress_buffer(
+    runnable: GlobalRunable,
+    cmd: str | list[str],
+    quiet: bool,
+    overwrite_output: bool | None,
+    auto_fix: bool,
+    use_filter_complex_script: bool,
+    buffer_size: int,
+    stderr_capture: StderrCapture,
+) -> tuple[subprocess.Popen[bytes], ProgressBuffer, list[threading.Thread]]:
+    """
+    Start FFmpeg with its progress reports collected into a buffer.
+
+    Args:
+        runnable: The command to run
+        cmd: The FFmpeg executable name or path, or a list containing
+             the executable and initial arguments
+        quiet: Whether to suppress stderr output to the console
+        overwrite_output: If True, add the -y option to overwrite output files
+                         If False, add the -n option to never overwrite
+                         If None (default), use the current settings
+        auto_fix: Whether to automatically fix issues in the filter graph
+        use_filter_complex_script: If True, use -filter_complex_script with a
+                                  temporary file instead of -filter_complex
+        buffer_size: The maximum number of reports buffered
+        stderr_capture: The capture stderr is read into
+
+    Returns:
+        The process, the buffer closed once FFmpeg exits, and the reader threads
+
+    """
+    buffer = ProgressBuffer(buffer_size)
+    process, progress_pipe = run_async_with_progress(
+        runnable,
+        cmd,
+        pipe_stdin=False,
+        pipe_stdout=False,
+        pipe_stderr=True,
+        overwrite_output=overwrite_output,
+        auto_fix=auto_fix,
+        use_filter_complex_script=use_filter_complex_script,
+    )
+
+    assert process.stderr is not None
+    threads = [
+        start_progress_thread(progress_pipe, buffer.put, on_eof=buffer.close),
+        runnable._start_stderr_tee_thread(
+            process.stderr,
+            capture_buffer=stderr_capture,
+            write_to_stderr=not quiet,
+        ),
+    ]
+    return process, buffer, threads
+
+
+def iter_progress(
+    runnable: GlobalRunable,
+    cmd: str | list[str],
+    quiet: bool,
+    overwrite_output: bool | None,
+    auto_fix: bool,
+    use_filter_complex_script: bool,
+    buffer_size: int,
+    stderr_head: int | None,
+    stderr_tail: int | None,
+    on_stderr_line: Callable[[str], None] | None,
+) -> Iterator[Progress]:
+    """
+    Run FFmpeg and iterate over its progress reports.
+
+    See `GlobalRunable.iter_progress` for the arguments.
+
+    Yields:
+        Each progress report, the last one having `done` set
+
+    Raises:
+        FFMpegExecuteError: If the FFmpeg process returns a non-zero exit code
+
+    """
+    stderr_capture = (
+        runnable._stderr_capture(stderr_head, stderr_tail, on_stderr_line)
+        or StderrCapture()
+    )
+    process, buffer, threads = start_progress_buffer(
+        runnable,
+        cmd,
+        quiet,
+        overwrite_output,
+        auto_fix,
+        use_filter_complex_script,
+        buffer_size,
+        stderr_capture,
+    )
+
+    completed = False
+    try:
+        yield from buffer
+        completed = True
+    finally:
+        retcode = runnable._stop_process(process, threads, terminate=not completed)
+
+    if retcode:
+        raise runnable._execute_error(
+            cmd,
+            retcode,
+            None,
+            stderr_capture.getvalue(),
+            overwrite_output,
+            auto_fix,
+            use_filter_complex_script,
+        )
+
+
+async def aiter_progress(
+    runnable: GlobalRunable,
+    cmd: str | list[str],
+    quiet: bool,
+    overwrite_output: bool | None,
+    auto_fix: bool,
+    use_filter_complex_script: bool,
+    buffer_size: int,
+    stderr_head: int | None,
+    stderr_tail: int | None,
+    on_stderr_line: Callable[[str], None] | None,
+) -> AsyncIterator[Progress]:
+    """
+    Run FFmpeg and asynchronously iterate over its progress reports.
+
+    See `GlobalRunable.aiter_progress` for the arguments.
+
+    Yields:
+        Each progress report, the last one having `done` set
+
+    Raises:
+        FFMpegExecuteError: If the FFmpeg process returns a non-zero exit code
+
+    """
+    stderr_capture = (
+        runnable._stderr_capture(stderr_head, stderr_tail, on_stderr_line)
+        or StderrCapture()
+    )
+    process, buffer, threads = start_progress_buffer(
+        runnable,
+        cmd,
+        quiet,
+        overwrite_output,
+        auto_fix,
+        use_filter_complex_script,
+        buffer_size,
+        stderr_capture,
+    )
+
+    completed = False
+    try:
+        async for progress in buffer:
+            yield progress
+        completed = True
+    finally:
+        retcode = await asyncio.to_thread(
+            runnable._stop_process, process, threads, terminate=not completed
+        )
+
+    if retcode:
+        raise runnable._execute_error(
+            cmd,
+            retcode,
+            None,
+            stderr_capture.getvalue(),
+            overwrite_output,
+            auto_fix,
+            use_filter_complex_script,
+        )
@@ -0,0 +1,574 @@
+"""
+Raw video frames and audio samples through FFmpeg's standard streams.
+
+This module backs `GlobalRunable.iter_frames`, `GlobalRunable.iter_audio_chunks`,
+`GlobalRunable.aiter_audio_chunks` and `GlobalRunable.frame_writer`: it finds the
+output written to stdout (or the input read from stdin), settles the layout of
+its frames or samples, and runs FFmpeg with the pipe read or written in place.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import AsyncIterator, Callable, Iterator
+from dataclasses import replace
+from typing import TYPE_CHECKING, Any
+
+from ffmpeg_core.ffprobe.probe import probe
+
+from ...exceptions import FFMpegValueError
+from ...utils.frames import (
+    SAMPLE_FORMATS,
+    AudioChunkBuffer,
+    AudioSampleFormat,
+    VideoFrameFormat,
+    iter_video_frames,
+)
+from ...utils.frames import (
+    iter_audio_chunks as _iter_audio_chunks,
+)
+from ...utils.frozendict import FrozenDict
+from ...utils.stderr import StderrCapture
+from .frame_writer import FrameWriter
+
+if TYPE_CHECKING:
+    from ..nodes import GlobalStream, InputNode, OutputNode
+    from .runnable import GlobalRunable
+
+PIPE_FILENAMES = ("pipe:", "pipe:1", "-")
+"""
+The output filenames that make FFmpeg write to stdout
+"""
+
+STDIN_FILENAMES = ("pipe:", "pipe:0", "-")
+"""
+The input filenames that make FFmpeg read from stdin
+"""
+
+
+def pipe_output(runnable: GlobalRunable) -> tuple[GlobalStream, int]:
+    """
+    Find the output written to stdout.
+
+    Args:
+        runnable: The command
+
+    Returns:
+        The command as a global stream, and the position of the output in it
+
+    Raises:
+        FFMpegValueError: If not exactly one output is written to stdout
+
+    """
+    stream = runnable._global_node().stream()
+    positions = [
+        i
+        for i, output in enumerate(stream.node.inputs)
+        if output.node.filename in PIPE_FILENAMES
+    ]
+    if len(positions) != 1:
+        raise FFMpegValueError(
+            f"Expected exactly one output to stdout ({', '.join(PIPE_FILENAMES)}), "
+            f"found {len(positions)}"
+        )
+    return stream, positions[0]
+
+
+def source_input(output: OutputNode, audio: bool = False) -> InputNode | None:
+    """
+    Find the input a video (or audio) output's data originates from.
+
+    The first video (or audio) stream of the output is followed upstream,
+    through the first input of each filter (e.g. the main input of `overlay`).
+
+    Args:
+        output: The output node
+        audio: Whether to follow the first audio stream instead
+
+    Returns:
+        The input node, or None if the output does not come from an input
+
+    """
+    from ...streams.audio import AudioStream
+    from ...streams.video import VideoStream
+    from ..nodes import InputNode
+
+    kind = AudioStream if audio else VideoStream
+    streams = [i for i in output.inputs if isinstance(i, kind)]
+    node = (streams or list(output.inputs))[0].node
+    while not isinstance(node, InputNode):
+        if not node.inputs:
+            return None
+        node = node.inputs[0].node
+    return node
+
+
+def replace_output_kwargs(
+    stream: GlobalStream, position: int, kwargs: dict[str, Any]
+) -> GlobalStream:
+    """
+    Replace the options of one output of a command.
+
+    Args:
+        stream: The command as a global stream
+        position: The position of the output in it
+        kwargs: The new options of the output
+
+    Returns:
+        The updated command
+
+    """
+    output = stream.node.inputs[position].node
+    outputs = list(stream.node.inputs)
+    outputs[position] = replace(output, kwargs=FrozenDict(kwargs)).stream()
+    return replace(stream.node, inputs=tuple(outputs)).stream()
+
+
+def raw_video_output(
+    runnable: GlobalRunable,
+    width: int | None,
+    height: int | None,
+    pix_fmt: str | None,
+    probe_cmd: str,
+) -> tuple[GlobalStream, VideoFrameFormat]:
+    """
+    Set up the output written to stdout as raw video of a known layout.
+
+    The frame size is taken from, in order: the arguments, the output's `s`
+    option, or a probe of the input the output's video originates from. The
+    output's `f`, `pix_fmt` and `s` options are set accordingly, so that the
+    frames always match the returned layout.
+
+    Args:
+        runnable: The command
+        width: The frame width, if known
+        height: The frame height, if known
+        pix_fmt: The pixel format, if not the output's `pix_fmt` (or rgb24)
+        probe_cmd: The ffprobe executable used to probe the input's size
+
+    Returns:
+        The updated command, and the layout of its frames
+
+    Raises:
+        FFMpegValueError: If the output is not raw video, or its frame size cannot be determined
+
+    """
+    stream, position = pipe_output(runnable)
+    output = stream.node.inputs[position].node
+    kwargs = dict(output.kwargs)
+
+    if kwargs.setdefault("f", "rawvideo") != "rawvideo":
+        raise FFMpegValueError(
+            f"Frames can only be read from rawvideo outputs, not {kwargs['f']!r}"
+        )
+    pix_fmt = pix_fmt or str(kwargs.get("pix_fmt", "rgb24"))
+
+    if width is not None and height is not None:
+        frame_format = VideoFrameFormat(width, height, pix_fmt)
+    elif "s" in kwargs:
+        frame_format = VideoFrameFormat.parse_size(str(kwargs["s"]), pix_fmt)
+    else:
+        source = source_input(output)
+        if source is None:
+            raise FFMpegValueError(
+                "Cannot determine the frame size; pass width and height"
+            )
+        info = probe(source.filename, cmd=probe_cmd, select_streams="v:0")
+        if not info.get("streams"):
+            raise FFMpegValueError(f"No video stream in {source.filename!r}")
+        frame_format = VideoFrameFormat(
+            info["streams"][0]["width"], info["streams"][0]["height"], pix_fmt
+        )
+
+    kwargs["pix_fmt"] = frame_format.pix_fmt
+    kwargs["s"] = frame_format.size
+    return replace_output_kwargs(stream, position, kwargs), frame_format
+
+
+def raw_audio_output(
+    runnable: GlobalRunable, channels: int | None, probe_cmd: str
+) -> tuple[GlobalStream, AudioSampleFormat]:
+    """
+    Set up the output written to stdout as raw PCM audio of a known layout.
+
+    The sample format is the output's `f` option (s16le if not given). The
+    number of channels is taken from, in order: the argument, the output's `ac`
+    option, or a probe of the input the output's audio originates from. The
+    output's `f` and `ac` options are set accordingly, so that the samples
+    always match the returned layout.
+
+    Args:
+        runnable: The command
+        channels: The number of channels, if known
+        probe_cmd: The ffprobe executable used to probe the input's channels
+
+    Returns:
+        The updated command, and the layout of its samples
+
+    Raises:
+        FFMpegValueError: If the output is not raw PCM, or its number of channels cannot be determined
+
+    """
+    stream, position = pipe_output(runnable)
+    output = stream.node.inputs[position].node
+    kwargs = dict(output.kwargs)
+
+    f = str(kwargs.setdefault("f", "s16le"))
+    if f not in SAMPLE_FORMATS:
+        raise FFMpegValueError(
+            f"Samples can only be read from raw PCM outputs "
+            f"({', '.join(SAMPLE_FORMATS)}), not {f!r}"
+        )
+
+    if channels is None and "ac" in kwargs:
+        channels = int(kwargs["ac"])
+    if channels is None:
+        source = source_input(output, audio=True)
+        if source is None:
+            raise FFMpegValueError(
+                "Cannot determine the number of channels; pass channels"
+            )
+        info = probe(source.filename, cmd=probe_cmd, select_streams="a:0")
+        if not info.get("streams"):
+            raise FFMpegValueError(f"No audio stream in {source.filename!r}")
+        channels = int(info["streams"][0]["channels"])
+
+    sample_format = AudioSampleFormat(channels, f)
+    kwargs["ac"] = sample_format.channels
+    return replace_output_kwargs(stream, position, kwargs), sample_format
+
+
+def raw_video_input(runnable: GlobalRunable) -> VideoFrameFormat:
+    """
+    Get the layout of the raw video read from stdin.
+
+    Args:
+        runnable: The command
+
+    Returns:
+        The layout of the frames, from the input's `s` and `pix_fmt` options
+
+    Raises:
+        FFMpegValueError: If not exactly one input is read from stdin, or it is not raw video of a known size
+
+    """
+    from ..nodes import InputNode
+
+    inputs = [
+        node
+        for node in runnable._global_node().upstream_nodes
+        if isinstance(node, InputNode) and node.filename in STDIN_FILENAMES
+    ]
+    if len(inputs) != 1:
+        raise FFMpegValueError(
+            f"Expected exactly one input from stdin ({', '.join(STDIN_FILENAMES)}), "
+            f"found {len(inputs)}"
+        )
+
+    kwargs = inputs[0].kwargs
+    if kwargs.get("f") != "rawvideo" or "s" not in kwargs:
+        raise FFMpegValueError(
+            "Frames can only be written to a rawvideo input with a size, e.g. "
+            'ffmpeg.input("pipe:", f="rawvideo", pix_fmt="rgb24", s="640x480")'
+        )
+    # NOTE: yuv420p is the default of the rawvideo demuxer
+    return VideoFrameFormat.parse_size(
+        str(kwargs["s"]), str(kwargs.get("pix_fmt", "yuv420p"))
+    )
+
+
+def iter_frames(
+    runnable: GlobalRunable,
+    cmd: str | list[str],
+    width: int | None,
+    height: int | None,
+    pix_fmt: str | None,
+    copy: bool,
+    quiet: bool,
+    overwrite_output: bool | None,
+    auto_fix: bool,
+    use_filter_complex_script: bool,
+    probe_cmd: str,
+    stderr_head: int | None,
+    stderr_tail: int | None,
+    on_stderr_line: Callable[[str], None] | None,
+) -> Iterator[Any]:
+    """
+    Run FFmpeg and iterate over the raw video frames it writes to stdout.
+
+    See `GlobalRunable.iter_frames` for the arguments.
+
+    Yields:
+        Each frame
+
+    Raises:
+        FFMpegExecuteError: If the FFmpeg process returns a non-zero exit code
+
+    """
+    stderr_capture = (
+        runnable._stderr_capture(stderr_head, stderr_tail, on_stderr_line)
+        or StderrCapture()
+    )
+    stream, frame_format = raw_video_output(runnable, width, height, pix_fmt, probe_cmd)
+    process = stream.run_async(
+        cmd,
+        pipe_stdout=True,
+        pipe_stderr=True,
+        overwrite_output=overwrite_output,
+        auto_fix=auto_fix,
+        use_filter_complex_script=use_filter_complex_script,
+    )
+    assert process.stdout is not None and process.stderr is not None
+
+    stderr_thread = runnable._start_stderr_tee_thread(
+        process.stderr, capture_buffer=stderr_capture, write_to_stderr=not quiet
+    )
+
+    completed = False
+    try:
+        yield from iter_video_frames(process.stdout, frame_format, copy=copy)
+        completed = True
+    finally:
+        # NOTE: closing stdout first unblocks FFmpeg if it is writing a frame
+        process.stdout.close()
+        retcode = runnable._stop_process(
+            process, [stderr_thread], terminate=not completed
+        )
+
+    if retcode:
+        raise stream._execute_error(
+            cmd,
+            retcode,
+            None,
+            stderr_capture.getvalue(),
+            overwrite_output,
+            auto_fix,
+            use_filter_complex_script,
+        )
+
+
+def iter_audio_chunks(
+    runnable: GlobalRunable,
+    chunk_size: int,
+    overlap: int,
+    cmd: str | list[str],
+    channels: int | None,
+    copy: bool,
+    pad: bool,
+    quiet: bool,
+    overwrite_output: bool | None,
+    auto_fix: bool,
+    use_filter_complex_script: bool,
+    probe_cmd: str,
+    stderr_head: int | None,
+    stderr_tail: int | None,
+    on_stderr_line: Callable[[str], None] | None,
+) -> Iterator[Any]:
+    """
+    Run FFmpeg and iterate over the raw audio it writes to stdout, in fixed-size chunks.
+
+    See `GlobalRunable.iter_audio_chunks` for the arguments.
+
+    Yields:
+        Each chunk
+
+    Raises:
+        FFMpegExecuteError: If the FFmpeg process returns a non-zero exit code
+
+    """
+    stderr_capture = (
+        runnable._stderr_capture(stderr_head, stderr_tail, on_stderr_line)
+        or StderrCapture()
+    )
+    stream, sample_format = raw_audio_output(runnable, channels, probe_cmd)
+    buffer = AudioChunkBuffer(sample_format, chunk_size, overlap)
+    process = stream.run_async(
+        cmd,
+        pipe_stdout=True,
+        pipe_stderr=True,
+        overwrite_output=overwrite_output,
+        auto_fix=auto_fix,
+        use_filter_complex_script=use_filter_complex_script,
+    )
+    assert process.stdout is not None and process.stderr is not None
+
+    stderr_thread = runnable._start_stderr_tee_thread(
+        process.stderr, capture_buffer=stderr_capture, write_to_stderr=not quiet
+    )
+
+    completed = False
+    try:
+        yield from _iter_audio_chunks(process.stdout, buffer, copy=copy, pad=pad)
+        completed = True
+    finally:
+        # NOTE: closing stdout first unblocks FFmpeg if it is writing samples
+        process.stdout.close()
+        retcode = runnable._stop_process(
+            process, [stderr_thread], terminate=not completed
+        )
+
+    if retcode:
+        raise stream._execute_error(
+            cmd,
+            retcode,
+            None,
+            stderr_capture.getvalue(),
+            overwrite_output,
+            auto_fix,
+            use_filter_complex_script,
+        )
+
+
+async def aiter_audio_chunks(
+    runnable: GlobalRunable,
+    chunk_size: int,
+    overlap: int,
+    cmd: str | list[str],
+    channels: int | None,
+    copy: bool,
+    pad: bool,
+    quiet: bool,
+    overwrite_output: bool | None,
+    auto_fix: bool,
+    use_filter_complex_script: bool,
+    probe_cmd: str,
+    stderr_head: int | None,
+    stderr_tail: int | None,
+    on_stderr_line: Callable[[str], None] | None,
+) -> AsyncIterator[Any]:
+    """
+    Run FFmpeg and asynchronously iterate over the raw audio it writes to stdout.
+
+    See `GlobalRunable.aiter_audio_chunks` for the arguments.
+
+    Yields:
+        Each chunk
+
+    Raises:
+        FFMpegExecuteError: If the FFmpeg process returns a non-zero exit code
+
+    """
+    stderr_capture = (
+        runnable._stderr_capture(stderr_head, stderr_tail, on_stderr_line)
+        or StderrCapture()
+    )
+    stream, sample_format = raw_audio_output(runnable, channels, probe_cmd)
+    buffer = AudioChunkBuffer(sample_format, chunk_size, overlap)
+    process = stream.run_async(
+        cmd,
+        pipe_stdout=True,
+        pipe_stderr=True,
+        overwrite_output=overwrite_output,
+        auto_fix=auto_fix,
+        use_filter_complex_script=use_filter_complex_script,
+    )
+    assert process.stdout is not None and process.stderr is not None
+
+    stderr_thread = runnable._start_stderr_tee_thread(
+        process.stderr, capture_buffer=stderr_capture, write_to_stderr=not quiet
+    )
+
+    read: asyncio.Future[int] | None = None
+    completed = False
+    try:
+        while True:
+            read = asyncio.ensure_future(
+                asyncio.to_thread(
+                    process.stdout.readinto1,  # type: ignore[attr-defined]
+                    buffer.writable(),
+                )
+            )
+            # NOTE: shielded, so that a cancelled task still waits for the read
+            count = await asyncio.shield(read)
+            read = None
+            if not count:
+                break
+            buffer.commit(count)
+            for chunk in buffer.chunks(copy):
+                yield chunk
+
+        tail = buffer.tail(pad, copy)
+        if tail is not None:
+            yield tail
+        completed = True
+    finally:
+        if not completed and process.poll() is None:
+            process.terminate()
+        if read is not None:
+            # the read in progress returns once FFmpeg writes more or exits
+            await asyncio.wait([read])
+        # NOTE: closing stdout unblocks FFmpeg if it is writing samples
+        process.stdout.close()
+        retcode = await asyncio.to_thread(
+            runnable._stop_process, process, [stderr_thread], terminate=not completed
+        )
+
+    if retcode:
+        raise stream._execute_error(
+            cmd,
+            retcode,
+            None,
+            stderr_capture.getvalue(),
+            overwrite_output,
+            auto_fix,
+            use_filter_complex_script,
+        )
+
+
+def start_frame_writer(
+    runnable: GlobalRunable,
+    cmd: str | list[str],
+    queue_size: int,
+    quiet: bool,
+    overwrite_output: bool | None,
+    auto_fix: bool,
+    use_filter_complex_script: bool,
+    stderr_head: int | None,
+    stderr_tail: int | None,
+    on_stderr_line: Callable[[str], None] | None,
+) -> FrameWriter:
+    """
+    Run FFmpeg and return a writer of raw video frames to its stdin.
+
+    See `GlobalRunable.frame_writer` for the arguments.
+
+    Returns:
+        The frame writer
+
+    """
+    stderr_capture = (
+        runnable._stderr_capture(stderr_head, stderr_tail, on_stderr_line)
+        or StderrCapture()
+    )
+    frame_format = raw_video_input(runnable)
+    process = runnable.run_async(
+        cmd,
+        pipe_stdin=True,
+        pipe_stderr=True,
+        overwrite_output=overwrite_output,
+        auto_fix=auto_fix,
+        use_filter_complex_script=use_filter_complex_script,
+    )
+    assert process.stderr is not None
+
+    stderr_thread = runnable._start_stderr_tee_thread(
+        process.stderr, capture_buffer=stderr_capture, write_to_stderr=not quiet
+    )
+
+    return FrameWriter(
+        process,
+        frame_format,
+        stop=lambda terminate: runnable._stop_process(
+            process, [stderr_thread], terminate=terminate
+        ),
+        error=lambda retcode: runnable._execute_error(
+            cmd,
+            retcode,
+            None,
+            stderr_capture.getvalue(),
+            overwrite_output,
+            auto_fix,
+            use_filter_complex_script,
+        ),
+        queue_size=queue_size,
+    )
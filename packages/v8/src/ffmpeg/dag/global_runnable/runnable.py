@@ -10,18 +10,24 @@ and asynchronously.
 from __future__ import annotations
 
 import asyncio
+import contextlib
 import logging
+import signal
 import subprocess
 import sys
 import threading
-from typing import IO, TYPE_CHECKING
+from collections.abc import AsyncIterator, Callable, Iterator
+from typing import IO, TYPE_CHECKING, Any
 
-from ...exceptions import FFMpegExecuteError
+from ...exceptions import FFMpegExecuteError, FFMpegValueError
+from ...utils.progress import Progress
 from ...utils.run import command_line
+from ...utils.stderr import StderrCapture
 from .global_args import GlobalArgs
 
 if TYPE_CHECKING:
     from ..nodes import GlobalStream, OutputStream
+    from .frame_writer import FrameWriter
 
 logger = logging.getLogger(__name__)
 
@@ -38,7 +44,7 @@ class GlobalRunable(GlobalArgs):
     @staticmethod
     def _start_stderr_tee_thread(
         stderr_pipe: IO[bytes],
-        capture_buffer: list[bytes] | None = None,
+        capture_buffer: list[bytes] | StderrCapture | None = None,
         write_to_stderr: bool = True,
     ) -> threading.Thread:
         """
@@ -48,7 +54,8 @@ class GlobalRunable(GlobalArgs):
 
         Args:
             stderr_pipe: The stderr pipe from the subprocess
-            capture_buffer: Optional list to append captured stderr chunks to
+            capture_buffer: Optional list or `StderrCapture` to append captured
+                            stderr chunks to
             write_to_stderr: Whether to write stderr chunks to sys.stderr
 
         Returns:
@@ -87,6 +94,9 @@ class GlobalRunable(GlobalArgs):
             except Exception:
                 # Unexpected errors - log with full traceback for debugging
                 logger.exception("Unexpected error while reading FFmpeg stderr")
+            finally:
+                if isinstance(capture_buffer, StderrCapture):
+                    capture_buffer.close()
 
         thread = threading.Thread(target=read_stderr, daemon=True)
         thread.start()
@@ -389,12 +399,15 @@ class GlobalRunable(GlobalArgs):
         overwrite_output: bool | None,
         auto_fix: bool,
         use_filter_complex_script: bool,
+        stderr_capture: StderrCapture | None = None,
+        tee: bool = True,
     ) -> tuple[bytes, bytes, int]:
         """
         Run FFmpeg with tee_stderr enabled.
 
         This method handles the tee_stderr flow: it captures stderr to a buffer
         while simultaneously displaying it to the console (unless quiet=True).
+        It also serves runs whose stderr capture is bounded or reported by line.
 
         Args:
             cmd: The FFmpeg executable name or path, or a list containing
@@ -408,6 +421,9 @@ class GlobalRunable(GlobalArgs):
             auto_fix: Whether to automatically fix issues in the filter graph
             use_filter_complex_script: If True, use -filter_complex_script with a
                                       temporary file instead of -filter_complex
+            stderr_capture: The capture stderr is read into; by default, an
+                            unbounded one
+            tee: Whether to also display stderr to the console (unless quiet=True)
 
         Returns:
             A tuple of (stdout_bytes, stderr_bytes, retcode)
@@ -435,13 +451,14 @@ class GlobalRunable(GlobalArgs):
                 pass
 
         # stderr tee thread
-        stderr_buffer: list[bytes] = []
+        if stderr_capture is None:
+            stderr_capture = StderrCapture()
 
         if process.stderr is not None:
             stderr_thread = self._start_stderr_tee_thread(
                 process.stderr,
-                capture_buffer=stderr_buffer,
-                write_to_stderr=not quiet,
+                capture_buffer=stderr_capture,
+                write_to_stderr=tee and not quiet,
             )
         else:
             stderr_thread = None
@@ -474,10 +491,27 @@ class GlobalRunable(GlobalArgs):
                 stderr_thread.join()
 
         stdout = b"".join(stdout_chunks) if capture_stdout else b""
-        stderr = b"".join(stderr_buffer)
+        stderr = stderr_capture.getvalue()
 
         return stdout, stderr, retcode
 
+    @staticmethod
+    def _write_stdin(stdin: IO[bytes], input: bytes) -> None:
+        """
+        Write the input to the process's stdin and close it.
+
+        Args:
+            stdin: The stdin pipe of the process
+            input: The bytes to write
+
+        """
+        try:
+            stdin.write(input)
+            stdin.close()
+        except (BrokenPipeError, OSError):
+            # FFmpeg exited early; we'll handle via return code
+            pass
+
     def run(
         self,
         cmd: str | list[str] = "ffmpeg",
@@ -489,6 +523,10 @@ class GlobalRunable(GlobalArgs):
         overwrite_output: bool | None = None,
         auto_fix: bool = True,
         use_filter_complex_script: bool = False,
+        progress: Callable[[Progress], None] | None = None,
+        stderr_head: int | None = None,
+        stderr_tail: int | None = None,
+        on_stderr_line: Callable[[str], None] | None = None,
     ) -> tuple[bytes, bytes]:
         """
         Run FFmpeg synchronously and wait for completion.
@@ -517,6 +555,17 @@ class GlobalRunable(GlobalArgs):
             auto_fix: Whether to automatically fix issues in the filter graph
             use_filter_complex_script: If True, use -filter_complex_script with a
                                       temporary file instead of -filter_complex
+            progress: If given, FFmpeg reports its progress through a dedicated
+                      pipe (`-progress`), and this is called from a reader thread
+                      with each parsed report. See also `iter_progress`.
+            stderr_head: If set, only the first `stderr_head` bytes of stderr
+                         are kept, together with the last `stderr_tail` ones
+            stderr_tail: If set, only the last `stderr_tail` bytes of stderr are
+                         kept, together with the first `stderr_head` ones. The
+                         bytes in between are replaced by a note of their count,
+                         in the returned stderr and in the `FFMpegExecuteError`,
+                         so memory use stays fixed however long FFmpeg runs.
+            on_stderr_line: Called with each line FFmpeg logs, as it is logged
 
         Returns:
             A tuple of (stdout_bytes, stderr_bytes), which will be empty bytes
@@ -541,10 +590,40 @@ class GlobalRunable(GlobalArgs):
                 ffmpeg.input("input.mp4").output("output.mp4").run(tee_stderr=True)
             )
             # stderr is both displayed in console and captured for later use
+
+            # Report the progress
+            ffmpeg.input("input.mp4").output("output.mp4").run(
+                progress=lambda p: print(f"{p.out_time}s at {p.speed}x")
+            )
+
+            # Keep the beginning and the end of a long log
+            stdout, stderr = (
+                ffmpeg.input("input.mp4")
+                .output("output.mp4")
+                .run(capture_stderr=True, stderr_head=4096, stderr_tail=65536)
+            )
             ```
 
         """
-        if tee_stderr:
+        stderr_capture = self._stderr_capture(stderr_head, stderr_tail, on_stderr_line)
+        if progress is not None:
+            from .progress import run_with_progress
+
+            stdout, stderr, retcode = run_with_progress(
+                self,
+                cmd,
+                capture_stdout,
+                capture_stderr,
+                input,
+                quiet,
+                tee_stderr,
+                overwrite_output,
+                auto_fix,
+                use_filter_complex_script,
+                progress,
+                stderr_capture,
+            )
+        elif tee_stderr or stderr_capture is not None:
             stdout, stderr, retcode = self._run_with_tee_stderr(
                 cmd,
                 capture_stdout,
@@ -553,6 +632,8 @@ class GlobalRunable(GlobalArgs):
                 overwrite_output,
                 auto_fix,
                 use_filter_complex_script,
+                stderr_capture,
+                tee=tee_stderr or not capture_stderr,
             )
         else:
             # Original behavior
@@ -570,16 +651,805 @@ class GlobalRunable(GlobalArgs):
             retcode = process.returncode
 
         if retcode:
-            raise FFMpegExecuteError(
-                retcode=retcode,
-                cmd=self.compile_line(
-                    cmd,
-                    overwrite_output=overwrite_output,
-                    auto_fix=auto_fix,
-                    use_filter_complex_script=use_filter_complex_script,
-                ),
-                stdout=stdout or b"",
-                stderr=stderr or b"",
+            raise self._execute_error(
+                cmd,
+                retcode,
+                stdout,
+                stderr,
+                overwrite_output,
+                auto_fix,
+                use_filter_complex_script,
+            )
+
+        return stdout or b"", stderr or b""
+
+    async def arun(
+        self,
+        cmd: str | list[str] = "ffmpeg",
+        capture_stdout: bool = False,
+        capture_stderr: bool = False,
+        input: bytes | None = None,
+        quiet: bool = False,
+        tee_stderr: bool = False,
+        overwrite_output: bool | None = None,
+        auto_fix: bool = True,
+        use_filter_complex_script: bool = False,
+        kill_timeout: float = 5,
+        stderr_head: int | None = None,
+        stderr_tail: int | None = None,
+        on_stderr_line: Callable[[str], None] | None = None,
+    ) -> tuple[bytes, bytes]:
+        """
+        Run FFmpeg with asyncio and wait for completion.
+
+        This is the asyncio counterpart of `run`: stdin is written and stdout and
+        stderr are drained concurrently by the event loop, so a full pipe cannot
+        deadlock FFmpeg, and no thread is used per process. The call can be
+        wrapped in `asyncio.timeout` or `asyncio.wait_for`: when it is
+        cancelled, FFmpeg is first interrupted (SIGINT), which lets it finalize
+        its outputs, and killed if it has not exited after `kill_timeout`
+        seconds.
+
+        Args:
+            cmd: The FFmpeg executable name or path, or a list containing
+                 the executable and initial arguments
+            capture_stdout: Whether to capture and return the process's stdout
+            capture_stderr: Whether to capture and return the process's stderr
+            input: Optional bytes to write to the process's stdin
+            quiet: Whether to suppress output to the console
+            tee_stderr: Whether to capture stderr and also display it to the console
+                        (unless quiet=True)
+            overwrite_output: If True, add the -y option to overwrite output files
+                             If False, add the -n option to never overwrite
+                             If None (default), use the current settings
+            auto_fix: Whether to automatically fix issues in the filter graph
+            use_filter_complex_script: If True, use -filter_complex_script with a
+                                      temporary file instead of -filter_complex
+            kill_timeout: The number of seconds an interrupted FFmpeg has to exit
+                          before it is killed
+            stderr_head: If set, only the first `stderr_head` bytes of stderr
+                         are kept, together with the last `stderr_tail` ones
+            stderr_tail: If set, only the last `stderr_tail` bytes of stderr are
+                         kept, together with the first `stderr_head` ones. The
+                         bytes in between are replaced by a note of their count,
+                         in the returned stderr and in the `FFMpegExecuteError`,
+                         so memory use stays fixed however long FFmpeg runs.
+            on_stderr_line: Called with each line FFmpeg logs, as it is logged
+
+        Returns:
+            A tuple of (stdout_bytes, stderr_bytes), which will be empty bytes
+            objects if the respective capture_* parameter is False
+
+        Raises:
+            FFMpegExecuteError: If the FFmpeg process returns a non-zero exit code
+
+        Example:
+            ```python
+            async def main():
+                stream = ffmpeg.input("input.mp4").output("output.mp4")
+                async with asyncio.timeout(60):
+                    stdout, stderr = await stream.arun(capture_stderr=True)
+
+
+            asyncio.run(main())
+            ```
+
+        """
+        stderr_capture = self._stderr_capture(stderr_head, stderr_tail, on_stderr_line)
+        process = await self.run_async_awaitable(
+            cmd,
+            pipe_stdin=input is not None,
+            pipe_stdout=capture_stdout or quiet,
+            pipe_stderr=capture_stderr
+            or tee_stderr
+            or quiet
+            or stderr_capture is not None,
+            overwrite_output=overwrite_output,
+            auto_fix=auto_fix,
+            use_filter_complex_script=use_filter_complex_script,
+        )
+        communicate = asyncio.gather(
+            self._afeed(process.stdin, input),
+            self._aread(process.stdout),
+            self._aread(
+                process.stderr,
+                tee=not quiet
+                and (tee_stderr or (stderr_capture is not None and not capture_stderr)),
+                capture=stderr_capture,
+            ),
+        )
+        try:
+            # NOTE: shielded, so that the pipes are still drained while FFmpeg exits
+            _, stdout, stderr = await asyncio.shield(communicate)
+            retcode = await process.wait()
+        except asyncio.CancelledError:
+            await self._ainterrupt(process, kill_timeout)
+            await asyncio.wait([communicate])
+            raise
+
+        if retcode:
+            raise self._execute_error(
+                cmd,
+                retcode,
+                stdout,
+                stderr,
+                overwrite_output,
+                auto_fix,
+                use_filter_complex_script,
             )
 
         return stdout or b"", stderr or b""
+
+    @staticmethod
+    async def _afeed(stdin: asyncio.StreamWriter | None, input: bytes | None) -> None:
+        """
+        Write the input to an asyncio process's stdin, then close it.
+
+        Args:
+            stdin: The stdin pipe, if any
+            input: The bytes to write
+
+        """
+        if stdin is None:
+            return
+        try:
+            if input:
+                stdin.write(input)
+                await stdin.drain()
+            stdin.close()
+        except (BrokenPipeError, ConnectionResetError):
+            # FFmpeg exited early; the error is reported from its exit code
+            logger.debug("I/O error while writing to FFmpeg stdin")
+
+    @staticmethod
+    def _stderr_capture(
+        head: int | None,
+        tail: int | None,
+        on_line: Callable[[str], None] | None,
+    ) -> StderrCapture | None:
+        """
+        Create the stderr capture requested by the arguments of `run`, if any.
+
+        Args:
+            head: The number of bytes kept from the beginning of stderr
+            tail: The number of bytes kept from the end of stderr
+            on_line: Called with each line of stderr
+
+        Returns:
+            The capture, or None if stderr is captured the default way
+
+        Raises:
+            FFMpegValueError: If head or tail is negative
+
+        """
+        if head is None and tail is None and on_line is None:
+            return None
+        try:
+            return StderrCapture(head, tail, on_line)
+        except ValueError as e:
+            raise FFMpegValueError(str(e)) from e
+
+    @staticmethod
+    async def _aread(
+        pipe: asyncio.StreamReader | None,
+        tee: bool = False,
+        capture: StderrCapture | None = None,
+    ) -> bytes:
+        """
+        Read an asyncio process's pipe until its end.
+
+        Args:
+            pipe: The pipe, if any
+            tee: Whether to also write what is read to sys.stderr
+            capture: The capture to read into; by default, an unbounded one
+
+        Returns:
+            The bytes read, as kept by the capture
+
+        """
+        if pipe is None:
+            return b""
+
+        out: IO[bytes] | None = getattr(sys.stderr, "buffer", None) if tee else None
+        if capture is None:
+            capture = StderrCapture()
+        while chunk := await pipe.read(65536):
+            capture.append(chunk)
+            if out is not None:
+                out.write(chunk)
+                out.flush()
+        capture.close()
+        return capture.getvalue()
+
+    @staticmethod
+    async def _ainterrupt(
+        process: asyncio.subprocess.Process, kill_timeout: float
+    ) -> None:
+        """
+        Stop an asyncio FFmpeg process, giving it a chance to finalize its outputs.
+
+        Args:
+            process: The FFmpeg process
+            kill_timeout: The number of seconds the process has to exit before
+                          it is killed
+
+        """
+        if process.returncode is not None:
+            return
+
+        with contextlib.suppress(ProcessLookupError):
+            # NOTE: on SIGINT, FFmpeg stops reading its inputs and writes the
+            # trailers of its outputs; Windows only supports terminating it
+            if sys.platform == "win32":
+                process.terminate()
+            else:
+                process.send_signal(signal.SIGINT)
+        try:
+            await asyncio.wait_for(process.wait(), kill_timeout)
+        except asyncio.TimeoutError:
+            with contextlib.suppress(ProcessLookupError):
+                process.kill()
+            await process.wait()
+
+    def _execute_error(
+        self,
+        cmd: str | list[str],
+        retcode: int,
+        stdout: bytes | None,
+        stderr: bytes | None,
+        overwrite_output: bool | None,
+        auto_fix: bool,
+        use_filter_complex_script: bool,
+    ) -> FFMpegExecuteError:
+        """
+        Build the error raised when FFmpeg exits with a non-zero code.
+
+        Args:
+            cmd: The FFmpeg executable name or path, or a list containing
+                 the executable and initial arguments
+            retcode: The exit code of the process
+            stdout: The captured stdout, if any
+            stderr: The captured stderr, if any
+            overwrite_output: The overwrite_output option the command was run with
+            auto_fix: The auto_fix option the command was run with
+            use_filter_complex_script: The use_filter_complex_script option the
+                                      command was run with
+
+        Returns:
+            The error to raise
+
+        """
+        return FFMpegExecuteError(
+            retcode=retcode,
+            cmd=self.compile_line(
+                cmd,
+                overwrite_output=overwrite_output,
+                auto_fix=auto_fix,
+                use_filter_complex_script=use_filter_complex_script,
+            ),
+            stdout=stdout or b"",
+            stderr=stderr or b"",
+        )
+
+    @staticmethod
+    def _stop_process(
+        process: subprocess.Popen[bytes],
+        threads: list[threading.Thread],
+        terminate: bool,
+        timeout: float = 5,
+    ) -> int:
+        """
+        Wait for an FFmpeg process and the threads reading its pipes.
+
+        Args:
+            process: The FFmpeg process
+            threads: The threads reading the process's pipes
+            terminate: Whether to terminate the process if it is still running
+            timeout: The number of seconds a terminated process has to exit
+                     before it is killed
+
+        Returns:
+            The exit code of the process
+
+        """
+        if terminate and process.poll() is None:
+            # NOTE: FFmpeg handles SIGTERM gracefully, finalizing its other outputs
+            process.terminate()
+            try:
+                process.wait(timeout=timeout)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        retcode = process.wait()
+        for thread in threads:
+            thread.join()
+        return retcode
+
+    def iter_progress(
+        self,
+        cmd: str | list[str] = "ffmpeg",
+        quiet: bool = False,
+        overwrite_output: bool | None = None,
+        auto_fix: bool = True,
+        use_filter_complex_script: bool = False,
+        buffer_size: int = 64,
+        stderr_head: int | None = None,
+        stderr_tail: int | None = None,
+        on_stderr_line: Callable[[str], None] | None = None,
+    ) -> Iterator[Progress]:
+        """
+        Run FFmpeg and iterate over its progress reports.
+
+        Reports are read by a background thread into a bounded buffer; if the
+        consumer falls behind, the oldest reports are dropped instead of stalling
+        FFmpeg. Stopping the iteration early terminates FFmpeg.
+
+        Args:
+            cmd: The FFmpeg executable name or path, or a list containing
+                 the executable and initial arguments
+            quiet: Whether to suppress stderr output to the console
+            overwrite_output: If True, add the -y option to overwrite output files
+                             If False, add the -n option to never overwrite
+                             If None (default), use the current settings
+            auto_fix: Whether to automatically fix issues in the filter graph
+            use_filter_complex_script: If True, use -filter_complex_script with a
+                                      temporary file instead of -filter_complex
+            buffer_size: The maximum number of reports buffered
+            stderr_head: If set, only the first `stderr_head` bytes of stderr
+                         are kept for the `FFMpegExecuteError`, together with the
+                         last `stderr_tail` ones
+            stderr_tail: If set, only the last `stderr_tail` bytes of stderr are
+                         kept for the `FFMpegExecuteError`, together with the first
+                         `stderr_head` ones, so memory use stays fixed however
+                         long FFmpeg runs
+            on_stderr_line: Called with each line FFmpeg logs, as it is logged
+
+        Yields:
+            Each progress report, the last one having `done` set
+
+        Raises:
+            FFMpegExecuteError: If the FFmpeg process returns a non-zero exit code
+
+        Example:
+            ```python
+            for progress in ffmpeg.input("input.mp4").output("output.mp4").iter_progress():
+                print(f"{progress.out_time}s at {progress.speed}x")
+            ```
+
+        """
+        from .progress import iter_progress
+
+        return iter_progress(
+            self,
+            cmd,
+            quiet,
+            overwrite_output,
+            auto_fix,
+            use_filter_complex_script,
+            buffer_size,
+            stderr_head,
+            stderr_tail,
+            on_stderr_line,
+        )
+
+    def aiter_progress(
+        self,
+        cmd: str | list[str] = "ffmpeg",
+        quiet: bool = False,
+        overwrite_output: bool | None = None,
+        auto_fix: bool = True,
+        use_filter_complex_script: bool = False,
+        buffer_size: int = 64,
+        stderr_head: int | None = None,
+        stderr_tail: int | None = None,
+        on_stderr_line: Callable[[str], None] | None = None,
+    ) -> AsyncIterator[Progress]:
+        """
+        Run FFmpeg and asynchronously iterate over its progress reports.
+
+        This is the asyncio counterpart of `iter_progress`: waiting for reports
+        does not block the event loop, and stopping the iteration early (or
+        cancelling the task) terminates FFmpeg.
+
+        Args:
+            cmd: The FFmpeg executable name or path, or a list containing
+                 the executable and initial arguments
+            quiet: Whether to suppress stderr output to the console
+            overwrite_output: If True, add the -y option to overwrite output files
+                             If False, add the -n option to never overwrite
+                             If None (default), use the current settings
+            auto_fix: Whether to automatically fix issues in the filter graph
+            use_filter_complex_script: If True, use -filter_complex_script with a
+                                      temporary file instead of -filter_complex
+            buffer_size: The maximum number of reports buffered
+            stderr_head: If set, only the first `stderr_head` bytes of stderr
+                         are kept for the `FFMpegExecuteError`, together with the
+                         last `stderr_tail` ones
+            stderr_tail: If set, only the last `stderr_tail` bytes of stderr are
+                         kept for the `FFMpegExecuteError`, together with the first
+                         `stderr_head` ones, so memory use stays fixed however
+                         long FFmpeg runs
+            on_stderr_line: Called with each line FFmpeg logs, as it is logged
+
+        Yields:
+            Each progress report, the last one having `done` set
+
+        Raises:
+            FFMpegExecuteError: If the FFmpeg process returns a non-zero exit code
+
+        Example:
+            ```python
+            async def main():
+                stream = ffmpeg.input("input.mp4").output("output.mp4")
+                async for progress in stream.aiter_progress():
+                    print(f"{progress.out_time}s at {progress.speed}x")
+
+
+            asyncio.run(main())
+            ```
+
+        """
+        from .progress import aiter_progress
+
+        return aiter_progress(
+            self,
+            cmd,
+            quiet,
+            overwrite_output,
+            auto_fix,
+            use_filter_complex_script,
+            buffer_size,
+            stderr_head,
+            stderr_tail,
+            on_stderr_line,
+        )
+
+    def iter_frames(
+        self,
+        cmd: str | list[str] = "ffmpeg",
+        width: int | None = None,
+        height: int | None = None,
+        pix_fmt: str | None = None,
+        copy: bool = False,
+        quiet: bool = False,
+        overwrite_output: bool | None = None,
+        auto_fix: bool = True,
+        use_filter_complex_script: bool = False,
+        probe_cmd: str = "ffprobe",
+        stderr_head: int | None = None,
+        stderr_tail: int | None = None,
+        on_stderr_line: Callable[[str], None] | None = None,
+    ) -> Iterator[Any]:
+        """
+        Run FFmpeg and iterate over the raw video frames it writes to stdout.
+
+        The command must have one output to stdout (``"pipe:"``), whose format is
+        set to ``rawvideo`` if not given. Frames are read with `readinto` into a
+        single preallocated buffer, and FFmpeg only runs ahead of the consumer by
+        what fits in the pipe. Stopping the iteration early terminates FFmpeg.
+
+        Args:
+            cmd: The FFmpeg executable name or path, or a list containing
+                 the executable and initial arguments
+            width: The frame width; see `height`
+            height: The frame height. If either is omitted, the size is taken
+                    from the output's `s` option, or else probed from the input the
+                    output's video originates from, which is only right if no
+                    filter changes the size.
+            pix_fmt: The pixel format of the frames, if not the output's `pix_fmt`
+                     (default rgb24); see `VideoFrameFormat` for the supported ones
+            copy: Whether to yield a copy of each frame. Otherwise every frame is
+                  a view of the same buffer, only valid until the next frame.
+            quiet: Whether to suppress stderr output to the console
+            overwrite_output: If True, add the -y option to overwrite output files
+                             If False, add the -n option to never overwrite
+                             If None (default), use the current settings
+            auto_fix: Whether to automatically fix issues in the filter graph
+            use_filter_complex_script: If True, use -filter_complex_script with a
+                                      temporary file instead of -filter_complex
+            probe_cmd: The ffprobe executable used to probe the frame size
+            stderr_head: If set, only the first `stderr_head` bytes of stderr
+                         are kept for the `FFMpegExecuteError`, together with the
+                         last `stderr_tail` ones
+            stderr_tail: If set, only the last `stderr_tail` bytes of stderr are
+                         kept for the `FFMpegExecuteError`, together with the first
+                         `stderr_head` ones, so memory use stays fixed however
+                         long FFmpeg runs
+            on_stderr_line: Called with each line FFmpeg logs, as it is logged
+
+        Yields:
+            Each frame, as a NumPy array of shape ``(height, width, channels)`` for
+            packed pixel formats, or as a flat memoryview if NumPy is not installed
+
+        Raises:
+            FFMpegValueError: If the output or frame layout is not supported
+            FFMpegExecuteError: If the FFmpeg process returns a non-zero exit code
+
+        Example:
+            ```python
+            stream = ffmpeg.input("input.mp4").video.hflip().output(filename="pipe:")
+            for frame in stream.iter_frames(pix_fmt="rgb24"):
+                print(frame.shape, frame.mean())
+            ```
+
+        """
+        from .raw import iter_frames
+
+        return iter_frames(
+            self,
+            cmd,
+            width,
+            height,
+            pix_fmt,
+            copy,
+            quiet,
+            overwrite_output,
+            auto_fix,
+            use_filter_complex_script,
+            probe_cmd,
+            stderr_head,
+            stderr_tail,
+            on_stderr_line,
+        )
+
+    def iter_audio_chunks(
+        self,
+        chunk_size: int,
+        overlap: int = 0,
+        cmd: str | list[str] = "ffmpeg",
+        channels: int | None = None,
+        copy: bool = False,
+        pad: bool = False,
+        quiet: bool = False,
+        overwrite_output: bool | None = None,
+        auto_fix: bool = True,
+        use_filter_complex_script: bool = False,
+        probe_cmd: str = "ffprobe",
+        stderr_head: int | None = None,
+        stderr_tail: int | None = None,
+        on_stderr_line: Callable[[str], None] | None = None,
+    ) -> Iterator[Any]:
+        """
+        Run FFmpeg and iterate over the raw audio it writes to stdout, in fixed-size chunks.
+
+        The command must have one output to stdout (``"pipe:"``) in a raw PCM
+        format, set with its `f` option (``s16le`` if not given, or e.g.
+        ``f32le``), which also determines the dtype of the chunks. Samples are read
+        into a ring buffer, and every chunk has exactly `chunk_size` samples.
+        Stopping the iteration early terminates FFmpeg.
+
+        Args:
+            chunk_size: The number of samples per chunk, e.g. 320 for 20 ms at 16 kHz
+            overlap: The number of samples shared by consecutive chunks
+            cmd: The FFmpeg executable name or path, or a list containing
+                 the executable and initial arguments
+            channels: The number of channels. If omitted, it is taken from the
+                      output's `ac` option, or else probed from the input the
+                      output's audio originates from, which is only right if no
+                      filter changes it.
+            copy: Whether to yield a copy of each chunk. Otherwise every chunk is
+                  a view of the ring buffer, only valid until the next chunk.
+            pad: Whether to yield the samples left at the end, padded with silence
+                 to a full chunk. Otherwise they are discarded.
+            quiet: Whether to suppress stderr output to the console
+            overwrite_output: If True, add the -y option to overwrite output files
+                             If False, add the -n option to never overwrite
+                             If None (default), use the current settings
+            auto_fix: Whether to automatically fix issues in the filter graph
+            use_filter_complex_script: If True, use -filter_complex_script with a
+                                      temporary file instead of -filter_complex
+            probe_cmd: The ffprobe executable used to probe the number of channels
+            stderr_head: If set, only the first `stderr_head` bytes of stderr
+                         are kept for the `FFMpegExecuteError`, together with the
+                         last `stderr_tail` ones
+            stderr_tail: If set, only the last `stderr_tail` bytes of stderr are
+                         kept for the `FFMpegExecuteError`, together with the first
+                         `stderr_head` ones, so memory use stays fixed however
+                         long FFmpeg runs
+            on_stderr_line: Called with each line FFmpeg logs, as it is logged
+
+        Yields:
+            Each chunk, as a NumPy array of shape ``(chunk_size, channels)``, or as
+            a flat memoryview of bytes if NumPy is not installed
+
+        Raises:
+            FFMpegValueError: If the output or sample layout is not supported
+            FFMpegExecuteError: If the FFmpeg process returns a non-zero exit code
+
+        Example:
+            ```python
+            stream = (
+                ffmpeg.input("input.mp4")
+                .audio.aresample(16000)
+                .output(filename="pipe:", f="s16le", ac=1)
+            )
+            for chunk in stream.iter_audio_chunks(320):  # 20 ms
+                print(chunk.shape, abs(chunk).max())
+            ```
+
+        """
+        from .raw import iter_audio_chunks
+
+        return iter_audio_chunks(
+            self,
+            chunk_size,
+            overlap,
+            cmd,
+            channels,
+            copy,
+            pad,
+            quiet,
+            overwrite_output,
+            auto_fix,
+            use_filter_complex_script,
+            probe_cmd,
+            stderr_head,
+            stderr_tail,
+            on_stderr_line,
+        )
+
+    def aiter_audio_chunks(
+        self,
+        chunk_size: int,
+        overlap: int = 0,
+        cmd: str | list[str] = "ffmpeg",
+        channels: int | None = None,
+        copy: bool = False,
+        pad: bool = False,
+        quiet: bool = False,
+        overwrite_output: bool | None = None,
+        auto_fix: bool = True,
+        use_filter_complex_script: bool = False,
+        probe_cmd: str = "ffprobe",
+        stderr_head: int | None = None,
+        stderr_tail: int | None = None,
+        on_stderr_line: Callable[[str], None] | None = None,
+    ) -> AsyncIterator[Any]:
+        """
+        Run FFmpeg and asynchronously iterate over the raw audio it writes to stdout.
+
+        This is the asyncio counterpart of `iter_audio_chunks`: reads from the pipe
+        run in a worker thread, so waiting for samples does not block the event
+        loop, and stopping the iteration early (or cancelling the task) terminates
+        FFmpeg.
+
+        Args:
+            chunk_size: The number of samples per chunk, e.g. 320 for 20 ms at 16 kHz
+            overlap: The number of samples shared by consecutive chunks
+            cmd: The FFmpeg executable name or path, or a list containing
+                 the executable and initial arguments
+            channels: The number of channels. If omitted, it is taken from the
+                      output's `ac` option, or else probed from the input the
+                      output's audio originates from.
+            copy: Whether to yield a copy of each chunk. Otherwise every chunk is
+                  a view of the ring buffer, only valid until the next chunk.
+            pad: Whether to yield the samples left at the end, padded with silence
+                 to a full chunk. Otherwise they are discarded.
+            quiet: Whether to suppress stderr output to the console
+            overwrite_output: If True, add the -y option to overwrite output files
+                             If False, add the -n option to never overwrite
+                             If None (default), use the current settings
+            auto_fix: Whether to automatically fix issues in the filter graph
+            use_filter_complex_script: If True, use -filter_complex_script with a
+                                      temporary file instead of -filter_complex
+            probe_cmd: The ffprobe executable used to probe the number of channels
+            stderr_head: If set, only the first `stderr_head` bytes of stderr
+                         are kept for the `FFMpegExecuteError`, together with the
+                         last `stderr_tail` ones
+            stderr_tail: If set, only the last `stderr_tail` bytes of stderr are
+                         kept for the `FFMpegExecuteError`, together with the first
+                         `stderr_head` ones, so memory use stays fixed however
+                         long FFmpeg runs
+            on_stderr_line: Called with each line FFmpeg logs, as it is logged
+
+        Yields:
+            Each chunk, as a NumPy array of shape ``(chunk_size, channels)``, or as
+            a flat memoryview of bytes if NumPy is not installed
+
+        Raises:
+            FFMpegValueError: If the output or sample layout is not supported
+            FFMpegExecuteError: If the FFmpeg process returns a non-zero exit code
+
+        Example:
+            ```python
+            async def main():
+                stream = ffmpeg.input("input.mp4").output(
+                    filename="pipe:", f="f32le", ac=1, ar=16000
+                )
+                async for chunk in stream.aiter_audio_chunks(320, copy=True):
+                    await websocket.send(chunk.tobytes())
+
+
+            asyncio.run(main())
+            ```
+
+        """
+        from .raw import aiter_audio_chunks
+
+        return aiter_audio_chunks(
+            self,
+            chunk_size,
+            overlap,
+            cmd,
+            channels,
+            copy,
+            pad,
+            quiet,
+            overwrite_output,
+            auto_fix,
+            use_filter_complex_script,
+            probe_cmd,
+            stderr_head,
+            stderr_tail,
+            on_stderr_line,
+        )
+
+    def frame_writer(
+        self,
+        cmd: str | list[str] = "ffmpeg",
+        queue_size: int = 8,
+        quiet: bool = False,
+        overwrite_output: bool | None = None,
+        auto_fix: bool = True,
+        use_filter_complex_script: bool = False,
+        stderr_head: int | None = None,
+        stderr_tail: int | None = None,
+        on_stderr_line: Callable[[str], None] | None = None,
+    ) -> FrameWriter:
+        """
+        Run FFmpeg and write raw video frames to its stdin.
+
+        The command must read one input from stdin, declared as raw video with a
+        size, e.g. ``ffmpeg.input("pipe:", f="rawvideo", pix_fmt="rgb24",
+        s="640x480")``. The returned writer is a context manager: leaving the
+        block waits for FFmpeg to finish encoding, or terminates it if the block
+        raised an exception.
+
+        Args:
+            cmd: The FFmpeg executable name or path, or a list containing
+                 the executable and initial arguments
+            queue_size: The maximum number of frames queued for writing
+            quiet: Whether to suppress stderr output to the console
+            overwrite_output: If True, add the -y option to overwrite output files
+                             If False, add the -n option to never overwrite
+                             If None (default), use the current settings
+            auto_fix: Whether to automatically fix issues in the filter graph
+            use_filter_complex_script: If True, use -filter_complex_script with a
+                                      temporary file instead of -filter_complex
+            stderr_head: If set, only the first `stderr_head` bytes of stderr
+                         are kept for the `FFMpegExecuteError`, together with the
+                         last `stderr_tail` ones
+            stderr_tail: If set, only the last `stderr_tail` bytes of stderr are
+                         kept for the `FFMpegExecuteError`, together with the first
+                         `stderr_head` ones, so memory use stays fixed however
+                         long FFmpeg runs
+            on_stderr_line: Called with each line FFmpeg logs, as it is logged
+
+        Returns:
+            The frame writer
+
+        Raises:
+            FFMpegValueError: If the command does not read raw video from stdin
+
+        Example:
+            ```python
+            source = ffmpeg.input("pipe:", f="rawvideo", pix_fmt="rgb24", s="640x480")
+            with source.video.output(filename="output.mp4").frame_writer() as writer:
+                for frame in frames:  # e.g. NumPy arrays of shape (480, 640, 3)
+                    writer.write(frame)
+            ```
+
+        """
+        from .raw import start_frame_writer
+
+        return start_frame_writer(
+            self,
+            cmd,
+            queue_size,
+            quiet,
+            overwrite_output,
+            auto_fix,
+            use_filter_complex_script,
+            stderr_head,
+            stderr_tail,
+            on_stderr_line,
+        )
@@ -0,0 +1,3 @@
+"""Re-export from ffmpeg_core.utils.frames."""
+
+from ffmpeg_core.utils.frames import *  # noqa: F401, F403
@@ -0,0 +1,3 @@
+"""Re-export from ffmpeg_core.utils.progress."""
+
+from ffmpeg_core.utils.progress import *  # noqa: F401, F403
@@ -0,0 +1,3 @@
+"""Re-export from ffmpeg_core.utils.stderr."""
+
+from ffmpeg_core.utils.stderr import *  # noqa: F401, F403
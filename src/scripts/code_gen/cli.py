@@ -8,7 +8,7 @@ from typing import Annotated
 
 import typer
 
-from ffmpeg_core.common.cache import load, save
+from ffmpeg_core.common.cache import load, save, snapshot
 from ffmpeg_core.common.schema import (
     FFMpegFilter,
     FFMpegFilterOption,
@@ -206,7 +206,7 @@ def load_options(
         )
         for i in parse_c.cli.parse_ffmpeg_options(ffmpeg_binary=ffmpeg_binary)
     ]
-    save(options, cache_id)
+    snapshot(save(options, cache_id))
     return _normalize_option_flags(options)
 
 
@@ -241,7 +241,7 @@ def load_av_option_set(
     ]
     output = list(_convert_av_options(parsed_options))
 
-    save(output, cache_id)
+    snapshot(save(output, cache_id))
     return output
 
 
@@ -343,7 +343,7 @@ def load_filters(
         save(filter_info, filter_info.name)
         ffmpeg_filters.append(filter_info)
 
-    save(ffmpeg_filters, cache_id)
+    snapshot(save(ffmpeg_filters, cache_id))
 
     return ffmpeg_filters
 
@@ -394,7 +394,7 @@ def load_codecs(
             )
         )
 
-    save(codecs, cache_id)
+    snapshot(save(codecs, cache_id))
     return codecs
 
 
@@ -444,7 +444,7 @@ def load_formats(
             )
         )
 
-    save(formats, cache_id)
+    snapshot(save(formats, cache_id))
     return formats
 
 
@@ -697,6 +697,33 @@ def generate_all_ts() -> None:
     )
 
 
+@app.command("snapshot")
+def snapshot_all(
+    path: Annotated[
+        Path | None,
+        typer.Argument(
+            help="Directory of cached lists (e.g. a data package's cache/list). Uses the local cache if omitted.",
+        ),
+    ] = None,
+) -> None:
+    """
+    Write the binary snapshot of every cached list in a directory.
+
+    `generate` already writes the snapshots of the caches it rebuilds; this
+    refreshes them, e.g. after copying JSON caches into a data package.
+
+    Args:
+        path: The directory of cached lists
+
+    """
+    from ffmpeg_core.common.cache import get_cache_path
+
+    cache_dir = path or get_cache_path() / "list"
+    for json_path in sorted(cache_dir.glob("*.json")):
+        snapshot_path = snapshot(json_path)
+        logging.info(f"Wrote {snapshot_path}")
+
+
 @app.command()
 def reexport(
     outpath: Path | None = None,